@@ -2,39 +2,47 @@
 """
 Point d'entrée principal de l'application Dash.
 """
+import time
+
+_boot_start = time.perf_counter()
+
 import dash
 import dash_bootstrap_components as dbc
+_boot_libs = time.perf_counter()
 
 # === INITIALISATION DE LA BASE DE DONNÉES ===
-try:
-    from db_manager import init_database, check_database_connection
-    db_ok, db_msg = check_database_connection()
-    if db_ok:
-        print("✅ Connexion à PostgreSQL établie")
-        init_database()
-    else:
-        print(f"⚠️ Impossible de se connecter à PostgreSQL: {db_msg}")
-except Exception as e:
-    print(f"⚠️ Erreur d'initialisation DB: {e}")
-
-from layouts import create_main_layout
+# Une seule fois par processus, et une seule fois par version de schéma (schema_migrations)
+from db_manager import ensure_database_schema
+ensure_database_schema()
+_boot_db = time.perf_counter()
+
+from layouts import serve_layout
 from callbacks import register_all_callbacks
+_boot_imports = time.perf_counter()
 
 
 # --- Initialisation de l'application Dash ---
 app = dash.Dash(
-    __name__, 
-    external_stylesheets=[dbc.themes.CYBORG], 
+    __name__,
+    external_stylesheets=[dbc.themes.CYBORG],
     suppress_callback_exceptions=True
 )
 server = app.server
 
 # --- Layout ---
-app.layout = create_main_layout()
+# Fonction : la partie statique est construite une fois, les actifs sont lus à chaque chargement de page
+app.layout = serve_layout
 
 # --- Callbacks ---
 register_all_callbacks(app)
+_boot_end = time.perf_counter()
+
+print(f"⏱️ Démarrage en {(_boot_end - _boot_start) * 1000:.0f} ms "
+      f"(dash {(_boot_libs - _boot_start) * 1000:.0f} ms, "
+      f"base {(_boot_db - _boot_libs) * 1000:.0f} ms, "
+      f"imports {(_boot_imports - _boot_db) * 1000:.0f} ms, "
+      f"app + callbacks {(_boot_end - _boot_imports) * 1000:.0f} ms)")
 
 
 if __name__ == '__main__':
-    app.run(debug=True) 
\ No newline at end of file
+    app.run(debug=True)
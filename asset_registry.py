@@ -0,0 +1,362 @@
+# asset_registry.py
+"""
+Registre des métadonnées des actifs (id, nom, catégorie, devise, place de cotation).
+Chargé une fois par worker depuis PostgreSQL (tables assets + user_assets),
+puis servi depuis la mémoire : le chemin critique ne fait aucune I/O de métadonnées.
+
+- Écriture : les fonctions de config.py mettent à jour le registre (write-through)
+  puis publient une invalidation (NOTIFY asset_registry).
+- Les autres workers écoutent ce canal (LISTEN) et invalident leur copie.
+"""
+import os
+import select
+import threading
+import time
+
+
+NOTIFY_CHANNEL = 'asset_registry'
+LISTEN_TIMEOUT = 60    # secondes entre deux vérifications de la connexion
+LISTEN_RETRY_DELAY = 30
+LOAD_RETRY_DELAY = 30      # secondes avant de recharger un registre dont la lecture a échoué
+ASSET_ID_RETRY_DELAY = 60  # secondes avant de retenter la création d'une ligne assets en échec
+
+# Place de cotation par suffixe de ticker Yahoo
+EXCHANGE_SUFFIXES = {
+    '.PA': 'Euronext Paris',
+    '.AS': 'Euronext Amsterdam',
+    '.DE': 'Xetra',
+    '.L': 'London',
+    '.MI': 'Borsa Italiana',
+    '.MC': 'Madrid',
+    '.SW': 'SIX Swiss',
+    '.T': 'Tokyo',
+    '.HK': 'Hong Kong',
+    '.TO': 'Toronto',
+}
+
+_registry = {}
+_loaded = False
+_load_retry_at = 0.0
+_asset_id_retry_at = {}  # ticker -> instant du prochain essai de _create_asset_row
+_lock = threading.RLock()
+_listener_thread = None
+_listener_enabled = True
+
+
+# =============================================================================
+# CONSTRUCTION DES ENTRÉES
+# =============================================================================
+
+def detect_exchange(ticker):
+    """Déduit la place de cotation depuis le format du ticker."""
+    ticker = ticker.upper()
+    if ticker.startswith('^'):
+        return 'Index'
+    if '=X' in ticker:
+        return 'Forex'
+    if '=F' in ticker:
+        return 'Futures'
+    if '-EUR' in ticker or '-USD' in ticker or '-GBP' in ticker:
+        return 'Crypto'
+    for suffix, exchange in EXCHANGE_SUFFIXES.items():
+        if ticker.endswith(suffix):
+            return exchange
+    return 'US'
+
+
+def _build_entry(ticker, asset_id=None, name=None, category=None):
+    """Construit une entrée du registre ; les champs absents sont déduits du ticker."""
+    from config import get_asset_currency, get_asset_name, detect_asset_category
+
+    known_name = get_asset_name(ticker)
+    return {
+        'ticker': ticker,
+        'id': asset_id,
+        # Les noms de config.py priment sur le nom yfinance stocké en base
+        'name': known_name if known_name != ticker else (name or ticker),
+        'category': category or detect_asset_category(ticker),
+        'currency': get_asset_currency(ticker),
+        'exchange': detect_exchange(ticker),
+    }
+
+
+# =============================================================================
+# CHARGEMENT
+# =============================================================================
+
+def load_registry():
+    """
+    Charge (ou recharge) tout le registre en une requête.
+    En cas d'échec, le registre reste marqué non chargé : une nouvelle lecture est tentée
+    après LOAD_RETRY_DELAY secondes, les entrées déduites des tickers servent entre-temps.
+    """
+    global _loaded, _load_retry_at
+    from db_manager import get_db_connection, db_unavailable
+
+    if db_unavailable():
+        with _lock:
+            _load_retry_at = time.time() + LOAD_RETRY_DELAY
+        return
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_name = 'user_assets' AND column_name = 'category'
+        """)
+        category_expr = "ua.category" if cursor.fetchone() else "NULL"
+        cursor.execute(f"""
+            SELECT COALESCE(a.ticker, ua.ticker), a.id, a.name, {category_expr}
+            FROM assets a
+            FULL OUTER JOIN user_assets ua ON ua.ticker = a.ticker
+        """)
+        rows = cursor.fetchall()
+        cursor.close()
+        conn.close()
+        _start_listener()
+    except Exception as e:
+        print(f"⚠️ Registre des actifs non chargé (nouvel essai dans {LOAD_RETRY_DELAY}s): {e}")
+        with _lock:
+            _load_retry_at = time.time() + LOAD_RETRY_DELAY
+        return
+
+    entries = {}
+    for ticker, asset_id, name, category in rows:
+        ticker = ticker.upper()
+        entries[ticker] = _build_entry(ticker, asset_id, name, category)
+
+    with _lock:
+        _registry.clear()
+        _registry.update(entries)
+        _asset_id_retry_at.clear()
+        _loaded = True
+
+    print(f"📇 Registre des actifs: {len(entries)} actifs chargés")
+
+
+def _ensure_loaded():
+    if not _loaded and time.time() >= _load_retry_at:
+        with _lock:
+            if not _loaded and time.time() >= _load_retry_at:
+                load_registry()
+
+
+def get_asset_metadata(ticker):
+    """
+    Retourne les métadonnées d'un actif depuis la mémoire.
+    Un ticker inconnu reçoit une entrée déduite de son format (sans I/O).
+    """
+    _ensure_loaded()
+    ticker = ticker.upper().strip()
+
+    entry = _registry.get(ticker)
+    if entry is None:
+        entry = _build_entry(ticker)
+        with _lock:
+            entry = _registry.setdefault(ticker, entry)
+    return entry
+
+
+def get_registered_category(ticker):
+    """Catégorie de l'actif (choisie par l'utilisateur, sinon détectée)."""
+    return get_asset_metadata(ticker)['category']
+
+
+def get_registered_asset_id(ticker):
+    """
+    Retourne l'id de l'actif. Seul le premier appel pour un actif absent de la table
+    assets fait une I/O (création de la ligne), le résultat est ensuite en mémoire.
+    Retourne None si la base est indisponible : l'échec est mémorisé ASSET_ID_RETRY_DELAY
+    secondes (aucun id n'est enregistré, l'appel suivant après ce délai réessaie).
+    """
+    from db_manager import db_unavailable
+
+    entry = get_asset_metadata(ticker)
+    if entry['id'] is not None:
+        return entry['id']
+    if db_unavailable() or time.time() < _asset_id_retry_at.get(entry['ticker'], 0):
+        return None
+
+    asset_id, name = _create_asset_row(entry['ticker'])
+    if asset_id is None:
+        with _lock:
+            _asset_id_retry_at[entry['ticker']] = time.time() + ASSET_ID_RETRY_DELAY
+        return None
+    with _lock:
+        _asset_id_retry_at.pop(entry['ticker'], None)
+        entry['id'] = asset_id
+        if name and entry['name'] == entry['ticker']:
+            entry['name'] = name
+    return asset_id
+
+
+def _create_asset_row(ticker):
+    """Récupère ou crée la ligne de l'actif dans la table assets."""
+    try:
+        from db_manager import get_db_connection
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT id, name FROM assets WHERE ticker = %s", (ticker,))
+        data = cursor.fetchone()
+
+        if data is None:
+            try:
+                import yfinance as yf
+                info = yf.Ticker(ticker).info
+                name = info.get('longName', ticker)
+                asset_type = info.get('quoteType', 'EQUITY')
+            except Exception:
+                name = ticker
+                asset_type = 'UNKNOWN'
+
+            cursor.execute(
+                "INSERT INTO assets (ticker, name, asset_type) VALUES (%s, %s, %s) RETURNING id",
+                (ticker, name, asset_type)
+            )
+            asset_id = cursor.fetchone()[0]
+            conn.commit()
+        else:
+            asset_id, name = data
+
+        cursor.close()
+        conn.close()
+        return asset_id, name
+
+    except Exception as e:
+        print(f"Erreur lors de la récupération de l'asset_id pour {ticker}: {e}")
+        return None, None
+
+
+# =============================================================================
+# ÉCRITURE (WRITE-THROUGH) ET INVALIDATION
+# =============================================================================
+
+def update_registered_category(ticker, category, notify=True):
+    """Met à jour la catégorie en mémoire après écriture en base."""
+    entry = get_asset_metadata(ticker)
+    with _lock:
+        entry['category'] = category
+    if notify:
+        publish_invalidation(entry['ticker'])
+
+
+def update_registered_categories(categories, notify=True):
+    """Met à jour plusieurs catégories (sauvegarde de la liste d'actifs)."""
+    for ticker, category in categories.items():
+        update_registered_category(ticker, category, notify=False)
+    if notify:
+        publish_invalidation('*')
+
+
+def invalidate(ticker=None):
+    """Invalide une entrée (rechargée depuis la base au prochain accès) ou tout le registre."""
+    global _loaded, _load_retry_at
+    if ticker is None or ticker == '*':
+        with _lock:
+            _loaded = False
+            _load_retry_at = 0.0
+        return
+
+    with _lock:
+        _registry.pop(ticker.upper(), None)
+    _refresh_entry(ticker.upper())
+
+
+def _refresh_entry(ticker):
+    """Relit une seule entrée depuis la base."""
+    try:
+        from db_manager import get_db_connection
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT a.id, a.name, ua.category
+            FROM (SELECT %s::varchar AS ticker) t
+            LEFT JOIN assets a ON a.ticker = t.ticker
+            LEFT JOIN user_assets ua ON ua.ticker = t.ticker
+        """, (ticker,))
+        row = cursor.fetchone()
+        cursor.close()
+        conn.close()
+    except Exception as e:
+        print(f"⚠️ Impossible de relire {ticker} dans le registre: {e}")
+        return
+
+    if row:
+        with _lock:
+            _registry[ticker] = _build_entry(ticker, *row)
+
+
+def publish_invalidation(payload):
+    """Prévient les autres workers qu'une entrée (ou '*' pour tout) a changé."""
+    try:
+        from db_manager import get_db_connection
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_notify(%s, %s)", (NOTIFY_CHANNEL, f"{os.getpid()}:{payload}"))
+        conn.commit()
+        cursor.close()
+        conn.close()
+    except Exception as e:
+        print(f"⚠️ Invalidation du registre non publiée: {e}")
+
+
+def _handle_notification(payload):
+    sender, _, target = payload.partition(':')
+    if sender == str(os.getpid()):
+        return  # Déjà appliqué localement (write-through)
+    invalidate(target)
+
+
+def _listen_loop():
+    """Écoute les invalidations publiées par les autres workers."""
+    from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+    from db_manager import get_db_connection
+
+    while True:
+        conn = None
+        try:
+            conn = get_db_connection()
+            conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+            cursor = conn.cursor()
+            cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+
+            while True:
+                if select.select([conn], [], [], LISTEN_TIMEOUT) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    _handle_notification(conn.notifies.pop(0).payload)
+
+        except Exception as e:
+            print(f"⚠️ Écoute du registre interrompue: {e}")
+            # Des notifications ont pu être perdues : recharger au prochain accès
+            invalidate()
+            time.sleep(LISTEN_RETRY_DELAY)
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+
+def disable_listener():
+    """
+    Désactive l'écoute des invalidations dans ce processus (processus de calcul éphémères
+    de batch_analysis : le registre y est lu une fois, sans connexion LISTEN ni thread).
+    """
+    global _listener_enabled
+    _listener_enabled = False
+
+
+def _start_listener():
+    """Démarre le thread d'écoute (une fois par processus, après le fork gunicorn)."""
+    global _listener_thread
+    if not _listener_enabled:
+        return
+    if _listener_thread is not None and _listener_thread.is_alive():
+        return
+    _listener_thread = threading.Thread(target=_listen_loop, name='asset-registry-listener', daemon=True)
+    _listener_thread.start()
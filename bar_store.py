@@ -0,0 +1,270 @@
+# bar_store.py
+"""
+Stockage local des barres intraday (OHLCV) et rééchantillonnage.
+
+- Intervalles de base (15m, 1h) : téléchargés depuis Yahoo Finance, seulement les barres
+  manquantes en fin de série
+- Intervalles dérivés (30m, 4h, 1wk...) : calculés par rééchantillonnage incrémental
+  de l'intervalle source (seul le dernier seau est recalculé), jamais re-téléchargés
+- Stockage par morceaux mensuels (un fichier .npz par ticker / intervalle / mois) :
+  une lecture sur une plage ne charge que les mois concernés, les mois déjà lus
+  restent en mémoire tant que le fichier n'a pas changé
+
+Les horodatages sont stockés en heure locale de la place de cotation (sans fuseau),
+comme les dates journalières du reste de l'application.
+"""
+import os
+import time
+import threading
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from lazy_imports import lazy_import
+
+yf = lazy_import('yfinance')
+
+
+BAR_STORE_DIR = os.getenv('BAR_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'bars'))
+BAR_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+INGEST_REFRESH_SECONDS = 60   # délai minimal entre deux téléchargements d'un même intervalle
+INGEST_OVERLAP_BARS = 2       # dernières barres re-téléchargées (la dernière peut être incomplète)
+
+# source : intervalle de base (None = téléchargé) ; rule : règle pandas de rééchantillonnage
+# max_days : historique disponible sur Yahoo Finance pour les intervalles téléchargés
+INTERVALS = {
+    '15m': {'label': '15 min', 'delta': pd.Timedelta(minutes=15), 'source': None, 'max_days': 59},
+    '30m': {'label': '30 min', 'delta': pd.Timedelta(minutes=30), 'source': '15m', 'rule': '30min'},
+    '1h': {'label': '1 heure', 'delta': pd.Timedelta(hours=1), 'source': None, 'max_days': 729},
+    '4h': {'label': '4 heures', 'delta': pd.Timedelta(hours=4), 'source': '1h', 'rule': '4h'},
+    '1d': {'label': 'Journalier', 'delta': pd.Timedelta(days=1), 'source': None},
+}
+INTRADAY_INTERVALS = [name for name, spec in INTERVALS.items() if spec['delta'] < pd.Timedelta(days=1)]
+
+OHLCV_AGGREGATION = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+_locks = {}
+_locks_guard = threading.Lock()
+_last_ingest = {}
+
+
+# =============================================================================
+# INTERVALLES
+# =============================================================================
+
+def is_intraday(interval):
+    return interval in INTRADAY_INTERVALS
+
+
+def base_interval(interval):
+    """Intervalle téléchargé dont dérive `interval`."""
+    spec = INTERVALS[interval]
+    return base_interval(spec['source']) if spec.get('source') else interval
+
+
+def max_history_days(interval):
+    """Profondeur d'historique disponible pour un intervalle (None = illimitée)."""
+    return INTERVALS[base_interval(interval)].get('max_days')
+
+
+def resample_ohlcv(df, rule):
+    """
+    Agrège des barres OHLCV (index datetime) selon une règle pandas ('30min', '4h', 'W'...).
+    Les seaux sont alignés sur le début de journée : un seau ne dépend que de ses propres barres.
+    """
+    columns = {col: agg for col, agg in OHLCV_AGGREGATION.items() if col in df.columns}
+    return df.resample(rule, origin='start_day').agg(columns).dropna(subset=['Close'])
+
+
+# =============================================================================
+# MORCEAUX MENSUELS
+# =============================================================================
+
+def _lock_for(ticker, interval):
+    with _locks_guard:
+        return _locks.setdefault((ticker, interval), threading.RLock())
+
+
+def _series_dir(ticker, interval):
+    safe_ticker = ticker.replace('/', '_').replace('^', 'idx_').replace('=', '_')
+    return os.path.join(BAR_STORE_DIR, safe_ticker, interval)
+
+
+def _chunk_paths(ticker, interval):
+    """Fichiers de morceaux triés par mois : [(mois 'YYYY-MM', chemin)]."""
+    directory = _series_dir(ticker, interval)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        (name[:-4], os.path.join(directory, name))
+        for name in os.listdir(directory) if name.endswith('.npz')
+    )
+
+
+@lru_cache(maxsize=512)
+def _load_chunk_cached(path, mtime):
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def _load_chunk(path):
+    """Charge un morceau (mis en cache tant que le fichier n'est pas modifié)."""
+    return _load_chunk_cached(path, os.path.getmtime(path))
+
+
+def _chunk_to_frame(chunk):
+    df = pd.DataFrame({field: chunk[field] for field in BAR_FIELDS},
+                      index=pd.DatetimeIndex(chunk['ts'].view('datetime64[ns]'), name='Date'))
+    return df
+
+
+def _write_chunk(path, df):
+    """Écrit un morceau de façon atomique (fichier temporaire puis remplacement)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(
+        tmp_path,
+        ts=df.index.values.astype('datetime64[ns]').view('int64'),
+        **{field: df[field].to_numpy(dtype=np.float64) for field in BAR_FIELDS}
+    )
+    os.replace(tmp_path, path)
+
+
+def write_bars(ticker, interval, bars):
+    """
+    Fusionne des barres dans le stockage : seuls les mois concernés sont réécrits,
+    les nouvelles barres remplacent celles de même horodatage.
+    """
+    if bars.empty:
+        return
+    bars = bars[BAR_FIELDS].astype(np.float64)
+    directory = _series_dir(ticker, interval)
+    with _lock_for(ticker, interval):
+        for month, month_bars in bars.groupby(bars.index.strftime('%Y-%m')):
+            path = os.path.join(directory, f"{month}.npz")
+            if os.path.exists(path):
+                existing = _chunk_to_frame(_load_chunk(path))
+                existing = existing[~existing.index.isin(month_bars.index)]
+                month_bars = pd.concat([existing, month_bars])
+            _write_chunk(path, month_bars.sort_index())
+
+
+def read_bars(ticker, interval, start=None, end=None):
+    """
+    Lit les barres stockées sur une plage [start, end] (ne charge que les mois concernés).
+
+    Returns:
+        pd.DataFrame: Open, High, Low, Close, Volume indexés par Date (vide si rien de stocké)
+    """
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    first_month = start.strftime('%Y-%m') if start is not None else None
+    last_month = end.strftime('%Y-%m') if end is not None else None
+
+    frames = [
+        _chunk_to_frame(_load_chunk(path))
+        for month, path in _chunk_paths(ticker, interval)
+        if (first_month is None or month >= first_month) and (last_month is None or month <= last_month)
+    ]
+    if not frames:
+        return pd.DataFrame(columns=BAR_FIELDS, index=pd.DatetimeIndex([], name='Date'))
+
+    df = pd.concat(frames) if len(frames) > 1 else frames[0]
+    lo = df.index.searchsorted(start) if start is not None else 0
+    hi = df.index.searchsorted(end, side='right') if end is not None else len(df)
+    return df.iloc[lo:hi]
+
+
+def last_bar_time(ticker, interval):
+    """Horodatage de la dernière barre stockée (None si aucune)."""
+    paths = _chunk_paths(ticker, interval)
+    if not paths:
+        return None
+    ts = _load_chunk(paths[-1][1])['ts']
+    return pd.Timestamp(ts[-1]) if len(ts) else None
+
+
+# =============================================================================
+# MISE À JOUR
+# =============================================================================
+
+def _download_bars(ticker, interval, start):
+    """Télécharge les barres intraday depuis `start` (heure locale de la place, sans fuseau)."""
+    try:
+        df = yf.download(ticker, interval=interval, start=start.strftime('%Y-%m-%d'),
+                         auto_adjust=True, progress=False)
+    except Exception as e:
+        print(f"❌ Erreur lors du téléchargement {interval} de {ticker}: {e}")
+        return pd.DataFrame()
+    if df.empty:
+        return df
+
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.droplevel(1)
+    df.columns = [str(col).capitalize() for col in df.columns]
+    if df.index.tz is not None:
+        df.index = df.index.tz_localize(None)
+    df.index.name = 'Date'
+    return df[[field for field in BAR_FIELDS if field in df.columns]]
+
+
+def _ingest_base(ticker, interval):
+    """Télécharge les barres manquantes en fin de série d'un intervalle de base."""
+    key = (ticker, interval)
+    if time.time() - _last_ingest.get(key, 0) < INGEST_REFRESH_SECONDS:
+        return 0
+
+    oldest = pd.Timestamp.today().normalize() - pd.Timedelta(days=INTERVALS[interval]['max_days'])
+    last = last_bar_time(ticker, interval)
+    start = oldest if last is None else max(last - INGEST_OVERLAP_BARS * INTERVALS[interval]['delta'], oldest)
+
+    bars = _download_bars(ticker, interval, start)
+    _last_ingest[key] = time.time()
+    write_bars(ticker, interval, bars)
+    if not bars.empty:
+        print(f"✅ {ticker} {interval}: {len(bars)} barres téléchargées depuis {start:%Y-%m-%d}")
+    return len(bars)
+
+
+def _update_derived(ticker, interval):
+    """
+    Rééchantillonne l'intervalle source à partir du dernier seau stocké
+    (le seul qui ait pu changer) : le reste de la série dérivée est conservé.
+    """
+    spec = INTERVALS[interval]
+    last = last_bar_time(ticker, interval)
+    source = read_bars(ticker, spec['source'], start=last)
+    if source.empty:
+        return 0
+    derived = resample_ohlcv(source, spec['rule'])
+    write_bars(ticker, interval, derived)
+    return len(derived)
+
+
+def update_bars(ticker, interval):
+    """Met à jour le stockage d'un intervalle (téléchargement ou rééchantillonnage)."""
+    spec = INTERVALS[interval]
+    if spec.get('source'):
+        update_bars(ticker, spec['source'])
+        with _lock_for(ticker, interval):
+            return _update_derived(ticker, interval)
+    with _lock_for(ticker, interval):
+        return _ingest_base(ticker, interval)
+
+
+def load_bars(ticker, interval, start=None, end=None, refresh=True):
+    """
+    Barres d'un intervalle intraday sur une plage, après mise à jour du stockage.
+
+    Returns:
+        pd.DataFrame: Open, High, Low, Close, Volume indexés par Date
+    """
+    if interval not in INTRADAY_INTERVALS:
+        raise ValueError(f"Intervalle intraday inconnu: {interval}")
+    if refresh:
+        try:
+            update_bars(ticker, interval)
+        except Exception as e:
+            print(f"⚠️ Mise à jour des barres {interval} de {ticker} impossible: {e}")
+    return read_bars(ticker, interval, start=start, end=end)
@@ -0,0 +1,164 @@
+# batch_analysis.py
+"""
+Analyse complète (fetch_and_prepare_data) de plusieurs actifs dans un pool de processus.
+- Les tickers sont soumis par lots (chunks) pour amortir le coût des échanges
+- La configuration est transmise une seule fois à chaque processus (lecture seule)
+- Les résultats reviennent sous forme de tableaux NumPy colonne par colonne
+  (libellés encodés en entiers + catégories) plutôt que de DataFrames picklés
+- En cas d'échec du pool (environnement sans multiprocessing, processus cassé...),
+  l'analyse se poursuit en série dans le processus courant
+"""
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+
+BATCH_CHUNK_SIZE = 4          # tickers par tâche soumise au pool
+BATCH_MIN_PARALLEL = 3        # en dessous, le pool coûte plus qu'il ne rapporte
+
+_worker_config = None
+_mp_context = None
+
+
+# =============================================================================
+# ENCODAGE DES RÉSULTATS
+# =============================================================================
+
+def encode_frame(df, columns=None):
+    """
+    Encode un DataFrame en tableaux NumPy colonne par colonne.
+    Les colonnes texte sont factorisées (codes entiers + catégories).
+
+    Returns:
+        dict: {'length', 'columns': {nom: ('values', ndarray) | ('codes', ndarray, list)}}
+    """
+    if columns is not None:
+        df = df[[col for col in columns if col in df.columns]]
+
+    encoded = {}
+    for col in df.columns:
+        series = df[col]
+        if series.dtype == object or isinstance(series.dtype, (pd.CategoricalDtype, pd.StringDtype)):
+            if series.map(lambda v: isinstance(v, (list, dict, set))).any():
+                encoded[col] = ('values', series.to_numpy(dtype=object))
+                continue
+            codes, categories = pd.factorize(series, use_na_sentinel=True)
+            code_dtype = np.int8 if len(categories) < 127 else np.int32
+            encoded[col] = ('codes', codes.astype(code_dtype), list(categories))
+        else:
+            encoded[col] = ('values', series.to_numpy())
+
+    return {'length': len(df), 'columns': encoded}
+
+
+def decode_frame(payload):
+    """Reconstruit le DataFrame encodé par encode_frame."""
+    data = {}
+    for col, item in payload['columns'].items():
+        if item[0] == 'codes':
+            _, codes, categories = item
+            values = np.asarray(categories, dtype=object)[np.maximum(codes, 0)] if len(categories) else \
+                np.full(len(codes), None, dtype=object)
+            values[codes < 0] = None
+            data[col] = values
+        else:
+            data[col] = item[1]
+    return pd.DataFrame(data)
+
+
+# =============================================================================
+# CÔTÉ PROCESSUS DE CALCUL
+# =============================================================================
+
+def _init_worker(config):
+    """
+    Reçoit la configuration partagée (une fois par processus).
+    Le registre des actifs y est chargé sans thread d'écoute des invalidations.
+    """
+    global _worker_config
+    _worker_config = config
+
+    from asset_registry import disable_listener
+    disable_listener()
+
+
+def _analyze_chunk(tickers, period, columns, config=None):
+    """Analyse un lot de tickers ; un échec n'interrompt pas le lot."""
+    from data_handler import fetch_and_prepare_data
+
+    config = config if config is not None else _worker_config
+    results = []
+    for ticker in tickers:
+        try:
+            df = fetch_and_prepare_data(ticker, period=period, config=config)
+            results.append((ticker, encode_frame(df, columns) if not df.empty else None))
+        except Exception as e:
+            print(f"⚠️ Erreur d'analyse pour {ticker}: {e}")
+            results.append((ticker, None))
+    return results
+
+
+def _get_context():
+    """
+    Contexte multiprocessing : 'forkserver' quand il existe (les processus sont créés
+    depuis un serveur sans threads, avec les modules déjà importés), sinon le défaut.
+    """
+    global _mp_context
+    if _mp_context is None:
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            _mp_context = multiprocessing.get_context('forkserver')
+            _mp_context.set_forkserver_preload(['batch_analysis', 'data_handler'])
+        else:
+            _mp_context = multiprocessing.get_context()
+    return _mp_context
+
+
+# =============================================================================
+# POINT D'ENTRÉE
+# =============================================================================
+
+def analyze_tickers(tickers, period, config=None, columns=None, max_workers=None, chunk_size=BATCH_CHUNK_SIZE):
+    """
+    Lance fetch_and_prepare_data sur tous les tickers, en parallèle sur les cœurs disponibles.
+
+    Args:
+        columns: colonnes à rapatrier (None = toutes)
+        max_workers: nombre de processus (défaut : nombre de cœurs)
+
+    Returns:
+        dict: ticker -> DataFrame (vide si l'analyse a échoué)
+    """
+    tickers = list(dict.fromkeys(tickers))
+    chunks = [tickers[i:i + chunk_size] for i in range(0, len(tickers), chunk_size)]
+    workers = min(max_workers or os.cpu_count() or 1, len(chunks))
+
+    start = time.time()
+    payloads = {}
+
+    if workers > 1 and len(tickers) >= BATCH_MIN_PARALLEL:
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=_get_context(),
+                                     initializer=_init_worker, initargs=(config,)) as executor:
+                futures = [executor.submit(_analyze_chunk, chunk, period, columns) for chunk in chunks]
+                for future in as_completed(futures):
+                    payloads.update(future.result())
+        except (BrokenProcessPool, OSError, NotImplementedError, PermissionError) as e:
+            print(f"⚠️ Pool de processus indisponible, poursuite en série: {e}")
+
+    # Mode série : tout ou partie restante
+    remaining = [ticker for ticker in tickers if ticker not in payloads]
+    if remaining:
+        payloads.update(_analyze_chunk(remaining, period, columns, config=config))
+        workers = workers if len(remaining) < len(tickers) else 1
+
+    print(f"✅ Analyse de {len(tickers)} actifs en {time.time() - start:.1f}s ({workers} processus)")
+
+    return {
+        ticker: decode_frame(payloads[ticker]) if payloads.get(ticker) else pd.DataFrame()
+        for ticker in tickers
+    }
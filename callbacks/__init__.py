@@ -7,6 +7,7 @@ from .performance_callbacks import register_performance_callbacks
 from .strategy_callbacks import register_strategy_callbacks
 from .summary_callbacks import register_summary_callbacks
 from .divergence_timeline_callbacks import register_divergence_timeline_callbacks
+from .screener_callbacks import register_screener_callbacks
 
 
 def register_all_callbacks(app):
@@ -18,4 +19,5 @@ def register_all_callbacks(app):
     register_performance_callbacks(app)
     register_strategy_callbacks(app)
     register_summary_callbacks(app)
-    register_divergence_timeline_callbacks(app)
\ No newline at end of file
+    register_divergence_timeline_callbacks(app)
+    register_screener_callbacks(app)
\ No newline at end of file
@@ -5,7 +5,7 @@ VERSION 2.0 - Ajout du bouton de réinitialisation aux actifs par défaut
 """
 from dash import Input, Output, State, ctx, html, no_update
 import dash_bootstrap_components as dbc
-import yfinance as yf
+from lazy_imports import lazy_import
 
 from config import (
     load_user_assets, load_user_assets_with_categories, 
@@ -14,6 +14,8 @@ from config import (
     reset_to_default_assets
 )
 
+yf = lazy_import('yfinance')
+
 
 def register_asset_callbacks(app):
     """Enregistre les callbacks de gestion des actifs."""
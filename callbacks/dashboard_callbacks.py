@@ -2,7 +2,7 @@
 """
 Callbacks pour le dashboard principal et les graphiques.
 """
-from dash import dcc, html, Input, Output, State, callback_context, ALL, MATCH
+from dash import dcc, html, Input, Output, State, callback_context, ALL, MATCH, Patch, no_update
 from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 import pandas as pd
@@ -10,12 +10,18 @@ import json
 
 from data_handler import fetch_and_prepare_data, save_indicators_to_db
 from config import INDICATOR_DESCRIPTIONS
+from store_codec import encode_frame, decode_frame, decode_column
 from components import (
     create_price_chart, create_recommendations_chart, create_trend_chart,
     create_macd_chart, create_volume_chart, create_rsi_chart,
     create_stochastic_chart, create_patterns_chart,
-    create_technical_indicators_table
+    create_technical_indicators_table,
+    price_trace_arrays, recommendations_trace_arrays, trend_trace_arrays,
+    macd_trace_arrays, volume_trace_arrays, rsi_trace_arrays,
+    stochastic_trace_arrays, patterns_trace_arrays,
+    SELECTED_DATE_SHAPE_INDEX
 )
+from components.downsampling import prepare_chart_frames
 
 
 def register_dashboard_callbacks(app):
@@ -28,10 +34,11 @@ def register_dashboard_callbacks(app):
          Output('zoom-range-store', 'data', allow_duplicate=True)],
         [Input('asset-dropdown', 'value'),
          Input('period-dropdown', 'value'),
+         Input('interval-dropdown', 'value'),
          Input('config-store', 'data')],  # <-- Ceci déclenche un recalcul quand la config change
         prevent_initial_call=True
     )
-    def load_data(selected_asset, selected_period, config):
+    def load_data(selected_asset, selected_period, interval, config):
         if not selected_asset:
             return {}, None
         
@@ -44,56 +51,114 @@ def register_dashboard_callbacks(app):
             print(f"   min_combos = {dec_cfg.get('min_combinations_for_signal')}")
             print(f"   rsi_divergence = {ind_cfg.get('rsi_divergence')}")
         
-        df = fetch_and_prepare_data(selected_asset, period=selected_period, config=config)
+        df = fetch_and_prepare_data(selected_asset, period=selected_period, config=config,
+                                    interval=interval or '1d')
         if df.empty:
             return {}, None
         
-        # Convertir en format JSON-serializable
-        df['Date'] = df['Date'].astype(str)
-        data = df.to_dict('records')
-        
-        return data, None
+        # Format colonnaire compact (store_codec)
+        return encode_frame(df), None
     
     # === CALLBACK 2: Mise à jour des graphiques ===
+    # Un simple déplacement de la date ou du zoom est géré par patch_charts (mise à jour partielle)
     @app.callback(
         [Output('main-charts-container', 'children'),
-         Output('technical-charts-container', 'children')],
+         Output('technical-charts-container', 'children'),
+         Output('charts-render-store', 'data')],
         [Input('full-data-store', 'data'),
          Input('date-picker', 'date'),
-         Input('display-options', 'value'),
-         Input('zoom-range-store', 'data')],
-        [State('asset-dropdown', 'value'),
-         State('config-store', 'data')]
+         Input('display-options', 'value')],
+        [State('zoom-range-store', 'data'),
+         State('asset-dropdown', 'value'),
+         State('config-store', 'data'),
+         State('charts-render-store', 'data')]
     )
-    def update_charts(data, selected_date_str, display_options, zoom_range, selected_asset, config):
+    def update_charts(data, selected_date_str, display_options, zoom_range, selected_asset, config, render_state):
         if not data or not selected_asset:
-            return [], []
+            return [], [], {'rendered': False}
+        
+        date_only = callback_context.triggered_id == 'date-picker'
+        if date_only and (render_state or {}).get('figures'):
+            # Les figures existent : la date sera patchée si des données existent à cette date
+            first_date = decode_column(data, 'Date').iloc[0]
+            if pd.to_datetime(selected_date_str) >= first_date:
+                raise PreventUpdate
         
-        df = pd.DataFrame(data)
+        df = decode_frame(data)
         df['Date'] = pd.to_datetime(df['Date'])
         
         selected_date = pd.to_datetime(selected_date_str)
-        df_graph = df[df['Date'] <= selected_date].copy()
+        df_graph = df[df['Date'] < selected_date + pd.Timedelta(days=1)].copy()
         
         if df_graph.empty:
-            return [dbc.Alert("Aucune donnée pour cette date", color="warning")], []
+            return [dbc.Alert("Aucune donnée pour cette date", color="warning")], [], {'rendered': False}
         
         # Appliquer le zoom si défini
         x_range = None
         if zoom_range:
             x_range = [zoom_range.get('start'), zoom_range.get('end')]
         
+        # Niveau de détail selon la plage visible (pleine résolution quand on zoome)
+        lod = prepare_chart_frames(df_graph, x_range)
+        
         # === GRAPHIQUES PRINCIPAUX ===
         main_charts = create_main_charts_with_zoom(
-            df_graph, selected_date, selected_asset, display_options, config, x_range
+            df_graph, selected_date, selected_asset, display_options, config, x_range, lod
         )
         
         # === GRAPHIQUES TECHNIQUES ===
         technical_charts = create_technical_charts_with_zoom(
-            df_graph, selected_date, display_options, config, x_range
+            df_graph, selected_date, display_options, config, x_range, lod
         )
         
-        return main_charts, technical_charts
+        # Structure de chaque figure rendue (nombre de traces, ligne de date) pour patch_charts
+        figures = get_figure_layouts(main_charts + technical_charts)
+        return main_charts, technical_charts, {'rendered': True, 'figures': figures}
+    
+    # === CALLBACK 2b: Mise à jour partielle quand seule la date ou le zoom change ===
+    # Sur changement de zoom, les traces sont recalculées au niveau de détail de la nouvelle plage
+    @app.callback(
+        [Output(graph_id, 'figure', allow_duplicate=True) for graph_id in CHART_GRAPH_IDS],
+        [Input('date-picker', 'date'),
+         Input('zoom-range-store', 'data')],
+        [State('full-data-store', 'data'),
+         State('display-options', 'value'),
+         State('config-store', 'data'),
+         State('charts-render-store', 'data')],
+        prevent_initial_call=True
+    )
+    def patch_charts(selected_date_str, zoom_range, data, display_options, config, render_state):
+        if not data or not selected_date_str or not (render_state or {}).get('rendered'):
+            raise PreventUpdate
+        
+        # Seuls les graphiques rendus sont patchés, et seules leurs colonnes sont décodées
+        figures = render_state.get('figures', {})
+        graph_ids = [graph_id for graph_id in CHART_GRAPH_IDS if graph_id in figures]
+        if not graph_ids:
+            raise PreventUpdate
+        
+        columns = ['Date'] + sorted({col for graph_id in graph_ids for col in CHART_COLUMNS[graph_id]})
+        df = decode_frame(data, columns=columns)
+        df['Date'] = pd.to_datetime(df['Date'])
+        
+        selected_date = pd.to_datetime(selected_date_str)
+        df_graph = df[df['Date'] < selected_date + pd.Timedelta(days=1)]
+        
+        if df_graph.empty:
+            raise PreventUpdate
+        
+        x_range = None
+        if zoom_range:
+            x_range = [zoom_range.get('start'), zoom_range.get('end')]
+        
+        lod = prepare_chart_frames(df_graph, x_range)
+        trace_arrays = compute_chart_trace_arrays(lod, display_options or [], config or {}, graph_ids)
+        
+        return [
+            create_date_patch(selected_date, trace_arrays[graph_id], x_range, figures[graph_id])
+            if graph_id in trace_arrays else no_update
+            for graph_id in CHART_GRAPH_IDS
+        ]
     
     # === CALLBACK 3: Mise à jour du header et tableau technique ===
     @app.callback(
@@ -111,11 +176,11 @@ def register_dashboard_callbacks(app):
         if not data or not selected_asset:
             return [], [], {}, ""
         
-        df = pd.DataFrame(data)
+        df = decode_frame(data)
         df['Date'] = pd.to_datetime(df['Date'])
         
         selected_date = pd.to_datetime(selected_date_str)
-        df_filtered = df[df['Date'] <= selected_date].copy()
+        df_filtered = df[df['Date'] < selected_date + pd.Timedelta(days=1)].copy()
         
         if df_filtered.empty:
             return [], [], {}, ""
@@ -152,61 +217,15 @@ def register_dashboard_callbacks(app):
         
         return technical_header, indicators_table, store_data, zoom_info
     
-    # === CALLBACK 4: Capturer le zoom du graphique principal ===
-    @app.callback(
-        Output('zoom-range-store', 'data', allow_duplicate=True),
-        [Input('price-chart', 'relayoutData'),
-         Input('recommendations-chart', 'relayoutData'),
-         Input('trend-chart', 'relayoutData'),
-         Input('macd-chart', 'relayoutData'),
-         Input('volume-chart', 'relayoutData'),
-         Input('rsi-chart', 'relayoutData'),
-         Input('stochastic-chart', 'relayoutData'),
-         Input('patterns-chart', 'relayoutData'),
-         Input('reset-zoom-btn', 'n_clicks')],
-        [State('zoom-range-store', 'data')],
+    # === CALLBACK 4: Synchronisation du zoom côté navigateur ===
+    # Les plages x sont appliquées directement aux graphiques voisins (Plotly.relayout) ;
+    # seule la plage finale, après ZOOM_DEBOUNCE_MS sans mouvement, est écrite dans zoom-range-store.
+    app.clientside_callback(
+        ZOOM_SYNC_JS,
+        [Input(graph_id, 'relayoutData') for graph_id in CHART_GRAPH_IDS] +
+        [Input('reset-zoom-btn', 'n_clicks')],
         prevent_initial_call=True
     )
-    def sync_zoom(price_relay, reco_relay, trend_relay, macd_relay, 
-                  volume_relay, rsi_relay, stoch_relay, patterns_relay,
-                  reset_clicks, current_zoom):
-        
-        ctx = callback_context
-        if not ctx.triggered:
-            raise PreventUpdate
-        
-        triggered_id = ctx.triggered[0]['prop_id'].split('.')[0]
-        
-        # Reset zoom
-        if triggered_id == 'reset-zoom-btn':
-            return None
-        
-        # Trouver le relayoutData qui a déclenché le callback
-        relay_data = None
-        for relay in [price_relay, reco_relay, trend_relay, macd_relay, 
-                      volume_relay, rsi_relay, stoch_relay, patterns_relay]:
-            if relay:
-                relay_data = relay
-                break
-        
-        if not relay_data:
-            raise PreventUpdate
-        
-        # Extraire la plage de zoom
-        if 'xaxis.range[0]' in relay_data and 'xaxis.range[1]' in relay_data:
-            return {
-                'start': relay_data['xaxis.range[0]'],
-                'end': relay_data['xaxis.range[1]']
-            }
-        elif 'xaxis.range' in relay_data:
-            return {
-                'start': relay_data['xaxis.range'][0],
-                'end': relay_data['xaxis.range'][1]
-            }
-        elif 'xaxis.autorange' in relay_data:
-            return None
-        
-        raise PreventUpdate
     
     # === CALLBACK 5: Sauvegarde ===
     @app.callback(
@@ -214,18 +233,26 @@ def register_dashboard_callbacks(app):
         Input('save-button', 'n_clicks'),
         [State('asset-dropdown', 'value'), 
          State('date-picker', 'date'), 
-         State('config-store', 'data')],
+         State('config-store', 'data'),
+         State('period-dropdown', 'value')],
         prevent_initial_call=True
     )
-    def save_data_callback(n_clicks, selected_asset, selected_date_str, config):
-        df = fetch_and_prepare_data(selected_asset, period="5y", config=config)
-        df_today = df[df['date'] == selected_date_str].copy()
+    def save_data_callback(n_clicks, selected_asset, selected_date_str, config, selected_period):
+        # Même période que l'affichage : calcul partagé avec load_data ; 5 ans si la date est plus ancienne
+        df_today = pd.DataFrame()
+        for period in dict.fromkeys([selected_period or "5y", "5y"]):
+            df = fetch_and_prepare_data(selected_asset, period=period, config=config)
+            if df.empty:
+                continue
+            df_today = df[df['Date'].dt.strftime('%Y-%m-%d') == str(selected_date_str)[:10]].copy()
+            if not df_today.empty:
+                break
 
         if df_today.empty:
             return dbc.Alert(f"Aucune donnée pour {selected_asset} le {selected_date_str}.", 
                            color="warning", duration=4000)
 
-        save_indicators_to_db(df_today)
+        save_indicators_to_db(df_today, config=config)
         return dbc.Alert(f"✅ Indicateurs sauvegardés pour {selected_asset} le {selected_date_str}", 
                         color="success", duration=4000, dismissable=True)
 
@@ -299,14 +326,202 @@ def create_technical_header(last_row, selected_asset):
         html.Span(f"({date_str})", className="text-muted small"),
     ]
 
-def create_main_charts_with_zoom(df_graph, selected_date, selected_asset, display_options, config, x_range=None):
+# Graphiques synchronisés, dans l'ordre des Outputs de patch_charts
+CHART_GRAPH_IDS = [
+    'price-chart', 'recommendations-chart', 'trend-chart', 'macd-chart',
+    'volume-chart', 'rsi-chart', 'stochastic-chart', 'patterns-chart'
+]
+
+# Colonnes lues par les tableaux de traces de chaque graphique (en plus de 'Date')
+CHART_COLUMNS = {
+    'price-chart': ['open', 'high', 'low', 'close', 'bb_upper', 'bb_lower', 'bb_middle',
+                    'sma_20', 'sma_50', 'sma_200'],
+    'recommendations-chart': ['recommendation', 'conviction', 'trend', 'bb_signal'],
+    'trend-chart': ['adx', 'di_plus', 'di_minus'],
+    'macd-chart': ['macd', 'macd_signal', 'macd_histogram'],
+    'volume-chart': ['open', 'close', 'volume'],
+    'rsi-chart': ['rsi'],
+    'stochastic-chart': ['stochastic_k', 'stochastic_d'],
+    'patterns-chart': ['pattern', 'pattern_direction'],
+}
+
+
+# Délai sans mouvement avant d'envoyer la plage de zoom au serveur
+ZOOM_DEBOUNCE_MS = 400
+
+ZOOM_SYNC_JS = """
+function() {
+    const ctx = dash_clientside.callback_context;
+    if (!ctx.triggered || !ctx.triggered.length) {
+        return;
+    }
+    const sourceId = ctx.triggered[0].prop_id.split('.')[0];
+    const graphIds = %s;
+    const state = window.dashboardZoomSync = window.dashboardZoomSync || {key: undefined, timer: null};
+
+    let zoom;
+    if (sourceId === 'reset-zoom-btn') {
+        zoom = null;
+        state.key = undefined;
+    } else {
+        const relay = ctx.triggered[0].value;
+        if (!relay) {
+            return;
+        }
+        if ('xaxis.range[0]' in relay && 'xaxis.range[1]' in relay) {
+            zoom = {start: relay['xaxis.range[0]'], end: relay['xaxis.range[1]']};
+        } else if (relay['xaxis.range']) {
+            zoom = {start: relay['xaxis.range'][0], end: relay['xaxis.range'][1]};
+        } else if (relay['xaxis.autorange']) {
+            zoom = null;
+        } else {
+            return;
+        }
+    }
+
+    // Écho d'un relayout appliqué à un graphique voisin : rien à faire
+    const key = JSON.stringify(zoom);
+    if (key === state.key) {
+        return;
+    }
+    state.key = key;
+
+    const update = zoom ? {'xaxis.range': [zoom.start, zoom.end]} : {'xaxis.autorange': true};
+    graphIds.forEach(function(graphId) {
+        if (graphId === sourceId || !window.Plotly) {
+            return;
+        }
+        const container = document.getElementById(graphId);
+        if (!container) {
+            return;
+        }
+        const gd = container.classList.contains('js-plotly-plot')
+            ? container : container.querySelector('.js-plotly-plot');
+        if (gd && gd.data && gd.data.length) {
+            window.Plotly.relayout(gd, update);
+        }
+    });
+
+    if (state.timer) {
+        clearTimeout(state.timer);
+    }
+    state.timer = setTimeout(function() {
+        state.timer = null;
+        dash_clientside.set_props('zoom-range-store', {data: zoom});
+    }, sourceId === 'reset-zoom-btn' ? 0 : %d);
+}
+""" % (json.dumps(CHART_GRAPH_IDS), ZOOM_DEBOUNCE_MS)
+
+
+def signal_strength(df):
+    """Poids LOD des recommandations : conviction des signaux Acheter/Vendre, 0 pour Neutre."""
+    return df['conviction'].where(df['recommendation'].isin(['Acheter', 'Vendre']), 0)
+
+
+def has_pattern(df):
+    """Poids LOD des patterns : les bougies sans pattern ne sont conservées qu'à défaut d'autre."""
+    return df['pattern'] != 'Aucun'
+
+
+def compute_chart_trace_arrays(lod, display_options, config, graph_ids=None):
+    """
+    Calcule les tableaux de traces des graphiques affichés (restreints à `graph_ids` si fourni),
+    à partir des mêmes données (niveau de détail) que create_main_charts_with_zoom /
+    create_technical_charts_with_zoom.
+    """
+    builders = {
+        'price-chart': ('price', lambda: price_trace_arrays(
+            lod['price'], 'moving_averages' in display_options, 'bollinger' in display_options)),
+        'recommendations-chart': ('recommendations', lambda: recommendations_trace_arrays(
+            lod['bars'](signal_strength))),
+        'trend-chart': ('trend', lambda: trend_trace_arrays(lod['bars']('adx'), config)),
+        'macd-chart': ('macd', lambda: macd_trace_arrays(lod['lines']('macd'))),
+        'volume-chart': ('volume', lambda: volume_trace_arrays(lod['price'])),
+        'rsi-chart': ('rsi', lambda: rsi_trace_arrays(lod['lines']('rsi'))),
+        'stochastic-chart': ('stochastic', lambda: stochastic_trace_arrays(lod['lines']('stochastic_k'))),
+        'patterns-chart': ('patterns', lambda: patterns_trace_arrays(lod['bars'](has_pattern))),
+    }
+    
+    return {
+        graph_id: build()
+        for graph_id, (option, build) in builders.items()
+        if option in display_options and (graph_ids is None or graph_id in graph_ids)
+    }
+
+
+def get_figure_layouts(charts):
+    """
+    Relève la structure des figures rendues : {graph_id: {'traces': n, 'date_line': bool}}.
+    Une figure vide (ex. MACD sans données) n'a ni traces ni ligne de date à patcher.
+    """
+    layouts = {}
+    stack = list(charts)
+    while stack:
+        component = stack.pop()
+        if isinstance(component, dcc.Graph):
+            figure = getattr(component, 'figure', None)
+            if getattr(component, 'id', None) in CHART_GRAPH_IDS and hasattr(figure, 'layout'):
+                layouts[component.id] = {
+                    'traces': len(figure.data),
+                    'date_line': len(figure.layout.shapes) > SELECTED_DATE_SHAPE_INDEX,
+                }
+            continue
+        children = getattr(component, 'children', None)
+        if isinstance(children, (list, tuple)):
+            stack.extend(children)
+        elif children is not None and not isinstance(children, str):
+            stack.append(children)
+    return layouts
+
+
+def _assign_patch(patch_node, values):
+    """Affecte récursivement les feuilles de `values` pour ne pas écraser le style des traces."""
+    for key, value in values.items():
+        if isinstance(value, dict):
+            _assign_patch(patch_node[key], value)
+        else:
+            patch_node[key] = value
+
+
+def create_date_patch(selected_date, trace_arrays, x_range=None, layout=None):
+    """
+    Crée le Patch d'une figure : ligne de la date sélectionnée, plage x et données des traces.
+    `layout` (voir get_figure_layouts) décrit la figure rendue : la ligne de date n'est patchée
+    que si elle existe, les traces seulement si leur nombre correspond.
+    """
+    if layout is None:
+        layout = {'traces': len(trace_arrays), 'date_line': True}
+    patched = Patch()
+    
+    # La plage x est déjà appliquée côté navigateur ; la reporter évite que la figure la réinitialise
+    if x_range:
+        patched['layout']['xaxis']['range'] = x_range
+        patched['layout']['xaxis']['autorange'] = False
+    else:
+        patched['layout']['xaxis']['autorange'] = True
+    
+    if layout.get('date_line'):
+        shape = patched['layout']['shapes'][SELECTED_DATE_SHAPE_INDEX]
+        shape['x0'] = selected_date
+        shape['x1'] = selected_date
+    
+    if layout.get('traces') == len(trace_arrays):
+        for index, values in enumerate(trace_arrays):
+            _assign_patch(patched['data'][index], values)
+    
+    return patched
+
+
+def create_main_charts_with_zoom(df_graph, selected_date, selected_asset, display_options, config, x_range=None, lod=None):
     """Crée les graphiques principaux avec zoom synchronisé."""
     main_charts = []
+    if lod is None:
+        lod = prepare_chart_frames(df_graph, x_range)
     
     if 'price' in display_options:
         show_ma = 'moving_averages' in display_options
         show_bb = 'bollinger' in display_options
-        fig_price = create_price_chart(df_graph, selected_date, selected_asset, show_ma, show_bb, config)
+        fig_price = create_price_chart(lod['price'], selected_date, selected_asset, show_ma, show_bb, config)
         if x_range:
             fig_price.update_xaxes(range=x_range)
         main_charts.append(
@@ -319,7 +534,7 @@ def create_main_charts_with_zoom(df_graph, selected_date, selected_asset, displa
         )
     
     if 'recommendations' in display_options:
-        fig_reco = create_recommendations_chart(df_graph, selected_date)
+        fig_reco = create_recommendations_chart(lod['bars'](signal_strength), selected_date)
         if x_range:
             fig_reco.update_xaxes(range=x_range)
         main_charts.append(html.Div([
@@ -334,7 +549,7 @@ def create_main_charts_with_zoom(df_graph, selected_date, selected_asset, displa
         ]))
     
     if 'trend' in display_options:
-        fig_trend = create_trend_chart(df_graph, selected_date, config)
+        fig_trend = create_trend_chart(lod['bars']('adx'), selected_date, config)
         if x_range:
             fig_trend.update_xaxes(range=x_range)
         main_charts.append(html.Div([
@@ -350,7 +565,9 @@ def create_main_charts_with_zoom(df_graph, selected_date, selected_asset, displa
     
     # Graphiques vides pour les IDs manquants
     if 'price' not in display_options:
-        main_charts.append(html.Div(id='price-chart', style={'display': 'none'}))
+        main_charts.append(html.Div([
+            dcc.Graph(id='price-chart', figure={}, style={'display': 'none'})
+        ], style={'display': 'none'}))
     if 'recommendations' not in display_options:
         main_charts.append(html.Div([
             dcc.Graph(id='recommendations-chart', figure={}, style={'display': 'none'})
@@ -363,12 +580,14 @@ def create_main_charts_with_zoom(df_graph, selected_date, selected_asset, displa
     return main_charts
 
 
-def create_technical_charts_with_zoom(df_graph, selected_date, display_options, config, x_range=None):
+def create_technical_charts_with_zoom(df_graph, selected_date, display_options, config, x_range=None, lod=None):
     """Crée les graphiques techniques détaillés avec zoom synchronisé."""
     technical_charts = []
+    if lod is None:
+        lod = prepare_chart_frames(df_graph, x_range)
     
     if 'macd' in display_options:
-        fig_macd = create_macd_chart(df_graph, selected_date)
+        fig_macd = create_macd_chart(lod['lines']('macd'), selected_date)
         if x_range:
             fig_macd.update_xaxes(range=x_range)
         technical_charts.append(html.Div([
@@ -383,7 +602,7 @@ def create_technical_charts_with_zoom(df_graph, selected_date, display_options,
         ]))
     
     if 'volume' in display_options:
-        fig_volume = create_volume_chart(df_graph, selected_date)
+        fig_volume = create_volume_chart(lod['price'], selected_date)
         if x_range:
             fig_volume.update_xaxes(range=x_range)
         technical_charts.append(html.Div([
@@ -398,7 +617,7 @@ def create_technical_charts_with_zoom(df_graph, selected_date, display_options,
         ]))
     
     if 'rsi' in display_options:
-        fig_rsi = create_rsi_chart(df_graph, selected_date, config)
+        fig_rsi = create_rsi_chart(lod['lines']('rsi'), selected_date, config)
         if x_range:
             fig_rsi.update_xaxes(range=x_range)
         technical_charts.append(html.Div([
@@ -413,7 +632,7 @@ def create_technical_charts_with_zoom(df_graph, selected_date, display_options,
         ]))
     
     if 'stochastic' in display_options:
-        fig_stoch = create_stochastic_chart(df_graph, selected_date, config)
+        fig_stoch = create_stochastic_chart(lod['lines']('stochastic_k'), selected_date, config)
         if x_range:
             fig_stoch.update_xaxes(range=x_range)
         technical_charts.append(html.Div([
@@ -428,7 +647,7 @@ def create_technical_charts_with_zoom(df_graph, selected_date, display_options,
         ]))
     
     if 'patterns' in display_options:
-        fig_patterns = create_patterns_chart(df_graph, selected_date)
+        fig_patterns = create_patterns_chart(lod['bars'](has_pattern), selected_date)
         if x_range:
             fig_patterns.update_xaxes(range=x_range)
         technical_charts.append(html.Div([
@@ -8,58 +8,116 @@ import dash_bootstrap_components as dbc
 import pandas as pd
 from datetime import datetime
 
-from data_handler import fetch_and_prepare_data
 from config import load_user_assets, load_user_assets_with_categories, ASSET_CATEGORIES, get_asset_category
 from components.divergence_timeline import (
     create_divergence_timeline_chart,
     create_stats_summary,
     calculate_strategy_stats,
+    create_portfolio_backtest_section,
     generate_color_for_asset
 )
 
 
+HISTORY_FRESH_DAYS = 4      # dernière barre enregistrée tolérée (week-ends, jours fériés)
+HISTORY_START_TOLERANCE = 7  # l'historique enregistré doit couvrir le début de la période
+
+
+def split_by_stored_history(assets, period, config):
+    """
+    Sépare les actifs dont historical_data couvre toute la période (même configuration,
+    dernière barre récente) de ceux qu'il faut recalculer.
+
+    Returns:
+        tuple: (tickers lus en base, tickers à recalculer, date de début)
+    """
+    from data_handler import period_to_days
+    from db_schema import load_latest_bars
+    from config import config_fingerprint
+    
+    today = pd.Timestamp.today().normalize()
+    start = today - pd.Timedelta(days=period_to_days(period))
+    latest = load_latest_bars(assets, config_hash=config_fingerprint(config))
+    
+    covered = latest[
+        (latest['first_date'] <= start + pd.Timedelta(days=HISTORY_START_TOLERANCE)) &
+        (latest['date'] >= today - pd.Timedelta(days=HISTORY_FRESH_DAYS))
+    ].index
+    stored = [ticker for ticker in assets if ticker in covered]
+    missing = [ticker for ticker in assets if ticker not in covered]
+    
+    return stored, missing, start
+
+
 def get_all_divergences(assets, period, config):
     """
     Récupère toutes les divergences RSI pour tous les actifs sur une période.
+    - Actifs déjà enregistrés dans historical_data : lecture directe (index partiel des divergences)
+    - Autres actifs : analyses complètes réparties sur les cœurs disponibles (batch_analysis),
+      qui enregistrent leur historique pour les prochains appels
     """
+    from batch_analysis import analyze_tickers
+    from db_schema import load_divergences
+    from config import config_fingerprint
+    
     all_divergences = []
+    stored, missing, start = split_by_stored_history(assets, period, config)
+    config_hash = config_fingerprint(config)
     
-    for ticker in assets:
-        try:
-            print(f"📊 Analyse des divergences pour {ticker}...")
-            df = fetch_and_prepare_data(ticker, period=period, config=config)
-            
-            if df.empty:
-                continue
-            
-            if 'Date' in df.columns:
-                df['Date'] = pd.to_datetime(df['Date'])
-            
-            if 'rsi_divergence' in df.columns:
-                div_df = df[df['rsi_divergence'].isin(['bullish', 'bearish'])].copy()
-                
-                for _, row in div_df.iterrows():
-                    date_val = row.get('Date', row.get('date'))
-                    div_type = row.get('rsi_divergence')
-                    price = row.get('close', row.get('Close', None))
-                    
-                    if pd.notna(date_val) and pd.notna(div_type):
-                        all_divergences.append({
-                            'date': date_val,
-                            'ticker': ticker,
-                            'type': div_type,
-                            'price': float(price) if pd.notna(price) else None
-                        })
-                        
-        except Exception as e:
-            print(f"⚠️ Erreur pour {ticker}: {e}")
+    if stored:
+        db_df = load_divergences(stored, start.date(), config_hash=config_hash)
+        print(f"🗄️ Divergences lues en base pour {len(stored)} actifs ({len(db_df)} événements)")
+        all_divergences.extend(
+            {'date': row.date, 'ticker': row.ticker, 'type': row.type,
+             'price': float(row.price) if pd.notna(row.price) else None}
+            for row in db_df.itertuples(index=False)
+        )
+    
+    columns = ['Date', 'rsi_divergence', 'close']
+    frames = analyze_tickers(missing, period, config=config, columns=columns) if missing else {}
+    
+    for ticker, df in frames.items():
+        if df.empty or 'rsi_divergence' not in df.columns:
             continue
+        
+        div_df = df[df['rsi_divergence'].isin(['bullish', 'bearish'])]
+        dates = pd.to_datetime(div_df['Date'])
+        prices = div_df['close'] if 'close' in div_df.columns else pd.Series(None, index=div_df.index)
+        
+        for date_val, div_type, price in zip(dates, div_df['rsi_divergence'], prices):
+            if pd.notna(date_val):
+                all_divergences.append({
+                    'date': date_val,
+                    'ticker': ticker,
+                    'type': div_type,
+                    'price': float(price) if pd.notna(price) else None
+                })
     
     all_divergences.sort(key=lambda x: x['date'])
     
     return all_divergences
 
 
+def get_portfolio_backtest(assets, period, all_divergences, holding_period, max_positions):
+    """
+    Backtest de portefeuille des divergences (capital partagé entre tous les actifs).
+    Retourne None si les prix ne peuvent pas être téléchargés.
+    """
+    from portfolio_backtest import load_price_matrices, run_portfolio_backtest
+    
+    try:
+        prices = load_price_matrices(assets, period)
+        if prices is None:
+            return None
+        result = run_portfolio_backtest(all_divergences, prices, holding_period=holding_period,
+                                        max_positions=max_positions)
+        print(f"💼 Backtest portefeuille: {len(assets)} actifs, {result['stats']['num_trades']} trades, "
+              f"{result['stats']['total_return']:+.1f}%")
+        return result
+    except Exception as e:
+        print(f"❌ Erreur backtest portefeuille: {e}")
+        return None
+
+
 def filter_assets_by_category(assets, category_filter):
     """
     Filtre les actifs par catégorie.
@@ -104,10 +162,12 @@ def register_divergence_timeline_callbacks(app):
          State('period-dropdown', 'value'),
          State('config-store', 'data'),
          State('holding-period-input', 'value'),
-         State('timeline-category-filter', 'value')],
+         State('timeline-category-filter', 'value'),
+         State('max-positions-input', 'value')],
         prevent_initial_call=True
     )
-    def calculate_divergence_timeline(n_clicks, assets, period, config, holding_period, category_filter):
+    def calculate_divergence_timeline(n_clicks, assets, period, config, holding_period, category_filter,
+                                      max_positions):
         if not assets:
             assets = load_user_assets()
         
@@ -120,6 +180,9 @@ def register_divergence_timeline_callbacks(app):
         if category_filter is None:
             category_filter = 'all'
         
+        if max_positions is None or max_positions < 1:
+            max_positions = 10
+        
         # Filtrer les actifs par catégorie
         filtered_assets = filter_assets_by_category(assets, category_filter)
         
@@ -173,6 +236,9 @@ def register_divergence_timeline_callbacks(app):
         # Calculer les statistiques
         stats = calculate_strategy_stats(all_divergences, holding_period)
         
+        # Simulation de portefeuille sur tous les actifs
+        backtest = get_portfolio_backtest(filtered_assets, period, all_divergences, holding_period, max_positions)
+        
         # Créer le graphique
         fig = create_divergence_timeline_chart(all_divergences, full_label)
         
@@ -207,6 +273,9 @@ def register_divergence_timeline_callbacks(app):
                 ])
             ], color="dark", className="mb-3"),
             
+            # Portefeuille simulé
+            create_portfolio_backtest_section(backtest, holding_period, max_positions),
+            
             # Graphique
             dcc.Graph(
                 figure=fig,
@@ -9,6 +9,7 @@ from fundamental_analyzer import (
     get_fundamental_data, calculate_fundamental_score, format_large_number
 )
 from components import create_fundamental_details
+from store_codec import encode_frame
 
 
 def register_fundamental_callbacks(app):
@@ -68,7 +69,7 @@ def register_fundamental_callbacks(app):
         # Stocker les données
         store_data = {
             'current': current_data,
-            'history': quarterly_history.to_dict('records') if not quarterly_history.empty else []
+            'history': encode_frame(quarterly_history) if not quarterly_history.empty else []
         }
         
         return header, details, store_data
\ No newline at end of file
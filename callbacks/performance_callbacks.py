@@ -7,22 +7,43 @@ from dash import html, Input, Output, State
 import dash_bootstrap_components as dbc
 import pandas as pd
 
+from store_codec import encode_store, decode_frame, is_encoded_frame
 from indicator_performance import (
     calculate_performance_history,
     calculate_performance_history_with_combinations,
     analyze_signal_combinations,
     get_combination_summary,
-    calculate_accuracy_stats
+    calculate_accuracy_stats,
+    walk_forward_evaluation,
+    validate_category_weights
 )
+from signal_statistics import evaluate_signal_significance
 from components.performance_charts import (
     create_performance_section,
     create_performance_summary_cards,
     create_combination_ranking_table,
     create_global_performance_summary,
+    create_walk_forward_table,
     HORIZON_NAMES
 )
 
 
+def _read_performance_cache(cached_perf):
+    """
+    Historique de performance et tests de significativité mis en cache dans performance-store.
+    Les horizons redeviennent des entiers (clés JSON en texte) ; significativité None si absente.
+    """
+    if 'history' not in cached_perf:
+        # Ancien format : {nom: historique}
+        return {k: decode_frame(v) for k, v in cached_perf.items()}, None
+    performance_history = {k: decode_frame(v) for k, v in cached_perf['history'].items()}
+    significance = cached_perf.get('significance')
+    if significance is not None:
+        significance = {name: {int(h): stats for h, stats in by_horizon.items()}
+                        for name, by_horizon in significance.items()}
+    return performance_history, significance
+
+
 def register_performance_callbacks(app):
     """Enregistre les callbacks de performance."""
     
@@ -30,14 +51,15 @@ def register_performance_callbacks(app):
         [Output('performance-content', 'children'),
          Output('performance-store', 'data')],
         [Input('analyze-performance-btn', 'n_clicks'),
-         Input('performance-horizon-filter', 'value')],
+         Input('performance-horizon-filter', 'value'),
+         Input('walk-forward-scheme', 'value')],
         [State('full-data-store', 'data'),
          State('config-store', 'data'),
          State('asset-dropdown', 'value'),
          State('performance-store', 'data')],
         prevent_initial_call=True
     )
-    def update_performance_analysis(n_clicks, selected_horizons, data, config, asset, cached_perf):
+    def update_performance_analysis(n_clicks, selected_horizons, walk_forward_scheme, data, config, asset, cached_perf):
         from dash import callback_context
         ctx = callback_context
         
@@ -45,13 +67,14 @@ def register_performance_callbacks(app):
             return html.P("Chargez d'abord des données.", className="text-muted"), {}
         
         triggered = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else None
+        significance = None
         
-        # Si on a des données en cache et qu'on change juste le filtre
-        if triggered == 'performance-horizon-filter' and cached_perf:
-            performance_history = {k: pd.DataFrame(v) for k, v in cached_perf.items()}
+        # Si on a des données en cache et qu'on change juste le filtre (horizons ou walk-forward)
+        if triggered in ('performance-horizon-filter', 'walk-forward-scheme') and cached_perf:
+            performance_history, significance = _read_performance_cache(cached_perf)
         elif triggered == 'analyze-performance-btn' or not cached_perf:
             # Recalculer la performance avec les combinaisons
-            df = pd.DataFrame(data)
+            df = decode_frame(data)
             df['Date'] = pd.to_datetime(df['Date'])
             
             horizons = [1, 2, 5, 10, 20]
@@ -60,14 +83,14 @@ def register_performance_callbacks(app):
             if not performance_history:
                 return html.P("Pas assez de données pour analyser la performance.", className="text-muted"), {}
         else:
-            performance_history = {k: pd.DataFrame(v) for k, v in cached_perf.items()}
+            performance_history, significance = _read_performance_cache(cached_perf)
         
         if not selected_horizons:
             selected_horizons = [1, 2, 5, 10, 20]
         
         # Récupérer le prix initial pour le calcul de performance
-        df = pd.DataFrame(data)
-        initial_price = df['close'].iloc[0] if 'close' in df.columns else None
+        prices = decode_frame(data, columns=['Date', 'close'])
+        initial_price = prices['close'].iloc[0] if 'close' in prices.columns else None
         
         # Séparer indicateurs individuels et combinaisons
         individual_perf = {k: v for k, v in performance_history.items() if k.startswith('📊')}
@@ -76,7 +99,22 @@ def register_performance_callbacks(app):
         
         # Créer le classement des combinaisons
         all_combos = {**buy_combos, **sell_combos}
-        combo_summary = get_combination_summary(all_combos, selected_horizons)
+        # Tests de significativité (permutation + bootstrap) de tous les signaux :
+        # calculés avec l'historique, puis relus du cache quand seuls les filtres changent
+        if significance is None:
+            try:
+                significance = evaluate_signal_significance(performance_history, prices, [1, 2, 5, 10, 20])
+            except Exception as e:
+                print(f"⚠️ Tests de significativité impossibles: {e}")
+                significance = {}
+        combo_summary = get_combination_summary(all_combos, selected_horizons, significance)
+        
+        # Validation walk-forward (hors échantillon) des poids de la configuration
+        walk_forward = walk_forward_evaluation(performance_history, [1, 2, 5, 10, 20],
+                                               scheme=walk_forward_scheme or 'expanding')
+        validation_horizon = 5 if 5 in selected_horizons else sorted(selected_horizons)[0]
+        validation, correlation = (validate_category_weights(walk_forward, config, validation_horizon)
+                                   if walk_forward else (None, None))
         
         # Créer le contenu
         content = html.Div([
@@ -84,7 +122,7 @@ def register_performance_callbacks(app):
             html.Div([
                 html.H5(f"📊 Backtesting des Indicateurs — {asset}", className="mb-2"),
                 html.P([
-                    f"Basé sur {len(pd.DataFrame(data))} jours de données. ",
+                    f"Basé sur {data['length'] if is_encoded_frame(data) else len(data)} jours de données. ",
                     html.Strong("Les barres représentent le gain/perte réel en %"),
                     " si on avait suivi le signal. ",
                     html.Strong("Perf. Σ = somme des rendements"),
@@ -102,15 +140,28 @@ def register_performance_callbacks(app):
             html.H5("🏆 Classement des Combinaisons de Signaux", className="mb-3"),
             html.P([
                 "Classement basé sur la précision (% de signaux corrects). ",
-                "La colonne 'Perf. Σ' montre la performance cumulée en suivant chaque combinaison."
+                "La colonne 'Perf. Σ' montre la performance cumulée en suivant chaque combinaison. ",
+                "La p-value indique si la précision se distingue du hasard (survolez un horizon pour ",
+                "son intervalle de confiance)."
             ], className="text-muted small mb-3"),
             create_combination_ranking_table(combo_summary, selected_horizons),
             
             html.Hr(className="my-4"),
             
+            # === SECTION 1b: VALIDATION WALK-FORWARD ===
+            html.H5("🧪 Validation Walk-Forward (hors échantillon)", className="mb-3"),
+            html.P([
+                "Les signaux sont évalués sur des périodes de test successives, jamais utilisées ",
+                "pour l'entraînement : une précision qui chute hors échantillon signale un poids ",
+                "surévalué pour cet actif."
+            ], className="text-muted small mb-3"),
+            create_walk_forward_table(walk_forward, validation, correlation, validation_horizon),
+            
+            html.Hr(className="my-4"),
+            
             # === SECTION 2: INDICATEURS INDIVIDUELS ===
             html.H5("📈 Performance des Indicateurs Individuels", className="mb-3"),
-            create_performance_summary_cards(individual_perf, selected_horizons),
+            create_performance_summary_cards(individual_perf, selected_horizons, significance),
             
             html.Hr(),
             
@@ -136,8 +187,8 @@ def register_performance_callbacks(app):
             ], start_collapsed=True, always_open=True),
         ])
         
-        # Convertir pour le cache (DataFrame -> dict)
-        cache_data = {k: v.to_dict('records') for k, v in performance_history.items()}
+        # Convertir pour le cache (format colonnaire)
+        cache_data = {'history': encode_store(performance_history), 'significance': significance}
         
         return content, cache_data
     
@@ -0,0 +1,49 @@
+# callbacks/screener_callbacks.py
+"""
+Callbacks du screener fondamental.
+"""
+from dash import Input, Output, State, ctx
+from dash.exceptions import PreventUpdate
+
+from config import load_user_assets
+from fundamental_screener import get_snapshot, refresh_snapshot, start_background_refresh
+from components.screener_table import create_screener_table
+
+
+def register_screener_callbacks(app):
+    """Enregistre les callbacks du screener fondamental."""
+
+    # Snapshot du jour calculé en arrière-plan (un seul worker grâce au verrou consultatif)
+    from db_manager import DATABASE_URL
+    if DATABASE_URL:
+        start_background_refresh(load_user_assets)
+
+    @app.callback(
+        Output("collapse-screener", "is_open"),
+        Input("collapse-screener-btn", "n_clicks"),
+        State("collapse-screener", "is_open"),
+        prevent_initial_call=True
+    )
+    def toggle_screener_collapse(n_clicks, is_open):
+        return not is_open
+
+    @app.callback(
+        Output('screener-content', 'children'),
+        [Input('collapse-screener', 'is_open'),
+         Input('refresh-screener-btn', 'n_clicks'),
+         Input('assets-store', 'data')],
+        prevent_initial_call=True
+    )
+    def update_screener(is_open, refresh_clicks, assets):
+        """Affiche le snapshot ; le bouton force une récupération complète de la liste."""
+        triggered = ctx.triggered_id
+        if triggered != 'refresh-screener-btn' and not is_open:
+            raise PreventUpdate
+
+        tickers = assets or load_user_assets()
+
+        if triggered == 'refresh-screener-btn':
+            refresh_snapshot(tickers)
+
+        snapshot, snapshot_date = get_snapshot(tickers)
+        return create_screener_table(snapshot, snapshot_date)
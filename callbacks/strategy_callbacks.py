@@ -7,6 +7,7 @@ import dash_bootstrap_components as dbc
 import pandas as pd
 
 from trading_strategies import create_strategy_comparison_data
+from store_codec import decode_frame
 from components.strategy_charts import create_strategies_section
 
 
@@ -25,7 +26,7 @@ def register_strategy_callbacks(app):
         if not data or not asset:
             return html.P("Chargez d'abord des données.", className="text-muted")
         
-        df = pd.DataFrame(data)
+        df = decode_frame(data)
         df['Date'] = pd.to_datetime(df['Date'])
         
         # Récupérer le spread depuis la config
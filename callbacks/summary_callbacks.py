@@ -7,266 +7,244 @@ from dash import html, Input, Output, State, ALL, ctx, callback_context
 import dash_bootstrap_components as dbc
 import pandas as pd
 import numpy as np
-import yfinance as yf
 from datetime import datetime
 
-from config import load_user_assets, get_default_config, RSI, DIVERGENCE
-from components.summary_table import create_assets_summary_table
+from config import load_user_assets, get_default_config, RSI
+from components.summary_table import create_assets_summary_table, staleness_days, SUMMARY_STALE_DAYS
 
 
-def fetch_minimal_data_for_divergence(ticker, config=None):
+SUMMARY_PERIOD = "3mo"         # suffisant pour RSI 14 + divergence lookback 14*2 + marge
+SUMMARY_MIN_ROWS = 50          # minimum nécessaire pour des calculs fiables
+SUMMARY_DIVERGENCE_ROWS = 30   # divergences recherchées sur les 30 dernières séances
+
+
+def _summary_error(ticker):
+    return {
+        'ticker': ticker,
+        'rsi_divergence': 'none',
+        'last_div_date': None,
+        'last_div_type': 'none',
+        'current_price': None,
+        'rsi_value': None,
+        'recommendation': 'Neutre',
+        'error': True
+    }
+
+
+def summary_recommendation(rsi_values, divergence_codes, config):
     """
-    Télécharge uniquement les données nécessaires pour calculer la divergence RSI.
-    Beaucoup plus léger que fetch_and_prepare_data car:
-    - Période courte (3 mois max au lieu de 6mo+)
-    - Calcule seulement RSI et divergence (pas MACD, Bollinger, patterns, etc.)
-    
-    Args:
-        ticker: Symbole de l'actif
-        config: Configuration (optionnel)
-    
-    Returns:
-        dict avec les infos nécessaires ou None si erreur
+    Recommandation simplifiée du récapitulatif : priorité à la divergence, sinon RSI extrême.
+    Distincte de la recommandation du moteur (historical_data / asset_latest_state.recommendation).
     """
-    if config is None:
-        config = get_default_config()
-    
-    try:
-        # Télécharger seulement 3 mois de données (suffisant pour RSI 14 + divergence lookback 14*2 + marge)
-        df = yf.download(ticker, period="3mo", auto_adjust=True, progress=False)
-        
-        if df.empty or len(df) < 50:  # Minimum nécessaire pour des calculs fiables
-            return None
-        
-        # Normaliser les colonnes
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = df.columns.droplevel(1)
-        df.columns = df.columns.str.lower()
-        
-        # Renommer pour cohérence
-        df.rename(columns={
-            'open': 'Open',
-            'high': 'High',
-            'low': 'Low',
-            'close': 'Close',
-            'volume': 'Volume'
-        }, inplace=True)
-        
-        # Calculer le RSI (minimal)
-        rsi_cfg = config.get('rsi', RSI)
-        rsi_period = rsi_cfg.get('period', 14)
-        
-        delta = df['Close'].diff()
-        gain = delta.where(delta > 0, 0)
-        loss = (-delta).where(delta < 0, 0)
-        
-        avg_gain = gain.rolling(window=rsi_period, min_periods=rsi_period).mean()
-        avg_loss = loss.rolling(window=rsi_period, min_periods=rsi_period).mean()
-        
-        # Éviter division par zéro
-        rs = avg_gain / avg_loss.replace(0, np.nan)
-        df['rsi'] = 100 - (100 / (1 + rs))
-        
-        # Détecter les divergences RSI (version simplifiée)
-        df['rsi_divergence'] = detect_rsi_divergence_fast(df, config)
-        
-        # Calculer la recommandation simplifiée basée sur RSI et divergence
-        df['recommendation'] = calculate_simple_recommendation(df, config)
-        
-        # Réinitialiser l'index pour avoir la colonne Date
-        df.reset_index(inplace=True)
-        df.rename(columns={'index': 'Date', 'date': 'Date'}, inplace=True)
-        if 'Date' not in df.columns and df.index.name:
-            df = df.reset_index()
-        
-        return df
-        
-    except Exception as e:
-        print(f"⚠️ Erreur fetch_minimal_data_for_divergence pour {ticker}: {e}")
-        return None
+    rsi_cfg = config.get('rsi', RSI)
+    rsi_values = np.asarray(rsi_values, dtype=float)
+    divergence_codes = np.asarray(divergence_codes)
+    recommendation = np.select(
+        [divergence_codes == 1, divergence_codes == -1,
+         rsi_values <= rsi_cfg.get('oversold', 30), rsi_values >= rsi_cfg.get('overbought', 70)],
+        ['Acheter', 'Vendre', 'Acheter', 'Vendre'],
+        default='Neutre'
+    )
+    recommendation[np.isnan(rsi_values)] = 'Neutre'
+    return recommendation
 
 
-def detect_rsi_divergence_fast(df, config):
+def get_assets_rsi_summary(tickers, config=None):
     """
-    Version optimisée de la détection de divergence RSI.
-    Ne regarde que les derniers jours (pas tout l'historique).
-    """
-    div_cfg = config.get('divergence', DIVERGENCE)
-    rsi_low = div_cfg.get('rsi_low_threshold', 40)
-    rsi_high = div_cfg.get('rsi_high_threshold', 60)
-    lookback = div_cfg.get('lookback_period', 14)
+    Récupère les informations de divergence RSI de plusieurs actifs en une fois.
+    Un seul téléchargement groupé, puis RSI et divergences calculés sur le panel
+    dates × tickers (panel_engine) : le coût varie peu avec le nombre d'actifs.
     
-    divergences = ['none'] * len(df)
+    Returns:
+        list: Données résumées par actif (même ordre que `tickers`)
+    """
+    from panel_engine import download_panel, compute_panel_indicators, panel_latest, panel_last_events, DIVERGENCE_CODES
     
-    # Ne calculer que sur les 30 derniers jours (suffisant pour détecter une divergence récente)
-    start_idx = max(lookback * 2 + 5, len(df) - 30)
+    if config is None:
+        config = get_default_config()
     
-    def find_local_min(series, idx, window=5):
-        if idx < window or idx >= len(series) - window:
-            return False
-        val = series.iloc[idx]
-        left_vals = series.iloc[idx-window:idx]
-        right_vals = series.iloc[idx+1:idx+window+1]
-        return val <= left_vals.min() and val <= right_vals.min()
+    panel = download_panel(tickers, period=SUMMARY_PERIOD)
+    if panel is None:
+        return [_summary_error(ticker) for ticker in tickers]
     
-    def find_local_max(series, idx, window=5):
-        if idx < window or idx >= len(series) - window:
-            return False
-        val = series.iloc[idx]
-        left_vals = series.iloc[idx-window:idx]
-        right_vals = series.iloc[idx+1:idx+window+1]
-        return val >= left_vals.max() and val >= right_vals.max()
+    compute_panel_indicators(panel, config, indicators=['rsi', 'divergence'],
+                             recent_rows=SUMMARY_DIVERGENCE_ROWS)
+    latest = panel_latest(panel, ['close', 'rsi', 'rsi_divergence'])
+    last_events = panel_last_events(panel, 'rsi_divergence')
     
-    window = 5
-    min_distance = 5
-    max_distance = lookback * 2
+    latest['recommendation'] = summary_recommendation(latest['rsi'], latest['rsi_divergence'], config)
     
-    for i in range(start_idx, len(df) - window):
-        try:
-            rsi = df['rsi'].iloc[i]
-            price = df['Close'].iloc[i]
-            
-            if pd.isna(rsi):
-                continue
-            
-            # Divergence haussière
-            if find_local_min(df['Close'], i, window) and rsi < rsi_low:
-                for j in range(i - min_distance, max(i - max_distance, lookback), -1):
-                    if find_local_min(df['Close'], j, window):
-                        prev_price = df['Close'].iloc[j]
-                        prev_rsi = df['rsi'].iloc[j]
-                        
-                        if pd.isna(prev_rsi):
-                            continue
-                        
-                        if price < prev_price and rsi > prev_rsi:
-                            divergences[i] = 'bullish'
-                            break
-            
-            # Divergence baissière
-            elif find_local_max(df['Close'], i, window) and rsi > rsi_high:
-                for j in range(i - min_distance, max(i - max_distance, lookback), -1):
-                    if find_local_max(df['Close'], j, window):
-                        prev_price = df['Close'].iloc[j]
-                        prev_rsi = df['rsi'].iloc[j]
-                        
-                        if pd.isna(prev_rsi):
-                            continue
-                        
-                        if price > prev_price and rsi < prev_rsi:
-                            divergences[i] = 'bearish'
-                            break
-                            
-        except (IndexError, KeyError):
+    summaries = []
+    for ticker in tickers:
+        if ticker not in latest.index or latest.at[ticker, 'length'] < SUMMARY_MIN_ROWS:
+            summaries.append(_summary_error(ticker))
             continue
+        
+        row = latest.loc[ticker]
+        event = last_events.loc[ticker]
+        summaries.append({
+            'ticker': ticker,
+            'rsi_divergence': DIVERGENCE_CODES[int(row['rsi_divergence'])],
+            'last_div_date': event['date'] if event['code'] != 0 else None,
+            'last_div_type': DIVERGENCE_CODES[int(event['code'])],
+            'current_price': float(row['close']) if pd.notna(row['close']) else 0,
+            'rsi_value': float(row['rsi']) if pd.notna(row['rsi']) else 50,
+            'recommendation': row['recommendation'],
+            'as_of': row['Date'],
+            'error': False
+        })
     
-    return divergences
+    _save_summary_state(summaries, config)
+    return summaries
 
 
-def calculate_simple_recommendation(df, config):
+def _save_summary_state(summaries, config):
     """
-    Calcul simplifié de la recommandation basé principalement sur RSI et divergence.
-    Pour le tableau récapitulatif, on n'a pas besoin de tous les indicateurs.
+    Enregistre les états calculés dans asset_latest_state (best effort).
+    La recommandation simplifiée n'est pas enregistrée : elle se déduit de rsi et rsi_divergence,
+    la colonne recommendation reste réservée au moteur de recommandations.
     """
-    rsi_cfg = config.get('rsi', RSI)
-    recommendations = []
+    from db_schema import save_latest_state
+    from config import config_fingerprint
     
-    for i in range(len(df)):
-        rsi = df['rsi'].iloc[i] if 'rsi' in df.columns else None
-        div = df['rsi_divergence'].iloc[i] if 'rsi_divergence' in df.columns else 'none'
-        
-        if pd.isna(rsi):
-            recommendations.append('Neutre')
-            continue
-        
-        # Priorité à la divergence
-        if div == 'bullish':
-            recommendations.append('Acheter')
-        elif div == 'bearish':
-            recommendations.append('Vendre')
-        # Sinon basé sur RSI extrême
-        elif rsi <= rsi_cfg.get('oversold', 30):
-            recommendations.append('Acheter')
-        elif rsi >= rsi_cfg.get('overbought', 70):
-            recommendations.append('Vendre')
-        else:
-            recommendations.append('Neutre')
+    states = [{
+        'ticker': s['ticker'],
+        'bar_date': pd.Timestamp(s['as_of']).date(),
+        'close': s['current_price'],
+        'rsi': s['rsi_value'],
+        'rsi_divergence': s['rsi_divergence'],
+        'last_div_date': pd.Timestamp(s['last_div_date']).date() if s['last_div_date'] is not None else None,
+        'last_div_type': s['last_div_type'],
+    } for s in summaries if not s.get('error')]
     
-    return recommendations
+    try:
+        save_latest_state(states, config_hash=config_fingerprint(config))
+    except Exception as e:
+        print(f"⚠️ Dernier état non enregistré: {e}")
 
 
-def get_asset_rsi_summary(ticker, config):
+def get_stored_summaries(tickers):
     """
-    Récupère les informations de divergence RSI pour un actif.
-    VERSION OPTIMISÉE: Utilise fetch_minimal_data_for_divergence au lieu de fetch_and_prepare_data
+    Dernier état enregistré des actifs (asset_latest_state) : une requête, aucun téléchargement.
+    Chaque ligne porte sa date de barre ('as_of') pour l'indicateur d'ancienneté.
+    La recommandation affichée est la règle simplifiée du récapitulatif, recalculée
+    depuis le RSI et la divergence enregistrés (même sens qu'après un rafraîchissement).
     
     Returns:
-        dict: Données résumées pour l'actif
+        dict: ticker -> données résumées (actifs sans état enregistré absents)
     """
-    try:
-        # Utiliser la fonction optimisée au lieu de fetch_and_prepare_data
-        df = fetch_minimal_data_for_divergence(ticker, config)
-        
-        if df is None or df.empty:
-            return {
-                'ticker': ticker,
-                'rsi_divergence': 'none',
-                'last_div_date': None,
-                'last_div_type': 'none',
-                'current_price': None,
-                'rsi_value': None,
-                'recommendation': 'Neutre',
-                'error': True
-            }
-        
-        # Convertir la date si nécessaire
-        if 'Date' in df.columns:
-            df['Date'] = pd.to_datetime(df['Date'])
-        
-        # Dernière ligne pour les valeurs actuelles
-        last_row = df.iloc[-1]
-        
-        current_price = last_row.get('Close', 0)
-        rsi_value = last_row.get('rsi', 50)
-        current_divergence = last_row.get('rsi_divergence', 'none')
-        recommendation = last_row.get('recommendation', 'Neutre')
-        
-        # Trouver la dernière divergence dans l'historique (3 derniers mois)
-        last_div_date = None
-        last_div_type = 'none'
-        
-        if 'rsi_divergence' in df.columns:
-            # Filtrer les lignes avec une divergence
-            div_df = df[df['rsi_divergence'].isin(['bullish', 'bearish'])].copy()
-            
-            if not div_df.empty:
-                last_div_row = div_df.iloc[-1]
-                last_div_date = last_div_row.get('Date', last_div_row.get('date'))
-                last_div_type = last_div_row.get('rsi_divergence', 'none')
-        
-        return {
+    from db_schema import load_latest_state
+    from panel_engine import DIVERGENCE_CODES
+    
+    states = load_latest_state(tickers)
+    divergence_codes = {label: code for code, label in DIVERGENCE_CODES.items()}
+    states['summary_recommendation'] = summary_recommendation(
+        states['rsi'], states['rsi_divergence'].map(divergence_codes).fillna(0), get_default_config()
+    )
+    summaries = {}
+    for ticker, row in states.iterrows():
+        summaries[ticker] = {
             'ticker': ticker,
-            'rsi_divergence': current_divergence if pd.notna(current_divergence) else 'none',
-            'last_div_date': last_div_date,
-            'last_div_type': last_div_type if pd.notna(last_div_type) else 'none',
-            'current_price': float(current_price) if pd.notna(current_price) else 0,
-            'rsi_value': float(rsi_value) if pd.notna(rsi_value) else 50,
-            'recommendation': recommendation if pd.notna(recommendation) else 'Neutre',
+            'rsi_divergence': row['rsi_divergence'] or 'none',
+            'last_div_date': row['last_div_date'] if pd.notna(row['last_div_date']) else None,
+            'last_div_type': row['last_div_type'] or 'none',
+            'current_price': float(row['close']) if pd.notna(row['close']) else 0,
+            'rsi_value': float(row['rsi']) if pd.notna(row['rsi']) else None,
+            'recommendation': row['summary_recommendation'],
+            'as_of': row['bar_date'],
+            'stored': True,
             'error': False
         }
-        
-    except Exception as e:
-        print(f"Erreur lors de l'analyse de {ticker}: {e}")
-        return {
-            'ticker': ticker,
-            'rsi_divergence': 'none',
-            'last_div_date': None,
-            'last_div_type': 'none',
-            'current_price': None,
-            'rsi_value': None,
-            'recommendation': 'Neutre',
-            'error': True
-        }
+    return summaries
+
+
+def get_asset_rsi_summary(ticker, config):
+    """
+    Récupère les informations de divergence RSI pour un actif.
+    
+    Returns:
+        dict: Données résumées pour l'actif
+    """
+    return get_assets_rsi_summary([ticker], config)[0]
+
+
+def _not_loaded(ticker):
+    """Placeholder pour un actif ni rafraîchi ni enregistré."""
+    return {
+        'ticker': ticker,
+        'rsi_divergence': 'none',
+        'last_div_date': None,
+        'last_div_type': 'none',
+        'current_price': None,
+        'rsi_value': None,
+        'recommendation': 'Neutre',
+        'not_loaded': True  # Flag pour indiquer que ce n'est pas chargé
+    }
+
+
+def build_summary_content(summary_data, assets, errors=None, footer=""):
+    """Construit le contenu du récapitulatif (badges, tableau, messages)."""
+    # Trier: d'abord les actifs avec divergences actives, puis par ticker
+    def sort_key(x):
+        if x.get('not_loaded'):
+            return (3, x['ticker'])  # Non chargés en dernier
+        if x['rsi_divergence'] == 'bullish':
+            return (0, x['ticker'])
+        elif x['rsi_divergence'] == 'bearish':
+            return (1, x['ticker'])
+        else:
+            return (2, x['ticker'])
+    
+    summary_data = sorted(summary_data, key=sort_key)
+    
+    # Filtrer les actifs non chargés pour l'affichage principal
+    loaded_data = [d for d in summary_data if not d.get('not_loaded')]
+    not_loaded_tickers = [d['ticker'] for d in summary_data if d.get('not_loaded')]
+    
+    # Créer le contenu
+    if loaded_data:
+        content = [create_assets_summary_table(loaded_data)]
+    else:
+        content = [create_assets_summary_table(None, assets_list=assets)]
+    
+    # Ajouter un message pour les erreurs
+    if errors:
+        content.insert(0, dbc.Alert(
+            f"⚠️ Erreur pour: {', '.join(errors)}", 
+            color="warning", 
+            dismissable=True,
+            className="mb-2"
+        ))
+    
+    # Ajouter un message pour les actifs non chargés
+    if not_loaded_tickers:
+        content.append(html.Div([
+            html.Small([
+                "📋 Non analysés: ",
+                ", ".join(not_loaded_tickers)
+            ], className="text-muted")
+        ], className="mt-2"))
+    
+    # Ajouter un résumé
+    num_bullish = sum(1 for d in loaded_data if d['rsi_divergence'] == 'bullish')
+    num_bearish = sum(1 for d in loaded_data if d['rsi_divergence'] == 'bearish')
+    num_stale = sum(1 for d in loaded_data if staleness_days(d.get('as_of')) > SUMMARY_STALE_DAYS)
+    
+    summary_badges = html.Div([
+        html.Small([
+            f"Analysés: {len(loaded_data)}/{len(assets)} | ",
+            html.Span([
+                dbc.Badge(f"🟢 {num_bullish} Achats", color="success", className="me-1"),
+                dbc.Badge(f"🔴 {num_bearish} Ventes", color="danger", className="me-1"),
+                dbc.Badge(f"⏱️ {num_stale} anciens", color="warning", className="me-1") if num_stale else None,
+            ]),
+            footer
+        ], className="text-muted")
+    ], className="mb-2")
+    
+    content.insert(0, summary_badges)
+    
+    return html.Div(content)
 
 
 def register_summary_callbacks(app):
@@ -279,10 +257,16 @@ def register_summary_callbacks(app):
         prevent_initial_call='initial_duplicate'
     )
     def initialize_summary_table(assets):
-        """Affiche le tableau avec les actifs listés mais sans données chargées."""
+        """Affiche le dernier état enregistré des actifs, ou les actifs sans données."""
         if not assets:
             assets = load_user_assets()
         
+        # Dernier état enregistré : une seule requête, sans téléchargement
+        stored = get_stored_summaries(assets) if assets else {}
+        if stored:
+            summary_data = [stored.get(ticker) or _not_loaded(ticker) for ticker in assets]
+            return build_summary_content(summary_data, assets, footer=" | 🗄️ Dernier état enregistré")
+        
         # Créer le tableau avec juste les noms des actifs
         table = create_assets_summary_table(None, assets_list=assets)
         
@@ -344,94 +328,25 @@ def register_summary_callbacks(app):
         import time
         start_time = time.time()
         
-        for ticker in tickers_to_refresh:
-            print(f"📊 Analyse rapide de {ticker}...")
-            data = get_asset_rsi_summary(ticker, config)
+        print(f"📊 Analyse groupée de {len(tickers_to_refresh)} actifs...")
+        for data in get_assets_rsi_summary(tickers_to_refresh, config):
             summary_data.append(data)
             
             if data.get('error'):
-                errors.append(ticker)
+                errors.append(data['ticker'])
         
         elapsed = time.time() - start_time
         print(f"✅ Analyse de {len(tickers_to_refresh)} actifs en {elapsed:.2f}s")
         
-        # Si on n'a rafraîchi qu'une partie, garder les actifs non rafraîchis dans l'affichage
-        # avec les données en cache si disponibles
+        # Si on n'a rafraîchi qu'une partie, garder les autres actifs avec leur dernier état enregistré
         if triggered != 'refresh-all-summary-btn':
             refreshed_tickers = set(t['ticker'] for t in summary_data)
-            for ticker in assets:
-                if ticker not in refreshed_tickers:
-                    # Ajouter un placeholder pour les actifs non rafraîchis
-                    summary_data.append({
-                        'ticker': ticker,
-                        'rsi_divergence': 'none',
-                        'last_div_date': None,
-                        'last_div_type': 'none',
-                        'current_price': None,
-                        'rsi_value': None,
-                        'recommendation': 'Neutre',
-                        'not_loaded': True  # Flag pour indiquer que ce n'est pas chargé
-                    })
-        
-        # Trier: d'abord les actifs avec divergences actives, puis par ticker
-        def sort_key(x):
-            if x.get('not_loaded'):
-                return (3, x['ticker'])  # Non chargés en dernier
-            if x['rsi_divergence'] == 'bullish':
-                return (0, x['ticker'])
-            elif x['rsi_divergence'] == 'bearish':
-                return (1, x['ticker'])
-            else:
-                return (2, x['ticker'])
-        
-        summary_data.sort(key=sort_key)
-        
-        # Filtrer les actifs non chargés pour l'affichage principal
-        loaded_data = [d for d in summary_data if not d.get('not_loaded')]
-        not_loaded_tickers = [d['ticker'] for d in summary_data if d.get('not_loaded')]
-        
-        # Créer le contenu
-        if loaded_data:
-            content = [create_assets_summary_table(loaded_data)]
-        else:
-            content = [create_assets_summary_table(None, assets_list=assets)]
-        
-        # Ajouter un message pour les erreurs
-        if errors:
-            content.insert(0, dbc.Alert(
-                f"⚠️ Erreur pour: {', '.join(errors)}", 
-                color="warning", 
-                dismissable=True,
-                className="mb-2"
-            ))
-        
-        # Ajouter un message pour les actifs non chargés
-        if not_loaded_tickers:
-            content.append(html.Div([
-                html.Small([
-                    "📋 Non analysés: ",
-                    ", ".join(not_loaded_tickers)
-                ], className="text-muted")
-            ], className="mt-2"))
-        
-        # Ajouter un résumé
-        num_bullish = sum(1 for d in loaded_data if d['rsi_divergence'] == 'bullish')
-        num_bearish = sum(1 for d in loaded_data if d['rsi_divergence'] == 'bearish')
-        
-        summary_badges = html.Div([
-            html.Small([
-                f"Analysés: {len(loaded_data)}/{len(assets)} | ",
-                html.Span([
-                    dbc.Badge(f"🟢 {num_bullish} Achats", color="success", className="me-1"),
-                    dbc.Badge(f"🔴 {num_bearish} Ventes", color="danger", className="me-1"),
-                ]),
-                f" | ⚡ {elapsed:.1f}s | Dernière màj: {datetime.now().strftime('%H:%M:%S')}"
-            ], className="text-muted")
-        ], className="mb-2")
-        
-        content.insert(0, summary_badges)
+            others = [ticker for ticker in assets if ticker not in refreshed_tickers]
+            stored = get_stored_summaries(others)
+            summary_data.extend(stored.get(ticker) or _not_loaded(ticker) for ticker in others)
         
-        return html.Div(content)
+        footer = f" | ⚡ {elapsed:.1f}s | Dernière màj: {datetime.now().strftime('%H:%M:%S')}"
+        return build_summary_content(summary_data, assets, errors, footer)
     
     @app.callback(
         Output({'type': 'asset-checkbox', 'index': ALL}, 'value'),
@@ -8,7 +8,16 @@ from .charts import (
     create_rsi_chart,
     create_stochastic_chart,
     create_patterns_chart,
-    create_quarterly_chart
+    create_quarterly_chart,
+    price_trace_arrays,
+    recommendations_trace_arrays,
+    trend_trace_arrays,
+    macd_trace_arrays,
+    volume_trace_arrays,
+    rsi_trace_arrays,
+    stochastic_trace_arrays,
+    patterns_trace_arrays,
+    SELECTED_DATE_SHAPE_INDEX
 )
 from .tables import (
     create_technical_indicators_table,
@@ -50,4 +59,8 @@ from .divergence_timeline import (
     calculate_strategy_stats,
     generate_color_for_asset,
     get_category_filter_options
-)
\ No newline at end of file
+)
+from .screener_table import (
+    create_screener_table,
+    create_screener_section
+)
@@ -1,36 +1,190 @@
 # components/charts.py
 """
 Fonctions de création des graphiques Plotly.
+
+Chaque graphique sépare les tableaux dépendant des données (fonctions *_trace_arrays,
+une entrée par trace, dans l'ordre des traces) du style de la figure. Cela permet
+de patcher une figure existante quand seule la date sélectionnée change.
 """
-import plotly.graph_objects as go
+from lazy_imports import lazy_import
 from dash import dcc, html
+import numpy as np
 import pandas as pd
 
 from config import INDICATOR_DESCRIPTIONS
 
+go = lazy_import('plotly.graph_objects')
+
+
+# Index de la ligne verticale de la date sélectionnée dans layout.shapes
+SELECTED_DATE_SHAPE_INDEX = 0
+
+
+def add_selected_date_line(fig, selected_date):
+    """Ajoute la ligne verticale de la date sélectionnée en première position des shapes."""
+    fig.add_vline(x=selected_date, line_width=2, line_dash="dash", line_color="cyan")
+    shapes = fig.layout.shapes
+    fig.layout.shapes = (shapes[-1],) + tuple(shapes[:-1])
+    return fig
+
+
+# =============================================================================
+# TABLEAUX DE DONNÉES PAR TRACE
+# =============================================================================
+
+def price_trace_arrays(df_graph, show_ma, show_bb):
+    """Tableaux des traces du graphique des prix (chandeliers, Bollinger, MAs)."""
+    x = df_graph['Date']
+    arrays = [dict(x=x, open=df_graph['open'], high=df_graph['high'],
+                   low=df_graph['low'], close=df_graph['close'])]
+    
+    if show_bb and 'bb_upper' in df_graph.columns and 'bb_lower' in df_graph.columns:
+        arrays.append(dict(x=x, y=df_graph['bb_upper']))
+        arrays.append(dict(x=x, y=df_graph['bb_lower']))
+        if 'bb_middle' in df_graph.columns:
+            arrays.append(dict(x=x, y=df_graph['bb_middle']))
+    
+    if show_ma:
+        if 'sma_20' in df_graph.columns and not show_bb:
+            arrays.append(dict(x=x, y=df_graph['sma_20']))
+        if 'sma_50' in df_graph.columns:
+            arrays.append(dict(x=x, y=df_graph['sma_50']))
+        if 'sma_200' in df_graph.columns:
+            arrays.append(dict(x=x, y=df_graph['sma_200']))
+    
+    return arrays
+
+
+def recommendations_trace_arrays(df_graph):
+    """Tableaux du graphique des recommandations (barres signées par la conviction)."""
+    recommendation = df_graph['recommendation']
+    conviction = df_graph['conviction'].fillna(0)
+    trend = df_graph['trend'].fillna('neutral').astype(str) if 'trend' in df_graph.columns else 'neutral'
+    bb_signal = df_graph['bb_signal'].fillna('neutral').astype(str) if 'bb_signal' in df_graph.columns else 'neutral'
+    
+    is_buy = (recommendation == 'Acheter').to_numpy()
+    is_sell = (recommendation == 'Vendre').to_numpy()
+    
+    conviction_values = np.select([is_buy, is_sell], [conviction, -conviction], default=0)
+    bar_colors = np.select([is_buy, is_sell], ['#26a69a', '#ef5350'], default='rgba(128,128,128,0.3)')
+    
+    context = " | Trend: " + trend + " | BB: " + bb_signal
+    conviction_text = " | Conv: " + conviction.astype(str) + "/5"
+    hover_texts = np.select(
+        [is_buy, is_sell],
+        ["ACHETER" + conviction_text + context, "VENDRE" + conviction_text + context],
+        default="Neutre" + context
+    )
+    
+    return [dict(x=df_graph['Date'], y=conviction_values, hovertext=hover_texts,
+                 marker=dict(color=bar_colors))]
+
+
+def trend_trace_arrays(df_graph, config):
+    """Tableaux du graphique de tendance (ADX signé par la direction DI)."""
+    adx_strong = config.get('adx', {}).get('strong', 25)
+    
+    adx = df_graph['adx'].to_numpy(dtype=float) if 'adx' in df_graph.columns else np.zeros(len(df_graph))
+    di_plus = df_graph['di_plus'].to_numpy(dtype=float) if 'di_plus' in df_graph.columns else np.zeros(len(df_graph))
+    di_minus = df_graph['di_minus'].to_numpy(dtype=float) if 'di_minus' in df_graph.columns else np.zeros(len(df_graph))
+    
+    missing = np.isnan(adx)
+    bullish = di_plus > di_minus
+    strong = adx >= adx_strong
+    
+    trend_values = np.where(missing, 0, np.where(bullish, adx, -adx))
+    trend_colors = np.select(
+        [missing, bullish & strong, bullish, strong],
+        ['rgba(128,128,128,0.3)', '#26a69a', '#4a7c6f', '#ef5350'],
+        default='#8b5a5a'
+    )
+    
+    return [dict(x=df_graph['Date'], y=trend_values, marker=dict(color=trend_colors))]
+
+
+def macd_trace_arrays(df_graph):
+    """Tableaux du graphique MACD (histogramme, MACD, signal)."""
+    if 'macd' not in df_graph.columns:
+        return []
+    
+    x = df_graph['Date']
+    histogram_colors = np.where(df_graph['macd_histogram'].fillna(0).to_numpy() >= 0, '#26a69a', '#ef5350')
+    return [
+        dict(x=x, y=df_graph['macd_histogram'], marker=dict(color=histogram_colors)),
+        dict(x=x, y=df_graph['macd']),
+        dict(x=x, y=df_graph['macd_signal']),
+    ]
+
+
+def volume_trace_arrays(df_graph):
+    """Tableaux du graphique de volume (couleur selon la bougie)."""
+    colors = np.where(df_graph['close'].to_numpy() >= df_graph['open'].to_numpy(), '#26a69a', '#ef5350')
+    return [dict(x=df_graph['Date'], y=df_graph['volume'], marker=dict(color=colors))]
+
+
+def rsi_trace_arrays(df_graph):
+    """Tableaux du graphique RSI."""
+    return [dict(x=df_graph['Date'], y=df_graph['rsi'])]
+
+
+def stochastic_trace_arrays(df_graph):
+    """Tableaux du graphique Stochastique (%K, %D)."""
+    x = df_graph['Date']
+    return [dict(x=x, y=df_graph['stochastic_k']), dict(x=x, y=df_graph['stochastic_d'])]
+
+
+def patterns_trace_arrays(df_graph):
+    """
+    Tableaux du graphique des patterns : une seule trace, position, couleur et symbole
+    dérivés de la direction. La trace existe toujours (éventuellement vide).
+    """
+    df_with_patterns = df_graph[df_graph['pattern'] != 'Aucun']
+    direction = df_with_patterns['pattern_direction'].to_numpy()
+    
+    conditions = [direction == 'bullish', direction == 'bearish']
+    known = conditions[0] | conditions[1] | (direction == 'neutral')
+    y_values = np.select(conditions, [1, -1], default=0)
+    colors = np.select(conditions, ['#26a69a', '#ef5350'], default='#ffd700')
+    
+    return [dict(
+        x=df_with_patterns['Date'][known], y=y_values[known],
+        text=df_with_patterns['pattern'][known],
+        textposition=np.where(y_values >= 0, 'top center', 'bottom center')[known],
+        marker=dict(
+            symbol=np.select(conditions, ['triangle-up', 'triangle-down'], default='diamond')[known],
+            size=np.select(conditions, [14, 14], default=10)[known],
+            color=colors[known]
+        ),
+        textfont=dict(color=colors[known])
+    )]
+
+
+# =============================================================================
+# FIGURES
+# =============================================================================
 
 def create_price_chart(df_graph, selected_date, asset_name, show_ma, show_bb, config):
     """Crée le graphique principal des prix en chandeliers avec Bollinger optionnel."""
     fig = go.Figure()
+    arrays = iter(price_trace_arrays(df_graph, show_ma, show_bb))
     
     fig.add_trace(go.Candlestick(
-        x=df_graph['Date'], open=df_graph['open'], high=df_graph['high'],
-        low=df_graph['low'], close=df_graph['close'], name='Prix',
+        **next(arrays), name='Prix',
         increasing_line_color='#26a69a', decreasing_line_color='#ef5350'
     ))
     
     # Bandes de Bollinger (affichées en premier pour être en arrière-plan)
     if show_bb and 'bb_upper' in df_graph.columns and 'bb_lower' in df_graph.columns:
         # Bande supérieure
-        fig.add_trace(go.Scatter(
-            x=df_graph['Date'], y=df_graph['bb_upper'],
+        fig.add_trace(go.Scattergl(
+            **next(arrays),
             mode='lines', name='BB Haute',
             line=dict(color='rgba(255, 165, 0, 0.6)', width=1),
             hovertemplate='BB Haute: %{y:.2f}<extra></extra>'
         ))
         # Bande inférieure avec remplissage vers la bande supérieure
-        fig.add_trace(go.Scatter(
-            x=df_graph['Date'], y=df_graph['bb_lower'],
+        fig.add_trace(go.Scattergl(
+            **next(arrays),
             mode='lines', name='BB Basse',
             line=dict(color='rgba(255, 165, 0, 0.6)', width=1),
             fill='tonexty',
@@ -39,8 +193,8 @@ def create_price_chart(df_graph, selected_date, asset_name, show_ma, show_bb, co
         ))
         # Bande médiane (SMA 20)
         if 'bb_middle' in df_graph.columns:
-            fig.add_trace(go.Scatter(
-                x=df_graph['Date'], y=df_graph['bb_middle'],
+            fig.add_trace(go.Scattergl(
+                **next(arrays),
                 mode='lines', name='BB Milieu (SMA20)',
                 line=dict(color='rgba(255, 165, 0, 0.8)', width=1, dash='dot'),
                 hovertemplate='BB Milieu: %{y:.2f}<extra></extra>'
@@ -50,21 +204,19 @@ def create_price_chart(df_graph, selected_date, asset_name, show_ma, show_bb, co
     if show_ma:
         ma_cfg = config.get('moving_averages', {})
         if 'sma_20' in df_graph.columns and not show_bb:  # Ne pas afficher SMA20 si BB est actif (BB middle = SMA20)
-            fig.add_trace(go.Scatter(x=df_graph['Date'], y=df_graph['sma_20'],
+            fig.add_trace(go.Scattergl(**next(arrays),
                 mode='lines', name=f"SMA {ma_cfg.get('sma_short', 20)}",
                 line=dict(color='#00bfff', width=1.5), opacity=0.8))
-        elif 'sma_20' in df_graph.columns and show_bb:
-            pass  # SMA20 déjà affichée via BB middle
         if 'sma_50' in df_graph.columns:
-            fig.add_trace(go.Scatter(x=df_graph['Date'], y=df_graph['sma_50'],
+            fig.add_trace(go.Scattergl(**next(arrays),
                 mode='lines', name=f"SMA {ma_cfg.get('sma_medium', 50)}",
                 line=dict(color='#ffa500', width=1.5), opacity=0.8))
         if 'sma_200' in df_graph.columns:
-            fig.add_trace(go.Scatter(x=df_graph['Date'], y=df_graph['sma_200'],
+            fig.add_trace(go.Scattergl(**next(arrays),
                 mode='lines', name=f"SMA {ma_cfg.get('sma_long', 200)}",
                 line=dict(color='#9932cc', width=2), opacity=0.9))
     
-    fig.add_vline(x=selected_date, line_width=2, line_dash="dash", line_color="cyan")
+    add_selected_date_line(fig, selected_date)
     
     desc = INDICATOR_DESCRIPTIONS['price']
     if show_bb:
@@ -84,30 +236,10 @@ def create_price_chart(df_graph, selected_date, asset_name, show_ma, show_bb, co
 def create_recommendations_chart(df_graph, selected_date):
     """Crée le graphique des recommandations achat/vente."""
     fig = go.Figure()
-    conviction_values = []
-    bar_colors = []
-    hover_texts = []
-    
-    for _, row in df_graph.iterrows():
-        trend = row.get('trend', 'neutral')
-        bb_signal = row.get('bb_signal', 'neutral')
-        if row['recommendation'] == 'Acheter':
-            conviction_values.append(row['conviction'])
-            bar_colors.append('#26a69a')
-            hover_texts.append(f"ACHETER | Conv: {row['conviction']}/5 | Trend: {trend} | BB: {bb_signal}")
-        elif row['recommendation'] == 'Vendre':
-            conviction_values.append(-row['conviction'])
-            bar_colors.append('#ef5350')
-            hover_texts.append(f"VENDRE | Conv: {row['conviction']}/5 | Trend: {trend} | BB: {bb_signal}")
-        else:
-            conviction_values.append(0)
-            bar_colors.append('rgba(128,128,128,0.3)')
-            hover_texts.append(f"Neutre | Trend: {trend} | BB: {bb_signal}")
-    
-    fig.add_trace(go.Bar(x=df_graph['Date'], y=conviction_values, marker_color=bar_colors, 
-                         hovertext=hover_texts, hoverinfo='text+x'))
+    
+    fig.add_trace(go.Bar(**recommendations_trace_arrays(df_graph)[0], hoverinfo='text+x'))
     fig.add_hline(y=0, line_dash="solid", line_color="white", opacity=0.5)
-    fig.add_vline(x=selected_date, line_width=2, line_dash="dash", line_color="cyan")
+    add_selected_date_line(fig, selected_date)
     
     fig.add_annotation(x=0.02, y=0.85, xref="paper", yref="paper", text="↑ ACHETER", 
                        showarrow=False, font=dict(size=10, color="#26a69a"))
@@ -125,33 +257,13 @@ def create_recommendations_chart(df_graph, selected_date):
 def create_trend_chart(df_graph, selected_date, config):
     """Crée le graphique de tendance ADX."""
     fig = go.Figure()
-    trend_values = []
-    trend_colors = []
-    
     adx_strong = config.get('adx', {}).get('strong', 25)
     
-    for _, row in df_graph.iterrows():
-        adx = row.get('adx', 0)
-        di_plus = row.get('di_plus', 0)
-        di_minus = row.get('di_minus', 0)
-        
-        if pd.isna(adx):
-            trend_values.append(0)
-            trend_colors.append('rgba(128,128,128,0.3)')
-            continue
-        
-        if di_plus > di_minus:
-            trend_values.append(adx)
-            trend_colors.append('#26a69a' if adx >= adx_strong else '#4a7c6f')
-        else:
-            trend_values.append(-adx)
-            trend_colors.append('#ef5350' if adx >= adx_strong else '#8b5a5a')
-    
-    fig.add_trace(go.Bar(x=df_graph['Date'], y=trend_values, marker_color=trend_colors))
+    fig.add_trace(go.Bar(**trend_trace_arrays(df_graph, config)[0]))
     fig.add_hline(y=adx_strong, line_dash="dot", line_color="green", opacity=0.5)
     fig.add_hline(y=-adx_strong, line_dash="dot", line_color="red", opacity=0.5)
     fig.add_hline(y=0, line_dash="solid", line_color="white", opacity=0.5)
-    fig.add_vline(x=selected_date, line_width=2, line_dash="dash", line_color="cyan")
+    add_selected_date_line(fig, selected_date)
     
     fig.update_layout(
         template='plotly_dark',
@@ -168,13 +280,13 @@ def create_macd_chart(df_graph, selected_date):
     if 'macd' not in df_graph.columns:
         return fig
     
-    histogram_colors = ['#26a69a' if v >= 0 else '#ef5350' for v in df_graph['macd_histogram'].fillna(0)]
+    histogram, macd, signal = macd_trace_arrays(df_graph)
     
-    fig.add_trace(go.Bar(x=df_graph['Date'], y=df_graph['macd_histogram'], marker_color=histogram_colors, opacity=0.7, name='Hist'))
-    fig.add_trace(go.Scatter(x=df_graph['Date'], y=df_graph['macd'], mode='lines', name='MACD', line=dict(color='#00bfff', width=1.5)))
-    fig.add_trace(go.Scatter(x=df_graph['Date'], y=df_graph['macd_signal'], mode='lines', name='Signal', line=dict(color='#ffa500', width=1.5)))
+    fig.add_trace(go.Bar(**histogram, opacity=0.7, name='Hist'))
+    fig.add_trace(go.Scattergl(**macd, mode='lines', name='MACD', line=dict(color='#00bfff', width=1.5)))
+    fig.add_trace(go.Scattergl(**signal, mode='lines', name='Signal', line=dict(color='#ffa500', width=1.5)))
     fig.add_hline(y=0, line_dash="solid", line_color="white", opacity=0.5)
-    fig.add_vline(x=selected_date, line_width=2, line_dash="dash", line_color="cyan")
+    add_selected_date_line(fig, selected_date)
     
     fig.update_layout(
         template='plotly_dark', showlegend=True,
@@ -187,9 +299,8 @@ def create_macd_chart(df_graph, selected_date):
 def create_volume_chart(df_graph, selected_date):
     """Crée le graphique de volume."""
     fig = go.Figure()
-    colors = ['#26a69a' if c >= o else '#ef5350' for c, o in zip(df_graph['close'], df_graph['open'])]
-    fig.add_trace(go.Bar(x=df_graph['Date'], y=df_graph['volume'], marker_color=colors, opacity=0.7))
-    fig.add_vline(x=selected_date, line_width=2, line_dash="dash", line_color="cyan")
+    fig.add_trace(go.Bar(**volume_trace_arrays(df_graph)[0], opacity=0.7))
+    add_selected_date_line(fig, selected_date)
     fig.update_layout(template='plotly_dark', showlegend=False, margin=dict(l=50, r=50, t=10, b=20))
     return fig
 
@@ -199,13 +310,13 @@ def create_rsi_chart(df_graph, selected_date, config):
     fig = go.Figure()
     rsi_cfg = config.get('rsi', {})
     
-    fig.add_trace(go.Scatter(x=df_graph['Date'], y=df_graph['rsi'], mode='lines', name='RSI', line=dict(color='#ffd700', width=1.5)))
+    fig.add_trace(go.Scattergl(**rsi_trace_arrays(df_graph)[0], mode='lines', name='RSI', line=dict(color='#ffd700', width=1.5)))
     fig.add_hrect(y0=rsi_cfg.get('overbought', 70), y1=100, fillcolor="red", opacity=0.15, line_width=0)
     fig.add_hrect(y0=0, y1=rsi_cfg.get('oversold', 30), fillcolor="green", opacity=0.15, line_width=0)
     fig.add_hline(y=rsi_cfg.get('overbought', 70), line_dash="dot", line_color="red", opacity=0.5)
     fig.add_hline(y=rsi_cfg.get('oversold', 30), line_dash="dot", line_color="green", opacity=0.5)
     fig.add_hline(y=50, line_dash="dot", line_color="gray", opacity=0.3)
-    fig.add_vline(x=selected_date, line_width=2, line_dash="dash", line_color="cyan")
+    add_selected_date_line(fig, selected_date)
     
     fig.update_layout(template='plotly_dark', yaxis=dict(range=[0, 100]), showlegend=False, margin=dict(l=50, r=50, t=10, b=20))
     return fig
@@ -216,13 +327,15 @@ def create_stochastic_chart(df_graph, selected_date, config):
     fig = go.Figure()
     stoch_cfg = config.get('stochastic', {})
     
-    fig.add_trace(go.Scatter(x=df_graph['Date'], y=df_graph['stochastic_k'], mode='lines', name='%K', line=dict(color='#00bfff', width=1.5)))
-    fig.add_trace(go.Scatter(x=df_graph['Date'], y=df_graph['stochastic_d'], mode='lines', name='%D', line=dict(color='#ff6347', width=1.5)))
+    stoch_k, stoch_d = stochastic_trace_arrays(df_graph)
+    
+    fig.add_trace(go.Scattergl(**stoch_k, mode='lines', name='%K', line=dict(color='#00bfff', width=1.5)))
+    fig.add_trace(go.Scattergl(**stoch_d, mode='lines', name='%D', line=dict(color='#ff6347', width=1.5)))
     fig.add_hrect(y0=stoch_cfg.get('overbought', 80), y1=100, fillcolor="red", opacity=0.15, line_width=0)
     fig.add_hrect(y0=0, y1=stoch_cfg.get('oversold', 20), fillcolor="green", opacity=0.15, line_width=0)
     fig.add_hline(y=stoch_cfg.get('overbought', 80), line_dash="dot", line_color="red", opacity=0.5)
     fig.add_hline(y=stoch_cfg.get('oversold', 20), line_dash="dot", line_color="green", opacity=0.5)
-    fig.add_vline(x=selected_date, line_width=2, line_dash="dash", line_color="cyan")
+    add_selected_date_line(fig, selected_date)
     
     fig.update_layout(
         template='plotly_dark', yaxis=dict(range=[0, 100]), showlegend=True,
@@ -235,25 +348,17 @@ def create_stochastic_chart(df_graph, selected_date, config):
 def create_patterns_chart(df_graph, selected_date):
     """Crée le graphique des patterns de chandeliers."""
     fig = go.Figure()
-    df_with_patterns = df_graph[df_graph['pattern'] != 'Aucun'].copy()
-    
-    if not df_with_patterns.empty:
-        for direction, y_val, color, symbol in [
-            ('bullish', 1, '#26a69a', 'triangle-up'),
-            ('bearish', -1, '#ef5350', 'triangle-down'),
-            ('neutral', 0, '#ffd700', 'diamond')
-        ]:
-            df_dir = df_with_patterns[df_with_patterns['pattern_direction'] == direction]
-            if not df_dir.empty:
-                fig.add_trace(go.Scatter(
-                    x=df_dir['Date'], y=[y_val] * len(df_dir), mode='markers+text',
-                    marker=dict(symbol=symbol, size=14 if direction != 'neutral' else 10, color=color, line=dict(width=1, color='white')),
-                    text=df_dir['pattern'], textposition='top center' if y_val >= 0 else 'bottom center',
-                    textfont=dict(size=8, color=color), name=direction.capitalize()
-                ))
+    arrays = patterns_trace_arrays(df_graph)[0]
+    
+    fig.add_trace(go.Scatter(
+        x=arrays['x'], y=arrays['y'], mode='markers+text',
+        marker=dict(arrays['marker'], line=dict(width=1, color='white')),
+        text=arrays['text'], textposition=arrays['textposition'],
+        textfont=dict(size=8, color=arrays['textfont']['color']), name='Patterns'
+    ))
     
     fig.add_hline(y=0, line_dash="dot", line_color="gray", opacity=0.3)
-    fig.add_vline(x=selected_date, line_width=2, line_dash="dash", line_color="cyan")
+    add_selected_date_line(fig, selected_date)
     
     fig.update_layout(
         template='plotly_dark',
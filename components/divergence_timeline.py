@@ -3,7 +3,7 @@
 Graphique timeline des divergences RSI pour tous les actifs.
 VERSION 2.0 - Filtre par catégorie d'actifs
 """
-import plotly.graph_objects as go
+from lazy_imports import lazy_import
 from dash import dcc, html
 import dash_bootstrap_components as dbc
 import pandas as pd
@@ -12,6 +12,9 @@ from datetime import datetime, timedelta
 import hashlib
 
 from config import ASSET_CATEGORIES, load_user_assets_with_categories
+from portfolio_backtest import ENTRY_PRIORITIES
+
+go = lazy_import('plotly.graph_objects')
 
 
 def generate_color_for_asset(ticker):
@@ -316,6 +319,75 @@ def create_stats_summary(stats):
     ])
 
 
+def create_portfolio_backtest_section(result, holding_period=11, max_positions=10):
+    """
+    Affiche le backtest de portefeuille : courbe de capital, exposition et statistiques.
+    """
+    if not result or result['curve'].empty:
+        return html.Div([
+            html.P("Backtest de portefeuille indisponible (prix non téléchargés).", className="text-muted small")
+        ])
+    
+    curve = result['curve']
+    stats = result['stats']
+    
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=curve.index, y=curve['equity'],
+        name="Capital", line=dict(color='#00bc8c', width=2),
+        hovertemplate="%{x|%d/%m/%Y}<br>Capital: %{y:,.0f}<extra></extra>"
+    ))
+    fig.add_trace(go.Scatter(
+        x=curve.index, y=curve['exposure'] * 100,
+        name="Exposition (%)", yaxis='y2', fill='tozeroy',
+        line=dict(color='rgba(52, 152, 219, 0.6)', width=1),
+        fillcolor='rgba(52, 152, 219, 0.15)',
+        hovertemplate="%{x|%d/%m/%Y}<br>Exposition: %{y:.0f}%<extra></extra>"
+    ))
+    fig.update_layout(
+        template='plotly_dark',
+        height=300,
+        margin=dict(l=50, r=50, t=30, b=30),
+        yaxis=dict(title="Capital"),
+        yaxis2=dict(title="Exposition (%)", overlaying='y', side='right', range=[0, 105], showgrid=False),
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='left', x=0),
+        hovermode='x unified'
+    )
+    
+    def stat_card(label, value, color):
+        return dbc.Col([
+            dbc.Card([
+                dbc.CardBody([
+                    html.H6(label, className="text-muted mb-1"),
+                    html.H5(value, className=f"mb-0 text-{color}"),
+                ], className="p-2")
+            ], color="dark", outline=True)
+        ], width=2)
+    
+    return_color = 'success' if stats['total_return'] >= 0 else 'danger'
+    
+    return html.Div([
+        html.H6(f"💼 Portefeuille simulé ({max_positions} positions max, détention {holding_period - 1} séances)",
+                className="mb-2"),
+        dbc.Row([
+            stat_card("📈 Rendement", f"{stats['total_return']:+.1f}%", return_color),
+            stat_card("📅 CAGR", f"{stats['cagr']:+.1f}%", return_color),
+            stat_card("📉 Drawdown max", f"{stats['max_drawdown']:.1f}%", 'danger'),
+            stat_card("🎯 Trades / Gagnants", f"{stats['num_trades']} / {stats['win_rate']:.0f}%", 'info'),
+            stat_card("⚖️ Exposition moy.", f"{stats['avg_exposure']:.0f}%", 'primary'),
+            stat_card("🔄 Rotation annuelle", f"{stats['annual_turnover']:.0f}%", 'warning'),
+        ], className="mb-2"),
+        dcc.Graph(figure=fig, config={'displayModeBar': False}),
+        html.Small([
+            f"Sharpe: {stats['sharpe']:.2f} | ",
+            f"Signaux ignorés faute de créneau: {stats['skipped_no_slot']} "
+            f"(priorité: {ENTRY_PRIORITIES.get(stats.get('entry_priority'), 'n/a').lower()}) | ",
+            f"déjà en position: {stats['skipped_in_position']} | ",
+            f"Positions ouvertes en fin de période: {len(result['open_positions'])}"
+        ], className="text-muted")
+    ], className="mb-3")
+
+
 def get_category_filter_options():
     """Retourne les options pour le filtre de catégorie."""
     options = [{'label': '🌐 Tous les actifs', 'value': 'all'}]
@@ -387,6 +459,19 @@ def create_divergence_timeline_section():
                             style={'width': '60px', 'display': 'inline-block'}
                         ),
                         html.Small(" jours", className="text-muted ms-1"),
+                    ], className="me-3"),
+                    html.Span([
+                        html.Small("Positions max: ", className="text-muted me-1"),
+                        dbc.Input(
+                            id="max-positions-input",
+                            type="number",
+                            value=10,
+                            min=1,
+                            max=50,
+                            step=1,
+                            size="sm",
+                            style={'width': '60px', 'display': 'inline-block'}
+                        ),
                     ]),
                 ], className="d-flex align-items-center justify-content-end"),
             ], align="center"),
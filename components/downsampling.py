@@ -0,0 +1,205 @@
+# components/downsampling.py
+"""
+Niveau de détail (LOD) des graphiques sur longues périodes.
+Réduit le nombre de points envoyés au navigateur :
+- LTTB (Largest-Triangle-Three-Buckets) pour les courbes
+- Plus forte barre de chaque seau pour les barres signées et les marqueurs
+- Agrégation OHLC en bougies hebdomadaires/mensuelles pour le prix
+La résolution est choisie à partir de la plage visible (zoom-range-store).
+"""
+import numpy as np
+import pandas as pd
+
+
+# Nombre maximum de points par trace envoyés au navigateur
+MAX_LINE_POINTS = 1200
+MAX_CANDLES = 1500
+MAX_BARS = 1200
+
+# Marge chargée de part et d'autre de la fenêtre zoomée (fraction de sa largeur)
+ZOOM_MARGIN = 0.5
+
+# Résolutions de bougies possibles, de la plus fine à la plus grossière
+# (clé de période pandas, nombre approximatif de séances par bougie)
+CANDLE_RESOLUTIONS = [
+    ('D', 1),
+    ('W', 5),
+    ('M', 21),
+]
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Retourne les indices des points conservés par l'algorithme LTTB.
+
+    x et y sont des tableaux numériques de même longueur (x croissant).
+    Le premier et le dernier point sont toujours conservés.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # Les NaN (début des indicateurs) sont remplacés pour le calcul des aires
+    y_filled = np.where(np.isnan(y), np.nanmean(y) if np.isfinite(y).any() else 0.0, y)
+
+    # Découpage des points intérieurs en (threshold - 2) seaux
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+
+        # Moyenne du seau suivant (ou dernier point)
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y_filled[next_start:next_end].mean()
+
+        # Point du seau courant formant le plus grand triangle
+        bucket_x = x[start:end]
+        bucket_y = y_filled[start:end]
+        areas = np.abs(
+            (x[a] - avg_x) * (bucket_y - y_filled[a]) -
+            (x[a] - bucket_x) * (avg_y - y_filled[a])
+        )
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+
+    return selected
+
+
+def downsample_lttb(df, y_col, threshold=MAX_LINE_POINTS):
+    """
+    Réduit un DataFrame à `threshold` lignes en choisissant les points par LTTB sur `y_col`.
+    Toutes les colonnes sont conservées alignées (les overlays restent synchronisés).
+    """
+    if df.empty or len(df) <= threshold or y_col not in df.columns:
+        return df
+
+    x = df['Date'].values.astype('datetime64[s]').astype(np.int64)
+    idx = lttb_indices(x, df[y_col].values, threshold)
+    return df.iloc[idx]
+
+
+def downsample_peaks(df, weights, threshold=MAX_BARS):
+    """
+    Réduit un DataFrame à `threshold` lignes en gardant, dans chaque seau de lignes consécutives,
+    celle de plus grand |poids| : les barres fortes (signaux, ADX élevé) ne sont jamais lissées.
+
+    `weights` est un nom de colonne ou des valeurs alignées sur df (les NaN comptent pour 0).
+    """
+    if df.empty or len(df) <= threshold:
+        return df
+    if isinstance(weights, str):
+        if weights not in df.columns:
+            return df
+        weights = df[weights]
+
+    w = np.nan_to_num(np.abs(np.asarray(weights, dtype=float)))
+    edges = np.linspace(0, len(df), threshold + 1).astype(int)
+    idx = [start + int(np.argmax(w[start:end])) for start, end in zip(edges[:-1], edges[1:]) if end > start]
+    return df.iloc[idx]
+
+
+def aggregate_ohlc(df, resolution):
+    """
+    Agrège les bougies journalières en bougies hebdomadaires ('W') ou mensuelles ('M').
+
+    Les colonnes d'overlay (moyennes mobiles, Bollinger) prennent la dernière valeur
+    de la période, le volume est sommé. La date de la bougie est celle de sa dernière séance.
+    """
+    if df.empty or resolution == 'D':
+        return df
+
+    periods = df['Date'].dt.to_period(resolution)
+    grouped = df.groupby(periods.values, sort=True)
+
+    agg = {}
+    for col in df.columns:
+        if col == 'open':
+            agg[col] = 'first'
+        elif col == 'high':
+            agg[col] = 'max'
+        elif col == 'low':
+            agg[col] = 'min'
+        elif col == 'volume':
+            agg[col] = 'sum'
+        else:
+            agg[col] = 'last'
+
+    return grouped.agg(agg).reset_index(drop=True)
+
+
+def get_visible_window(df, x_range):
+    """
+    Retourne la portion du DataFrame couverte par la plage zoomée, élargie de ZOOM_MARGIN
+    pour que les petits déplacements restent couverts sans nouvel aller-retour serveur.
+    """
+    if not x_range or df.empty:
+        return df
+
+    try:
+        start = pd.to_datetime(x_range[0])
+        end = pd.to_datetime(x_range[1])
+    except (TypeError, ValueError, IndexError):
+        return df
+
+    if pd.isna(start) or pd.isna(end) or end <= start:
+        return df
+
+    margin = (end - start) * ZOOM_MARGIN
+    mask = (df['Date'] >= start - margin) & (df['Date'] <= end + margin)
+    window = df[mask]
+    return window if not window.empty else df
+
+
+def select_candle_resolution(num_bars, max_candles=MAX_CANDLES):
+    """Choisit la résolution de bougie la plus fine qui reste sous `max_candles`."""
+    for resolution, bars_per_candle in CANDLE_RESOLUTIONS:
+        if num_bars / bars_per_candle <= max_candles:
+            return resolution
+    return CANDLE_RESOLUTIONS[-1][0]
+
+
+def prepare_chart_frames(df_graph, x_range=None):
+    """
+    Prépare les données des graphiques selon le niveau de détail adapté à la plage visible.
+
+    Returns:
+        dict: {
+            'window': données de la fenêtre visible (+ marge), pleine résolution,
+            'price': bougies agrégées pour le graphique des prix et du volume,
+            'resolution': 'D', 'W' ou 'M',
+            'lines': callable(y_col) -> DataFrame réduit par LTTB sur y_col,
+            'bars': callable(weights) -> DataFrame réduit par downsample_peaks
+                    (weights : colonne, valeurs alignées ou fonction(window) -> valeurs)
+        }
+    """
+    window = get_visible_window(df_graph, x_range)
+    resolution = select_candle_resolution(len(window))
+    price = aggregate_ohlc(window, resolution)
+
+    def lines(y_col):
+        return downsample_lttb(window, y_col)
+
+    def bars(weights):
+        if callable(weights):
+            weights = weights(window)
+        return downsample_peaks(window, weights)
+
+    return {
+        'window': window,
+        'price': price,
+        'resolution': resolution,
+        'lines': lines,
+        'bars': bars,
+    }
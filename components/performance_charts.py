@@ -3,13 +3,16 @@
 Graphiques de performance des indicateurs (backtesting visuel).
 VERSION 2.0 - Affichage des rendements réels en % + Performance cumulée
 """
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from lazy_imports import lazy_import
 from dash import dcc, html
 import dash_bootstrap_components as dbc
 import pandas as pd
 import numpy as np
 
+from signal_statistics import SIGNIFICANCE_LEVEL, combined_p_value
+
+go = lazy_import('plotly.graph_objects')
+
 
 # Couleurs pour chaque horizon
 HORIZON_COLORS = {
@@ -257,10 +260,10 @@ def create_performance_section(performance_history, selected_horizons=[1, 2, 5,
     return html.Div(sections)
 
 
-def create_performance_summary_cards(performance_history, selected_horizons=[1, 2, 5, 10, 20]):
+def create_performance_summary_cards(performance_history, selected_horizons=[1, 2, 5, 10, 20], significance=None):
     """
     Crée des cartes résumé pour tous les indicateurs.
-    Inclut maintenant la performance cumulée.
+    Inclut maintenant la performance cumulée, et la p-value si `significance` est fourni.
     """
     from indicator_performance import calculate_accuracy_stats
     
@@ -311,6 +314,10 @@ def create_performance_summary_cards(performance_history, selected_horizons=[1,
                                  style={'fontSize': '12px', 'color': perf_color, 'fontWeight': 'bold'}),
                     ]),
                     html.Small(f"{total_signals} signaux", className="text-muted", style={'fontSize': '9px'}),
+                    html.Div(
+                        create_p_value_badge(combined_p_value(significance.get(indicator_name, {}), selected_horizons)),
+                        className="mt-1"
+                    ) if significance else None,
                 ], className="p-2")
             ], color=card_color, outline=True, className="h-100")
         ], width=2, className="mb-2")
@@ -328,6 +335,24 @@ def _darken_color(hex_color, factor=0.5):
     return f'#{darkened[0]:02x}{darkened[1]:02x}{darkened[2]:02x}'
 
 
+def format_significance_tooltip(horizon_stats):
+    """Texte de survol : intervalle de confiance à 95% et p-value d'un horizon."""
+    if horizon_stats.get('p_value') is None:
+        return None
+    return (f"IC 95%: {horizon_stats['ci_low']:.0f}–{horizon_stats['ci_high']:.0f}% "
+            f"(hasard: {horizon_stats['null_accuracy']:.0f}%) · p = {horizon_stats['p_value']:.3f} · "
+            f"rendement moyen IC 95%: {horizon_stats['return_ci_low']:+.2f} à {horizon_stats['return_ci_high']:+.2f}%")
+
+
+def create_p_value_badge(p_value):
+    """Badge de significativité (vert si p < seuil)."""
+    if p_value is None:
+        return dbc.Badge("—", color="secondary", style={'fontSize': '9px'})
+    color = "success" if p_value < SIGNIFICANCE_LEVEL else "warning" if p_value < 2 * SIGNIFICANCE_LEVEL else "secondary"
+    label = "p < 0.001" if p_value < 0.001 else f"p = {p_value:.3f}"
+    return dbc.Badge(label, color=color, style={'fontSize': '9px'})
+
+
 def create_combination_ranking_table(combo_summary, selected_horizons=[1, 2, 5, 10, 20]):
     """
     Crée un tableau de classement des combinaisons par performance.
@@ -376,13 +401,14 @@ def create_combination_ranking_table(combo_summary, selected_horizons=[1, 2, 5,
                 else:
                     badge_color = "danger"
                 
-                # Badge précision
+                # Badge précision (intervalle de confiance et p-value au survol)
                 horizon_badges.append(
                     dbc.Badge(
                         f"{h}j: {h_acc:.0f}%",
                         color=badge_color,
                         className="me-1",
-                        style={'fontSize': '9px'}
+                        style={'fontSize': '9px'},
+                        title=format_significance_tooltip(stats[h])
                     )
                 )
                 
@@ -429,7 +455,8 @@ def create_combination_ranking_table(combo_summary, selected_horizons=[1, 2, 5,
                                    'fontWeight': 'bold'})
                 ], className="text-center", style={'width': '10%'}),
                 html.Td(str(total_signals), className="text-center", style={'width': '6%'}),
-                html.Td(horizon_badges, style={'width': '44%'}),
+                html.Td(create_p_value_badge(combo.get('p_value')), className="text-center", style={'width': '8%'}),
+                html.Td(horizon_badges, style={'width': '36%'}),
             ], className=row_class)
         )
     
@@ -441,6 +468,7 @@ def create_combination_ranking_table(combo_summary, selected_horizons=[1, 2, 5,
             html.Th("Précision", className="text-center"),
             html.Th("Perf. Σ", className="text-center"),
             html.Th("Signaux", className="text-center"),
+            html.Th("p-value", className="text-center"),
             html.Th("Détail par Horizon"),
         ]), style={'backgroundColor': '#1a1d20'}),
         html.Tbody(rows)
@@ -456,6 +484,10 @@ def create_combination_ranking_table(combo_summary, selected_horizons=[1, 2, 5,
             dbc.Badge("<50%", color="danger", className="me-1"), html.Span("Faible ", className="me-3"),
             html.Span(" | ", className="text-muted"),
             html.Span(" Perf. Σ = Performance cumulée (somme des gains/pertes en %)", className="text-muted"),
+            html.Span(" | ", className="text-muted"),
+            html.Span(f" p-value = probabilité qu'un placement aléatoire des signaux fasse aussi bien "
+                      f"(meilleur horizon, corrigée ; significatif si < {SIGNIFICANCE_LEVEL:.2f})",
+                      className="text-muted"),
         ], className="text-muted")
     ], className="mb-3")
     
@@ -540,4 +572,59 @@ def create_global_performance_summary(performance_history, selected_horizons, in
         ], width=3),
     ], className="mb-4")
     
-    return summary_cards
\ No newline at end of file
+    return summary_cards
+
+def create_walk_forward_table(walk_forward, validation, correlation, horizon):
+    """
+    Tableau de validation walk-forward : poids configurés face aux résultats hors échantillon.
+    """
+    if walk_forward is None or validation is None or validation.empty:
+        return html.P("Pas assez de données pour une validation walk-forward.", className="text-muted")
+    
+    folds = walk_forward['folds']
+    flag_badges = {
+        'overweighted': dbc.Badge("Surpondéré", color="danger"),
+        'underweighted': dbc.Badge("Sous-pondéré", color="info"),
+        'ok': dbc.Badge("Cohérent", color="secondary"),
+    }
+    
+    rows = []
+    for row in validation.itertuples(index=False):
+        test_acc = row.test_accuracy
+        train_acc = row.train_accuracy
+        avg = row.test_avg_return
+        acc_color = '#26a69a' if test_acc >= 55 else '#ffc107' if test_acc >= 50 else '#ef5350'
+        rows.append(html.Tr([
+            html.Td(row.name.lstrip('📊🟢🔴 '), style={'fontWeight': 'bold', 'fontSize': '12px'}),
+            html.Td(f"{row.weight:.1f}", className="text-center"),
+            html.Td(f"{train_acc:.0f}%" if pd.notna(train_acc) else "N/A", className="text-center text-muted"),
+            html.Td(html.Span(f"{test_acc:.0f}%", style={'color': acc_color, 'fontWeight': 'bold'}),
+                    className="text-center"),
+            html.Td(f"{'+' if avg > 0 else ''}{avg:.2f}%", className="text-center"),
+            html.Td(str(int(row.test_signals)), className="text-center"),
+            html.Td(flag_badges.get(row.flag, flag_badges['ok']), className="text-center"),
+        ]))
+    
+    table = dbc.Table([
+        html.Thead(html.Tr([
+            html.Th("Signal"),
+            html.Th("Poids", className="text-center"),
+            html.Th("Précision (entr.)", className="text-center"),
+            html.Th("Précision (test)", className="text-center"),
+            html.Th("Rdt moyen (test)", className="text-center"),
+            html.Th("Signaux (test)", className="text-center"),
+            html.Th("Pondération", className="text-center"),
+        ]), style={'backgroundColor': '#1a1d20'}),
+        html.Tbody(rows)
+    ], bordered=True, color="dark", hover=True, size="sm", responsive=True)
+    
+    scheme_label = "fenêtre croissante" if walk_forward['scheme'] == 'expanding' else "fenêtre glissante"
+    correlation_text = f"{correlation:+.2f}" if correlation is not None and pd.notna(correlation) else "N/A"
+    header = html.Small([
+        f"{len(folds)} plis ({scheme_label}), tests du {folds['test_start'].iloc[0]:%d/%m/%Y} ",
+        f"au {folds['test_end'].iloc[-1]:%d/%m/%Y}, horizon {HORIZON_NAMES.get(horizon, f'{horizon}j')}. ",
+        "Corrélation de rang poids / rendement hors échantillon : ",
+        html.Strong(correlation_text),
+    ], className="text-muted d-block mb-2")
+    
+    return html.Div([header, table])
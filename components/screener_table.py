@@ -0,0 +1,119 @@
+# components/screener_table.py
+"""
+Screener fondamental : tableau triable et filtrable de toute la liste d'actifs.
+"""
+from dash import html, dcc, dash_table
+import dash_bootstrap_components as dbc
+import pandas as pd
+
+from config import get_asset_name
+
+
+# Colonnes affichées : (colonne, libellé, format)
+SCREENER_DISPLAY_COLUMNS = [
+    ('ticker', 'Ticker', None),
+    ('name', 'Nom', None),
+    ('score', 'Score', '.1f'),
+    ('valuation_score', 'Valo.', '.1f'),
+    ('profitability_score', 'Renta.', '.1f'),
+    ('financial_health_score', 'Santé', '.1f'),
+    ('growth_score', 'Croiss.', '.1f'),
+    ('pe_ratio', 'P/E', '.1f'),
+    ('peg_ratio', 'PEG', '.2f'),
+    ('pb_ratio', 'P/B', '.2f'),
+    ('roe', 'ROE %', '.1f'),
+    ('net_margin', 'Marge %', '.1f'),
+    ('debt_equity', 'D/E', '.2f'),
+    ('revenue_growth', 'CA % YoY', '.1f'),
+    ('dividend_yield', 'Div. %', '.2f'),
+    ('market_cap_b', 'Cap (Md)', '.1f'),
+    ('sector', 'Secteur', None),
+]
+
+
+def create_screener_table(df, snapshot_date=None):
+    """Crée le tableau du screener à partir du snapshot."""
+    if df is None or df.empty:
+        return html.P(
+            "Aucun snapshot disponible. Cliquez sur 'Rafraîchir' pour analyser la liste d'actifs.",
+            className="text-muted"
+        )
+
+    data = df.copy()
+    data['name'] = data['ticker'].map(get_asset_name)
+    data['market_cap_b'] = pd.to_numeric(data['market_cap'], errors='coerce') / 1e9
+    data = data.sort_values('score', ascending=False, na_position='last')
+
+    columns = []
+    for col, label, fmt in SCREENER_DISPLAY_COLUMNS:
+        if fmt:
+            columns.append({'name': label, 'id': col, 'type': 'numeric',
+                            'format': {'specifier': fmt}})
+        else:
+            columns.append({'name': label, 'id': col, 'type': 'text'})
+
+    records = data[[c for c, _, _ in SCREENER_DISPLAY_COLUMNS]].astype(object)
+    records = records.where(pd.notna(records), None).to_dict('records')
+
+    date_info = f"Snapshot du {snapshot_date.strftime('%d/%m/%Y')}" if snapshot_date else ""
+
+    return html.Div([
+        html.Small(f"{len(records)} actifs — {date_info}", className="text-muted d-block mb-1"),
+        dash_table.DataTable(
+            id='screener-datatable',
+            columns=columns,
+            data=records,
+            sort_action='native',
+            sort_mode='multi',
+            filter_action='native',
+            page_action='native',
+            page_size=25,
+            style_table={'overflowX': 'auto'},
+            style_header={'backgroundColor': '#303030', 'color': 'white', 'fontWeight': 'bold', 'fontSize': '12px'},
+            style_cell={'backgroundColor': '#222', 'color': 'white', 'fontSize': '12px',
+                        'padding': '4px', 'border': '1px solid #444'},
+            style_filter={'backgroundColor': '#2a2a2a', 'color': 'white'},
+            style_data_conditional=[
+                {'if': {'filter_query': '{score} >= 4', 'column_id': 'score'},
+                 'backgroundColor': '#1e5631', 'fontWeight': 'bold'},
+                {'if': {'filter_query': '{score} >= 3 && {score} < 4', 'column_id': 'score'},
+                 'backgroundColor': '#1f3f6b'},
+                {'if': {'filter_query': '{score} < 2', 'column_id': 'score'},
+                 'backgroundColor': '#6b1f1f'},
+            ],
+        )
+    ])
+
+
+def create_screener_section():
+    """Crée la section collapsible du screener fondamental."""
+    return dbc.Card([
+        dbc.CardHeader([
+            dbc.Row([
+                dbc.Col([
+                    dbc.Button(
+                        id="collapse-screener-btn",
+                        color="link",
+                        className="text-white text-decoration-none p-0",
+                        children=[
+                            html.H5("🔎 Screener Fondamental", className="mb-0 d-inline me-2"),
+                        ]
+                    ),
+                ], width="auto"),
+                dbc.Col([
+                    dbc.Button("🔄 Rafraîchir", id="refresh-screener-btn", color="info", size="sm", className="me-3"),
+                    html.Small("Filtres : ex. « >3 » ou « <20 » dans l'en-tête des colonnes", className="text-muted"),
+                ], className="d-flex align-items-center"),
+            ], align="center", className="g-0"),
+        ]),
+        dbc.Collapse(
+            dbc.CardBody([
+                dcc.Loading(
+                    html.Div(id='screener-content'),
+                    type="circle"
+                )
+            ], className="p-2"),
+            id="collapse-screener",
+            is_open=False,
+        ),
+    ], className="mb-3", color="dark", outline=True)
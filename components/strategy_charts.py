@@ -3,13 +3,14 @@
 Graphiques pour les stratégies de trading.
 VERSION 2.0 - Ajout de la stratégie J+1
 """
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from lazy_imports import lazy_import
 from dash import dcc, html
 import dash_bootstrap_components as dbc
 import pandas as pd
 import numpy as np
 
+go = lazy_import('plotly.graph_objects')
+
 # Couleurs pour chaque période de holding
 HOLDING_COLORS = {
     1: '#00bfff',   # Bleu clair
@@ -33,6 +34,7 @@ def create_hold_and_sell_chart(strategy_results, asset_name, df_prices):
     if not strategy_results:
         return html.P("Aucune donnée de stratégie disponible.", className="text-muted")
     
+    from plotly.subplots import make_subplots  # import différé (lourd)
     fig = make_subplots(
         rows=2, cols=1,
         shared_xaxes=True,
@@ -170,6 +172,7 @@ def create_buy_on_divergence_chart(strategy_results, asset_name, df_prices, is_n
     
     suffix = " (J+1)" if is_next_day else ""
     
+    from plotly.subplots import make_subplots  # import différé (lourd)
     fig = make_subplots(
         rows=2, cols=1,
         shared_xaxes=True,
@@ -745,6 +748,7 @@ def create_hold_and_sell_next_day_chart(strategy_results, asset_name, df_prices)
     if not strategy_results:
         return html.P("Aucune donnée de stratégie disponible.", className="text-muted")
     
+    from plotly.subplots import make_subplots  # import différé (lourd)
     fig = make_subplots(
         rows=2, cols=1,
         shared_xaxes=True,
@@ -1,7 +1,7 @@
 # components/summary_table.py
 """
 Tableau récapitulatif des divergences RSI pour tous les actifs.
-VERSION 3.1 - Correction affichage colonne Nom + devises métaux
+VERSION 3.2 - Colonne d'ancienneté des données (dernier état enregistré)
 """
 from dash import html, dcc
 import dash_bootstrap_components as dbc
@@ -14,6 +14,35 @@ from config import (
 )
 
 
+SUMMARY_STALE_DAYS = 1  # séances manquantes tolérées avant de signaler un état ancien
+
+
+def staleness_days(as_of):
+    """Nombre de séances (jours ouvrés) écoulées depuis la barre `as_of` (0 = à jour)."""
+    if as_of is None or pd.isna(as_of):
+        return 0
+    as_of = pd.Timestamp(as_of)
+    if as_of.tzinfo:
+        as_of = as_of.tz_localize(None)
+    return len(pd.bdate_range(as_of.normalize() + timedelta(days=1), datetime.now()))
+
+
+def create_staleness_badge(as_of):
+    """Badge d'ancienneté des données d'une ligne (date de la dernière barre en infobulle)."""
+    if as_of is None or pd.isna(as_of):
+        return dbc.Badge("—", color="secondary")
+    
+    days = staleness_days(as_of)
+    title = f"Dernière barre: {pd.Timestamp(as_of).strftime('%d/%m/%Y')}"
+    if days == 0:
+        return html.Span(dbc.Badge("✓ À jour", color="success"), title=title)
+    if days <= SUMMARY_STALE_DAYS:
+        return html.Span(dbc.Badge(f"J-{days}", color="info"), title=title)
+    if days <= 5:
+        return html.Span(dbc.Badge(f"⏱️ J-{days}", color="warning"), title=title)
+    return html.Span(dbc.Badge(f"⏱️ J-{days}", color="danger"), title=title)
+
+
 def format_price_with_currency(price, ticker):
     """Formate un prix avec le bon symbole de devise."""
     if price is None or price == 0:
@@ -163,6 +192,7 @@ def create_asset_row(asset_data, is_loaded=True):
             html.Td(dbc.Badge("—", color="secondary", className="me-1"), className="text-center", style={'width': '90px'}),
             html.Td(dbc.Badge("—", color="secondary", className="me-1"), className="text-center", style={'width': '70px'}),
             html.Td(dbc.Badge("—", color="secondary"), className="text-center", style={'width': '90px'}),
+            html.Td(dbc.Badge("—", color="secondary"), className="text-center", style={'width': '80px'}),
         ], id={'type': 'asset-row', 'index': ticker}, className="text-muted")
     
     # Données pour actif chargé
@@ -273,6 +303,7 @@ def create_asset_row(asset_data, is_loaded=True):
         html.Td(date_badge, className="text-center", style={'width': '90px'}),
         html.Td(last_type_badge, className="text-center", style={'width': '70px'}),
         html.Td(reco_badge, className="text-center", style={'width': '90px'}),
+        html.Td(create_staleness_badge(asset_data.get('as_of')), className="text-center", style={'width': '80px'}),
     ], id={'type': 'asset-row', 'index': ticker})
 
 
@@ -301,6 +332,7 @@ def create_category_table(category_key, assets_data, is_loaded=True):
             html.Th("Dernière", className="text-center", style={'width': '90px'}),
             html.Th("Type", className="text-center", style={'width': '70px'}),
             html.Th("Reco.", className="text-center", style={'width': '90px'}),
+            html.Th("Données", className="text-center", style={'width': '80px'}),
         ]), style={'backgroundColor': '#1a1d20'}),
         html.Tbody(rows)
     ], bordered=True, color="dark", hover=True, size="sm", responsive=True, className="mb-0")
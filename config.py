@@ -4,6 +4,9 @@ Configuration centralisée des paramètres du modèle d'analyse technique.
 VERSION 3.3 - Corrections Forex EUR, Métaux EUR, réorganisation actions US
 """
 import os
+import json
+import hashlib
+from functools import lru_cache
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -314,8 +317,9 @@ ASSET_NAMES = {
 }
 
 # === DEVISES PAR ASSET ===
+@lru_cache(maxsize=4096)
 def get_asset_currency(ticker):
-    """Retourne la devise d'un actif."""
+    """Retourne la devise d'un actif (mémoïsé : règles purement déduites du ticker)."""
     ticker = ticker.upper()
     
     # Crypto EUR
@@ -1132,8 +1136,19 @@ KNOWN_TICKERS = {
 def detect_asset_category(ticker, ticker_info=None):
     """
     Détecte automatiquement la catégorie d'un asset.
+    Sans ticker_info, le résultat ne dépend que du ticker et est mémoïsé.
     """
-    ticker = ticker.upper().strip()
+    if ticker_info is None:
+        return _detect_asset_category_from_ticker(ticker.upper().strip())
+    return _detect_asset_category(ticker.upper().strip(), ticker_info)
+
+
+@lru_cache(maxsize=4096)
+def _detect_asset_category_from_ticker(ticker):
+    return _detect_asset_category(ticker, None)
+
+
+def _detect_asset_category(ticker, ticker_info):
     
     # 1. Vérifier si le ticker est dans la liste connue
     if ticker in KNOWN_TICKERS:
@@ -1295,6 +1310,23 @@ def get_default_config():
     }
 
 
+# Version du calcul des indicateurs : à incrémenter quand les colonnes produites changent,
+# pour que les historiques enregistrés avec l'ancienne version soient recalculés
+INDICATOR_PIPELINE_VERSION = 2
+
+
+def config_fingerprint(config=None):
+    """
+    Empreinte courte (16 caractères) d'une configuration : deux configs identiques
+    produisent les mêmes indicateurs, donc la même empreinte.
+    """
+    payload = json.dumps({
+        'config': config if config is not None else get_default_config(),
+        'pipeline': INDICATOR_PIPELINE_VERSION,
+    }, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
 # === FONCTIONS DE GESTION DES ACTIFS AVEC CATÉGORIES ===
 
 def load_user_assets():
@@ -1373,8 +1405,10 @@ def save_user_assets(assets):
         
         cursor.execute("DELETE FROM user_assets")
         
+        categories = {}
         for i, ticker in enumerate(assets):
             category = detect_asset_category(ticker)
+            categories[ticker.upper().strip()] = category
             cursor.execute(
                 """INSERT INTO user_assets (ticker, display_order, category) 
                    VALUES (%s, %s, %s) 
@@ -1385,6 +1419,9 @@ def save_user_assets(assets):
         conn.commit()
         cursor.close()
         conn.close()
+        
+        from asset_registry import update_registered_categories
+        update_registered_categories(categories)
         return True
         
     except Exception as e:
@@ -1420,6 +1457,9 @@ def save_user_assets_with_categories(assets_dict):
         conn.commit()
         cursor.close()
         conn.close()
+        
+        from asset_registry import update_registered_categories
+        update_registered_categories({t.upper().strip(): c for t, c in assets_dict.items()})
         return True
         
     except Exception as e:
@@ -1428,25 +1468,9 @@ def save_user_assets_with_categories(assets_dict):
 
 
 def get_asset_category(ticker):
-    """Récupère la catégorie d'un asset."""
-    try:
-        from db_manager import get_db_connection
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT category FROM user_assets WHERE ticker = %s", (ticker.upper(),))
-        row = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
-        if row and row[0]:
-            return row[0]
-        else:
-            return detect_asset_category(ticker)
-            
-    except Exception as e:
-        print(f"Erreur lors de la récupération de la catégorie de {ticker}: {e}")
-        return detect_asset_category(ticker)
+    """Récupère la catégorie d'un asset (depuis le registre en mémoire)."""
+    from asset_registry import get_registered_category
+    return get_registered_category(ticker)
 
 
 def update_asset_category(ticker, category):
@@ -1464,6 +1488,9 @@ def update_asset_category(ticker, category):
         conn.commit()
         cursor.close()
         conn.close()
+        
+        from asset_registry import update_registered_category
+        update_registered_category(ticker, category)
         return True
         
     except Exception as e:
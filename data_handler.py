@@ -1,47 +1,21 @@
 # data_handler.py - VERSION MISE À JOUR
-import yfinance as yf
+import time
+
+from lazy_imports import lazy_import
 import pandas as pd
-from indicator_calculator import calculate_all_indicators
+from indicator_calculator import calculate_all_indicators, add_derived_columns
+from frame_schema import compact_indicator_frame
 from config import get_default_config, get_category_config, get_asset_category, detect_asset_category
 
+yf = lazy_import('yfinance')
+
 MIN_PERIOD_FOR_INDICATORS = "2y"
 
 
 def get_asset_id(ticker):
-    """Récupère l'ID d'un actif depuis PostgreSQL. S'il n'existe pas, il le crée."""
-    try:
-        from db_manager import get_db_connection
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id FROM assets WHERE ticker = %s", (ticker,))
-        data = cursor.fetchone()
-        
-        if data is None:
-            try:
-                info = yf.Ticker(ticker).info
-                name = info.get('longName', ticker)
-                asset_type = info.get('quoteType', 'EQUITY')
-            except Exception:
-                name = ticker
-                asset_type = 'UNKNOWN'
-            
-            cursor.execute(
-                "INSERT INTO assets (ticker, name, asset_type) VALUES (%s, %s, %s) RETURNING id",
-                (ticker, name, asset_type)
-            )
-            asset_id = cursor.fetchone()[0]
-            conn.commit()
-        else:
-            asset_id = data[0]
-        
-        cursor.close()
-        conn.close()
-        return asset_id
-        
-    except Exception as e:
-        print(f"Erreur lors de la récupération de l'asset_id pour {ticker}: {e}")
-        return hash(ticker) % 1000000
+    """Récupère l'ID d'un actif (registre en mémoire ; créé en base au premier usage)."""
+    from asset_registry import get_registered_asset_id
+    return get_registered_asset_id(ticker)
 
 
 def period_to_days(period_str):
@@ -74,36 +48,38 @@ def get_minimum_period(requested_period):
         return "max"
 
 
-def fetch_and_prepare_data(ticker, period="2y", return_full=False, config=None):
+# Lecture depuis historical_data (DB-first)
+HISTORY_START_TOLERANCE = 7     # jours : l'historique enregistré doit couvrir le début de la période
+HISTORY_MIN_DENSITY = 0.9       # part minimale de jours ouvrés présents (pas de trous)
+TRAILING_OVERLAP_DAYS = 7       # jours re-téléchargés pour détecter un ajustement (split, dividende)
+TRAILING_REFRESH_SECONDS = 300  # délai minimal entre deux téléchargements de fin de série
+ADJUSTMENT_TOLERANCE = 1e-4     # écart relatif de clôture toléré sur le recouvrement
+TAIL_WARMUP_BARS = 600          # barres d'historique pour recalculer la fin de série (SMA 200, tendance mensuelle...)
+TAIL_REFRESH_BARS = 20          # dernières barres enregistrées recalculées avec les nouvelles
+INTRADAY_WARMUP_BARS = 300      # barres intraday précédant la période (stabilisation des indicateurs)
+
+_trailing_checked = {}
+
+
+def _download_prices(ticker, **kwargs):
     """
-    Récupère les données depuis Yahoo Finance, calcule les indicateurs, et retourne un DataFrame.
-    
-    NOUVEAU: Si config est None, utilise la config adaptée à la catégorie de l'asset.
+    Télécharge les prix (Open, High, Low, Close, Volume indexés par Date), vide en cas d'échec.
+    Les téléchargements identiques simultanés n'interrogent Yahoo Finance qu'une fois.
     """
-    # Récupérer la catégorie de l'asset et appliquer la config correspondante
-    if config is None:
-        asset_category = get_asset_category(ticker)
-        config = get_category_config(asset_category)
-        print(f"📊 {ticker}: Catégorie '{asset_category}' détectée, config adaptée appliquée")
-    else:
-        asset_category = config.get('asset_category', 'custom')
-    
-    print(f"📊 Téléchargement des données pour {ticker} (catégorie: {asset_category})...")
-    
-    asset_id = get_asset_id(ticker)
-    download_period = get_minimum_period(period)
-    
+    from single_flight import single_flight
+    return single_flight(('download', ticker, tuple(sorted(kwargs.items()))), _download_prices_uncoalesced,
+                         ticker, **kwargs)
+
+
+def _download_prices_uncoalesced(ticker, **kwargs):
     try:
-        df = yf.download(ticker, period=download_period, auto_adjust=True, progress=False)
+        df = yf.download(ticker, auto_adjust=True, progress=False, **kwargs)
     except Exception as e:
         print(f"❌ Erreur lors du téléchargement de {ticker}: {e}")
         return pd.DataFrame()
     
     if df.empty:
-        print(f"⚠️ Aucune donnée reçue pour {ticker}")
-        return pd.DataFrame()
-    
-    print(f"✅ {len(df)} lignes téléchargées pour {ticker}")
+        return df
 
     if isinstance(df.columns, pd.MultiIndex):
         df.columns = df.columns.droplevel(1)
@@ -113,9 +89,13 @@ def fetch_and_prepare_data(ticker, period="2y", return_full=False, config=None):
     df.rename(columns={
         'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'
     }, inplace=True)
+    df.index.name = 'Date'
+    return df
 
-    # Calculer les indicateurs avec la config adaptée à la catégorie
-    df_with_indicators = calculate_all_indicators(df.copy(), config=config)
+
+def _prepare_indicators(prices, config, asset_id, asset_category):
+    """Calcule les indicateurs sur les prix et retourne le DataFrame au schéma compact."""
+    df_with_indicators = calculate_all_indicators(prices.copy(), config=config)
     
     df_with_indicators.rename(columns={
         'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
@@ -124,55 +104,260 @@ def fetch_and_prepare_data(ticker, period="2y", return_full=False, config=None):
     df_with_indicators['asset_id'] = asset_id
     df_with_indicators['asset_category'] = asset_category  # Ajouter la catégorie
     df_with_indicators.reset_index(inplace=True)
-    df_with_indicators['date'] = df_with_indicators['Date'].dt.strftime('%Y-%m-%d')
+    return compact_indicator_frame(df_with_indicators)
+
+
+def _covers_period(stored, start):
+    """L'historique enregistré couvre-t-il la période, sans trous ni prix manquants ?"""
+    if stored is None or stored.empty or stored['close'].isna().any():
+        return False
+    first, last = stored['Date'].iloc[0], stored['Date'].iloc[-1]
+    if first > start + pd.Timedelta(days=HISTORY_START_TOLERANCE):
+        return False
+    return len(stored) >= HISTORY_MIN_DENSITY * len(pd.bdate_range(first, last))
+
+
+def _download_trailing(ticker, stored):
+    """
+    Télécharge les barres postérieures à l'historique enregistré (avec un recouvrement).
+
+    Returns:
+        pd.DataFrame: barres à partir de la dernière date enregistrée (incluse, elle a pu
+        être partielle), vide si rien à télécharger ; None si les prix enregistrés ont été ajustés
+    """
+    last_date = stored['Date'].iloc[-1]
+    if time.time() - _trailing_checked.get(ticker, 0) < TRAILING_REFRESH_SECONDS:
+        return pd.DataFrame()
     
-    if not return_full:
-        end_date = df_with_indicators['Date'].max()
-        requested_days = period_to_days(period)
-        start_date = end_date - pd.Timedelta(days=requested_days)
-        df_filtered = df_with_indicators[df_with_indicators['Date'] >= start_date].copy()
-        return df_filtered
+    overlap_start = last_date - pd.Timedelta(days=TRAILING_OVERLAP_DAYS)
+    trailing = _download_prices(ticker, start=overlap_start.strftime('%Y-%m-%d'))
+    _trailing_checked[ticker] = time.time()
+    if trailing.empty:
+        return trailing
     
-    return df_with_indicators
+    # Recouvrement (hors dernière barre enregistrée) : un écart signale un ajustement des prix
+    stored_close = stored.set_index('Date')['close']
+    common = trailing.index[(trailing.index < last_date) & trailing.index.isin(stored_close.index)]
+    if len(common):
+        expected = stored_close.loc[common].to_numpy()
+        received = trailing.loc[common, 'Close'].to_numpy()
+        if (abs(received - expected) > ADJUSTMENT_TOLERANCE * abs(expected)).any():
+            print(f"⚠️ {ticker}: prix ajustés depuis le dernier enregistrement, rechargement complet")
+            return None
+    
+    return trailing[trailing.index >= last_date]
+
 
+def _load_from_history(ticker, asset_id, download_period, config, asset_category):
+    """
+    Chemin DB-first : lit l'historique enregistré, télécharge seulement les barres manquantes
+    en fin de série et ne recalcule que ce qui n'a pas été calculé avec la même configuration.
 
-def save_indicators_to_db(df_today):
-    """Sauvegarde les indicateurs calculés pour un jour donné dans la base de données PostgreSQL."""
+    Returns:
+        pd.DataFrame, ou None s'il faut tout télécharger (historique absent, incomplet ou ajusté)
+    """
+    from db_schema import load_history, save_history
+    from config import config_fingerprint
+    
+    start = pd.Timestamp.today().normalize() - pd.Timedelta(days=period_to_days(download_period))
+    stored = load_history(asset_id, start.date())
+    if not _covers_period(stored, start):
+        return None
+    
+    trailing = _download_trailing(ticker, stored)
+    if trailing is None:
+        return None
+    
+    config_hash = config_fingerprint(config)
+    same_config = bool((stored['config_hash'] == config_hash).all())
+    stored = stored.drop(columns='config_hash')
+    
+    if trailing.empty and same_config:
+        print(f"🗄️ {ticker}: {len(stored)} barres lues en base")
+        stored['asset_category'] = asset_category
+        return compact_indicator_frame(add_derived_columns(stored, config))
+    
+    stored_prices = stored.set_index('Date')[['open', 'high', 'low', 'close', 'volume']].rename(columns={
+        'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'
+    })
+    prices = stored_prices
+    if not trailing.empty:
+        prices = pd.concat([stored_prices[~stored_prices.index.isin(trailing.index)],
+                            trailing[['Open', 'High', 'Low', 'Close', 'Volume']]])
+    
+    if same_config:
+        # Seule la fin de série change : recalcul sur une fenêtre, le reste est conservé
+        refresh_from = stored['Date'].iloc[max(len(stored) - TAIL_REFRESH_BARS, 0)]
+        tail = prices.iloc[-(len(prices[prices.index >= refresh_from]) + TAIL_WARMUP_BARS):]
+        computed = _prepare_indicators(tail, config, asset_id, asset_category)
+        changed = computed[computed['Date'] >= refresh_from]
+        kept = stored[stored['Date'] < refresh_from].assign(asset_category=asset_category)
+        # Colonnes dérivées (non stockées) recalculées sur toute la série, barres relues comprises
+        merged = pd.concat([kept, changed], ignore_index=True)
+        df = compact_indicator_frame(add_derived_columns(merged, config))
+        print(f"🗄️ {ticker}: {len(kept)} barres lues en base, {len(changed)} recalculées")
+    else:
+        # Configuration différente : indicateurs recalculés sur les prix enregistrés
+        df = changed = _prepare_indicators(prices, config, asset_id, asset_category)
+        print(f"🗄️ {ticker}: prix lus en base, indicateurs recalculés (configuration modifiée)")
+    
     try:
-        from db_manager import get_db_connection
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        save_history(changed, config_hash=config_hash)
+    except Exception as e:
+        print(f"⚠️ Historique non enregistré pour {ticker}: {e}")
+    
+    return df
+
+
+def _prepare_intraday(ticker, period, interval, return_full, config, asset_id, asset_category):
+    """
+    Barres intraday (bar_store : stockage local par morceaux, rééchantillonnage incrémental)
+    puis même moteur d'indicateurs que pour le journalier.
+    Les indicateurs sont calculés sur la période demandée + INTRADAY_WARMUP_BARS barres.
+    """
+    from bar_store import load_bars, max_history_days
+    
+    requested_days = period_to_days(period)
+    max_days = max_history_days(interval)
+    if max_days is not None and requested_days > max_days:
+        print(f"⚠️ {ticker} {interval}: historique limité à {max_days} jours")
+        requested_days = max_days
+    
+    bars = load_bars(ticker, interval)
+    if bars.empty:
+        print(f"⚠️ Aucune barre {interval} pour {ticker}")
+        return pd.DataFrame()
+    
+    start_date = bars.index[-1] - pd.Timedelta(days=requested_days)
+    first = 0 if return_full else max(bars.index.searchsorted(start_date) - INTRADAY_WARMUP_BARS, 0)
+    df = _prepare_indicators(bars.iloc[first:], config, asset_id, asset_category)
+    
+    if not return_full:
+        df = df[df['Date'] >= start_date].reset_index(drop=True)
+    print(f"✅ {ticker} {interval}: {len(df)} barres")
+    return df
+
+
+def fetch_and_prepare_data(ticker, period="2y", return_full=False, config=None, use_history=True, interval='1d'):
+    """
+    Point d'entrée de _fetch_and_prepare_data :
+    - en journalier, le calcul porte sur toute la période téléchargée (get_minimum_period) et
+      la période demandée est découpée ensuite : les appels de périodes différentes mais de même
+      période téléchargée (ex. '6mo' et '1y', chargement et sauvegarde) partagent le même calcul
+    - les appels concurrents pour le même calcul partagent un seul téléchargement (single_flight)
+    - le résultat est conservé quelques minutes entre workers : panneau mappé en mémoire
+      (mmap_store, partagé sans copie) ou, si désactivé, cache partagé sérialisé
+    """
+    from functools import partial
+    from config import config_fingerprint
+    from single_flight import single_flight
+    from shared_cache import cached
+    from mmap_store import PANEL_STORE_ENABLED, cached_frame
+    from bar_store import INGEST_REFRESH_SECONDS
+    
+    fingerprint = config_fingerprint(config) if config is not None else None
+    if interval == '1d':
+        download_period = get_minimum_period(period)
+        key = ('prepare', ticker, download_period, interval, use_history, fingerprint)
+        compute = partial(_fetch_and_prepare_data, ticker, download_period, True, config, use_history, interval)
+        ttl = TRAILING_REFRESH_SECONDS
+    else:
+        key = ('prepare', ticker, period, interval, return_full, use_history, fingerprint)
+        compute = partial(_fetch_and_prepare_data, ticker, period, return_full, config, use_history, interval)
+        ttl = INGEST_REFRESH_SECONDS
+    
+    if PANEL_STORE_ENABLED:
+        df = single_flight(key, cached_frame, ticker, key, compute, ttl, lambda df: not df.empty)
+    else:
+        df = single_flight(key, cached, 'indicators', key, compute, ttl, lambda df: not df.empty)
+    
+    if interval == '1d' and not return_full:
+        return _filter_period(df, period)
+    return df
+
+
+def _filter_period(df, period):
+    """Dernières `period` de l'historique (depuis la dernière date disponible)."""
+    if df.empty:
+        return df
+    end_date = df['Date'].max()
+    start_date = end_date - pd.Timedelta(days=period_to_days(period))
+    return df[df['Date'] >= start_date].copy()
+
+
+def _fetch_and_prepare_data(ticker, period="2y", return_full=False, config=None, use_history=True, interval='1d'):
+    """
+    Récupère les données (historical_data puis Yahoo Finance), calcule les indicateurs,
+    et retourne un DataFrame.
+    
+    NOUVEAU: Si config est None, utilise la config adaptée à la catégorie de l'asset.
+    Si l'historique enregistré couvre la période, seules les barres manquantes sont téléchargées
+    et seuls les indicateurs calculés avec une autre configuration sont recalculés.
+    Les intervalles intraday ('15m', '30m', '1h', '4h') passent par bar_store.
+    """
+    # Récupérer la catégorie de l'asset et appliquer la config correspondante
+    if config is None:
+        asset_category = get_asset_category(ticker)
+        config = get_category_config(asset_category)
+        print(f"📊 {ticker}: Catégorie '{asset_category}' détectée, config adaptée appliquée")
+    else:
+        asset_category = config.get('asset_category', 'custom')
+    
+    asset_id = get_asset_id(ticker)
+    
+    if interval != '1d':
+        return _prepare_intraday(ticker, period, interval, return_full, config, asset_id, asset_category)
+    
+    download_period = get_minimum_period(period)
+    
+    df_with_indicators = None
+    if use_history and asset_id is not None:
+        df_with_indicators = _load_from_history(ticker, asset_id, download_period, config, asset_category)
+    
+    if df_with_indicators is None:
+        print(f"📊 Téléchargement des données pour {ticker} (catégorie: {asset_category})...")
+        df = _download_prices(ticker, period=download_period)
+        
+        if df.empty:
+            print(f"⚠️ Aucune donnée reçue pour {ticker}")
+            return pd.DataFrame()
+        
+        print(f"✅ {len(df)} lignes téléchargées pour {ticker}")
         
-        columns_to_save = [
-            'asset_id', 'date', 'open', 'high', 'low', 'close', 'volume',
-            'stochastic_k', 'stochastic_d', 'rsi', 'pattern', 'recommendation', 'conviction'
-        ]
+        # Calculer les indicateurs avec la config adaptée à la catégorie
+        df_with_indicators = _prepare_indicators(df, config, asset_id, asset_category)
         
-        for col in columns_to_save:
-            if col not in df_today.columns:
-                df_today[col] = None
-                
-        df_to_save = df_today[columns_to_save].copy()
-        df_to_save = df_to_save.where(pd.notna(df_to_save), None)
-
-        for _, row in df_to_save.iterrows():
-            cursor.execute('''
-                INSERT INTO historical_data 
-                (asset_id, date, open, high, low, close, volume, stochastic_k, stochastic_d, rsi, pattern, recommendation, conviction)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (asset_id, date) 
-                DO UPDATE SET 
-                    open = EXCLUDED.open, high = EXCLUDED.high, low = EXCLUDED.low,
-                    close = EXCLUDED.close, volume = EXCLUDED.volume,
-                    stochastic_k = EXCLUDED.stochastic_k, stochastic_d = EXCLUDED.stochastic_d,
-                    rsi = EXCLUDED.rsi, pattern = EXCLUDED.pattern,
-                    recommendation = EXCLUDED.recommendation, conviction = EXCLUDED.conviction
-            ''', tuple(row))
+        if use_history and asset_id is not None:
+            _write_history(ticker, df_with_indicators, config)
+    
+    if not return_full:
+        return _filter_period(df_with_indicators, period)
+    
+    return df_with_indicators
+
+
+def _write_history(ticker, df, config):
+    """Enregistre un historique téléchargé pour les prochaines lectures (best effort)."""
+    from config import config_fingerprint
+    from db_schema import save_history
+    
+    try:
+        save_history(df, config_hash=config_fingerprint(config))
+    except Exception as e:
+        print(f"⚠️ Historique non enregistré pour {ticker}: {e}")
+
+
+def save_indicators_to_db(df_today, config=None):
+    """
+    Sauvegarde les indicateurs calculés dans historical_data (PostgreSQL).
+    Les lignes sont marquées de l'empreinte de la configuration utilisée pour les calculer.
+    """
+    try:
+        from config import config_fingerprint
+        from db_schema import save_history
         
-        conn.commit()
-        cursor.close()
-        conn.close()
-        print(f"✅ Données sauvegardées pour {len(df_to_save)} lignes.")
+        saved = save_history(df_today, config_hash=config_fingerprint(config))
+        print(f"✅ Données sauvegardées pour {saved} lignes.")
         
     except Exception as e:
         print(f"❌ Erreur lors de la sauvegarde: {e}")
\ No newline at end of file
@@ -1,6 +1,7 @@
 -- database/init_database.sql
 -- Script d'initialisation de la base de données locale
 -- À exécuter une seule fois pour créer la structure
+-- (l'application crée aussi les tables qu'elle utilise au démarrage : db_manager.ensure_database_schema)
 
 -- Création de la base de données (à exécuter en tant que superuser)
 -- CREATE DATABASE trading_dashboard;
@@ -72,61 +73,86 @@ CREATE TABLE IF NOT EXISTS assets (
 -- ============================================================
 -- TABLE: historical_data
 -- Données historiques OHLCV + indicateurs calculés
+-- Même schéma que db_schema.create_historical_data : partitionnement annuel,
+-- BRIN sur date, index couvrants. Les migrations lancées au démarrage
+-- (db_manager.ensure_database_schema) le reconnaissent et n'y touchent pas.
 -- ============================================================
 CREATE TABLE IF NOT EXISTS historical_data (
-    id SERIAL PRIMARY KEY,
-    asset_id INTEGER REFERENCES assets(id) ON DELETE CASCADE,
+    asset_id INTEGER NOT NULL REFERENCES assets(id) ON DELETE CASCADE,
     date DATE NOT NULL,
     
-    -- OHLCV
-    open DECIMAL(20, 8),
-    high DECIMAL(20, 8),
-    low DECIMAL(20, 8),
-    close DECIMAL(20, 8),
+    open DOUBLE PRECISION,
+    high DOUBLE PRECISION,
+    low DOUBLE PRECISION,
+    close DOUBLE PRECISION,
     volume BIGINT,
-    
-    -- Indicateurs techniques
-    rsi DECIMAL(10, 4),
-    stochastic_k DECIMAL(10, 4),
-    stochastic_d DECIMAL(10, 4),
-    macd DECIMAL(15, 6),
-    macd_signal DECIMAL(15, 6),
-    macd_histogram DECIMAL(15, 6),
-    
-    -- Moyennes mobiles
-    sma_20 DECIMAL(20, 8),
-    sma_50 DECIMAL(20, 8),
-    sma_200 DECIMAL(20, 8),
-    ema_12 DECIMAL(20, 8),
-    ema_26 DECIMAL(20, 8),
-    
-    -- Bollinger Bands
-    bb_upper DECIMAL(20, 8),
-    bb_middle DECIMAL(20, 8),
-    bb_lower DECIMAL(20, 8),
-    bb_percent DECIMAL(10, 6),
+    rsi REAL,
+    stochastic_k REAL,
+    stochastic_d REAL,
+    macd DOUBLE PRECISION,
+    macd_signal DOUBLE PRECISION,
+    macd_histogram DOUBLE PRECISION,
+    sma_20 DOUBLE PRECISION,
+    sma_50 DOUBLE PRECISION,
+    sma_200 DOUBLE PRECISION,
+    ema_12 DOUBLE PRECISION,
+    ema_26 DOUBLE PRECISION,
+    bb_upper DOUBLE PRECISION,
+    bb_middle DOUBLE PRECISION,
+    bb_lower DOUBLE PRECISION,
+    bb_bandwidth REAL,
+    bb_percent REAL,
     bb_signal VARCHAR(20),
-    
-    -- ADX/DI
-    adx DECIMAL(10, 4),
-    di_plus DECIMAL(10, 4),
-    di_minus DECIMAL(10, 4),
-    
-    -- Tendance et signaux
+    adx REAL,
+    di_plus REAL,
+    di_minus REAL,
     trend VARCHAR(30),
+    weekly_trend VARCHAR(30),
+    monthly_trend VARCHAR(30),
     rsi_divergence VARCHAR(20),
     pattern VARCHAR(100),
     pattern_direction VARCHAR(20),
-    
-    -- Recommandation calculée
     recommendation VARCHAR(20),
-    conviction INTEGER,
-    active_combinations TEXT[],  -- Array des combinaisons actives
+    conviction SMALLINT,
+    active_combinations_mask INTEGER,
+    config_hash VARCHAR(16),
     
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    
-    -- Contrainte d'unicité
-    UNIQUE(asset_id, date)
+    PRIMARY KEY (asset_id, date)
+) PARTITION BY RANGE (date);
+
+CREATE TABLE IF NOT EXISTS historical_data_default PARTITION OF historical_data DEFAULT;
+
+-- Partitions annuelles de 2000 à l'année prochaine
+-- (les années suivantes sont créées par ensure_year_partitions)
+DO $$
+BEGIN
+    FOR y IN 2000..EXTRACT(YEAR FROM CURRENT_DATE)::INTEGER + 1 LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS historical_data_y%s PARTITION OF historical_data '
+            'FOR VALUES FROM (%L) TO (%L)',
+            y, make_date(y, 1, 1), make_date(y + 1, 1, 1)
+        );
+    END LOOP;
+END $$;
+
+-- ============================================================
+-- TABLE: asset_latest_state
+-- Dernier état de chaque actif (tableau récapitulatif), mis à jour
+-- à chaque enregistrement de barres (db_schema.refresh_latest_state)
+-- ============================================================
+CREATE TABLE IF NOT EXISTS asset_latest_state (
+    asset_id INTEGER PRIMARY KEY REFERENCES assets(id) ON DELETE CASCADE,
+    bar_date DATE NOT NULL,
+    close DOUBLE PRECISION,
+    rsi REAL,
+    rsi_divergence VARCHAR(20),
+    last_div_date DATE,
+    last_div_type VARCHAR(20),
+    recommendation VARCHAR(20),
+    config_hash VARCHAR(16),
+    source VARCHAR(20),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 -- ============================================================
@@ -140,15 +166,63 @@ CREATE TABLE IF NOT EXISTS user_preferences (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- ============================================================
+-- TABLE: fundamentals_cache
+-- Cache des données fondamentales (ticker.info, historique trimestriel)
+-- ============================================================
+CREATE TABLE IF NOT EXISTS fundamentals_cache (
+    ticker VARCHAR(20) NOT NULL,
+    field VARCHAR(50) NOT NULL,                 -- 'info', 'quarterly_history'
+    payload TEXT NOT NULL,                      -- JSON sérialisé
+    fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL,              -- 1 jour (info) / prochaine publication (états)
+    PRIMARY KEY (ticker, field)
+);
+
+-- ============================================================
+-- TABLE: fundamental_snapshots
+-- Snapshot journalier du screener fondamental (une ligne par ticker et par jour)
+-- ============================================================
+CREATE TABLE IF NOT EXISTS fundamental_snapshots (
+    snapshot_date DATE NOT NULL,
+    ticker VARCHAR(20) NOT NULL,
+    score DECIMAL(4, 1),                        -- Score global 1-5
+    valuation_score DECIMAL(4, 2),
+    profitability_score DECIMAL(4, 2),
+    financial_health_score DECIMAL(4, 2),
+    growth_score DECIMAL(4, 2),
+    pe_ratio DOUBLE PRECISION,
+    peg_ratio DOUBLE PRECISION,
+    pb_ratio DOUBLE PRECISION,
+    ps_ratio DOUBLE PRECISION,
+    ev_ebitda DOUBLE PRECISION,
+    roe DOUBLE PRECISION,
+    net_margin DOUBLE PRECISION,
+    debt_equity DOUBLE PRECISION,
+    current_ratio DOUBLE PRECISION,
+    revenue_growth DOUBLE PRECISION,
+    earnings_growth DOUBLE PRECISION,
+    dividend_yield DOUBLE PRECISION,
+    market_cap DOUBLE PRECISION,
+    sector VARCHAR(100),
+    industry VARCHAR(150),
+    PRIMARY KEY (snapshot_date, ticker)
+);
+
 -- ============================================================
 -- INDEX pour les performances
 -- ============================================================
 CREATE INDEX IF NOT EXISTS idx_assets_ticker ON assets(ticker);
 CREATE INDEX IF NOT EXISTS idx_assets_category ON assets(category_id);
 CREATE INDEX IF NOT EXISTS idx_assets_active ON assets(is_active);
-CREATE INDEX IF NOT EXISTS idx_historical_asset_date ON historical_data(asset_id, date DESC);
-CREATE INDEX IF NOT EXISTS idx_historical_date ON historical_data(date DESC);
-CREATE INDEX IF NOT EXISTS idx_historical_divergence ON historical_data(rsi_divergence) WHERE rsi_divergence IS NOT NULL;
+-- historical_data (déclarés sur la table mère : propagés à chaque partition)
+CREATE INDEX IF NOT EXISTS idx_historical_date_brin ON historical_data USING BRIN (date);
+CREATE INDEX IF NOT EXISTS idx_historical_latest
+    ON historical_data (asset_id, date DESC) INCLUDE (close, rsi, rsi_divergence, trend, recommendation, conviction, config_hash);
+CREATE INDEX IF NOT EXISTS idx_historical_divergences
+    ON historical_data (date, asset_id) INCLUDE (rsi_divergence, close, config_hash)
+    WHERE rsi_divergence IN ('bullish', 'bearish');
+CREATE INDEX IF NOT EXISTS idx_fundamental_snapshots_ticker ON fundamental_snapshots(ticker, snapshot_date DESC);
 
 -- ============================================================
 -- FONCTION: Mise à jour automatique du timestamp updated_at
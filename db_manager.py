@@ -1,12 +1,12 @@
 # db_manager.py
 """
 Gestionnaire de base de données PostgreSQL.
-Gère la connexion et l'initialisation des tables.
+Gère la connexion et les migrations du schéma (ensure_database_schema).
 """
 
 import os
-import psycopg2
-from psycopg2.extras import RealDictCursor
+import threading
+import time
 from dotenv import load_dotenv
 
 # Charger les variables d'environnement depuis .env (en local)
@@ -14,8 +14,20 @@ load_dotenv()
 
 DATABASE_URL = os.environ.get('DATABASE_URL')
 
+# Version du schéma : dernière entrée de get_migrations()
+SCHEMA_VERSION = 4
+SCHEMA_LOCK_ID = 72034  # verrou consultatif : un seul worker applique le schéma
+
+# Après un échec de connexion, les caches adossés à la base la sautent pendant ce délai
+DB_RETRY_DELAY = 30
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+_connection_failed_at = None
+
 def get_db_connection():
     """Crée et retourne une connexion à la base de données."""
+    global _connection_failed_at
     if not DATABASE_URL:
         raise ValueError("DATABASE_URL non définie. Vérifiez votre fichier .env ou les variables d'environnement.")
     
@@ -24,78 +36,114 @@ def get_db_connection():
     if db_url.startswith('postgres://'):
         db_url = db_url.replace('postgres://', 'postgresql://', 1)
     
-    return psycopg2.connect(db_url)
+    import psycopg2
+    try:
+        conn = psycopg2.connect(db_url)
+    except psycopg2.OperationalError:
+        _connection_failed_at = time.time()
+        raise
+    _connection_failed_at = None
+    return conn
 
 
-def init_database():
-    """Initialise les tables de la base de données si elles n'existent pas."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def db_unavailable():
+    """
+    True sans DATABASE_URL, ou si la dernière connexion a échoué il y a moins de
+    DB_RETRY_DELAY secondes : les lectures de cache passent alors la base sans I/O ni message.
+    """
+    if not DATABASE_URL:
+        return True
+    return _connection_failed_at is not None and time.time() - _connection_failed_at < DB_RETRY_DELAY
+
+
+def create_base_tables(cursor):
+    """Tables de base (migration 1)."""
+    # Table des actifs
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS assets (
+            id SERIAL PRIMARY KEY,
+            ticker VARCHAR(20) UNIQUE NOT NULL,
+            name VARCHAR(255),
+            asset_type VARCHAR(50),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
     
-    try:
-        # Table des actifs
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS assets (
-                id SERIAL PRIMARY KEY,
-                ticker VARCHAR(20) UNIQUE NOT NULL,
-                name VARCHAR(255),
-                asset_type VARCHAR(50),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Table des données historiques
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS historical_data (
-                id SERIAL PRIMARY KEY,
-                asset_id INTEGER REFERENCES assets(id),
-                date DATE NOT NULL,
-                open DECIMAL(20, 6),
-                high DECIMAL(20, 6),
-                low DECIMAL(20, 6),
-                close DECIMAL(20, 6),
-                volume BIGINT,
-                stochastic_k DECIMAL(10, 4),
-                stochastic_d DECIMAL(10, 4),
-                rsi DECIMAL(10, 4),
-                pattern VARCHAR(100),
-                recommendation VARCHAR(20),
-                conviction INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(asset_id, date)
-            )
-        ''')
-        
-        # Table des actifs utilisateur (pour la liste personnalisée)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_assets (
-                id SERIAL PRIMARY KEY,
-                ticker VARCHAR(20) UNIQUE NOT NULL,
-                display_order INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Table de configuration utilisateur (optionnel, pour sauvegarder les configs)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_config (
-                id SERIAL PRIMARY KEY,
-                config_key VARCHAR(100) UNIQUE NOT NULL,
-                config_value TEXT,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        print("✅ Base de données initialisée avec succès")
-        
-    except Exception as e:
-        print(f"❌ Erreur lors de l'initialisation de la base de données: {e}")
-        conn.rollback()
-        raise
-    finally:
-        cursor.close()
-        conn.close()
+    # Table des actifs utilisateur (pour la liste personnalisée)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_assets (
+            id SERIAL PRIMARY KEY,
+            ticker VARCHAR(20) UNIQUE NOT NULL,
+            display_order INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Table de configuration utilisateur (optionnel, pour sauvegarder les configs)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_config (
+            id SERIAL PRIMARY KEY,
+            config_key VARCHAR(100) UNIQUE NOT NULL,
+            config_value TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Cache des données fondamentales (ticker.info, historique trimestriel)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fundamentals_cache (
+            ticker VARCHAR(20) NOT NULL,
+            field VARCHAR(50) NOT NULL,
+            payload TEXT NOT NULL,
+            fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (ticker, field)
+        )
+    ''')
+    
+    # Snapshot journalier du screener fondamental
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fundamental_snapshots (
+            snapshot_date DATE NOT NULL,
+            ticker VARCHAR(20) NOT NULL,
+            score DECIMAL(4, 1),
+            valuation_score DECIMAL(4, 2),
+            profitability_score DECIMAL(4, 2),
+            financial_health_score DECIMAL(4, 2),
+            growth_score DECIMAL(4, 2),
+            pe_ratio DOUBLE PRECISION,
+            peg_ratio DOUBLE PRECISION,
+            pb_ratio DOUBLE PRECISION,
+            ps_ratio DOUBLE PRECISION,
+            ev_ebitda DOUBLE PRECISION,
+            roe DOUBLE PRECISION,
+            net_margin DOUBLE PRECISION,
+            debt_equity DOUBLE PRECISION,
+            current_ratio DOUBLE PRECISION,
+            revenue_growth DOUBLE PRECISION,
+            earnings_growth DOUBLE PRECISION,
+            dividend_yield DOUBLE PRECISION,
+            market_cap DOUBLE PRECISION,
+            sector VARCHAR(100),
+            industry VARCHAR(150),
+            PRIMARY KEY (snapshot_date, ticker)
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_fundamental_snapshots_ticker
+        ON fundamental_snapshots(ticker, snapshot_date DESC)
+    ''')
+
+
+def get_migrations():
+    """Migrations du schéma, dans l'ordre : (version, fonction(cursor))."""
+    from db_schema import migrate_historical_data, create_latest_state, sync_history_columns
+    return [
+        (1, create_base_tables),
+        (2, migrate_historical_data),
+        (3, create_latest_state),
+        (4, sync_history_columns),
+    ]
 
 
 def check_database_connection():
@@ -111,11 +159,73 @@ def check_database_connection():
         return False, str(e)
 
 
-# Initialiser la base de données au chargement du module
-if DATABASE_URL:
-    try:
-        init_database()
-    except Exception as e:
-        print(f"⚠️ Impossible d'initialiser la base de données: {e}")
-else:
-    print("⚠️ DATABASE_URL non définie - mode sans base de données")
\ No newline at end of file
+def ensure_database_schema():
+    """
+    Applique le schéma une seule fois : une fois par processus (drapeau), et une fois
+    par version de schéma pour toute l'application (table schema_migrations +
+    verrou consultatif, les workers gunicorn démarrant en parallèle).
+    
+    Returns:
+        bool: True si le schéma est à jour
+    """
+    global _schema_ready
+    if _schema_ready:
+        return True
+    
+    if not DATABASE_URL:
+        print("⚠️ DATABASE_URL non définie - mode sans base de données")
+        return False
+    
+    with _schema_lock:
+        if _schema_ready:
+            return True
+        
+        try:
+            conn = get_db_connection()
+        except Exception as e:
+            print(f"⚠️ Impossible de se connecter à PostgreSQL: {e}")
+            return False
+        
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT pg_advisory_lock(%s)", (SCHEMA_LOCK_ID,))
+            try:
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS schema_migrations (
+                        version INTEGER PRIMARY KEY,
+                        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+                current_version = cursor.fetchone()[0]
+                conn.commit()
+                
+                for version, migration in get_migrations():
+                    if version <= current_version:
+                        continue
+                    migration(cursor)
+                    cursor.execute(
+                        "INSERT INTO schema_migrations (version) VALUES (%s) ON CONFLICT DO NOTHING",
+                        (version,)
+                    )
+                    conn.commit()
+                    print(f"✅ Schéma migré en version {version}")
+                
+                # Partitions annuelles de historical_data (année en cours et suivante)
+                from db_schema import ensure_year_partitions
+                ensure_year_partitions(cursor)
+                conn.commit()
+                print(f"✅ Schéma à jour (version {SCHEMA_VERSION})")
+            finally:
+                conn.rollback()  # sort d'une éventuelle transaction en échec avant de libérer le verrou
+                cursor.execute("SELECT pg_advisory_unlock(%s)", (SCHEMA_LOCK_ID,))
+            
+            _schema_ready = True
+            return True
+        
+        except Exception as e:
+            print(f"⚠️ Impossible d'initialiser la base de données: {e}")
+            return False
+        finally:
+            cursor.close()
+            conn.close()
@@ -0,0 +1,492 @@
+# db_schema.py
+"""
+Schéma de la table historical_data et requêtes de lecture associées.
+
+- Partitionnement par année (RANGE sur date) + partition par défaut :
+  les requêtes bornées en date ne lisent que les partitions concernées
+- Index BRIN sur date (quasi gratuit, les lignes arrivent dans l'ordre chronologique)
+- Index couvrant (asset_id, date DESC) INCLUDE (...) pour « dernière barre par actif »
+- Index partiel couvrant pour « divergences sur une plage de dates »
+- asset_latest_state : dernier état de chaque actif (tableau récapitulatif),
+  mis à jour à chaque enregistrement de barres. Sa colonne recommendation est
+  celle du moteur (copiée de historical_data) ; le récapitulatif ne l'écrit pas.
+
+Les migrations sont appliquées par db_manager.ensure_database_schema.
+"""
+import io
+from datetime import date
+
+import pandas as pd
+
+
+FIRST_PARTITION_YEAR = 2000
+PARTITIONS_AHEAD = 1  # années créées à l'avance
+
+# Colonnes stockées (en plus de asset_id et date)
+HISTORY_COLUMNS = [
+    ('open', 'DOUBLE PRECISION'),
+    ('high', 'DOUBLE PRECISION'),
+    ('low', 'DOUBLE PRECISION'),
+    ('close', 'DOUBLE PRECISION'),
+    ('volume', 'BIGINT'),
+    ('rsi', 'REAL'),
+    ('stochastic_k', 'REAL'),
+    ('stochastic_d', 'REAL'),
+    ('macd', 'DOUBLE PRECISION'),
+    ('macd_signal', 'DOUBLE PRECISION'),
+    ('macd_histogram', 'DOUBLE PRECISION'),
+    ('sma_20', 'DOUBLE PRECISION'),
+    ('sma_50', 'DOUBLE PRECISION'),
+    ('sma_200', 'DOUBLE PRECISION'),
+    ('ema_12', 'DOUBLE PRECISION'),
+    ('ema_26', 'DOUBLE PRECISION'),
+    ('bb_upper', 'DOUBLE PRECISION'),
+    ('bb_middle', 'DOUBLE PRECISION'),
+    ('bb_lower', 'DOUBLE PRECISION'),
+    ('bb_bandwidth', 'REAL'),
+    ('bb_percent', 'REAL'),
+    ('bb_signal', 'VARCHAR(20)'),
+    ('adx', 'REAL'),
+    ('di_plus', 'REAL'),
+    ('di_minus', 'REAL'),
+    ('trend', 'VARCHAR(30)'),
+    ('weekly_trend', 'VARCHAR(30)'),
+    ('monthly_trend', 'VARCHAR(30)'),
+    ('rsi_divergence', 'VARCHAR(20)'),
+    ('pattern', 'VARCHAR(100)'),
+    ('pattern_direction', 'VARCHAR(20)'),
+    ('recommendation', 'VARCHAR(20)'),
+    ('conviction', 'SMALLINT'),
+    ('active_combinations_mask', 'INTEGER'),
+    ('config_hash', 'VARCHAR(16)'),
+]
+HISTORY_COLUMN_NAMES = [name for name, _ in HISTORY_COLUMNS]
+
+# Colonnes lues sans accès à la table grâce aux index couvrants
+LATEST_BAR_COLUMNS = ['close', 'rsi', 'rsi_divergence', 'trend', 'recommendation', 'conviction', 'config_hash']
+DIVERGENCE_COLUMNS = ['rsi_divergence', 'close', 'config_hash']
+
+# Types pandas à la lecture (COPY) ; les entiers passent par float64 tant qu'ils peuvent être NULL
+PANDAS_DTYPES = {
+    'DOUBLE PRECISION': 'float64',
+    'REAL': 'float32',
+    'BIGINT': 'float64',
+    'INTEGER': 'float64',
+    'SMALLINT': 'float64',
+}
+INTEGER_DTYPES = {'volume': 'int64', 'active_combinations_mask': 'int32'}
+
+# Dernier état par actif (tableau récapitulatif)
+LATEST_STATE_COLUMNS = [
+    'asset_id', 'bar_date', 'close', 'rsi', 'rsi_divergence', 'last_div_date', 'last_div_type',
+    'recommendation', 'config_hash', 'source', 'updated_at',
+]
+# Une ligne n'est remplacée que par un état au moins aussi récent
+_LATEST_STATE_UPSERT = "ON CONFLICT (asset_id) DO UPDATE SET " + ', '.join(
+    f"{c} = EXCLUDED.{c}" for c in LATEST_STATE_COLUMNS[1:]
+) + " WHERE asset_latest_state.bar_date <= EXCLUDED.bar_date"
+
+
+# =============================================================================
+# MIGRATION
+# =============================================================================
+
+def _table_kind(cursor, table):
+    """'p' (partitionnée), 'r' (table simple) ou None si absente."""
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (table,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def create_historical_data(cursor):
+    """Crée la table partitionnée, ses partitions annuelles et ses index."""
+    columns = ',\n'.join(f"                {name} {sql_type}" for name, sql_type in HISTORY_COLUMNS)
+    cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS historical_data (
+                asset_id INTEGER NOT NULL REFERENCES assets(id) ON DELETE CASCADE,
+                date DATE NOT NULL,
+{columns},
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (asset_id, date)
+            ) PARTITION BY RANGE (date)
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS historical_data_default PARTITION OF historical_data DEFAULT
+    ''')
+    ensure_year_partitions(cursor, range(FIRST_PARTITION_YEAR, date.today().year + PARTITIONS_AHEAD + 1))
+
+    # Index déclarés sur la table mère : propagés à chaque partition
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_historical_date_brin
+        ON historical_data USING BRIN (date)
+    ''')
+    cursor.execute(f'''
+        CREATE INDEX IF NOT EXISTS idx_historical_latest
+        ON historical_data (asset_id, date DESC) INCLUDE ({', '.join(LATEST_BAR_COLUMNS)})
+    ''')
+    cursor.execute(f'''
+        CREATE INDEX IF NOT EXISTS idx_historical_divergences
+        ON historical_data (date, asset_id) INCLUDE ({', '.join(DIVERGENCE_COLUMNS)})
+        WHERE rsi_divergence IN ('bullish', 'bearish')
+    ''')
+
+
+def ensure_year_partitions(cursor, years=None):
+    """Crée les partitions annuelles manquantes (par défaut : jusqu'à l'année prochaine)."""
+    if years is None:
+        current = date.today().year
+        years = range(current, current + PARTITIONS_AHEAD + 1)
+
+    for year in years:
+        # Point de sauvegarde : échoue si la partition par défaut contient déjà cette année
+        cursor.execute("SAVEPOINT year_partition")
+        try:
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS historical_data_y{year} PARTITION OF historical_data
+                FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')
+            ''')
+            cursor.execute("RELEASE SAVEPOINT year_partition")
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT year_partition")
+            print(f"⚠️ Partition {year} non créée: {e}")
+
+
+def migrate_historical_data(cursor):
+    """
+    Remplace l'ancienne table historical_data (simple, UNIQUE(asset_id, date)) par la
+    version partitionnée, en recopiant les colonnes communes.
+    """
+    kind = _table_kind(cursor, 'historical_data')
+    if kind == 'p':
+        return
+
+    if kind == 'r':
+        cursor.execute("ALTER TABLE historical_data RENAME TO historical_data_legacy")
+        # Les noms d'index (dont historical_data_pkey) doivent être libérés pour la nouvelle table
+        cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = 'historical_data_legacy'")
+        for (index_name,) in cursor.fetchall():
+            cursor.execute(f'ALTER INDEX "{index_name}" RENAME TO "{index_name[:50]}_legacy"')
+        cursor.execute("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_name = 'historical_data_legacy'
+        """)
+        legacy_columns = {row[0] for row in cursor.fetchall()}
+
+    create_historical_data(cursor)
+
+    if kind == 'r':
+        common = ['asset_id', 'date'] + [c for c in HISTORY_COLUMN_NAMES if c in legacy_columns]
+        cursor.execute(f"""
+            INSERT INTO historical_data ({', '.join(common)})
+            SELECT {', '.join(common)} FROM historical_data_legacy
+            WHERE asset_id IS NOT NULL
+            ON CONFLICT DO NOTHING
+        """)
+        cursor.execute("DROP TABLE historical_data_legacy")
+        print("✅ historical_data migrée vers la table partitionnée")
+
+
+def sync_history_columns(cursor):
+    """Ajoute à historical_data les colonnes de HISTORY_COLUMNS qui lui manquent (propagé aux partitions)."""
+    for name, sql_type in HISTORY_COLUMNS:
+        cursor.execute(f"ALTER TABLE historical_data ADD COLUMN IF NOT EXISTS {name} {sql_type}")
+
+
+def create_latest_state(cursor):
+    """Table du dernier état par actif (une ligne par actif)."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS asset_latest_state (
+            asset_id INTEGER PRIMARY KEY REFERENCES assets(id) ON DELETE CASCADE,
+            bar_date DATE NOT NULL,
+            close DOUBLE PRECISION,
+            rsi REAL,
+            rsi_divergence VARCHAR(20),
+            last_div_date DATE,
+            last_div_type VARCHAR(20),
+            recommendation VARCHAR(20),
+            config_hash VARCHAR(16),
+            source VARCHAR(20),
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute("SELECT id FROM assets")
+    refresh_latest_state(cursor, [row[0] for row in cursor.fetchall()])
+
+
+# =============================================================================
+# ÉCRITURE
+# =============================================================================
+
+def save_history(df, config_hash=None):
+    """
+    Enregistre (upsert) les lignes d'un DataFrame d'indicateurs dans historical_data.
+    Le DataFrame doit contenir 'asset_id' et 'Date' (ou 'date').
+
+    Returns:
+        int: nombre de lignes écrites
+    """
+    if df.empty:
+        return 0
+
+    data = pd.DataFrame({
+        'asset_id': df['asset_id'],
+        'date': pd.to_datetime(df['Date'] if 'Date' in df.columns else df['date']).dt.date,
+    })
+    for name in HISTORY_COLUMN_NAMES:
+        data[name] = df[name] if name in df.columns else None
+    if config_hash is not None:
+        data['config_hash'] = config_hash
+
+    # Types Python natifs (catégories, float32, int8 ne sont pas adaptés par psycopg2)
+    data = data.astype(object)
+    data = data.where(pd.notna(data), None)
+    rows = list(data.itertuples(index=False, name=None))
+
+    from db_manager import get_db_connection
+    from psycopg2.extras import execute_values
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        columns = ['asset_id', 'date'] + HISTORY_COLUMN_NAMES
+        updates = ', '.join(f"{c} = EXCLUDED.{c}" for c in HISTORY_COLUMN_NAMES)
+        execute_values(cursor, f"""
+            INSERT INTO historical_data ({', '.join(columns)})
+            VALUES %s
+            ON CONFLICT (asset_id, date) DO UPDATE SET {updates}
+        """, rows, page_size=1000)
+        refresh_latest_state(cursor, data['asset_id'].unique().tolist())
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+    return len(rows)
+
+
+def refresh_latest_state(cursor, asset_ids):
+    """
+    Recalcule asset_latest_state depuis historical_data pour ces actifs
+    (dernière barre + dernière divergence : deux recherches d'index par actif).
+    Une ligne plus récente (ex. écrite par le tableau récapitulatif) n'est pas écrasée.
+    """
+    if not asset_ids:
+        return
+    cursor.execute(f"""
+        INSERT INTO asset_latest_state ({', '.join(LATEST_STATE_COLUMNS)})
+        SELECT a.id, last.date, last.close, last.rsi, last.rsi_divergence, div.date, div.rsi_divergence,
+               last.recommendation, last.config_hash, 'history', CURRENT_TIMESTAMP
+        FROM assets a
+        CROSS JOIN LATERAL (
+            SELECT h.date, h.close, h.rsi, h.rsi_divergence, h.recommendation, h.config_hash
+            FROM historical_data h WHERE h.asset_id = a.id
+            ORDER BY h.date DESC LIMIT 1
+        ) last
+        LEFT JOIN LATERAL (
+            SELECT h.date, h.rsi_divergence FROM historical_data h
+            WHERE h.asset_id = a.id AND h.rsi_divergence IN ('bullish', 'bearish')
+            ORDER BY h.date DESC LIMIT 1
+        ) div ON TRUE
+        WHERE a.id = ANY(%s)
+        {_LATEST_STATE_UPSERT}
+    """, ([int(asset_id) for asset_id in asset_ids],))
+
+
+def save_latest_state(states, config_hash=None, source='summary'):
+    """
+    Enregistre des états calculés hors historique (ex. panel du tableau récapitulatif).
+    Ces états ne portent pas de recommandation du moteur : la colonne recommendation
+    est mise à NULL pour la barre enregistrée (elle n'est écrite que depuis historical_data).
+
+    Args:
+        states: liste de dicts (ticker, bar_date, close, rsi, rsi_divergence,
+                last_div_date, last_div_type)
+    """
+    if not states:
+        return
+    rows = [
+        (s['ticker'], s['bar_date'], s.get('close'), s.get('rsi'), s.get('rsi_divergence'),
+         s.get('last_div_date'), s.get('last_div_type'), config_hash, source)
+        for s in states
+    ]
+
+    from db_manager import get_db_connection
+    from psycopg2.extras import execute_values
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        execute_values(cursor, f"""
+            INSERT INTO asset_latest_state ({', '.join(LATEST_STATE_COLUMNS)})
+            SELECT a.id, v.bar_date::date, v.close::double precision, v.rsi::real, v.rsi_divergence,
+                   v.last_div_date::date, v.last_div_type, NULL, v.config_hash, v.source,
+                   CURRENT_TIMESTAMP
+            FROM (VALUES %s) AS v (ticker, bar_date, close, rsi, rsi_divergence, last_div_date,
+                                   last_div_type, config_hash, source)
+            JOIN assets a ON a.ticker = v.ticker
+            {_LATEST_STATE_UPSERT}
+        """, rows, page_size=500)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# =============================================================================
+# LECTURE
+# =============================================================================
+
+def load_latest_state(tickers):
+    """
+    Dernier état enregistré de chaque actif, en une seule requête (clé primaire).
+
+    Returns:
+        pd.DataFrame indexé par ticker (vide si la base est indisponible)
+    """
+    columns = ['ticker'] + LATEST_STATE_COLUMNS[1:]
+    rows = []
+    if tickers:
+        try:
+            from db_manager import get_db_connection
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT a.ticker, {', '.join(f"s.{c}" for c in LATEST_STATE_COLUMNS[1:])}
+                FROM asset_latest_state s
+                JOIN assets a ON a.id = s.asset_id
+                WHERE a.ticker = ANY(%s)
+            """, (list(tickers),))
+            rows = cursor.fetchall()
+            cursor.close()
+            conn.close()
+        except Exception as e:
+            print(f"⚠️ Lecture du dernier état des actifs impossible: {e}")
+
+    df = pd.DataFrame(rows, columns=columns).set_index('ticker')
+    for col in ('bar_date', 'last_div_date', 'updated_at'):
+        df[col] = pd.to_datetime(df[col])
+    return df
+
+
+
+def load_history(asset_id, start_date=None):
+    """
+    Historique complet (OHLCV + indicateurs) d'un actif, lu avec COPY ... TO STDOUT :
+    un seul parcours de l'index (asset_id, date), les colonnes sont parsées directement
+    en tableaux NumPy par pandas (pas de tuples Python ligne par ligne).
+
+    Returns:
+        pd.DataFrame trié par date (colonnes Date, asset_id + HISTORY_COLUMN_NAMES),
+        None si la base est indisponible
+    """
+    try:
+        from db_manager import get_db_connection
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        query = cursor.mogrify(f"""
+            SELECT date, asset_id, {', '.join(HISTORY_COLUMN_NAMES)}
+            FROM historical_data
+            WHERE asset_id = %s AND date >= %s
+            ORDER BY date
+        """, (int(asset_id), start_date or date(FIRST_PARTITION_YEAR, 1, 1))).decode('utf-8')
+        buffer = io.StringIO()
+        cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER true)", buffer)
+        cursor.close()
+        conn.close()
+    except Exception as e:
+        print(f"⚠️ Lecture de l'historique impossible: {e}")
+        return None
+
+    buffer.seek(0)
+    dtypes = {name: PANDAS_DTYPES.get(sql_type, 'object') for name, sql_type in HISTORY_COLUMNS}
+    df = pd.read_csv(buffer, dtype=dtypes, parse_dates=['date'])
+    for col, dtype in INTEGER_DTYPES.items():
+        if df[col].notna().all():
+            df[col] = df[col].astype(dtype)
+    return df.rename(columns={'date': 'Date'})
+
+
+def load_latest_bars(tickers, config_hash=None):
+    """
+    Dernière barre enregistrée de chaque ticker (une recherche d'index par actif).
+
+    Returns:
+        pd.DataFrame indexé par ticker : first_date, date + LATEST_BAR_COLUMNS
+    """
+    columns = ['ticker', 'first_date', 'date'] + LATEST_BAR_COLUMNS
+    if not tickers:
+        return pd.DataFrame(columns=columns).set_index('ticker')
+
+    hash_filter = "AND h.config_hash = %(config_hash)s" if config_hash else ""
+    selected = ', '.join(f"last.{c}" for c in LATEST_BAR_COLUMNS)
+
+    try:
+        from db_manager import get_db_connection
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT a.ticker, first.date, last.date, {selected}
+            FROM assets a
+            CROSS JOIN LATERAL (
+                SELECT h.date, {', '.join(f"h.{c}" for c in LATEST_BAR_COLUMNS)} FROM historical_data h
+                WHERE h.asset_id = a.id {hash_filter}
+                ORDER BY h.date DESC LIMIT 1
+            ) last
+            CROSS JOIN LATERAL (
+                SELECT h.date FROM historical_data h
+                WHERE h.asset_id = a.id {hash_filter}
+                ORDER BY h.date ASC LIMIT 1
+            ) first
+            WHERE a.ticker = ANY(%(tickers)s)
+        """, {'tickers': list(tickers), 'config_hash': config_hash})
+        rows = cursor.fetchall()
+        cursor.close()
+        conn.close()
+    except Exception as e:
+        print(f"⚠️ Lecture des dernières barres impossible: {e}")
+        rows = []
+
+    df = pd.DataFrame(rows, columns=columns).set_index('ticker')
+    for col in ('first_date', 'date'):
+        df[col] = pd.to_datetime(df[col])
+    return df
+
+
+def load_divergences(tickers, start_date, end_date=None, config_hash=None):
+    """
+    Divergences RSI enregistrées entre deux dates (index partiel + élagage des partitions).
+
+    Returns:
+        pd.DataFrame: colonnes date, ticker, type, price
+    """
+    columns = ['date', 'ticker', 'type', 'price']
+    if not tickers:
+        return pd.DataFrame(columns=columns)
+
+    end_date = end_date or date.today()
+    hash_filter = "AND h.config_hash = %(config_hash)s" if config_hash else ""
+
+    try:
+        from db_manager import get_db_connection
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT h.date, a.ticker, h.rsi_divergence, h.close
+            FROM historical_data h
+            JOIN assets a ON a.id = h.asset_id
+            WHERE h.rsi_divergence IN ('bullish', 'bearish')
+              AND h.date BETWEEN %(start)s AND %(end)s
+              AND a.ticker = ANY(%(tickers)s)
+              {hash_filter}
+            ORDER BY h.date
+        """, {'tickers': list(tickers), 'start': start_date, 'end': end_date, 'config_hash': config_hash})
+        rows = cursor.fetchall()
+        cursor.close()
+        conn.close()
+    except Exception as e:
+        print(f"⚠️ Lecture des divergences impossible: {e}")
+        rows = []
+
+    df = pd.DataFrame(rows, columns=columns)
+    df['date'] = pd.to_datetime(df['date'])
+    return df
@@ -0,0 +1,100 @@
+# frame_schema.py
+"""
+Schéma compact du DataFrame d'indicateurs produit par fetch_and_prepare_data.
+- Libellés (recommandation, tendance, signaux...) en catégories pandas
+- Oscillateurs bornés en float32 ; prix et niveaux dérivés des prix restent en float64
+  (ils sont comparés entre eux : close > sma_20, close < bb_lower...)
+- Combinaisons actives en masque de bits (une colonne entière au lieu d'une liste par ligne)
+- Une seule colonne de date ('Date', datetime64)
+"""
+import numpy as np
+import pandas as pd
+
+from config import COMBINATION_WEIGHTS
+
+
+# Catégories connues (l'ordre est conservé ; une valeur inattendue est ajoutée à la fin)
+LABEL_CATEGORIES = {
+    'recommendation': ['Acheter', 'Neutre', 'Vendre'],
+    'trend': ['strong_bullish', 'bullish', 'neutral', 'bearish', 'strong_bearish'],
+    'weekly_trend': ['strong_bullish', 'bullish', 'neutral', 'bearish', 'strong_bearish'],
+    'monthly_trend': ['strong_bullish', 'bullish', 'neutral', 'bearish', 'strong_bearish'],
+    'bb_signal': ['lower_touch', 'lower_zone', 'neutral', 'upper_zone', 'upper_touch', 'squeeze'],
+    'rsi_divergence': ['none', 'bullish', 'bearish'],
+    'pattern_direction': ['bullish', 'neutral', 'bearish'],
+    'pattern': ['Aucun'],
+    'asset_category': [],
+}
+
+# Valeurs bornées (0-100 ou proches) : la précision float32 suffit
+FLOAT32_COLUMNS = [
+    'rsi', 'stochastic_k', 'stochastic_d', 'adx', 'di_plus', 'di_minus',
+    'bb_percent', 'bb_bandwidth',
+    'rsi_smoothed', 'stochastic_k_smoothed', 'stochastic_d_smoothed',
+]
+
+# Contributions des indicateurs (contrib_<groupe>_buy / _sell) : affichage uniquement
+FLOAT32_PREFIXES = ('contrib_',)
+
+INTEGER_COLUMNS = {
+    'conviction': np.int8,
+    'asset_id': np.int32,
+}
+
+# Bit i du masque = i-ème combinaison de COMBINATION_WEIGHTS
+COMBINATION_NAMES = list(COMBINATION_WEIGHTS)
+COMBINATION_BITS = {name: 1 << i for i, name in enumerate(COMBINATION_NAMES)}
+
+
+def encode_combinations(combinations):
+    """Convertit une série de listes de combinaisons en masques de bits (int32)."""
+    return np.fromiter(
+        (sum(COMBINATION_BITS.get(name, 0) for name in set(names or [])) for names in combinations),
+        dtype=np.int32, count=len(combinations)
+    )
+
+
+def decode_combinations(mask):
+    """Retourne la liste des combinaisons actives d'un masque."""
+    mask = int(mask)
+    return [name for name, bit in COMBINATION_BITS.items() if mask & bit]
+
+
+def has_combination(masks, name):
+    """Booléens (vectorisé) : la combinaison `name` est-elle active sur chaque ligne ?"""
+    return (np.asarray(masks) & COMBINATION_BITS[name]) != 0
+
+
+def compact_indicator_frame(df):
+    """
+    Convertit le DataFrame d'indicateurs au schéma compact (en place autant que possible).
+
+    Returns:
+        pd.DataFrame: le même DataFrame, colonnes converties
+    """
+    if df.empty:
+        return df
+
+    # Une seule date : 'date' (texte) est redondante avec 'Date'
+    if 'date' in df.columns and 'Date' in df.columns:
+        df = df.drop(columns='date')
+
+    for col, known in LABEL_CATEGORIES.items():
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            observed = pd.unique(df[col].dropna())
+            categories = known + sorted(str(v) for v in observed if v not in known)
+            df[col] = pd.Categorical(df[col], categories=categories)
+
+    for col in FLOAT32_COLUMNS + [c for c in df.columns if str(c).startswith(FLOAT32_PREFIXES)]:
+        if col in df.columns:
+            df[col] = df[col].astype(np.float32)
+
+    for col, dtype in INTEGER_COLUMNS.items():
+        if col in df.columns and df[col].notna().all():
+            df[col] = df[col].astype(dtype)
+
+    if 'active_combinations' in df.columns:
+        df['active_combinations_mask'] = encode_combinations(df['active_combinations'].tolist())
+        df = df.drop(columns='active_combinations')
+
+    return df
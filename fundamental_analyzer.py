@@ -6,9 +6,11 @@ Récupère et calcule les ratios fondamentaux à partir des données yfinance.
 
 import pandas as pd
 import numpy as np
-import yfinance as yf
+from lazy_imports import lazy_import
 from datetime import datetime, timedelta
 
+yf = lazy_import('yfinance')
+
 
 # === SEUILS IDÉAUX PAR CATÉGORIE ===
 FUNDAMENTAL_THRESHOLDS = {
@@ -60,20 +62,38 @@ def get_quarter_string(date):
 def get_fundamental_data(ticker_symbol):
     """
     Récupère les données fondamentales actuelles et historiques depuis yfinance.
+    Passe par le cache (fundamental_cache) : ticker.info est rafraîchi chaque jour,
+    l'historique trimestriel à la prochaine publication de résultats.
+    Les appels concurrents pour le même ticker partagent un seul téléchargement.
     
     Returns:
         dict: Données fondamentales actuelles
         pd.DataFrame: Historique trimestriel des ratios calculés
     """
+    from single_flight import single_flight
+    return single_flight(('fundamentals', ticker_symbol), _get_fundamental_data, ticker_symbol)
+
+
+def _get_fundamental_data(ticker_symbol):
+    """Voir get_fundamental_data (sans regroupement des appels concurrents)."""
+    from fundamental_cache import get_cached, set_cached, statements_expiry
+    
     try:
         ticker = yf.Ticker(ticker_symbol)
-        info = ticker.info
+        info = get_ticker_info(ticker_symbol, ticker)
         
         # Données actuelles depuis .info
         current_data = extract_current_fundamentals(info)
         
         # Historique trimestriel
-        quarterly_history = calculate_quarterly_history(ticker)
+        quarterly_history = get_cached(ticker_symbol, 'quarterly_history')
+        if quarterly_history is None:
+            quarterly_history = calculate_quarterly_history(ticker, info=info)
+            if quarterly_history is None:
+                # Échec (réseau...) : rien n'est mis en cache, le prochain appel réessaie
+                quarterly_history = pd.DataFrame()
+            else:
+                set_cached(ticker_symbol, 'quarterly_history', quarterly_history, statements_expiry(info))
         
         return current_data, quarterly_history
         
@@ -82,6 +102,34 @@ def get_fundamental_data(ticker_symbol):
         return {}, pd.DataFrame()
 
 
+def get_ticker_info(ticker_symbol, ticker=None):
+    """
+    Retourne ticker.info en passant par le cache (rafraîchi une fois par jour).
+    Une réponse vide (échec de Yahoo Finance) est retournée sans être mise en cache.
+    """
+    from fundamental_cache import get_cached, set_cached, info_expiry
+    
+    info = get_cached(ticker_symbol, 'info')
+    if info is None:
+        ticker = ticker or yf.Ticker(ticker_symbol)
+        info = ticker.info or {}
+        if info:
+            set_cached(ticker_symbol, 'info', info, info_expiry())
+    return info
+
+
+def get_current_fundamentals(ticker_symbol):
+    """
+    Récupère uniquement les ratios actuels (sans historique trimestriel).
+    Utilisé par le screener pour couvrir toute la liste d'actifs.
+    """
+    try:
+        return extract_current_fundamentals(get_ticker_info(ticker_symbol))
+    except Exception as e:
+        print(f"Erreur lors de la récupération des données fondamentales pour {ticker_symbol}: {e}")
+        return {}
+
+
 def extract_current_fundamentals(info):
     """
     Extrait les ratios fondamentaux actuels depuis ticker.info
@@ -140,202 +188,184 @@ def extract_current_fundamentals(info):
     return current
 
 
-def calculate_quarterly_history(ticker):
+# === CORRESPONDANCE MÉTRIQUE -> (ÉTAT FINANCIER, NOMS POSSIBLES PAR ORDRE DE PRIORITÉ) ===
+STATEMENT_FIELDS = {
+    # Compte de résultat
+    'net_income': ('financials', ['Net Income', 'Net Income Common Stockholders', 'NetIncome']),
+    'total_revenue': ('financials', ['Total Revenue', 'TotalRevenue', 'Revenue']),
+    'gross_profit': ('financials', ['Gross Profit', 'GrossProfit']),
+    'operating_income': ('financials', ['Operating Income', 'OperatingIncome', 'EBIT']),
+    'ebitda': ('financials', ['EBITDA', 'Ebitda']),
+    # Bilan
+    'total_equity': ('balance', ['Stockholders Equity', 'Total Stockholder Equity', 'StockholdersEquity', 'Total Equity']),
+    'total_assets': ('balance', ['Total Assets', 'TotalAssets']),
+    'total_debt': ('balance', ['Total Debt', 'TotalDebt', 'Long Term Debt', 'LongTermDebt']),
+    'current_assets': ('balance', ['Current Assets', 'CurrentAssets', 'Total Current Assets']),
+    'current_liabilities': ('balance', ['Current Liabilities', 'CurrentLiabilities', 'Total Current Liabilities']),
+    'inventory': ('balance', ['Inventory', 'Inventories']),
+    # Cash flow
+    'free_cash_flow': ('cashflow', ['Free Cash Flow', 'FreeCashFlow']),
+    'operating_cf': ('cashflow', ['Operating Cash Flow', 'Cash Flow From Operating Activities']),
+    'capex': ('cashflow', ['Capital Expenditure', 'Capital Expenditures', 'CapEx']),
+}
+
+# Recherche du prix après la date du trimestre avant de prendre le plus proche
+PRICE_FORWARD_TOLERANCE = pd.Timedelta(days=9)
+
+
+def calculate_quarterly_history(ticker, info=None):
     """
     Calcule l'historique trimestriel des ratios fondamentaux.
     Utilise les financials trimestriels + prix historiques.
+    `info` évite un second appel à ticker.info quand il a déjà été récupéré.
+    
+    Returns:
+        pd.DataFrame: historique (vide si le ticker n'a pas d'états financiers, ex. un ETF),
+                      ou None en cas d'échec de la récupération (à ne pas mettre en cache)
     """
     try:
-        # Récupérer les états financiers trimestriels
-        quarterly_financials = ticker.quarterly_financials
-        quarterly_balance = ticker.quarterly_balance_sheet
-        quarterly_cashflow = ticker.quarterly_cashflow
-        
-        if quarterly_financials.empty:
-            return pd.DataFrame()
-        
-        # Récupérer les prix historiques
-        hist = ticker.history(period="5y")
-        if hist.empty:
+        metrics = fetch_quarterly_metrics(ticker, info=info)
+        if metrics.empty:
             return pd.DataFrame()
         
-        # Récupérer les infos statiques
-        info = ticker.info
-        shares_outstanding = info.get('sharesOutstanding', None)
-        
-        records = []
-        
-        # Parcourir chaque trimestre disponible
-        for quarter_date in quarterly_financials.columns:
-            record = {
-                'date': quarter_date, 
-                'quarter': get_quarter_string(quarter_date)
-            }
-            
-            try:
-                # === Données du compte de résultat ===
-                net_income = get_financial_value(quarterly_financials, quarter_date, 
-                    ['Net Income', 'Net Income Common Stockholders', 'NetIncome'])
-                total_revenue = get_financial_value(quarterly_financials, quarter_date, 
-                    ['Total Revenue', 'TotalRevenue', 'Revenue'])
-                gross_profit = get_financial_value(quarterly_financials, quarter_date, 
-                    ['Gross Profit', 'GrossProfit'])
-                operating_income = get_financial_value(quarterly_financials, quarter_date, 
-                    ['Operating Income', 'OperatingIncome', 'EBIT'])
-                ebitda = get_financial_value(quarterly_financials, quarter_date, 
-                    ['EBITDA', 'Ebitda'])
-                
-                # === Données du bilan ===
-                if not quarterly_balance.empty and quarter_date in quarterly_balance.columns:
-                    total_equity = get_financial_value(quarterly_balance, quarter_date, 
-                        ['Stockholders Equity', 'Total Stockholder Equity', 'StockholdersEquity', 'Total Equity'])
-                    total_assets = get_financial_value(quarterly_balance, quarter_date, 
-                        ['Total Assets', 'TotalAssets'])
-                    total_debt = get_financial_value(quarterly_balance, quarter_date, 
-                        ['Total Debt', 'TotalDebt', 'Long Term Debt', 'LongTermDebt'])
-                    current_assets = get_financial_value(quarterly_balance, quarter_date, 
-                        ['Current Assets', 'CurrentAssets', 'Total Current Assets'])
-                    current_liabilities = get_financial_value(quarterly_balance, quarter_date, 
-                        ['Current Liabilities', 'CurrentLiabilities', 'Total Current Liabilities'])
-                    inventory = get_financial_value(quarterly_balance, quarter_date, 
-                        ['Inventory', 'Inventories'])
-                else:
-                    total_equity = total_assets = total_debt = None
-                    current_assets = current_liabilities = inventory = None
-                
-                # === Données du cash flow ===
-                if not quarterly_cashflow.empty and quarter_date in quarterly_cashflow.columns:
-                    free_cash_flow = get_financial_value(quarterly_cashflow, quarter_date, 
-                        ['Free Cash Flow', 'FreeCashFlow'])
-                    if free_cash_flow is None:
-                        operating_cf = get_financial_value(quarterly_cashflow, quarter_date, 
-                            ['Operating Cash Flow', 'Cash Flow From Operating Activities'])
-                        capex = get_financial_value(quarterly_cashflow, quarter_date, 
-                            ['Capital Expenditure', 'Capital Expenditures', 'CapEx'])
-                        if operating_cf is not None and capex is not None:
-                            free_cash_flow = operating_cf + capex  # capex est généralement négatif
-                else:
-                    free_cash_flow = None
-                
-                # === Prix à la date du trimestre ===
-                quarter_price = get_price_at_date(hist, quarter_date)
-                
-                # === Calcul des ratios ===
-                
-                # Marges
-                if total_revenue and total_revenue != 0:
-                    record['gross_margin'] = (gross_profit / total_revenue * 100) if gross_profit else None
-                    record['operating_margin'] = (operating_income / total_revenue * 100) if operating_income else None
-                    record['net_margin'] = (net_income / total_revenue * 100) if net_income else None
-                
-                # ROE & ROA
-                if total_equity and total_equity != 0 and net_income:
-                    record['roe'] = (net_income / total_equity * 100) * 4  # Annualisé
-                if total_assets and total_assets != 0 and net_income:
-                    record['roa'] = (net_income / total_assets * 100) * 4  # Annualisé
-                
-                # Ratios d'endettement
-                if total_equity and total_equity != 0 and total_debt:
-                    record['debt_equity'] = total_debt / total_equity
-                
-                # Ratios de liquidité
-                if current_liabilities and current_liabilities != 0:
-                    if current_assets:
-                        record['current_ratio'] = current_assets / current_liabilities
-                    if current_assets and inventory:
-                        record['quick_ratio'] = (current_assets - inventory) / current_liabilities
-                
-                # EPS et P/E
-                if shares_outstanding and net_income:
-                    eps = (net_income * 4) / shares_outstanding  # Annualisé
-                    record['eps'] = eps
-                    if quarter_price and eps and eps != 0:
-                        record['pe_ratio'] = quarter_price / eps
-                
-                # P/B
-                if shares_outstanding and total_equity and quarter_price:
-                    book_per_share = total_equity / shares_outstanding
-                    if book_per_share and book_per_share != 0:
-                        record['pb_ratio'] = quarter_price / book_per_share
-                
-                # P/S
-                if shares_outstanding and total_revenue and quarter_price:
-                    sales_per_share = (total_revenue * 4) / shares_outstanding  # Annualisé
-                    if sales_per_share and sales_per_share != 0:
-                        record['ps_ratio'] = quarter_price / sales_per_share
-                
-                # Free Cash Flow
-                record['free_cash_flow'] = free_cash_flow
-                
-                # Prix et Market Cap
-                record['price'] = quarter_price
-                if quarter_price and shares_outstanding:
-                    record['market_cap'] = quarter_price * shares_outstanding
-                
-                # Revenus et bénéfices (pour tracking)
-                record['revenue'] = total_revenue
-                record['net_income'] = net_income
-                
-            except Exception as e:
-                # Ignorer les erreurs silencieusement pour chaque trimestre
-                continue
-            
-            records.append(record)
-        
-        df = pd.DataFrame(records)
-        
-        if not df.empty:
-            df['date'] = pd.to_datetime(df['date'])
-            df = df.sort_values('date')
-            
-            # Calculer les croissances YoY
-            df = calculate_growth_rates(df)
-        
-        return df
+        return compute_quarterly_ratios(metrics)
         
     except Exception as e:
         print(f"Erreur lors du calcul de l'historique trimestriel: {e}")
-        return pd.DataFrame()
+        return None
 
 
-def get_financial_value(df, date, possible_names):
+def fetch_quarterly_metrics(ticker, info=None):
     """
-    Récupère une valeur financière en essayant plusieurs noms possibles.
+    Récupère les états trimestriels et les prix d'un ticker et les aligne
+    en un tableau trimestre × métrique (une ligne par trimestre).
     """
-    if df.empty or date not in df.columns:
-        return None
+    quarterly_financials = ticker.quarterly_financials
+    if quarterly_financials is None or quarterly_financials.empty:
+        return pd.DataFrame()
+    
+    hist = ticker.history(period="5y")
+    if hist.empty:
+        # Des états financiers sans aucun prix : échec du téléchargement, pas une absence de données
+        raise ValueError("historique de prix vide")
+    
+    if info is None:
+        info = ticker.info
+    
+    metrics = normalize_statements({
+        'financials': quarterly_financials,
+        'balance': ticker.quarterly_balance_sheet,
+        'cashflow': ticker.quarterly_cashflow,
+    })
+    metrics['shares_outstanding'] = info.get('sharesOutstanding', None)
     
-    for name in possible_names:
-        if name in df.index:
-            val = df.loc[name, date]
-            if pd.notna(val):
-                return val
-    return None
+    return join_prices_asof(metrics, hist['Close'])
 
 
-def get_price_at_date(hist, target_date):
+def normalize_statements(statements):
     """
-    Récupère le prix de clôture à une date donnée (ou la plus proche).
+    Normalise les états financiers yfinance (lignes = postes, colonnes = trimestres)
+    en un DataFrame indexé par trimestre avec une colonne par métrique de STATEMENT_FIELDS.
+    Les trimestres sont ceux du compte de résultat ; le premier nom disponible et non nul
+    parmi les alternatives est retenu.
     """
-    try:
-        target = pd.Timestamp(target_date).tz_localize(None)
-        hist_copy = hist.copy()
-        hist_copy.index = hist_copy.index.tz_localize(None)
-        
-        # Chercher la date exacte ou les 5 jours suivants
-        for delta in range(0, 10):
-            check_date = target + pd.Timedelta(days=delta)
-            if check_date in hist_copy.index:
-                return hist_copy.loc[check_date, 'Close']
-        
-        # Sinon, prendre la date la plus proche
-        idx = hist_copy.index.get_indexer([target], method='nearest')[0]
-        if idx >= 0 and idx < len(hist_copy):
-            return hist_copy.iloc[idx]['Close']
+    quarters = pd.DatetimeIndex(statements['financials'].columns)
+    metrics = pd.DataFrame(index=quarters)
+    
+    for metric, (source, names) in STATEMENT_FIELDS.items():
+        statement = statements.get(source)
+        if statement is None or statement.empty:
+            metrics[metric] = np.nan
+            continue
         
-        return None
-    except Exception:
-        return None
+        candidates = statement.reindex(index=names, columns=quarters)
+        metrics[metric] = candidates.bfill(axis=0).iloc[0].astype(float).values
+    
+    # Free cash flow reconstruit quand le poste n'existe pas (capex est généralement négatif)
+    metrics['free_cash_flow'] = metrics['free_cash_flow'].fillna(metrics['operating_cf'] + metrics['capex'])
+    
+    metrics.index.name = 'date'
+    return metrics.reset_index()
+
+
+def join_prices_asof(metrics, close):
+    """
+    Associe à chaque trimestre le cours de clôture de la première séance dans les
+    PRICE_FORWARD_TOLERANCE jours suivants, sinon celui de la séance la plus proche.
+    """
+    prices = close.rename('price').to_frame()
+    prices.index = pd.DatetimeIndex(prices.index).tz_localize(None).astype('datetime64[ns]')
+    prices = prices.sort_index().reset_index(names='price_date')
+    
+    left = metrics.copy()
+    left['date'] = pd.to_datetime(left['date']).dt.tz_localize(None).astype('datetime64[ns]')
+    order = left['date'].argsort(kind='stable')
+    left = left.iloc[order]
+    
+    forward = pd.merge_asof(left[['date']], prices, left_on='date', right_on='price_date',
+                            direction='forward', tolerance=PRICE_FORWARD_TOLERANCE)
+    nearest = pd.merge_asof(left[['date']], prices, left_on='date', right_on='price_date',
+                            direction='nearest')
+    
+    left['price'] = forward['price'].fillna(nearest['price']).values
+    return left.sort_index()
+
+
+def compute_quarterly_ratios(metrics):
+    """
+    Calcule les ratios trimestriels colonne par colonne.
+    Une valeur nulle ou absente dans un dénominateur ou un poste requis donne NaN.
+    
+    Args:
+        metrics: sortie de normalize_statements + 'price' et 'shares_outstanding'
+    """
+    def nz(col):
+        values = metrics[col].astype(float)
+        return values.where(values != 0)
+    
+    revenue = nz('total_revenue')
+    net_income = nz('net_income')
+    equity = nz('total_equity')
+    price = nz('price')
+    shares = nz('shares_outstanding')
+    current_liabilities = nz('current_liabilities')
+    
+    df = pd.DataFrame({'date': pd.to_datetime(metrics['date'])}, index=metrics.index)
+    df['quarter'] = df['date'].dt.year.astype(str) + '-Q' + df['date'].dt.quarter.astype(str)
+    
+    # Marges
+    df['gross_margin'] = nz('gross_profit') / revenue * 100
+    df['operating_margin'] = nz('operating_income') / revenue * 100
+    df['net_margin'] = net_income / revenue * 100
+    
+    # ROE & ROA (annualisés)
+    df['roe'] = net_income / equity * 100 * 4
+    df['roa'] = net_income / nz('total_assets') * 100 * 4
+    
+    # Endettement et liquidité
+    df['debt_equity'] = nz('total_debt') / equity
+    df['current_ratio'] = nz('current_assets') / current_liabilities
+    df['quick_ratio'] = (nz('current_assets') - nz('inventory')) / current_liabilities
+    
+    # EPS et multiples de valorisation (annualisés)
+    df['eps'] = net_income * 4 / shares
+    df['pe_ratio'] = price / df['eps'].where(df['eps'] != 0)
+    book_per_share = equity / shares
+    df['pb_ratio'] = price / book_per_share.where(book_per_share != 0)
+    sales_per_share = revenue * 4 / shares
+    df['ps_ratio'] = price / sales_per_share.where(sales_per_share != 0)
+    
+    # Montants suivis
+    df['free_cash_flow'] = metrics['free_cash_flow']
+    df['price'] = metrics['price']
+    df['market_cap'] = price * shares
+    df['revenue'] = metrics['total_revenue']
+    df['net_income'] = metrics['net_income']
+    
+    df = df.sort_values('date').reset_index(drop=True)
+    
+    # Calculer les croissances YoY
+    return calculate_growth_rates(df)
 
 
 def calculate_growth_rates(df):
@@ -345,9 +375,11 @@ def calculate_growth_rates(df):
     if len(df) < 4:  # Besoin d'au moins 4 trimestres pour YoY
         return df
     
-    for col in ['revenue', 'net_income', 'eps', 'free_cash_flow']:
-        if col in df.columns:
-            df[f'{col}_yoy'] = df[col].pct_change(periods=4) * 100
+    cols = [col for col in ['revenue', 'net_income', 'eps', 'free_cash_flow'] if col in df.columns]
+    changes = df[cols].astype(float).pct_change(periods=4, fill_method=None)
+    
+    for col in cols:
+        df[f'{col}_yoy'] = changes[col] * 100
     
     return df
 
@@ -0,0 +1,200 @@
+# fundamental_cache.py
+"""
+Cache des données fondamentales avec durée de validité par champ.
+- 'info' (ticker.info) : valable 1 jour
+- 'quarterly_history' (ratios trimestriels calculés) : valable jusqu'à la prochaine
+  publication de résultats (ou FALLBACK_STATEMENTS_TTL si la date est inconnue)
+
+Trois niveaux : mémoire du processus, cache partagé entre workers (shared_cache),
+puis table PostgreSQL fundamentals_cache.
+Sans base de données (ou après un échec de connexion, pendant db_manager.DB_RETRY_DELAY),
+seuls les deux premiers niveaux sont utilisés, sans tentative de connexion.
+"""
+import json
+import threading
+from datetime import datetime, timedelta
+from io import StringIO
+
+import pandas as pd
+
+
+INFO_TTL = timedelta(days=1)
+FALLBACK_STATEMENTS_TTL = timedelta(days=90)
+
+# Marge après la date de publication, le temps que yfinance intègre les nouveaux états
+EARNINGS_GRACE = timedelta(days=2)
+
+_memory_cache = {}
+_lock = threading.Lock()
+
+# Espace de noms du cache partagé pour chaque champ
+SHARED_NAMESPACES = {
+    'info': 'metadata',
+    'quarterly_history': 'fundamentals',
+}
+
+
+# =============================================================================
+# SÉRIALISATION
+# =============================================================================
+
+def _serialize(field, value):
+    """Convertit une valeur en texte JSON pour la persistance."""
+    if isinstance(value, pd.DataFrame):
+        return json.dumps({'type': 'dataframe', 'data': value.to_json(orient='split', date_format='iso')})
+    return json.dumps({'type': 'json', 'data': value}, default=str)
+
+
+def _deserialize(payload):
+    """Reconstruit une valeur depuis son texte JSON."""
+    wrapped = json.loads(payload)
+    if wrapped.get('type') == 'dataframe':
+        df = pd.read_json(StringIO(wrapped['data']), orient='split')
+        if 'date' in df.columns:
+            df['date'] = pd.to_datetime(df['date']).dt.tz_localize(None)
+        return df
+    return wrapped.get('data')
+
+
+# =============================================================================
+# LECTURE / ÉCRITURE
+# =============================================================================
+
+def get_cached(ticker, field):
+    """
+    Retourne la valeur en cache si elle est encore valide, sinon None.
+    Consulte la mémoire, le cache partagé puis la base de données.
+    """
+    key = (ticker, field)
+    now = datetime.now()
+
+    with _lock:
+        entry = _memory_cache.get(key)
+    if entry and entry['expires_at'] > now:
+        return entry['value']
+
+    from shared_cache import cache_get
+    shared = cache_get(SHARED_NAMESPACES.get(field, 'fundamentals'), key)
+    if shared is not None and shared['expires_at'] > now:
+        with _lock:
+            _memory_cache[key] = shared
+        return shared['value']
+
+    from db_manager import get_db_connection, db_unavailable
+    if db_unavailable():
+        return None
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT payload, expires_at FROM fundamentals_cache
+            WHERE ticker = %s AND field = %s AND expires_at > %s
+        """, (ticker, field, now))
+        row = cursor.fetchone()
+        cursor.close()
+        conn.close()
+    except Exception as e:
+        print(f"⚠️ Cache fondamental indisponible ({ticker}/{field}): {e}")
+        return None
+
+    if not row:
+        return None
+
+    value = _deserialize(row[0])
+    with _lock:
+        _memory_cache[key] = {'value': value, 'expires_at': row[1]}
+    return value
+
+
+def set_cached(ticker, field, value, expires_at):
+    """Enregistre une valeur en mémoire, dans le cache partagé et en base (écritures best-effort)."""
+    from shared_cache import cache_set
+    
+    entry = {'value': value, 'expires_at': expires_at}
+    with _lock:
+        _memory_cache[(ticker, field)] = entry
+    cache_set(SHARED_NAMESPACES.get(field, 'fundamentals'), (ticker, field), entry,
+              ttl=(expires_at - datetime.now()).total_seconds())
+
+    from db_manager import get_db_connection, db_unavailable
+    if db_unavailable():
+        return
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO fundamentals_cache (ticker, field, payload, fetched_at, expires_at)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (ticker, field) DO UPDATE SET
+                payload = EXCLUDED.payload,
+                fetched_at = EXCLUDED.fetched_at,
+                expires_at = EXCLUDED.expires_at
+        """, (ticker, field, _serialize(field, value), datetime.now(), expires_at))
+        conn.commit()
+        cursor.close()
+        conn.close()
+    except Exception as e:
+        print(f"⚠️ Impossible de persister le cache fondamental ({ticker}/{field}): {e}")
+
+
+def invalidate(ticker=None):
+    """Invalide le cache (d'un ticker ou complet) en mémoire, dans le cache partagé et en base."""
+    from shared_cache import cache_delete
+    
+    with _lock:
+        if ticker is None:
+            _memory_cache.clear()
+        else:
+            for key in [k for k in _memory_cache if k[0] == ticker]:
+                del _memory_cache[key]
+    for field, namespace in SHARED_NAMESPACES.items():
+        cache_delete(namespace, (ticker, field) if ticker is not None else None)
+
+    try:
+        from db_manager import get_db_connection
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        if ticker is None:
+            cursor.execute("DELETE FROM fundamentals_cache")
+        else:
+            cursor.execute("DELETE FROM fundamentals_cache WHERE ticker = %s", (ticker,))
+        conn.commit()
+        cursor.close()
+        conn.close()
+    except Exception as e:
+        print(f"⚠️ Impossible d'invalider le cache fondamental: {e}")
+
+
+# =============================================================================
+# DURÉES DE VALIDITÉ
+# =============================================================================
+
+def info_expiry(now=None):
+    """Date d'expiration de ticker.info."""
+    return (now or datetime.now()) + INFO_TTL
+
+
+def statements_expiry(info, now=None):
+    """
+    Date d'expiration des états financiers : prochaine publication de résultats
+    connue dans ticker.info (+ marge), sinon FALLBACK_STATEMENTS_TTL.
+    """
+    now = now or datetime.now()
+
+    candidates = []
+    for key in ('earningsTimestamp', 'earningsTimestampStart', 'earningsTimestampEnd'):
+        ts = (info or {}).get(key)
+        if not ts:
+            continue
+        try:
+            earnings_date = datetime.fromtimestamp(int(ts))
+        except (TypeError, ValueError, OSError):
+            continue
+        if earnings_date > now:
+            candidates.append(earnings_date)
+
+    if candidates:
+        return min(candidates) + EARNINGS_GRACE
+    return now + FALLBACK_STATEMENTS_TTL
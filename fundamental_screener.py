@@ -0,0 +1,331 @@
+# fundamental_screener.py
+"""
+Screener fondamental sur toute la liste d'actifs.
+- Récupération parallèle (pool de threads borné) des ratios actuels
+- Score fondamental calculé en une passe vectorisée (mêmes barèmes que calculate_fundamental_score)
+- Snapshot journalier en base (fundamental_snapshots) + copie en mémoire
+- Rafraîchissement en arrière-plan quand le snapshot du jour manque
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+
+SCREENER_MAX_WORKERS = 8
+BACKGROUND_CHECK_INTERVAL = 3600  # secondes
+SNAPSHOT_MIN_COVERAGE = 0.5  # part minimale des tickers notés pour considérer le snapshot du jour complet
+SNAPSHOT_RELOAD_DELAY = 300  # secondes avant de relire la base quand elle n'avait aucun snapshot
+
+# Verrou consultatif PostgreSQL : un seul worker gunicorn rafraîchit le snapshot
+SNAPSHOT_LOCK_ID = 72031
+
+# Colonnes du snapshot (ordre d'affichage)
+SNAPSHOT_COLUMNS = [
+    'ticker', 'score', 'valuation_score', 'profitability_score', 'financial_health_score', 'growth_score',
+    'pe_ratio', 'peg_ratio', 'pb_ratio', 'ps_ratio', 'ev_ebitda',
+    'roe', 'net_margin', 'debt_equity', 'current_ratio',
+    'revenue_growth', 'earnings_growth', 'dividend_yield',
+    'market_cap', 'sector', 'industry',
+]
+
+_snapshot = {'date': None, 'loaded_at': None, 'data': pd.DataFrame(columns=SNAPSHOT_COLUMNS)}
+_snapshot_lock = threading.Lock()
+_background_thread = None
+
+
+# =============================================================================
+# RÉCUPÉRATION PARALLÈLE
+# =============================================================================
+
+def fetch_watchlist_fundamentals(tickers, max_workers=SCREENER_MAX_WORKERS):
+    """
+    Récupère les ratios actuels de tous les tickers avec un pool de threads borné.
+    Les tickers sans données (crypto, forex...) sont ignorés.
+
+    Returns:
+        pd.DataFrame: une ligne par ticker
+    """
+    from fundamental_analyzer import get_current_fundamentals
+
+    rows = []
+    if not tickers:
+        return pd.DataFrame(columns=SNAPSHOT_COLUMNS)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tickers))) as executor:
+        futures = {executor.submit(get_current_fundamentals, ticker): ticker for ticker in tickers}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                current = future.result()
+            except Exception as e:
+                print(f"⚠️ Screener: erreur pour {ticker}: {e}")
+                continue
+            if current and current.get('market_cap'):
+                rows.append({'ticker': ticker, **current})
+
+    return pd.DataFrame(rows)
+
+
+# =============================================================================
+# SCORE VECTORISÉ
+# =============================================================================
+
+def _bins_below(values, edges, scores, default):
+    """Note selon le premier seuil strictement supérieur (valeur < seuil)."""
+    return np.select([values < edge for edge in edges], scores, default=default)
+
+
+def _bins_above(values, edges, scores, default):
+    """Note selon le premier seuil strictement inférieur (valeur > seuil)."""
+    return np.select([values > edge for edge in edges], scores, default=default)
+
+
+def calculate_fundamental_scores(df):
+    """
+    Calcule le score fondamental (1 à 5) de chaque ligne en une passe.
+    Reprend les barèmes de calculate_fundamental_score : moyenne des notes disponibles
+    par catégorie, puis moyenne pondérée (25% chacune) des catégories disponibles.
+    """
+    if df.empty:
+        return df
+
+    def col(name):
+        if name not in df.columns:
+            return np.full(len(df), np.nan)
+        return pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=float)
+
+    def masked(values, valid, notes):
+        return np.where(valid, notes, np.nan)
+
+    pe, peg = col('pe_ratio'), col('peg_ratio')
+    roe, net_margin = col('roe'), col('net_margin')
+    debt_equity, current_ratio = col('debt_equity'), col('current_ratio')
+    revenue_growth, earnings_growth = col('revenue_growth'), col('earnings_growth')
+
+    categories = {
+        'valuation_score': [
+            masked(pe, pe > 0, _bins_below(pe, [15, 20, 25, 35], [5, 4, 3, 2], 1)),
+            masked(peg, peg > 0, _bins_below(peg, [1, 1.5, 2], [5, 4, 3], 2)),
+        ],
+        'profitability_score': [
+            masked(roe, ~np.isnan(roe), _bins_above(roe, [20, 15, 10, 5], [5, 4, 3, 2], 1)),
+            masked(net_margin, ~np.isnan(net_margin), _bins_above(net_margin, [20, 15, 10, 5], [5, 4, 3, 2], 1)),
+        ],
+        'financial_health_score': [
+            masked(debt_equity, ~np.isnan(debt_equity), _bins_below(debt_equity, [0.3, 0.5, 1, 2], [5, 4, 3, 2], 1)),
+            masked(current_ratio, ~np.isnan(current_ratio), _bins_above(current_ratio, [2, 1.5, 1], [5, 4, 3], 2)),
+        ],
+        'growth_score': [
+            masked(revenue_growth, ~np.isnan(revenue_growth), _bins_above(revenue_growth, [20, 10, 5, 0], [5, 4, 3, 2], 1)),
+            masked(earnings_growth, ~np.isnan(earnings_growth), _bins_above(earnings_growth, [20, 10, 5, 0], [5, 4, 3, 2], 1)),
+        ],
+    }
+
+    result = df.copy()
+    with np.errstate(invalid='ignore'):
+        for name, notes in categories.items():
+            stacked = np.vstack(notes)
+            counts = (~np.isnan(stacked)).sum(axis=0)
+            result[name] = np.where(counts > 0, np.nansum(stacked, axis=0) / np.maximum(counts, 1), np.nan)
+
+        # Poids identiques (25%) : moyenne des catégories disponibles
+        category_values = result[list(categories)].to_numpy(dtype=float)
+        available = (~np.isnan(category_values)).sum(axis=1)
+        total = np.nansum(category_values, axis=1)
+        result['score'] = np.where(available > 0, np.round(total / np.maximum(available, 1), 1), np.nan)
+
+    return result
+
+
+# =============================================================================
+# SNAPSHOT JOURNALIER
+# =============================================================================
+
+def save_snapshot(df, snapshot_date=None):
+    """Enregistre le snapshot du jour dans fundamental_snapshots."""
+    snapshot_date = snapshot_date or date.today()
+    if df.empty:
+        return
+
+    columns = SNAPSHOT_COLUMNS
+    rows = [
+        tuple([snapshot_date] + [None if pd.isna(v) else v for v in record])
+        for record in df.reindex(columns=columns).itertuples(index=False, name=None)
+    ]
+
+    try:
+        from db_manager import get_db_connection
+        from psycopg2.extras import execute_values
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        updates = ', '.join(f"{c} = EXCLUDED.{c}" for c in columns if c != 'ticker')
+        execute_values(cursor, f"""
+            INSERT INTO fundamental_snapshots (snapshot_date, {', '.join(columns)})
+            VALUES %s
+            ON CONFLICT (snapshot_date, ticker) DO UPDATE SET {updates}
+        """, rows)
+        conn.commit()
+        cursor.close()
+        conn.close()
+        print(f"✅ Snapshot fondamental enregistré ({len(rows)} actifs)")
+    except Exception as e:
+        print(f"⚠️ Impossible d'enregistrer le snapshot fondamental: {e}")
+
+
+def load_latest_snapshot():
+    """
+    Charge la dernière ligne connue de chaque ticker depuis fundamental_snapshots.
+
+    Returns:
+        tuple: (pd.DataFrame, date du snapshot le plus récent ou None)
+    """
+    from db_manager import get_db_connection, db_unavailable
+    if db_unavailable():
+        return pd.DataFrame(columns=SNAPSHOT_COLUMNS), None
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT DISTINCT ON (ticker) snapshot_date, {', '.join(SNAPSHOT_COLUMNS)}
+            FROM fundamental_snapshots
+            ORDER BY ticker, snapshot_date DESC
+        """)
+        rows = cursor.fetchall()
+        cursor.close()
+        conn.close()
+    except Exception as e:
+        print(f"⚠️ Impossible de charger le snapshot fondamental: {e}")
+        return pd.DataFrame(columns=SNAPSHOT_COLUMNS), None
+
+    if not rows:
+        return pd.DataFrame(columns=SNAPSHOT_COLUMNS), None
+
+    df = pd.DataFrame(rows, columns=['snapshot_date'] + SNAPSHOT_COLUMNS)
+    numeric = [c for c in SNAPSHOT_COLUMNS if c not in ('ticker', 'sector', 'industry')]
+    df[numeric] = df[numeric].apply(pd.to_numeric, errors='coerce')
+    latest = df['snapshot_date'].max()
+    return df.drop(columns='snapshot_date'), latest
+
+
+def get_snapshot(tickers=None):
+    """
+    Retourne le snapshot (mémoire, sinon base) filtré sur `tickers`.
+    Une lecture sans résultat (base vide ou indisponible) est mémorisée avec son instant :
+    la base n'est relue qu'après SNAPSHOT_RELOAD_DELAY secondes.
+
+    Returns:
+        tuple: (pd.DataFrame, date du snapshot ou None)
+    """
+    with _snapshot_lock:
+        data, snapshot_date, loaded_at = _snapshot['data'], _snapshot['date'], _snapshot['loaded_at']
+
+    if snapshot_date is None and (loaded_at is None or time.time() - loaded_at >= SNAPSHOT_RELOAD_DELAY):
+        loaded, snapshot_date = load_latest_snapshot()
+        with _snapshot_lock:
+            # Un snapshot partiel calculé localement est gardé tant que la base n'a rien
+            if snapshot_date is not None or _snapshot['data'].empty:
+                _snapshot['data'] = loaded
+            _snapshot['date'] = snapshot_date
+            _snapshot['loaded_at'] = time.time()
+            data = _snapshot['data']
+
+    if tickers is not None:
+        data = data[data['ticker'].isin(tickers)]
+    return data, snapshot_date
+
+
+def refresh_snapshot(tickers, max_workers=SCREENER_MAX_WORKERS):
+    """
+    Récupère, note et enregistre le snapshot des tickers donnés.
+    Si moins de SNAPSHOT_MIN_COVERAGE des tickers ont pu être notés (réseau indisponible...),
+    le snapshot n'est ni enregistré ni daté du jour : le prochain passage réessaie.
+    """
+    start = time.time()
+    raw = fetch_watchlist_fundamentals(tickers, max_workers=max_workers)
+    scored = calculate_fundamental_scores(raw).reindex(columns=SNAPSHOT_COLUMNS)
+
+    today = date.today()
+    complete = not scored.empty and len(scored) >= SNAPSHOT_MIN_COVERAGE * len(tickers)
+    if complete:
+        save_snapshot(scored, today)
+    else:
+        print(f"⚠️ Screener: seulement {len(scored)}/{len(tickers)} actifs notés, snapshot non daté")
+
+    with _snapshot_lock:
+        previous = _snapshot['data']
+        kept = previous[~previous['ticker'].isin(scored['ticker'])] if not previous.empty else previous
+        frames = [frame for frame in (kept, scored) if not frame.empty]
+        _snapshot['data'] = pd.concat(frames, ignore_index=True) if frames else scored
+        if complete:
+            _snapshot['date'] = today
+
+    print(f"📊 Screener: {len(scored)}/{len(tickers)} actifs notés en {time.time() - start:.1f}s")
+    return scored
+
+
+def snapshot_is_fresh():
+    """Indique si le snapshot du jour existe."""
+    _, snapshot_date = get_snapshot()
+    return snapshot_date is not None and snapshot_date >= date.today()
+
+
+# =============================================================================
+# RAFRAÎCHISSEMENT EN ARRIÈRE-PLAN
+# =============================================================================
+
+def _try_refresh_with_lock(get_tickers):
+    """Rafraîchit le snapshot si ce processus obtient le verrou consultatif."""
+    try:
+        from db_manager import get_db_connection
+        conn = get_db_connection()
+    except Exception:
+        # Sans base de données : rafraîchissement local uniquement
+        refresh_snapshot(get_tickers())
+        return
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", (SNAPSHOT_LOCK_ID,))
+        if not cursor.fetchone()[0]:
+            return
+        try:
+            # Un autre worker a pu terminer entre-temps
+            with _snapshot_lock:
+                _snapshot['date'] = None
+                _snapshot['loaded_at'] = None
+            if not snapshot_is_fresh():
+                refresh_snapshot(get_tickers())
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (SNAPSHOT_LOCK_ID,))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _background_loop(get_tickers, interval):
+    while True:
+        try:
+            if not snapshot_is_fresh():
+                _try_refresh_with_lock(get_tickers)
+        except Exception as e:
+            print(f"⚠️ Screener: échec du rafraîchissement en arrière-plan: {e}")
+        time.sleep(interval)
+
+
+def start_background_refresh(get_tickers, interval=BACKGROUND_CHECK_INTERVAL):
+    """Démarre (une seule fois par processus) le thread de rafraîchissement du snapshot."""
+    global _background_thread
+    if _background_thread is not None and _background_thread.is_alive():
+        return _background_thread
+
+    _background_thread = threading.Thread(
+        target=_background_loop, args=(get_tickers, interval),
+        name='fundamental-screener-refresh', daemon=True
+    )
+    _background_thread.start()
+    return _background_thread
@@ -3,8 +3,8 @@
 Module de calcul des indicateurs techniques.
 VERSION 2.4 - Correction du passage de config + debug amélioré
 """
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
 from config import (
     RSI, STOCHASTIC, MOVING_AVERAGES, MACD, ADX, BOLLINGER,
     SIGNAL_WEIGHTS, INDIVIDUAL_WEIGHTS, COMBINATION_WEIGHTS,
@@ -53,6 +53,8 @@ def get_pattern_with_direction(candle_patterns_row):
 
 def calculate_all_indicators(df, config=None):
     """Calcule tous les indicateurs techniques."""
+    import pandas_ta  # noqa: F401 - import différé (lourd) : enregistre l'accesseur df.ta
+    
     if config is None:
         config = get_default_config()
         if DEBUG_CONFIG:
@@ -144,6 +146,13 @@ def calculate_all_indicators(df, config=None):
     df['pattern'] = patterns_list
     df['pattern_direction'] = directions_list
 
+    # Tendances hebdomadaire / mensuelle, pour toutes les barres
+    df = add_multi_timeframe_context(df, config)
+    
+    # Moyennes glissantes et contributions achat / vente de chaque indicateur
+    # (additionnées par la recommandation, affichées par le tableau technique)
+    df = add_derived_columns(df, config)
+
     signal_timeframe = config.get('signal_timeframe', 1)
     
     # Passer explicitement la config à chaque appel
@@ -159,6 +168,75 @@ def calculate_all_indicators(df, config=None):
     return df
 
 
+# === CONTEXTE MULTI-TIMEFRAME ===
+# Tendance des timeframes supérieurs : règle de rééchantillonnage, SMA courte/moyenne/longue,
+# nombre minimal de périodes avant de donner une tendance
+HIGHER_TIMEFRAMES = {
+    'weekly_trend': {'rule': 'W', 'windows': (10, 20, 40), 'min_bars': 50},
+    'monthly_trend': {'rule': 'ME', 'windows': (6, 12, 24), 'min_bars': 24},
+}
+SMOOTHED_COLUMNS = ['rsi', 'stochastic_k', 'stochastic_d']
+
+
+def higher_timeframe_trend(df, rule, windows=(10, 20, 40), min_bars=50):
+    """
+    Tendance de chaque période d'un timeframe supérieur (vectorisé).
+
+    Returns:
+        pd.Series: libellé de tendance indexé par la date de fin de chaque période
+    """
+    from bar_store import resample_ohlcv
+    
+    bars = resample_ohlcv(df, rule)
+    close = bars['Close']
+    short, medium, long = (close.rolling(window).mean() for window in windows)
+    
+    trend = pd.Series(np.select(
+        [(close > short) & (short > medium) & (medium > long),
+         close > medium,
+         (close < short) & (short < medium) & (medium < long),
+         close < medium],
+        ['strong_bullish', 'bullish', 'strong_bearish', 'bearish'],
+        default='neutral'
+    ), index=bars.index)
+    trend.iloc[:min_bars - 1] = 'neutral'
+    return trend
+
+
+def add_multi_timeframe_context(df, config):
+    """
+    Ajoute à chaque barre weekly_trend / monthly_trend : tendance de la dernière période
+    supérieure connue à cette date (jointure as-of sur la date de fin de période,
+    sans regarder dans le futur).
+    """
+    dates = pd.DataFrame({'Date': df.index.values})
+    for column, spec in HIGHER_TIMEFRAMES.items():
+        trend = higher_timeframe_trend(df, spec['rule'], spec['windows'], spec['min_bars'])
+        periods = pd.DataFrame({'Date': trend.index.values, column: trend.values})
+        joined = pd.merge_asof(dates, periods, on='Date', direction='backward')
+        df[column] = joined[column].fillna('neutral').to_numpy()
+    
+    return df
+
+
+def add_derived_columns(df, config):
+    """
+    Colonnes dérivées peu coûteuses, calculées sur tout le DataFrame (non stockées en base :
+    recalculées aussi sur les historiques relus, pour que tous les chemins aient le même schéma) :
+    - <col>_smoothed : moyennes glissantes sur signal_timeframe barres (RSI, stochastique)
+    - contrib_<groupe>_buy / _sell : contributions de chaque indicateur individuel
+    """
+    signal_timeframe = config.get('signal_timeframe', 1)
+    if signal_timeframe > 1:
+        for col in SMOOTHED_COLUMNS:
+            if col in df.columns:
+                df[f'{col}_smoothed'] = df[col].astype(np.float64).rolling(signal_timeframe, min_periods=1).mean()
+    
+    contributions = calculate_individual_contributions(df, config)
+    df[list(contributions.columns)] = contributions
+    return df
+
+
 def calculate_bollinger_signal(df, config=None):
     """Calcule le signal Bollinger pour chaque ligne."""
     if config is None:
@@ -276,8 +354,14 @@ def calculate_trend(df, config=None):
     return trends
 
 
+# Pivots des divergences : un creux / sommet n'est confirmé qu'après DIVERGENCE_PIVOT_WINDOW
+# séances (la divergence est datée du pivot, mais n'est connue qu'à la clôture de confirmation)
+DIVERGENCE_PIVOT_WINDOW = 5
+DIVERGENCE_MIN_DISTANCE = 5
+
+
 def detect_rsi_divergence(df, lookback=14, config=None):
-    """Détecte les divergences entre le prix et le RSI."""
+    """Détecte les divergences entre le prix et le RSI (datées du pivot, voir DIVERGENCE_PIVOT_WINDOW)."""
     if config is None:
         config = get_default_config()
     
@@ -287,7 +371,7 @@ def detect_rsi_divergence(df, lookback=14, config=None):
     
     divergences = ['none'] * len(df)
     
-    def find_local_min(series, idx, window=5):
+    def find_local_min(series, idx, window=DIVERGENCE_PIVOT_WINDOW):
         if idx < window or idx >= len(series) - window:
             return False
         val = series.iloc[idx]
@@ -295,7 +379,7 @@ def detect_rsi_divergence(df, lookback=14, config=None):
         right_vals = series.iloc[idx+1:idx+window+1]
         return val <= left_vals.min() and val <= right_vals.min()
     
-    def find_local_max(series, idx, window=5):
+    def find_local_max(series, idx, window=DIVERGENCE_PIVOT_WINDOW):
         if idx < window or idx >= len(series) - window:
             return False
         val = series.iloc[idx]
@@ -303,8 +387,8 @@ def detect_rsi_divergence(df, lookback=14, config=None):
         right_vals = series.iloc[idx+1:idx+window+1]
         return val >= left_vals.max() and val >= right_vals.max()
     
-    window = 5
-    min_distance = 5
+    window = DIVERGENCE_PIVOT_WINDOW
+    min_distance = DIVERGENCE_MIN_DISTANCE
     max_distance = lookback * 2
     
     for i in range(lookback * 2 + window, len(df) - window):
@@ -667,152 +751,170 @@ def detect_active_combinations(row, row_prev, config, active_flags):
     
     return active
 
-def calculate_individual_signals(row, config, active_flags):
+# === CONTRIBUTIONS DES INDICATEURS INDIVIDUELS ===
+# Groupe affiché -> clés de individual_weights, dans l'ordre d'addition des scores.
+# Chaque groupe produit deux colonnes par barre : contrib_<groupe>_buy / contrib_<groupe>_sell.
+CONTRIBUTION_GROUPS = {
+    'rsi_divergence': ['rsi_divergence'],
+    'rsi': ['rsi_extreme', 'rsi_exit_zone'],
+    'stochastic': ['stoch_cross'],
+    'macd': ['macd_cross'],
+    'macd_histogram': ['macd_histogram'],
+    'trend': ['trend_strong', 'trend_weak'],
+    'pattern': ['pattern_signal'],
+    'bollinger': ['bollinger_touch', 'bollinger_zone'],
+    'adx': ['adx_direction'],
+}
+CONTRIBUTION_BUY_COLUMNS = [f'contrib_{group}_buy' for group in CONTRIBUTION_GROUPS]
+CONTRIBUTION_SELL_COLUMNS = [f'contrib_{group}_sell' for group in CONTRIBUTION_GROUPS]
+
+
+def _numeric_column(df, column, default):
+    """Colonne numérique (float64), valeurs manquantes remplacées comme _safe_num."""
+    if column not in df.columns and column == 'close' and 'Close' in df.columns:
+        column = 'Close'
+    if column not in df.columns:
+        return np.full(len(df), float(default))
+    values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64)
+    return np.where(np.isnan(values), float(default), values)
+
+
+def _label_column(df, column, default):
+    """Colonne de libellés (objets), valeurs manquantes remplacées comme _safe_get."""
+    if column not in df.columns:
+        return np.full(len(df), default, dtype=object)
+    values = df[column].astype(object).to_numpy()
+    return np.where(pd.isna(values), default, values)
+
+
+def calculate_individual_contributions(df, config):
     """
-    Calcule les signaux des indicateurs individuels.
-    VERSION CORRIGÉE: Utilise DIRECTEMENT les poids de la config, sans vérifier active_flags.
+    Contributions achat / vente de chaque indicateur individuel, pour toutes les barres (vectorisé).
+    Source unique du score individuel : la recommandation additionne ces colonnes et le tableau
+    technique les affiche telles quelles.
+    Avec signal_timeframe > 1, RSI et stochastique sont lus dans les colonnes *_smoothed.
+
+    Returns:
+        pd.DataFrame: colonnes contrib_<groupe>_buy / contrib_<groupe>_sell (même index que df)
     """
     ind_weights = config.get('individual_weights', {})
     rsi_cfg = config.get('rsi', RSI)
     stoch_cfg = config.get('stochastic', STOCHASTIC)
     adx_cfg = config.get('adx', ADX)
+    smoothed = config.get('signal_timeframe', 1) > 1
+    
+    def source(col):
+        return f'{col}_smoothed' if smoothed and f'{col}_smoothed' in df.columns else col
+    
+    rsi = _numeric_column(df, source('rsi'), 50)
+    stoch_k = _numeric_column(df, source('stochastic_k'), 50)
+    stoch_d = _numeric_column(df, source('stochastic_d'), 50)
+    macd = _numeric_column(df, 'macd', 0)
+    macd_signal_val = _numeric_column(df, 'macd_signal', 0)
+    macd_hist = _numeric_column(df, 'macd_histogram', 0)
+    adx = _numeric_column(df, 'adx', 0)
+    di_plus = _numeric_column(df, 'di_plus', 0)
+    di_minus = _numeric_column(df, 'di_minus', 0)
+    trend = _label_column(df, 'trend', 'neutral')
+    pattern_dir = _label_column(df, 'pattern_direction', 'neutral')
+    rsi_div = _label_column(df, 'rsi_divergence', 'none')
+    bb_signal = _label_column(df, 'bb_signal', 'neutral')
+    
+    def weight(key):
+        value = ind_weights.get(key, 0)
+        return value if value > 0 else 0.0
+    
+    def either(buy_condition, sell_condition, value):
+        """(achat, vente) : la vente n'est retenue que si l'achat ne l'est pas (if / elif)."""
+        buy = np.where(buy_condition, value, 0.0)
+        sell = np.where(~buy_condition & sell_condition, value, 0.0)
+        return buy, sell
+    
+    parts = {}
+    
+    # Divergence RSI
+    parts['rsi_divergence'] = either(rsi_div == 'bullish', rsi_div == 'bearish', weight('rsi_divergence'))
+    
+    # RSI : zones extrêmes puis zones de sortie
+    extreme_buy, extreme_sell = either(rsi <= rsi_cfg.get('oversold', 30),
+                                       rsi >= rsi_cfg.get('overbought', 70), weight('rsi_extreme'))
+    exit_buy, exit_sell = either(
+        (rsi_cfg.get('exit_oversold_min', 30) <= rsi) & (rsi <= rsi_cfg.get('exit_oversold_max', 40)),
+        (rsi_cfg.get('exit_overbought_min', 60) <= rsi) & (rsi <= rsi_cfg.get('exit_overbought_max', 70)),
+        weight('rsi_exit_zone'))
+    parts['rsi'] = (extreme_buy + exit_buy, extreme_sell + exit_sell)
+    
+    # Stochastique : croisement en zone extrême
+    parts['stochastic'] = either(
+        (stoch_k < stoch_cfg.get('oversold', 20) + 10) & (stoch_k > stoch_d),
+        (stoch_k > stoch_cfg.get('overbought', 80) - 10) & (stoch_k < stoch_d),
+        weight('stoch_cross'))
+    
+    # MACD : croisement confirmé par l'histogramme, puis histogramme seul
+    parts['macd'] = either((macd > macd_signal_val) & (macd_hist > 0),
+                           (macd < macd_signal_val) & (macd_hist < 0), weight('macd_cross'))
+    parts['macd_histogram'] = either(macd_hist > 0, macd_hist < 0, weight('macd_histogram'))
+    
+    # Tendance : forte ou faible
+    strong, weak = weight('trend_strong'), weight('trend_weak')
+    parts['trend'] = (
+        np.where(trend == 'strong_bullish', strong, np.where(trend == 'bullish', weak, 0.0)),
+        np.where(trend == 'strong_bearish', strong, np.where(trend == 'bearish', weak, 0.0)),
+    )
+    
+    # Patterns chandeliers
+    parts['pattern'] = either(pattern_dir == 'bullish', pattern_dir == 'bearish', weight('pattern_signal'))
+    
+    # Bollinger : contact de bande puis zone
+    touch_buy, touch_sell = either(bb_signal == 'lower_touch', bb_signal == 'upper_touch', weight('bollinger_touch'))
+    zone_buy, zone_sell = either(bb_signal == 'lower_zone', bb_signal == 'upper_zone', weight('bollinger_zone'))
+    parts['bollinger'] = (touch_buy + zone_buy, touch_sell + zone_sell)
+    
+    # ADX / DI : direction de la tendance si elle est assez forte
+    trending = adx > adx_cfg.get('weak', 20)
+    parts['adx'] = either(trending & (di_plus > di_minus), trending, weight('adx_direction'))
+    
+    columns = {}
+    for group in CONTRIBUTION_GROUPS:
+        buy, sell = parts[group]
+        columns[f'contrib_{group}_buy'] = buy
+        columns[f'contrib_{group}_sell'] = sell
+    return pd.DataFrame(columns, index=df.index)
+
+
+def row_contributions(row, config):
+    """
+    Contributions {groupe: (achat, vente)} d'une barre : lues dans les colonnes précalculées,
+    ou calculées pour cette seule barre si elles manquent (frames relus depuis historical_data).
+    """
+    precomputed = all(
+        row.get(col) is not None and not pd.isna(row.get(col))
+        for col in CONTRIBUTION_BUY_COLUMNS + CONTRIBUTION_SELL_COLUMNS
+    )
+    if not precomputed:
+        row = calculate_individual_contributions(pd.DataFrame([dict(row)]), config).iloc[0].to_dict()
+    return {group: (float(row[f'contrib_{group}_buy']), float(row[f'contrib_{group}_sell']))
+            for group in CONTRIBUTION_GROUPS}
+
+
+def calculate_individual_signals(row, config, active_flags):
+    """
+    Calcule les signaux des indicateurs individuels d'une barre.
+    Utilise DIRECTEMENT les poids de la config (via row_contributions, sans vérifier active_flags).
+    """
+    contributions = row_contributions(row, config)
     
     buy_score = 0
     sell_score = 0
     debug_contributions = []
     
-    # Extraire les valeurs
-    rsi = _safe_num(row, 'rsi', 50)
-    stoch_k = _safe_num(row, 'stochastic_k', 50)
-    stoch_d = _safe_num(row, 'stochastic_d', 50)
-    macd = _safe_num(row, 'macd', 0)
-    macd_signal_val = _safe_num(row, 'macd_signal', 0)
-    macd_hist = _safe_num(row, 'macd_histogram', 0)
-    trend = _safe_get(row, 'trend', 'neutral')
-    pattern_dir = _safe_get(row, 'pattern_direction', 'neutral')
-    rsi_div = _safe_get(row, 'rsi_divergence', 'none')
-    bb_signal = _safe_get(row, 'bb_signal', 'neutral')
-    adx = _safe_num(row, 'adx', 0)
-    di_plus = _safe_num(row, 'di_plus', 0)
-    di_minus = _safe_num(row, 'di_minus', 0)
-    
-    # === DIVERGENCE RSI - PRIORITÉ HAUTE ===
-    # C'est le signal le plus fiable, on le traite EN PREMIER
-    div_weight = ind_weights.get('rsi_divergence', 0)
-    if div_weight > 0:
-        if rsi_div == 'bullish':
-            buy_score += div_weight
-            debug_contributions.append(f"RSI DIV BULLISH: +{div_weight} buy")
-        elif rsi_div == 'bearish':
-            sell_score += div_weight
-            debug_contributions.append(f"RSI DIV BEARISH: +{div_weight} sell")
-    
-    # === RSI ===
-    rsi_extreme_weight = ind_weights.get('rsi_extreme', 0)
-    rsi_exit_weight = ind_weights.get('rsi_exit_zone', 0)
-    
-    if rsi_extreme_weight > 0:
-        if rsi <= rsi_cfg.get('oversold', 30):
-            buy_score += rsi_extreme_weight
-            debug_contributions.append(f"RSI extreme oversold: +{rsi_extreme_weight} buy")
-        elif rsi >= rsi_cfg.get('overbought', 70):
-            sell_score += rsi_extreme_weight
-            debug_contributions.append(f"RSI extreme overbought: +{rsi_extreme_weight} sell")
-    
-    if rsi_exit_weight > 0:
-        if rsi_cfg.get('exit_oversold_min', 30) <= rsi <= rsi_cfg.get('exit_oversold_max', 40):
-            buy_score += rsi_exit_weight
-            debug_contributions.append(f"RSI exit oversold: +{rsi_exit_weight} buy")
-        elif rsi_cfg.get('exit_overbought_min', 60) <= rsi <= rsi_cfg.get('exit_overbought_max', 70):
-            sell_score += rsi_exit_weight
-            debug_contributions.append(f"RSI exit overbought: +{rsi_exit_weight} sell")
-    
-    # === STOCHASTIQUE ===
-    stoch_weight = ind_weights.get('stoch_cross', 0)
-    if stoch_weight > 0:
-        if stoch_k < stoch_cfg.get('oversold', 20) + 10 and stoch_k > stoch_d:
-            buy_score += stoch_weight
-            debug_contributions.append(f"Stoch bullish: +{stoch_weight} buy")
-        elif stoch_k > stoch_cfg.get('overbought', 80) - 10 and stoch_k < stoch_d:
-            sell_score += stoch_weight
-            debug_contributions.append(f"Stoch bearish: +{stoch_weight} sell")
-    
-    # === MACD ===
-    macd_weight = ind_weights.get('macd_cross', 0)
-    macd_hist_weight = ind_weights.get('macd_histogram', 0)
-    
-    if macd_weight > 0:
-        if macd > macd_signal_val and macd_hist > 0:
-            buy_score += macd_weight
-            debug_contributions.append(f"MACD bullish: +{macd_weight} buy")
-        elif macd < macd_signal_val and macd_hist < 0:
-            sell_score += macd_weight
-            debug_contributions.append(f"MACD bearish: +{macd_weight} sell")
-    
-    if macd_hist_weight > 0:
-        if macd_hist > 0:
-            buy_score += macd_hist_weight
-            debug_contributions.append(f"MACD hist+: +{macd_hist_weight} buy")
-        elif macd_hist < 0:
-            sell_score += macd_hist_weight
-            debug_contributions.append(f"MACD hist-: +{macd_hist_weight} sell")
-    
-    # === TENDANCE ===
-    trend_strong_weight = ind_weights.get('trend_strong', 0)
-    trend_weak_weight = ind_weights.get('trend_weak', 0)
-    
-    if trend == 'strong_bullish' and trend_strong_weight > 0:
-        buy_score += trend_strong_weight
-        debug_contributions.append(f"Trend strong bull: +{trend_strong_weight} buy")
-    elif trend == 'bullish' and trend_weak_weight > 0:
-        buy_score += trend_weak_weight
-        debug_contributions.append(f"Trend bull: +{trend_weak_weight} buy")
-    elif trend == 'strong_bearish' and trend_strong_weight > 0:
-        sell_score += trend_strong_weight
-        debug_contributions.append(f"Trend strong bear: +{trend_strong_weight} sell")
-    elif trend == 'bearish' and trend_weak_weight > 0:
-        sell_score += trend_weak_weight
-        debug_contributions.append(f"Trend bear: +{trend_weak_weight} sell")
-    
-    # === PATTERNS ===
-    pattern_weight = ind_weights.get('pattern_signal', 0)
-    if pattern_weight > 0:
-        if pattern_dir == 'bullish':
-            buy_score += pattern_weight
-            debug_contributions.append(f"Pattern bullish: +{pattern_weight} buy")
-        elif pattern_dir == 'bearish':
-            sell_score += pattern_weight
-            debug_contributions.append(f"Pattern bearish: +{pattern_weight} sell")
-    
-    # === BOLLINGER ===
-    bb_touch_weight = ind_weights.get('bollinger_touch', 0)
-    bb_zone_weight = ind_weights.get('bollinger_zone', 0)
-    
-    if bb_touch_weight > 0:
-        if bb_signal == 'lower_touch':
-            buy_score += bb_touch_weight
-            debug_contributions.append(f"BB lower touch: +{bb_touch_weight} buy")
-        elif bb_signal == 'upper_touch':
-            sell_score += bb_touch_weight
-            debug_contributions.append(f"BB upper touch: +{bb_touch_weight} sell")
-    
-    if bb_zone_weight > 0:
-        if bb_signal == 'lower_zone':
-            buy_score += bb_zone_weight
-            debug_contributions.append(f"BB lower zone: +{bb_zone_weight} buy")
-        elif bb_signal == 'upper_zone':
-            sell_score += bb_zone_weight
-            debug_contributions.append(f"BB upper zone: +{bb_zone_weight} sell")
-    
-    # === ADX/DI ===
-    adx_weight = ind_weights.get('adx_direction', 0)
-    if adx_weight > 0 and adx > adx_cfg.get('weak', 20):
-        if di_plus > di_minus:
-            buy_score += adx_weight
-            debug_contributions.append(f"ADX DI+: +{adx_weight} buy")
-        else:
-            sell_score += adx_weight
-            debug_contributions.append(f"ADX DI-: +{adx_weight} sell")
+    for group, (buy, sell) in contributions.items():
+        buy_score += buy
+        sell_score += sell
+        if buy:
+            debug_contributions.append(f"{group}: +{buy} buy")
+        if sell:
+            debug_contributions.append(f"{group}: +{sell} sell")
     
     return buy_score, sell_score, debug_contributions
 
@@ -880,17 +982,12 @@ def calculate_recommendation_v4(row, df, config=None, signal_timeframe=1):
     row_dict = row.to_dict()
     
     # === ANALYSE MULTI-TIMEFRAME ===
-    if signal_timeframe > 1 and row.name in df.index:
-        try:
-            current_idx = df.index.get_loc(row.name)
-            start_idx = max(0, current_idx - signal_timeframe + 1)
-            window = df.iloc[start_idx:current_idx + 1]
-            
-            row_dict['rsi'] = window['rsi'].mean() if 'rsi' in window else row_dict.get('rsi')
-            row_dict['stochastic_k'] = window['stochastic_k'].mean() if 'stochastic_k' in window else row_dict.get('stochastic_k')
-            row_dict['stochastic_d'] = window['stochastic_d'].mean() if 'stochastic_d' in window else row_dict.get('stochastic_d')
-        except Exception:
-            pass
+    # Moyennes glissantes précalculées par add_derived_columns
+    if signal_timeframe > 1:
+        for col in SMOOTHED_COLUMNS:
+            smoothed = row_dict.get(f'{col}_smoothed')
+            if smoothed is not None:
+                row_dict[col] = smoothed
     
     # === 1. CALCULER LES SIGNAUX INDIVIDUELS ===
     ind_buy, ind_sell, debug_contribs = calculate_individual_signals(row_dict, config, active_flags)
@@ -986,31 +1083,7 @@ def calculate_recommendation_v4(row, df, config=None, signal_timeframe=1):
     return 'Neutre', min(int(round(max_conv)), max_conviction), all_active
 
 def get_weekly_trend(df_daily):
-    """Convertit les données daily en weekly et calcule la tendance weekly."""
-    df_weekly = df_daily.resample('W').agg({
-        'Open': 'first',
-        'High': 'max',
-        'Low': 'min',
-        'Close': 'last',
-        'Volume': 'sum'
-    }).dropna()
-    
-    if len(df_weekly) < 50:
-        return 'neutral'
-    
-    df_weekly['sma_10'] = df_weekly['Close'].rolling(10).mean()
-    df_weekly['sma_20'] = df_weekly['Close'].rolling(20).mean()
-    df_weekly['sma_40'] = df_weekly['Close'].rolling(40).mean()
-    
-    last = df_weekly.iloc[-1]
-    
-    if last['Close'] > last['sma_10'] > last['sma_20'] > last['sma_40']:
-        return 'strong_bullish'
-    elif last['Close'] > last['sma_20']:
-        return 'bullish'
-    elif last['Close'] < last['sma_10'] < last['sma_20'] < last['sma_40']:
-        return 'strong_bearish'
-    elif last['Close'] < last['sma_20']:
-        return 'bearish'
-    else:
-        return 'neutral'
\ No newline at end of file
+    """Tendance weekly de la dernière semaine (données daily converties en weekly)."""
+    spec = HIGHER_TIMEFRAMES['weekly_trend']
+    trend = higher_timeframe_trend(df_daily, spec['rule'], spec['windows'], spec['min_bars'])
+    return trend.iloc[-1] if len(trend) else 'neutral'
@@ -6,7 +6,10 @@ VERSION 3.0 - Scores basés sur les rendements réels en %
 """
 import pandas as pd
 import numpy as np
-from config import get_default_config, RSI, STOCHASTIC, BOLLINGER, ADX
+from config import (
+    get_default_config, RSI, STOCHASTIC, BOLLINGER, ADX,
+    INDIVIDUAL_WEIGHTS, COMBINATION_WEIGHTS
+)
 
 
 def calculate_performance_history(df, config=None, horizons=[1, 2, 5, 10, 20]):
@@ -815,35 +818,35 @@ def _check_macd_negative_trend_bearish(row, row_prev, cfg):
 # Définition des combinaisons avec leur type explicite
 COMBINATION_DEFINITIONS = [
     # === COMBINAISONS D'ACHAT ===
-    {'name': 'RSI Bas + Stoch Haussier', 'type': 'buy', 'check': _check_rsi_oversold_stoch_bullish},
-    {'name': 'RSI Sortie Survente + Stoch', 'type': 'buy', 'check': _check_rsi_exit_oversold_stoch},
-    {'name': 'MACD Haussier + Tendance Haussière', 'type': 'buy', 'check': _check_macd_bullish_trend_bullish},
-    {'name': 'MACD Croisement Haussier + RSI Bas', 'type': 'buy', 'check': _check_macd_cross_rsi_low},
-    {'name': 'Bollinger Basse + Stoch Haussier', 'type': 'buy', 'check': _check_bollinger_low_stoch_bullish},
-    {'name': 'Bollinger Basse + RSI Bas', 'type': 'buy', 'check': _check_bollinger_low_rsi_oversold},
-    {'name': 'Pattern Haussier + Tendance Haussière', 'type': 'buy', 'check': _check_pattern_bullish_trend_bullish},
-    {'name': 'Pattern Haussier + RSI Bas', 'type': 'buy', 'check': _check_pattern_bullish_rsi_oversold},
-    {'name': 'Divergence Haussière + Stoch', 'type': 'buy', 'check': _check_divergence_bullish_stoch},
-    {'name': 'Triple Confirm Achat', 'type': 'buy', 'check': _check_triple_buy},
-    {'name': 'ADX Fort + DI+ Dominant', 'type': 'buy', 'check': _check_adx_strong_di_plus},
-    {'name': 'Stoch Croisement Haussier + RSI Bas', 'type': 'buy', 'check': _check_stoch_bullish_cross_rsi_low},
-    {'name': 'MACD Positif + Tendance Haussière', 'type': 'buy', 'check': _check_macd_positive_trend_bullish},
+    {'name': 'RSI Bas + Stoch Haussier', 'key': 'rsi_low_stoch_bullish', 'type': 'buy', 'check': _check_rsi_oversold_stoch_bullish},
+    {'name': 'RSI Sortie Survente + Stoch', 'key': 'rsi_exit_oversold_stoch', 'type': 'buy', 'check': _check_rsi_exit_oversold_stoch},
+    {'name': 'MACD Haussier + Tendance Haussière', 'key': 'macd_bullish_trend_bullish', 'type': 'buy', 'check': _check_macd_bullish_trend_bullish},
+    {'name': 'MACD Croisement Haussier + RSI Bas', 'key': 'macd_cross_rsi_low', 'type': 'buy', 'check': _check_macd_cross_rsi_low},
+    {'name': 'Bollinger Basse + Stoch Haussier', 'key': 'bollinger_low_stoch_bullish', 'type': 'buy', 'check': _check_bollinger_low_stoch_bullish},
+    {'name': 'Bollinger Basse + RSI Bas', 'key': 'bollinger_low_rsi_low', 'type': 'buy', 'check': _check_bollinger_low_rsi_oversold},
+    {'name': 'Pattern Haussier + Tendance Haussière', 'key': 'pattern_bullish_trend_bullish', 'type': 'buy', 'check': _check_pattern_bullish_trend_bullish},
+    {'name': 'Pattern Haussier + RSI Bas', 'key': 'pattern_bullish_rsi_low', 'type': 'buy', 'check': _check_pattern_bullish_rsi_oversold},
+    {'name': 'Divergence Haussière + Stoch', 'key': 'divergence_bullish_stoch', 'type': 'buy', 'check': _check_divergence_bullish_stoch},
+    {'name': 'Triple Confirm Achat', 'key': 'triple_confirm_buy', 'type': 'buy', 'check': _check_triple_buy},
+    {'name': 'ADX Fort + DI+ Dominant', 'key': 'adx_strong_di_plus', 'type': 'buy', 'check': _check_adx_strong_di_plus},
+    {'name': 'Stoch Croisement Haussier + RSI Bas', 'key': 'stoch_cross_bullish_rsi_low', 'type': 'buy', 'check': _check_stoch_bullish_cross_rsi_low},
+    {'name': 'MACD Positif + Tendance Haussière', 'key': 'macd_positive_trend_bullish', 'type': 'buy', 'check': _check_macd_positive_trend_bullish},
     
     # === COMBINAISONS DE VENTE ===
-    {'name': 'RSI Haut + Stoch Baissier', 'type': 'sell', 'check': _check_rsi_overbought_stoch_bearish},
-    {'name': 'RSI Sortie Surachat + Stoch', 'type': 'sell', 'check': _check_rsi_exit_overbought_stoch},
-    {'name': 'MACD Baissier + Tendance Baissière', 'type': 'sell', 'check': _check_macd_bearish_trend_bearish},
-    {'name': 'MACD Croisement Baissier + RSI Haut', 'type': 'sell', 'check': _check_macd_cross_bearish_rsi_high},
-    {'name': 'Bollinger Haute + Stoch Baissier', 'type': 'sell', 'check': _check_bollinger_high_stoch_bearish},
-    {'name': 'Bollinger Haute + RSI Haut', 'type': 'sell', 'check': _check_bollinger_high_rsi_overbought},
-    {'name': 'Pattern Baissier + Tendance Baissière', 'type': 'sell', 'check': _check_pattern_bearish_trend_bearish},
-    {'name': 'Pattern Baissier + RSI Haut', 'type': 'sell', 'check': _check_pattern_bearish_rsi_overbought},
-    {'name': 'Divergence Baissière + Stoch', 'type': 'sell', 'check': _check_divergence_bearish_stoch},
-    {'name': 'Triple Confirm Vente', 'type': 'sell', 'check': _check_triple_sell},
-    {'name': 'ADX Fort + DI- Dominant', 'type': 'sell', 'check': _check_adx_strong_di_minus},
-    {'name': 'Prix Sous MAs + MACD Négatif', 'type': 'sell', 'check': _check_price_below_mas_macd_negative},
-    {'name': 'Stoch Croisement Baissier + RSI Haut', 'type': 'sell', 'check': _check_stoch_bearish_cross_rsi_high},
-    {'name': 'MACD Négatif + Tendance Baissière', 'type': 'sell', 'check': _check_macd_negative_trend_bearish},
+    {'name': 'RSI Haut + Stoch Baissier', 'key': 'rsi_high_stoch_bearish', 'type': 'sell', 'check': _check_rsi_overbought_stoch_bearish},
+    {'name': 'RSI Sortie Surachat + Stoch', 'key': 'rsi_exit_overbought_stoch', 'type': 'sell', 'check': _check_rsi_exit_overbought_stoch},
+    {'name': 'MACD Baissier + Tendance Baissière', 'key': 'macd_bearish_trend_bearish', 'type': 'sell', 'check': _check_macd_bearish_trend_bearish},
+    {'name': 'MACD Croisement Baissier + RSI Haut', 'key': 'macd_cross_bearish_rsi_high', 'type': 'sell', 'check': _check_macd_cross_bearish_rsi_high},
+    {'name': 'Bollinger Haute + Stoch Baissier', 'key': 'bollinger_high_stoch_bearish', 'type': 'sell', 'check': _check_bollinger_high_stoch_bearish},
+    {'name': 'Bollinger Haute + RSI Haut', 'key': 'bollinger_high_rsi_high', 'type': 'sell', 'check': _check_bollinger_high_rsi_overbought},
+    {'name': 'Pattern Baissier + Tendance Baissière', 'key': 'pattern_bearish_trend_bearish', 'type': 'sell', 'check': _check_pattern_bearish_trend_bearish},
+    {'name': 'Pattern Baissier + RSI Haut', 'key': 'pattern_bearish_rsi_high', 'type': 'sell', 'check': _check_pattern_bearish_rsi_overbought},
+    {'name': 'Divergence Baissière + Stoch', 'key': 'divergence_bearish_stoch', 'type': 'sell', 'check': _check_divergence_bearish_stoch},
+    {'name': 'Triple Confirm Vente', 'key': 'triple_confirm_sell', 'type': 'sell', 'check': _check_triple_sell},
+    {'name': 'ADX Fort + DI- Dominant', 'key': 'adx_strong_di_minus', 'type': 'sell', 'check': _check_adx_strong_di_minus},
+    {'name': 'Prix Sous MAs + MACD Négatif', 'key': 'price_below_mas_macd_negative', 'type': 'sell', 'check': _check_price_below_mas_macd_negative},
+    {'name': 'Stoch Croisement Baissier + RSI Haut', 'key': 'stoch_cross_bearish_rsi_high', 'type': 'sell', 'check': _check_stoch_bearish_cross_rsi_high},
+    {'name': 'MACD Négatif + Tendance Baissière', 'key': 'macd_negative_trend_bearish', 'type': 'sell', 'check': _check_macd_negative_trend_bearish},
 ]
 
 
@@ -944,15 +947,25 @@ def calculate_performance_history_with_combinations(df, config=None, horizons=[1
     return all_perf
 
 
-def get_combination_summary(combination_perf, horizons=[1, 2, 5, 10, 20]):
+def get_combination_summary(combination_perf, horizons=[1, 2, 5, 10, 20], significance=None):
     """
     Crée un résumé trié des combinaisons par performance.
     Inclut maintenant la performance cumulée.
+    
+    Args:
+        significance: sortie de signal_statistics.evaluate_signal_significance (optionnel) ;
+                      ajoute p-values et intervalles de confiance à chaque horizon
     """
+    from signal_statistics import combined_p_value
+    
     summary = []
+    significance = significance or {}
     
     for combo_name, perf_df in combination_perf.items():
         stats = calculate_accuracy_stats(perf_df, horizons)
+        combo_significance = significance.get(combo_name, {})
+        for h, horizon_stats in stats.items():
+            horizon_stats.update(combo_significance.get(h, {}))
         
         valid_accuracies = [s['accuracy'] for h, s in stats.items() 
                           if s.get('accuracy') is not None]
@@ -970,6 +983,7 @@ def get_combination_summary(combination_perf, horizons=[1, 2, 5, 10, 20]):
                 'accuracy': avg_accuracy,
                 'total_signals': total_signals,
                 'cumulative_return': avg_cumulative,
+                'p_value': combined_p_value(combo_significance, horizons),
                 'stats': stats
             })
     
@@ -979,6 +993,233 @@ def get_combination_summary(combination_perf, horizons=[1, 2, 5, 10, 20]):
     return summary
 
 
+# === VALIDATION WALK-FORWARD ===
+# Les signaux et rendements sont empilés une seule fois en matrices (barres × signaux × horizons) ;
+# avec des sommes cumulées, chaque fenêtre d'entraînement ou de test se résume à une soustraction.
+
+WALK_FORWARD_TRAIN_BARS = 250   # ~1 an de séances
+WALK_FORWARD_TEST_BARS = 60     # ~3 mois de séances
+WALK_FORWARD_SCHEMES = ['expanding', 'sliding']
+
+# Indicateurs individuels -> clés de INDIVIDUAL_WEIGHTS qui les pondèrent
+INDICATOR_WEIGHT_KEYS = {
+    'RSI': ['rsi_extreme', 'rsi_exit_zone'],
+    'Stochastique': ['stoch_cross', 'stoch_extreme'],
+    'Bollinger': ['bollinger_touch', 'bollinger_zone'],
+    'MACD': ['macd_cross', 'macd_histogram'],
+    'Tendance': ['trend_strong', 'trend_weak'],
+    'ADX': ['adx_direction'],
+    'Patterns': ['pattern_signal'],
+    'Divergence RSI': ['rsi_divergence'],
+}
+
+
+def build_signal_matrices(performance_history, horizons=[1, 2, 5, 10, 20]):
+    """
+    Empile l'historique de performance (sortie de calculate_performance_history_with_combinations)
+    en matrices cumulées.
+    
+    Returns:
+        dict: names, dates, horizons et sommes cumulées (T+1 × K × H) :
+              'signals' (signaux évaluables), 'hits' (signaux corrects), 'returns' (rendements suivis)
+    """
+    names = [name for name, perf_df in performance_history.items() if not perf_df.empty]
+    if not names:
+        return None
+    
+    length = len(performance_history[names[0]])
+    names = [name for name in names if len(performance_history[name]) == length]
+    
+    shape = (length, len(names), len(horizons))
+    signals = np.zeros(shape, dtype=np.int32)
+    hits = np.zeros(shape, dtype=np.int32)
+    returns = np.zeros(shape, dtype=np.float64)
+    
+    for k, name in enumerate(names):
+        perf_df = performance_history[name]
+        for j, h in enumerate(horizons):
+            if f'correct_{h}d' not in perf_df.columns:
+                continue
+            correct = perf_df[f'correct_{h}d'].to_numpy(dtype=np.float64)
+            valid = ~np.isnan(correct)
+            signals[:, k, j] = valid
+            hits[:, k, j] = valid & (correct == 1)
+            returns[:, k, j] = np.where(valid, perf_df[f'return_{h}d'].to_numpy(dtype=np.float64), 0.0)
+    
+    def cumulative(values):
+        return np.concatenate([np.zeros((1,) + values.shape[1:], dtype=values.dtype), values.cumsum(axis=0)])
+    
+    return {
+        'names': names,
+        'dates': pd.to_datetime(performance_history[names[0]]['Date']).reset_index(drop=True),
+        'horizons': list(horizons),
+        'signals': cumulative(signals),
+        'hits': cumulative(hits),
+        'returns': cumulative(returns),
+    }
+
+
+def walk_forward_folds(n_bars, train_bars=WALK_FORWARD_TRAIN_BARS, test_bars=WALK_FORWARD_TEST_BARS,
+                       scheme='expanding'):
+    """
+    Découpe [0, n_bars) en plis successifs (début entraînement, début test, fin test).
+    - expanding : l'entraînement part toujours de la première barre
+    - sliding : l'entraînement couvre les train_bars barres précédant le test
+    """
+    folds = []
+    test_start = train_bars
+    while test_start < n_bars:
+        train_start = 0 if scheme == 'expanding' else max(test_start - train_bars, 0)
+        folds.append((train_start, test_start, min(test_start + test_bars, n_bars)))
+        test_start += test_bars
+    return folds
+
+
+def _window_sums(cumulative, start, end):
+    """Sommes sur [start, end) par horizon ; `end` peut varier par horizon (tableau H)."""
+    horizons_idx = np.arange(cumulative.shape[2])
+    return cumulative[end, :, horizons_idx].T - cumulative[start, :, horizons_idx].T
+
+
+def walk_forward_evaluation(performance_history, horizons=[1, 2, 5, 10, 20],
+                            train_bars=WALK_FORWARD_TRAIN_BARS, test_bars=WALK_FORWARD_TEST_BARS,
+                            scheme='expanding', matrices=None):
+    """
+    Évaluation hors échantillon de chaque indicateur et combinaison.
+    Pour un horizon h, les signaux d'entraînement des h dernières barres avant le test sont
+    écartés (leur rendement futur chevauche la période de test).
+    
+    Returns:
+        dict: 'folds' (DataFrame des plis), 'table' (une ligne par pli × signal × horizon),
+              'summary' (agrégat par signal × horizon) ; None si pas assez de données
+    """
+    matrices = matrices or build_signal_matrices(performance_history, horizons)
+    if matrices is None:
+        return None
+    
+    dates = matrices['dates']
+    folds = walk_forward_folds(len(dates), train_bars, test_bars, scheme)
+    if not folds:
+        return None
+    
+    horizon_values = np.asarray(matrices['horizons'])
+    fold_rows = []
+    records = []
+    
+    for f, (train_start, test_start, test_end) in enumerate(folds):
+        purged_end = np.maximum(test_start - horizon_values, train_start)
+        window = {
+            'train': (train_start, purged_end),
+            'test': (test_start, np.full(len(horizon_values), test_end)),
+        }
+        sums = {
+            (part, key): _window_sums(matrices[key], start, end)
+            for part, (start, end) in window.items()
+            for key in ('signals', 'hits', 'returns')
+        }
+        fold_rows.append({
+            'fold': f + 1,
+            'train_start': dates[train_start], 'train_end': dates[test_start - 1],
+            'test_start': dates[test_start], 'test_end': dates[test_end - 1],
+        })
+        records.append(sums)
+    
+    # Tableau long : pli × signal × horizon
+    names = matrices['names']
+    n_folds, n_names, n_horizons = len(folds), len(names), len(horizon_values)
+    stacked = {key: np.stack([r[key] for r in records]) for key in records[0]}
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        train_accuracy = stacked[('train', 'hits')] / stacked[('train', 'signals')] * 100
+        test_accuracy = stacked[('test', 'hits')] / stacked[('test', 'signals')] * 100
+        test_avg = stacked[('test', 'returns')] / stacked[('test', 'signals')]
+    
+    index = pd.MultiIndex.from_product(
+        [range(1, n_folds + 1), names, horizon_values], names=['fold', 'name', 'horizon']
+    )
+    table = pd.DataFrame({
+        'train_signals': stacked[('train', 'signals')].ravel(),
+        'train_accuracy': train_accuracy.ravel(),
+        'test_signals': stacked[('test', 'signals')].ravel(),
+        'test_accuracy': test_accuracy.ravel(),
+        'test_cumulative_return': stacked[('test', 'returns')].ravel(),
+        'test_avg_return': test_avg.ravel(),
+    }, index=index).reset_index()
+    
+    # Agrégat : les fenêtres de test ne se chevauchent pas, on cumule signaux et rendements
+    grouped = table.groupby(['name', 'horizon'], sort=False)
+    summary = grouped.agg(
+        train_accuracy=('train_accuracy', 'mean'),
+        test_signals=('test_signals', 'sum'),
+        test_cumulative_return=('test_cumulative_return', 'sum'),
+        folds_positive=('test_cumulative_return', lambda r: int((r > 0).sum())),
+    )
+    test_hits = pd.Series(stacked[('test', 'hits')].sum(axis=0).ravel(),
+                          index=pd.MultiIndex.from_product([names, horizon_values]))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        summary['test_accuracy'] = test_hits.to_numpy() / summary['test_signals'].to_numpy() * 100
+        summary['test_avg_return'] = summary['test_cumulative_return'] / summary['test_signals']
+    summary['accuracy_drop'] = summary['train_accuracy'] - summary['test_accuracy']
+    summary['folds'] = n_folds
+    
+    return {
+        'scheme': scheme,
+        'folds': pd.DataFrame(fold_rows),
+        'table': table,
+        'summary': summary.reset_index(),
+    }
+
+
+def _signal_weight(name, config):
+    """Poids configuré d'un indicateur ('📊 RSI') ou d'une combinaison ('🟢 ...'), None si inconnu."""
+    clean_name = name.lstrip('📊🟢🔴 ')
+    if name.startswith('📊'):
+        keys = INDICATOR_WEIGHT_KEYS.get(clean_name)
+        if not keys:
+            return None
+        weights = config.get('individual_weights', INDIVIDUAL_WEIGHTS)
+        return float(sum(weights.get(key, 0) for key in keys))
+    
+    combination = next((c for c in COMBINATION_DEFINITIONS if c['name'] == clean_name), None)
+    if combination is None:
+        return None
+    return float(config.get('combination_weights', COMBINATION_WEIGHTS).get(combination['key'], 0))
+
+
+def validate_category_weights(walk_forward, config=None, horizon=5):
+    """
+    Confronte les poids de la configuration (poids de catégorie déjà appliqués)
+    aux résultats hors échantillon d'un horizon.
+    
+    Returns:
+        tuple: (DataFrame name, weight, test_accuracy, test_avg_return, test_signals, flag,
+                corrélation de rang poids / rendement moyen hors échantillon)
+    """
+    if config is None:
+        config = get_default_config()
+    
+    summary = walk_forward['summary']
+    rows = summary[summary['horizon'] == horizon].copy()
+    rows['weight'] = [_signal_weight(name, config) for name in rows['name']]
+    rows = rows[rows['weight'].notna() & (rows['test_signals'] > 0)]
+    
+    median_weight = rows['weight'].median() if len(rows) else 0
+    rows['flag'] = np.select(
+        [(rows['weight'] > median_weight) & (rows['test_accuracy'] < 50),
+         (rows['weight'] <= median_weight) & (rows['test_accuracy'] >= 55)],
+        ['overweighted', 'underweighted'],
+        default='ok'
+    )
+    
+    correlation = None
+    if len(rows) >= 3 and rows['weight'].nunique() > 1:
+        # Corrélation de Spearman = corrélation de Pearson des rangs
+        correlation = rows['weight'].rank().corr(rows['test_avg_return'].rank())
+    
+    columns = ['name', 'weight', 'train_accuracy', 'test_accuracy', 'test_avg_return', 'test_signals', 'flag']
+    return rows[columns].sort_values('weight', ascending=False).reset_index(drop=True), correlation
+
+
 def debug_combination_signals(df, config=None):
     """
     Fonction de debug pour voir combien de signaux chaque combinaison génère.
@@ -1,3 +1,3 @@
 # layouts/__init__.py
-from .main_layout import create_main_layout
+from .main_layout import create_main_layout, serve_layout
 from .config_modal import create_config_modal
\ No newline at end of file
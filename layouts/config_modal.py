@@ -3,14 +3,16 @@
 Modal de configuration des paramètres.
 VERSION 3.1 - Ajout du bouton de réinitialisation des actifs
 """
+from functools import lru_cache
 from dash import dcc, html
 import dash_bootstrap_components as dbc
 
 from config import SIGNAL_TIMEFRAME, ASSET_CATEGORIES, get_default_config
 
 
+@lru_cache(maxsize=1)
 def create_config_modal():
-    """Crée le modal de configuration des paramètres."""
+    """Crée le modal de configuration des paramètres (construit une seule fois, contenu statique)."""
     default_config = get_default_config()
     comb_weights = default_config.get('combination_weights', {})
     
@@ -3,13 +3,16 @@
 Layout principal de l'application.
 """
 from datetime import date
+from functools import lru_cache
 from dash import dcc, html
 import dash_bootstrap_components as dbc
 
 from config import SIGNAL_TIMEFRAME, INDICATOR_DESCRIPTIONS, load_user_assets, get_default_config
+from bar_store import INTERVALS
 from .config_modal import create_config_modal
 from components.summary_table import create_summary_section
 from components.divergence_timeline import create_divergence_timeline_section
+from components.screener_table import create_screener_section
 
 
 def get_display_options():
@@ -28,18 +31,35 @@ def get_display_options():
     ]
 
 
-def create_main_layout():
-    """Crée le layout principal de l'application."""
+def serve_layout():
+    """
+    Layout servi à chaque chargement de page : la partie statique est construite une fois
+    par jour, seule la liste d'actifs (dépendante de la base) est lue à la demande.
+    """
+    return html.Div([
+        dcc.Store(id='assets-store', data=load_user_assets()),
+        _cached_main_layout(date.today()),
+    ])
+
+
+@lru_cache(maxsize=1)
+def _cached_main_layout(today):
+    return create_main_layout(today)
+
+
+def create_main_layout(today=None):
+    """Crée la partie statique du layout principal (sans accès à la base)."""
     default_config = get_default_config()
+    today = today or date.today()
     
     return dbc.Container([
-        # Stores
+        # Stores (assets-store est ajouté par serve_layout)
         dcc.Store(id='config-store', data=default_config),
-        dcc.Store(id='assets-store', data=load_user_assets()),
         dcc.Store(id='fundamental-store', data={}),
         dcc.Store(id='technical-data-store', data={}),
         dcc.Store(id='full-data-store', data={}),
         dcc.Store(id='zoom-range-store', data=None),
+        dcc.Store(id='charts-render-store', data={'rendered': False}),
         dcc.Store(id='performance-store', data={}),
         dcc.Store(id='summary-store', data={}),
         
@@ -60,9 +80,9 @@ def create_main_layout():
                 dcc.DatePickerSingle(
                     id='date-picker',
                     min_date_allowed=date(2015, 1, 1),
-                    max_date_allowed=date.today(),
-                    initial_visible_month=date.today(),
-                    date=date.today(),
+                    max_date_allowed=today,
+                    initial_visible_month=today,
+                    date=today,
                     display_format='DD/MM/YYYY'
                 )
             ], width=2),
@@ -86,6 +106,15 @@ def create_main_layout():
                     clearable=False
                 )
             ], width=1),
+            dbc.Col([
+                html.Label("Barres :"),
+                dcc.Dropdown(
+                    id='interval-dropdown',
+                    options=[{'label': spec['label'], 'value': name} for name, spec in INTERVALS.items()],
+                    value='1d',
+                    clearable=False
+                )
+            ], width=1),
             dbc.Col([
                 html.Label("Signaux :"),
                 dcc.Dropdown(
@@ -105,7 +134,7 @@ def create_main_layout():
                     className="mt-1",
                     inputStyle={"marginRight": "3px", "marginLeft": "8px"}
                 )
-            ], width=3),
+            ], width=2),
             dbc.Col([
                 html.Br(),
                 dbc.ButtonGroup([
@@ -196,6 +225,9 @@ def create_main_layout():
             ),
         ], className="mb-3", color="dark", outline=True),
 
+        # === 2b. SCREENER FONDAMENTAL (COLLAPSIBLE) ===
+        create_screener_section(),
+
         # === 3. BACKTESTING DES INDICATEURS (COLLAPSIBLE) ===
         dbc.Card([
             dbc.CardHeader([
@@ -228,6 +260,19 @@ def create_main_layout():
                             className="d-inline",
                             labelStyle={"fontSize": "12px"}
                         ),
+                        html.Span("Walk-forward: ", className="text-muted small ms-3 me-1"),
+                        dcc.RadioItems(
+                            id='walk-forward-scheme',
+                            options=[
+                                {'label': ' Croissant', 'value': 'expanding'},
+                                {'label': ' Glissant', 'value': 'sliding'},
+                            ],
+                            value='expanding',
+                            inline=True,
+                            inputStyle={"marginRight": "3px", "marginLeft": "8px"},
+                            className="d-inline",
+                            labelStyle={"fontSize": "12px"}
+                        ),
                     ], className="d-flex align-items-center"),
                 ], align="center", className="g-0"),
             ]),
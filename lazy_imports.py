@@ -0,0 +1,40 @@
+# lazy_imports.py
+"""
+Chargement différé des bibliothèques lourdes (yfinance, pandas_ta...).
+Le module n'est réellement importé qu'au premier accès à l'un de ses attributs,
+ce qui raccourcit le démarrage des workers gunicorn.
+"""
+import importlib
+import threading
+import time
+
+
+class LazyModule:
+    """Mandataire d'un module importé au premier accès (thread-safe)."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    print(f"📦 {self._name} chargé en {(time.perf_counter() - start) * 1000:.0f} ms")
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'chargé' if self._module is not None else 'non chargé'
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_import(name):
+    """Retourne un mandataire du module `name`, importé au premier usage."""
+    return LazyModule(name)
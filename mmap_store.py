@@ -0,0 +1,394 @@
+# mmap_store.py
+"""
+Panneaux d'indicateurs en fichiers mappés en mémoire, partagés par les workers gunicorn.
+
+Le cache partagé (shared_cache) sérialise les DataFrames : chaque worker qui les lit
+en désérialise sa propre copie. Ici, le DataFrame d'indicateurs d'un ticker est écrit
+une seule fois dans un fichier colonnaire, puis chaque worker le mappe en lecture :
+les colonnes sont des vues NumPy sur les pages du fichier, partagées par tous les
+processus via le cache du système. La mémoire résidente ne croît plus avec le nombre
+de workers, et relire un panneau déjà ouvert ne coûte qu'un stat().
+
+Format d'un fichier (un par ticker et par clé de calcul) :
+- 'TDPANEL1' + longueur de l'en-tête (uint32) + en-tête JSON : expiration, nombre de lignes,
+  index, et pour chaque colonne son type et son décalage dans le fichier (index des offsets)
+- Données des colonnes, alignées sur 64 octets, little-endian :
+  numériques et dates tels quels, libellés en codes entiers (+ catégories dans l'en-tête)
+
+Les fichiers sont écrits dans un fichier temporaire puis renommés (os.replace) :
+un lecteur voit l'ancienne ou la nouvelle version, jamais un fichier partiel.
+Les DataFrames retournés partagent des tableaux en lecture seule ; avec pandas >= 3
+(Copy-on-Write), une modification par l'appelant copie d'abord la colonne concernée.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+PANEL_STORE_ENABLED = os.getenv('PANEL_STORE', '1') != '0'
+PANEL_STORE_DIR = os.getenv('PANEL_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'panels'))
+PANEL_STORE_MAX_BYTES = int(os.getenv('PANEL_STORE_MAX_BYTES', 2 * 1024 * 1024 * 1024))
+PANEL_PURGE_SECONDS = 300  # délai minimal entre deux nettoyages du répertoire
+PANEL_OPEN_LIMIT = 256     # panneaux gardés ouverts par processus
+
+MAGIC = b'TDPANEL1'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+# Sans Copy-on-Write (pandas < 3), une écriture en place atteindrait les tableaux en lecture seule
+_COPY_ON_WRITE = int(pd.__version__.split('.')[0]) >= 3
+
+_open_panels = OrderedDict()  # chemin -> (signature du fichier, expiration, DataFrame de base)
+_open_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'writes': 0, 'skipped': 0}
+_last_purge = [0.0]
+
+
+def _count(event):
+    with _open_lock:
+        _stats[event] += 1
+
+
+def _panel_path(ticker, key):
+    safe_ticker = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in str(ticker)) or '_'
+    digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:20]
+    return os.path.join(PANEL_STORE_DIR, safe_ticker, f"{digest}.panel")
+
+
+# =============================================================================
+# ENCODAGE DES COLONNES
+# =============================================================================
+
+def _encode_values(series):
+    """
+    Description (en-tête) et tableau little-endian d'une colonne ou d'un index.
+    Lève TypeError pour les valeurs non colonnaires (listes, dictionnaires...).
+    """
+    dtype = series.dtype
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        codes = np.asarray(series.array.codes)
+        return ({'kind': 'category', 'dtype': codes.dtype.str,
+                 'categories': [_json_label(c) for c in dtype.categories],
+                 'ordered': bool(dtype.ordered)}, codes)
+
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        tz = getattr(dtype, 'tz', None)
+        values = series.dt.tz_convert(None) if tz is not None else series
+        values = values.to_numpy()
+        return ({'kind': 'datetime', 'dtype': values.dtype.str, 'tz': str(tz) if tz is not None else None},
+                values)
+
+    if isinstance(dtype, np.dtype) and dtype.kind in 'biuf':
+        return {'kind': 'numeric', 'dtype': dtype.str}, series.to_numpy()
+
+    if pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+        # Types nullables (Int64, Float64, boolean) : NaN pour les manquants
+        return {'kind': 'numeric', 'dtype': '<f8'}, series.to_numpy(dtype=np.float64, na_value=np.nan)
+
+    non_null = series.dropna()
+    if non_null.map(lambda v: isinstance(v, str)).all():
+        codes, categories = pd.factorize(series, use_na_sentinel=True)
+        return ({'kind': 'labels', 'dtype': '<i4', 'categories': list(categories), 'pandas_dtype': str(dtype)},
+                codes.astype(np.int32))
+
+    raise TypeError(f"colonne non colonnaire ({dtype})")
+
+
+def _json_label(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value
+
+
+def _decode_values(meta, buffer, rows):
+    """Vue (sans copie) sur le tableau d'une colonne, reconstruit dans son type pandas."""
+    values = np.frombuffer(buffer, dtype=np.dtype(meta['dtype']), count=rows, offset=meta['offset'])
+    kind = meta['kind']
+
+    if kind == 'category':
+        dtype = pd.CategoricalDtype(meta['categories'], ordered=meta['ordered'])
+        return pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+    if kind == 'datetime':
+        dates = pd.DatetimeIndex(values, copy=False)
+        if meta['tz'] is not None:
+            dates = dates.tz_localize('UTC').tz_convert(meta['tz'])
+        return dates.array
+    if kind == 'labels':
+        # Texte : reconstruit (copie), ces colonnes sont rares et courtes
+        labels = np.asarray(meta['categories'] + [None], dtype=object)[values]
+        return pd.array(labels, dtype=meta['pandas_dtype'])
+    return values
+
+
+def _encode_index(index):
+    if isinstance(index, pd.RangeIndex):
+        return {'kind': 'range', 'start': index.start, 'stop': index.stop, 'step': index.step, 'name': index.name}, None
+    meta, values = _encode_values(index.to_series())
+    meta['name'] = index.name
+    return meta, values
+
+
+def _decode_index(meta, buffer, rows):
+    if meta['kind'] == 'range':
+        return pd.RangeIndex(meta['start'], meta['stop'], meta['step'], name=meta['name'])
+    return pd.Index(_decode_values(meta, buffer, rows), name=meta['name'], copy=False)
+
+
+# =============================================================================
+# ÉCRITURE / LECTURE
+# =============================================================================
+
+def store_frame(ticker, key, df, ttl):
+    """
+    Écrit le DataFrame dans le panneau de (ticker, key), valable `ttl` secondes.
+
+    Returns:
+        bool: False si le DataFrame n'est pas stockable (colonnes non colonnaires) ou en cas d'erreur
+    """
+    if df.empty or not df.columns.is_unique or not all(isinstance(col, str) for col in df.columns):
+        return False
+    try:
+        index_meta, index_values = _encode_index(df.index)
+        encoded = []
+        for col in df.columns:
+            meta, values = _encode_values(df[col])
+            encoded.append(({'name': col, **meta}, values))
+    except TypeError as e:
+        print(f"⚠️ Panneau {ticker} non stockable: {e}")
+        _count('skipped')
+        return False
+
+    arrays = ([(index_meta, index_values)] if index_values is not None else []) + encoded
+
+    # Décalages : calculés sur une taille d'en-tête réservée, recalculés si elle ne suffit pas
+    reserved = ALIGNMENT * 64
+    while True:
+        offset = reserved
+        for meta, values in arrays:
+            meta['offset'] = offset
+            offset += -(-values.nbytes // ALIGNMENT) * ALIGNMENT
+        header = json.dumps({
+            'version': FORMAT_VERSION,
+            'ticker': str(ticker),
+            'key': repr(key),
+            'rows': len(df),
+            'expires_at': time.time() + ttl,
+            'index': index_meta,
+            'columns': [meta for meta, _ in encoded],
+        }, default=str).encode('utf-8')
+        if len(MAGIC) + 4 + len(header) <= reserved:
+            break
+        reserved = -(-(len(MAGIC) + 4 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    path = _panel_path(ticker, key)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC + struct.pack('<I', len(header)) + header)
+            for meta, values in arrays:
+                f.seek(meta['offset'])
+                f.write(np.ascontiguousarray(values, dtype=np.dtype(meta['dtype'])).tobytes())
+            f.truncate(offset)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️ Panneau {ticker} non enregistré: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+    _count('writes')
+    _purge_if_due()
+    return True
+
+
+def _read_header(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("en-tête de panneau invalide")
+    (length,) = struct.unpack('<I', f.read(4))
+    return json.loads(f.read(length))
+
+
+def _map_panel(path):
+    """Mappe un fichier et construit le DataFrame de base (colonnes en vues sur le fichier)."""
+    with open(path, 'rb') as f:
+        header = _read_header(f)
+        if header.get('version') != FORMAT_VERSION:
+            raise ValueError(f"version de panneau {header.get('version')} non supportée")
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    rows = header['rows']
+    columns = {meta['name']: _decode_values(meta, buffer, rows) for meta in header['columns']}
+    index = _decode_index(header['index'], buffer, rows)
+    frame = pd.DataFrame(columns, index=index, columns=[meta['name'] for meta in header['columns']], copy=False)
+    return header['expires_at'], frame
+
+
+def load_frame(ticker, key):
+    """
+    DataFrame du panneau de (ticker, key), ou None s'il est absent ou expiré.
+    Un panneau déjà ouvert par ce processus n'est pas relu tant que le fichier n'a pas changé.
+    """
+    path = _panel_path(ticker, key)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        _count('misses')
+        return None
+    signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    with _open_lock:
+        entry = _open_panels.get(path)
+        if entry is not None and entry[0] == signature:
+            _open_panels.move_to_end(path)
+
+    if entry is None or entry[0] != signature:
+        try:
+            expires_at, frame = _map_panel(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Panneau {ticker} illisible: {e}")
+            _count('misses')
+            return None
+        entry = (signature, expires_at, frame)
+        with _open_lock:
+            _open_panels[path] = entry
+            _open_panels.move_to_end(path)
+            while len(_open_panels) > PANEL_OPEN_LIMIT:
+                _open_panels.popitem(last=False)
+
+    if entry[1] <= time.time():
+        _count('misses')
+        return None
+
+    _count('hits')
+    # Copie superficielle : l'appelant peut ajouter ou modifier des colonnes sans toucher au fichier
+    return entry[2].copy(deep=not _COPY_ON_WRITE)
+
+
+def cached_frame(ticker, key, compute, ttl, is_valid=None):
+    """
+    Lit le panneau de (ticker, key), sinon calcule compute(), l'écrit et le relit mappé.
+
+    Args:
+        is_valid: prédicat sur le DataFrame calculé (ex. non vide) ; un résultat invalide
+                  est retourné sans être stocké
+    """
+    frame = load_frame(ticker, key)
+    if frame is not None:
+        return frame
+
+    frame = compute()
+    if is_valid is not None and not is_valid(frame):
+        return frame
+    if store_frame(ticker, key, frame, ttl) and _COPY_ON_WRITE:
+        # Le worker qui a calculé utilise lui aussi les pages partagées ; le panneau peut
+        # déjà avoir été supprimé par le nettoyage, ou être illisible : on garde alors le calcul
+        mapped = load_frame(ticker, key)
+        if mapped is not None:
+            return mapped
+    return frame
+
+
+# =============================================================================
+# MAINTENANCE
+# =============================================================================
+
+def _panel_files():
+    if not os.path.isdir(PANEL_STORE_DIR):
+        return
+    for root, _, files in os.walk(PANEL_STORE_DIR):
+        for name in files:
+            if name.endswith('.panel'):
+                yield os.path.join(root, name)
+
+
+def _purge_if_due():
+    now = time.time()
+    with _open_lock:
+        if now - _last_purge[0] < PANEL_PURGE_SECONDS:
+            return
+        _last_purge[0] = now
+    purge_panels()
+
+
+def purge_panels():
+    """
+    Supprime les panneaux expirés, puis les plus anciens au-delà de PANEL_STORE_MAX_BYTES.
+    Un fichier supprimé reste lisible par les workers qui l'ont déjà mappé.
+
+    Returns:
+        int: nombre de fichiers supprimés
+    """
+    now = time.time()
+    kept, removed = [], 0
+    for path in _panel_files():
+        try:
+            with open(path, 'rb') as f:
+                expires_at = _read_header(f)['expires_at']
+            stat = os.stat(path)
+            if expires_at <= now:
+                os.remove(path)
+                removed += 1
+            else:
+                kept.append((stat.st_mtime, stat.st_size, path))
+        except (OSError, ValueError, KeyError):
+            continue
+
+    total = sum(size for _, size, _ in kept)
+    for _, size, path in sorted(kept):
+        if total <= PANEL_STORE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+            removed += 1
+            total -= size
+        except OSError:
+            continue
+
+    if removed:
+        print(f"🧹 {removed} panneau(x) supprimé(s)")
+    return removed
+
+
+def invalidate(ticker=None):
+    """Supprime les panneaux d'un ticker (ou tous)."""
+    prefix = os.path.dirname(_panel_path(ticker, None)) if ticker is not None else PANEL_STORE_DIR
+    for path in list(_panel_files()):
+        if path.startswith(prefix + os.sep):
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"⚠️ Panneau non supprimé ({path}): {e}")
+    with _open_lock:
+        for path in [p for p in _open_panels if p.startswith(prefix + os.sep)]:
+            del _open_panels[path]
+
+
+def panel_store_stats():
+    """Compteurs du processus, panneaux ouverts et occupation du répertoire."""
+    files = list(_panel_files())
+    size = 0
+    for path in files:
+        try:
+            size += os.path.getsize(path)
+        except OSError:
+            continue
+    with _open_lock:
+        stats = dict(_stats)
+        stats['open'] = len(_open_panels)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / lookups * 100 if lookups else None
+    stats['files'] = len(files)
+    stats['bytes'] = size
+    return stats
@@ -0,0 +1,390 @@
+# panel_engine.py
+"""
+Moteur d'indicateurs en panel : une matrice dates × tickers par champ OHLCV.
+Les indicateurs (RSI, stochastique, MACD, ADX, Bollinger, SMA/EMA, pivots de divergence)
+sont calculés pour tous les tickers dans les mêmes opérations vectorisées.
+
+Les séries sont « compactées » : chaque colonne contient uniquement les séances de son
+ticker, alignées sur la dernière ligne (les jours fériés propres à chaque place ne créent
+pas de trous). Chaque colonne donne donc exactement le résultat d'un calcul mono-ticker,
+et la dernière ligne contient la dernière séance de chaque ticker.
+
+Les formules reprennent celles de pandas_ta (RMA de Wilder, EMA amorcée par une SMA,
+écart-type de population pour Bollinger).
+"""
+import numpy as np
+import pandas as pd
+
+from lazy_imports import lazy_import
+from config import (
+    RSI, STOCHASTIC, MOVING_AVERAGES, MACD, ADX, BOLLINGER, DIVERGENCE,
+    get_default_config
+)
+from indicator_calculator import DIVERGENCE_PIVOT_WINDOW, DIVERGENCE_MIN_DISTANCE
+
+yf = lazy_import('yfinance')
+
+
+PRICE_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+DIVERGENCE_CODES = {1: 'bullish', -1: 'bearish', 0: 'none'}
+
+PIVOT_WINDOW = DIVERGENCE_PIVOT_WINDOW
+PIVOT_MIN_DISTANCE = DIVERGENCE_MIN_DISTANCE
+
+
+# =============================================================================
+# CONSTRUCTION DU PANEL
+# =============================================================================
+
+def download_prices(tickers, period='3mo', interval='1d'):
+    """
+    Télécharge tous les tickers en un seul appel yfinance.
+
+    Returns:
+        dict: champ -> pd.DataFrame (calendrier commun × tickers, NaN hors séance), None si aucune donnée
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return None
+
+    try:
+        raw = yf.download(tickers, period=period, interval=interval, auto_adjust=True,
+                          progress=False, group_by='column', threads=True)
+    except Exception as e:
+        print(f"❌ Erreur lors du téléchargement groupé ({len(tickers)} tickers): {e}")
+        return None
+
+    if raw is None or raw.empty:
+        return None
+
+    prices = {}
+    for field in PRICE_FIELDS:
+        if isinstance(raw.columns, pd.MultiIndex):
+            if field.capitalize() not in raw.columns.get_level_values(0):
+                continue
+            matrix = raw[field.capitalize()]
+        else:
+            # Un seul ticker : colonnes simples
+            matrix = raw[[field.capitalize()]].set_axis(tickers[:1], axis=1)
+        prices[field] = matrix.reindex(columns=tickers)
+
+    return prices
+
+
+def download_panel(tickers, period='3mo', interval='1d'):
+    """
+    Télécharge tous les tickers en un seul appel yfinance et construit le panel.
+
+    Returns:
+        dict: panel (voir build_panel), None si aucune donnée
+    """
+    prices = download_prices(tickers, period=period, interval=interval)
+    return build_panel(prices) if prices else None
+
+
+def build_panel(prices):
+    """
+    Construit le panel compacté à partir de matrices alignées sur un calendrier commun.
+
+    Args:
+        prices: dict champ -> pd.DataFrame (index dates × colonnes tickers), NaN hors séance
+
+    Returns:
+        dict: {'tickers', 'dates' (T × N datetime64, NaT en tête de colonne),
+               'lengths' (séances par ticker), 'fields' (champ -> pd.DataFrame T × N)}
+    """
+    close = prices['close']
+    tickers = list(close.columns)
+    valid = close.notna().to_numpy()
+    lengths = valid.sum(axis=0)
+    depth = int(lengths.max()) if len(lengths) else 0
+
+    # Tri stable : les séances valides passent en bas de chaque colonne, dans l'ordre
+    order = np.argsort(valid, axis=0, kind='stable')[-depth:] if depth else np.empty((0, len(tickers)), dtype=int)
+    kept = np.take_along_axis(valid, order, axis=0)
+
+    dates = close.index.to_numpy()[order]
+    dates = np.where(kept, dates, np.datetime64('NaT'))
+
+    fields = {}
+    for field, matrix in prices.items():
+        values = matrix.reindex(index=close.index, columns=tickers).to_numpy(dtype=float)
+        compacted = np.where(kept, np.take_along_axis(values, order, axis=0), np.nan)
+        fields[field] = pd.DataFrame(compacted, columns=tickers)
+
+    return {'tickers': tickers, 'dates': dates, 'lengths': lengths, 'fields': fields}
+
+
+def _positions(panel):
+    """Position de chaque ligne dans la série de son ticker (négative sur le remplissage)."""
+    depth = len(panel['dates'])
+    return np.arange(depth)[:, None] - (depth - panel['lengths'])[None, :]
+
+
+# =============================================================================
+# PRIMITIVES VECTORISÉES (toutes les colonnes à la fois)
+# =============================================================================
+
+def _rma(values, length):
+    """Moyenne mobile de Wilder (pandas_ta.rma)."""
+    return values.ewm(alpha=1.0 / length, min_periods=length).mean()
+
+
+def _sma(values, length):
+    return values.rolling(length).mean()
+
+
+def _ema(values, length):
+    """EMA amorcée par la SMA des `length` premières valeurs de chaque colonne (pandas_ta.ema)."""
+    first_valid = values.notna().to_numpy().argmax(axis=0)
+    offset = np.arange(len(values))[:, None] - first_valid[None, :]
+    seeded = values.where(offset >= length - 1)
+    seeded = seeded.mask(offset == length - 1, _sma(values, length))
+    return seeded.ewm(span=length, adjust=False).mean()
+
+
+def _non_zero(values):
+    """Évite les divisions par zéro comme pandas_ta.non_zero_range."""
+    return values.mask(values == 0, np.finfo(float).eps)
+
+
+def panel_rsi(close, length):
+    delta = close.diff()
+    gains = _rma(delta.clip(lower=0), length)
+    losses = _rma(delta.clip(upper=0).abs(), length)
+    return 100 * gains / (gains + losses)
+
+
+def panel_stochastic(high, low, close, k, d, smooth_k=3):
+    lowest = low.rolling(k).min()
+    highest = high.rolling(k).max()
+    raw = 100 * (close - lowest) / _non_zero(highest - lowest)
+    stoch_k = _sma(raw, smooth_k)
+    return stoch_k, _sma(stoch_k, d)
+
+
+def panel_bollinger(close, length, std_dev):
+    middle = _sma(close, length)
+    deviation = close.rolling(length).std(ddof=0)
+    lower = middle - std_dev * deviation
+    upper = middle + std_dev * deviation
+    bandwidth = 100 * (upper - lower) / middle
+    percent = (close - lower) / _non_zero(upper - lower)
+    return lower, middle, upper, bandwidth, percent
+
+
+def panel_macd(close, fast, slow, signal):
+    macd = _ema(close, fast) - _ema(close, slow)
+    macd_signal = _ema(macd, signal)
+    return macd, macd_signal, macd - macd_signal
+
+
+def panel_adx(high, low, close, length):
+    prev_close = close.shift(1)
+    # NaN sur la première séance de chaque ticker (pas de clôture précédente), comme pandas_ta
+    true_range = np.maximum(high - low, np.maximum((high - prev_close).abs(), (prev_close - low).abs()))
+    atr = _rma(true_range, length)
+
+    up = high - high.shift(1)
+    down = low.shift(1) - low
+    plus_dm = up.where((up > down) & (up > 0), 0).where(up.notna())
+    minus_dm = down.where((down > up) & (down > 0), 0).where(down.notna())
+
+    di_plus = 100 * _rma(plus_dm, length) / atr
+    di_minus = 100 * _rma(minus_dm, length) / atr
+    dx = 100 * (di_plus - di_minus).abs() / (di_plus + di_minus)
+    return _rma(dx, length), di_plus, di_minus
+
+
+# =============================================================================
+# DIVERGENCES RSI
+# =============================================================================
+
+def panel_pivots(close, window=PIVOT_WINDOW):
+    """
+    Creux et sommets locaux : la valeur est le min (max) des `window` séances
+    de part et d'autre. Retourne deux matrices booléennes.
+    """
+    left_min = close.rolling(window).min().shift(1)
+    right_min = close.rolling(window).min().shift(-window)
+    left_max = close.rolling(window).max().shift(1)
+    right_max = close.rolling(window).max().shift(-window)
+
+    lows = ((close <= left_min) & (close <= right_min)).to_numpy()
+    highs = ((close >= left_max) & (close >= right_max)).to_numpy()
+    return lows, highs
+
+
+def panel_divergences(close, rsi, positions, config=None, recent_rows=None):
+    """
+    Détecte les divergences RSI de tous les tickers (mêmes règles que detect_rsi_divergence).
+
+    Args:
+        close, rsi: pd.DataFrame T × N du panel
+        positions: position de chaque ligne dans la série de son ticker
+        recent_rows: ne garder que les `recent_rows` dernières séances (None = tout l'historique)
+
+    Returns:
+        np.ndarray T × N: 1 haussière, -1 baissière, 0 aucune
+    """
+    if config is None:
+        config = get_default_config()
+
+    div_cfg = config.get('divergence', DIVERGENCE)
+    rsi_low = div_cfg.get('rsi_low_threshold', 40)
+    rsi_high = div_cfg.get('rsi_high_threshold', 60)
+    lookback = div_cfg.get('lookback_period', 14)
+    max_distance = lookback * 2
+
+    lows, highs = panel_pivots(close)
+    price = close.to_numpy()
+    strength = rsi.to_numpy()
+
+    with np.errstate(invalid='ignore'):
+        bull_candidates = lows & (strength < rsi_low)
+        bear_candidates = ~bull_candidates & highs & (strength > rsi_high)
+
+        bullish = np.zeros_like(lows)
+        bearish = np.zeros_like(highs)
+
+        # Pivot antérieur à k séances : premier pivot trouvé qui confirme la divergence
+        for k in range(PIVOT_MIN_DISTANCE, max_distance):
+            if k >= len(price):
+                break
+            prev_ok = positions[:-k] > lookback
+            bullish[k:] |= (lows[:-k] & prev_ok
+                            & (price[k:] < price[:-k]) & (strength[k:] > strength[:-k]))
+            bearish[k:] |= (highs[:-k] & prev_ok
+                            & (price[k:] > price[:-k]) & (strength[k:] < strength[:-k]))
+
+    eligible = positions >= max_distance + PIVOT_WINDOW
+    if recent_rows is not None:
+        eligible &= np.arange(len(price))[:, None] >= len(price) - recent_rows
+
+    codes = np.zeros(price.shape, dtype=np.int8)
+    codes[bull_candidates & bullish & eligible] = 1
+    codes[bear_candidates & bearish & eligible] = -1
+    return codes
+
+
+# =============================================================================
+# CALCUL COMPLET
+# =============================================================================
+
+def compute_panel_indicators(panel, config=None, indicators=None, recent_rows=None):
+    """
+    Ajoute au panel les indicateurs de calculate_all_indicators (mêmes noms de colonnes).
+
+    Args:
+        indicators: sous-ensemble à calculer (None = tous). Valeurs possibles :
+            'rsi', 'stochastic', 'bollinger', 'moving_averages', 'macd', 'adx', 'divergence'
+        recent_rows: limite la détection des divergences aux dernières séances
+    """
+    if config is None:
+        config = get_default_config()
+
+    wanted = set(indicators or ['rsi', 'stochastic', 'bollinger', 'moving_averages', 'macd', 'adx', 'divergence'])
+    if 'divergence' in wanted:
+        wanted.add('rsi')
+
+    fields = panel['fields']
+    high, low, close = fields.get('high'), fields.get('low'), fields['close']
+
+    if 'rsi' in wanted:
+        fields['rsi'] = panel_rsi(close, config.get('rsi', RSI)['period'])
+
+    if 'stochastic' in wanted and high is not None and low is not None:
+        stoch_cfg = config.get('stochastic', STOCHASTIC)
+        fields['stochastic_k'], fields['stochastic_d'] = panel_stochastic(
+            high, low, close, stoch_cfg['k_period'], stoch_cfg['d_period'])
+
+    if 'bollinger' in wanted:
+        bb_cfg = config.get('bollinger', BOLLINGER)
+        (fields['bb_lower'], fields['bb_middle'], fields['bb_upper'],
+         fields['bb_bandwidth'], fields['bb_percent']) = panel_bollinger(close, bb_cfg['period'], bb_cfg['std_dev'])
+
+    if 'moving_averages' in wanted:
+        ma_cfg = config.get('moving_averages', MOVING_AVERAGES)
+        fields['sma_20'] = _sma(close, ma_cfg['sma_short'])
+        fields['sma_50'] = _sma(close, ma_cfg['sma_medium'])
+        fields['sma_200'] = _sma(close, ma_cfg['sma_long'])
+        fields['ema_12'] = _ema(close, ma_cfg['ema_fast'])
+        fields['ema_26'] = _ema(close, ma_cfg['ema_slow'])
+
+    if 'macd' in wanted:
+        macd_cfg = config.get('macd', MACD)
+        fields['macd'], fields['macd_signal'], fields['macd_histogram'] = panel_macd(
+            close, macd_cfg['fast'], macd_cfg['slow'], macd_cfg['signal'])
+
+    if 'adx' in wanted and high is not None and low is not None:
+        fields['adx'], fields['di_plus'], fields['di_minus'] = panel_adx(
+            high, low, close, config.get('adx', ADX)['period'])
+
+    if 'divergence' in wanted:
+        codes = panel_divergences(close, fields['rsi'], _positions(panel), config, recent_rows=recent_rows)
+        fields['rsi_divergence'] = pd.DataFrame(codes, columns=panel['tickers'])
+
+    return panel
+
+
+# =============================================================================
+# EXTRACTION
+# =============================================================================
+
+def panel_frame(panel, ticker):
+    """
+    Extrait le DataFrame d'un ticker (colonnes 'Date', OHLCV en minuscules et indicateurs),
+    au même format que fetch_and_prepare_data pour les graphiques existants.
+    """
+    column = panel['tickers'].index(ticker)
+    length = int(panel['lengths'][column])
+    if length == 0:
+        return pd.DataFrame()
+
+    rows = slice(len(panel['dates']) - length, None)
+    data = {'Date': pd.to_datetime(panel['dates'][rows, column])}
+    for field, matrix in panel['fields'].items():
+        values = matrix.iloc[rows, column].to_numpy()
+        if field == 'rsi_divergence':
+            values = pd.Series(values).map(DIVERGENCE_CODES).to_numpy()
+        data[field] = values
+
+    return pd.DataFrame(data)
+
+
+def panel_latest(panel, fields=None):
+    """
+    Dernière séance de chaque ticker (une ligne par ticker).
+
+    Returns:
+        pd.DataFrame indexé par ticker, avec la colonne 'Date'
+    """
+    fields = fields or list(panel['fields'])
+    latest = pd.DataFrame({field: panel['fields'][field].iloc[-1].to_numpy() for field in fields},
+                          index=pd.Index(panel['tickers'], name='ticker'))
+    latest.insert(0, 'Date', pd.to_datetime(panel['dates'][-1]) if len(panel['dates']) else pd.NaT)
+    latest['length'] = panel['lengths']
+    return latest
+
+
+def panel_last_events(panel, field='rsi_divergence'):
+    """
+    Dernier événement non nul de `field` pour chaque ticker.
+
+    Returns:
+        pd.DataFrame indexé par ticker : 'date', 'code' (0 et NaT si aucun)
+    """
+    codes = panel['fields'][field].to_numpy()
+    has_event = codes != 0
+    depth = len(codes)
+    # Index de la dernière ligne non nulle (par le bas)
+    last = depth - 1 - np.argmax(has_event[::-1], axis=0)
+    found = has_event.any(axis=0)
+
+    columns = np.arange(codes.shape[1])
+    dates = np.where(found, panel['dates'][last, columns], np.datetime64('NaT'))
+    return pd.DataFrame({
+        'date': pd.to_datetime(dates),
+        'code': np.where(found, codes[last, columns], 0),
+    }, index=pd.Index(panel['tickers'], name='ticker'))
@@ -0,0 +1,293 @@
+# portfolio_backtest.py
+"""
+Backtest de portefeuille des divergences RSI sur toute la watchlist.
+
+Au lieu de compter les signaux « actionnables » d'un seul fil de positions,
+un capital commun est réparti entre plusieurs positions simultanées :
+- Une divergence est datée de son pivot mais n'est connue qu'à la clôture de confirmation,
+  DIVERGENCE_PIVOT_WINDOW séances du ticker plus tard : les signaux sont décalés sur cette séance
+- Achat à l'ouverture de la séance qui suit la confirmation d'une divergence haussière
+- Revente à la clôture après `holding_period - 1` séances du ticker,
+  ou plus tôt sur une divergence baissière du même ticker
+- Au plus `max_positions` positions ouvertes (créneaux), une seule par ticker ;
+  chaque entrée reçoit equity / max_positions (limitée par la trésorerie disponible)
+- Quand les créneaux libres ne suffisent pas, l'ordre d'entrée suit `entry_priority`
+  (voir ENTRY_PRIORITIES) ; les signaux écartés sont comptés dans skipped_no_slot
+- Le spread est appliqué à chaque achat / vente (comme trading_strategies)
+
+Les prix sont des matrices dates × tickers alignées sur un calendrier commun
+(NaN hors séance). La boucle avance date par date et traite tous les tickers
+à la fois (opérations numpy sur des vecteurs de N tickers) : quelques milliers
+d'itérations suffisent pour plusieurs années et plusieurs centaines de tickers.
+"""
+import numpy as np
+import pandas as pd
+
+from indicator_calculator import DIVERGENCE_PIVOT_WINDOW
+
+
+DEFAULT_CAPITAL = 10000.0
+DEFAULT_MAX_POSITIONS = 10
+TRADING_DAYS_PER_YEAR = 252
+DEFAULT_SEED = 42
+
+# Priorité d'entrée quand les créneaux libres ne suffisent pas
+ENTRY_PRIORITIES = {
+    'random': "Signal le plus ancien d'abord, puis tirage aléatoire reproductible (seed)",
+    'watchlist': "Ordre de la watchlist (biaisé en faveur des premiers tickers)",
+}
+
+
+# =============================================================================
+# MATRICES D'ENTRÉE
+# =============================================================================
+
+def load_price_matrices(tickers, period):
+    """
+    Matrices d'ouverture et de clôture de tous les tickers (un seul téléchargement groupé).
+
+    Returns:
+        dict: {'open', 'close'} -> pd.DataFrame (dates × tickers), None si aucune donnée
+    """
+    from panel_engine import download_prices
+
+    prices = download_prices(tickers, period=period)
+    if not prices or 'close' not in prices:
+        return None
+
+    # Dates sans fuseau, comme celles des événements de divergence
+    index = pd.DatetimeIndex(prices['close'].index)
+    index = (index.tz_localize(None) if index.tz is not None else index).normalize()
+    close = prices['close'].set_axis(index, axis=0)
+    opening = prices.get('open', prices['close']).set_axis(index, axis=0)
+    return {'open': opening, 'close': close}
+
+
+def build_signal_matrix(divergences, dates, tickers, valid=None, delay=DIVERGENCE_PIVOT_WINDOW):
+    """
+    Place les événements de divergence sur la grille dates × tickers, à leur séance de confirmation.
+
+    Args:
+        divergences: liste de {'date', 'ticker', 'type'} (voir get_all_divergences), datés du pivot
+        valid: masque T × N des séances de chaque ticker (None = toutes les dates)
+        delay: séances du ticker entre le pivot et sa confirmation ; un événement dont
+               la confirmation tombe après la dernière date est ignoré
+
+    Returns:
+        np.ndarray: int8 T × N (1 = haussière, -1 = baissière, 0 = aucune)
+    """
+    signals = np.zeros((len(dates), len(tickers)), dtype=np.int8)
+    if not divergences:
+        return signals
+    if valid is None:
+        valid = np.ones(signals.shape, dtype=bool)
+
+    events = pd.DataFrame(divergences, columns=['date', 'ticker', 'type'])
+    events = events[events['type'].isin(['bullish', 'bearish'])]
+    rows = pd.DatetimeIndex(dates).get_indexer(pd.to_datetime(events['date']).dt.normalize())
+    cols = pd.Index(tickers).get_indexer(events['ticker'])
+    known = (rows >= 0) & (cols >= 0)
+    codes = np.where(events['type'].to_numpy() == 'bullish', 1, -1).astype(np.int8)
+    rows, cols, codes = rows[known], cols[known], codes[known]
+
+    # N° de séance du pivot, puis ligne de la séance `delay` séances plus loin pour ce ticker
+    bars = np.cumsum(valid, axis=0)
+    target = bars[rows, cols] + delay
+    confirmed = target <= bars[-1, cols]
+    for col, bar, code in zip(cols[confirmed], target[confirmed], codes[confirmed]):
+        signals[np.searchsorted(bars[:, col], bar), col] = code
+    return signals
+
+
+# =============================================================================
+# SIMULATION
+# =============================================================================
+
+def _summary(equity, exposure, turnover, trades, capital, skipped_no_slot, skipped_in_position):
+    """Statistiques globales de la simulation."""
+    values = equity.to_numpy()
+    final_value = float(values[-1]) if len(values) else capital
+    total_return = (final_value / capital - 1) * 100
+
+    years = len(values) / TRADING_DAYS_PER_YEAR
+    cagr = ((final_value / capital) ** (1 / years) - 1) * 100 if years > 0 and final_value > 0 else 0.0
+
+    returns = np.diff(values) / values[:-1] if len(values) > 1 else np.array([])
+    volatility = returns.std()
+    sharpe = float(returns.mean() / volatility * np.sqrt(TRADING_DAYS_PER_YEAR)) if volatility > 0 else 0.0
+
+    peak = np.maximum.accumulate(values) if len(values) else values
+    max_drawdown = float(((values / peak) - 1).min() * 100) if len(values) else 0.0
+
+    pnl = trades['pnl_pct'].to_numpy() if not trades.empty else np.array([])
+
+    return {
+        'final_value': final_value,
+        'total_return': total_return,
+        'cagr': cagr,
+        'sharpe': sharpe,
+        'max_drawdown': max_drawdown,
+        'num_trades': len(pnl),
+        'win_rate': float((pnl > 0).mean() * 100) if len(pnl) else 0.0,
+        'avg_trade': float(pnl.mean()) if len(pnl) else 0.0,
+        'avg_exposure': float(exposure.mean() * 100) if len(exposure) else 0.0,
+        'annual_turnover': float(turnover.mean() * TRADING_DAYS_PER_YEAR * 100) if len(turnover) else 0.0,
+        'skipped_no_slot': int(skipped_no_slot),
+        'skipped_in_position': int(skipped_in_position),
+    }
+
+
+def _entry_order(candidates, signal_rows, entry_priority, rng):
+    """Candidats triés par priorité d'entrée (voir ENTRY_PRIORITIES)."""
+    if entry_priority == 'watchlist':
+        return candidates
+    # lexsort : la dernière clé est la clé principale
+    return candidates[np.lexsort((rng.random(len(candidates)), signal_rows[candidates]))]
+
+
+def run_portfolio_backtest(divergences, prices, holding_period=11, max_positions=DEFAULT_MAX_POSITIONS,
+                           capital=DEFAULT_CAPITAL, spread_pct=0.5, entry_priority='random', seed=DEFAULT_SEED):
+    """
+    Simule un portefeuille qui achète les divergences haussières de tous les tickers.
+
+    Args:
+        divergences: liste de {'date', 'ticker', 'type'} (tous tickers confondus)
+        prices: dict {'open', 'close'} -> pd.DataFrame dates × tickers (voir load_price_matrices)
+        holding_period: durée de détention comme dans la timeline (revente N-1 séances après l'achat)
+        max_positions: nombre maximal de positions simultanées
+        capital: capital initial
+        spread_pct: écart achat/vente en % du prix
+        entry_priority: clé de ENTRY_PRIORITIES, ordre d'entrée quand les créneaux manquent
+        seed: graine du tirage aléatoire de la priorité 'random'
+
+    Returns:
+        dict:
+            - 'curve': pd.DataFrame indexé par date (equity, cash, exposure, turnover, positions)
+            - 'trades': pd.DataFrame des positions clôturées
+            - 'open_positions': liste des tickers encore détenus en fin de période
+            - 'stats': statistiques globales
+    """
+    close_df = prices['close']
+    dates = close_df.index
+    tickers = list(close_df.columns)
+    close = close_df.to_numpy(dtype=float)
+    opening = prices.get('open', close_df).reindex(index=dates, columns=tickers).to_numpy(dtype=float)
+    # Ouverture manquante (certains indices) : clôture de la séance
+    opening = np.where(np.isnan(opening), close, opening)
+
+    valid = ~np.isnan(close)
+    mark = close_df.ffill().fillna(0.0).to_numpy(dtype=float)  # valorisation hors séance
+    bars = np.cumsum(valid, axis=0)                             # n° de séance propre à chaque ticker
+    signals = build_signal_matrix(divergences, dates, tickers, valid=valid)
+
+    if entry_priority not in ENTRY_PRIORITIES:
+        raise ValueError(f"Priorité d'entrée inconnue: {entry_priority}")
+    rng = np.random.default_rng(seed)
+
+    hold = max(int(holding_period) - 1, 1)
+    max_positions = max(int(max_positions), 1)
+    half_spread = spread_pct / 100 / 2
+
+    T, N = close.shape
+    shares = np.zeros(N)
+    entry_price = np.zeros(N)
+    entry_bar = np.zeros(N, dtype=np.int64)
+    entry_row = np.zeros(N, dtype=np.int64)
+    pending = np.zeros(N, dtype=bool)
+    signal_row = np.zeros(N, dtype=np.int64)  # date du signal haussier en attente
+    cash = float(capital)
+    equity_prev = float(capital)
+
+    equity = np.empty(T)
+    cash_curve = np.empty(T)
+    exposure = np.empty(T)
+    turnover = np.empty(T)
+    open_count = np.empty(T, dtype=np.int32)
+    trades = []
+    skipped_no_slot = 0
+    skipped_in_position = 0
+
+    for t in range(T):
+        traded = 0.0
+        held = shares > 0
+
+        # 1. Entrées à l'ouverture (signaux de la séance précédente du ticker)
+        candidates = np.flatnonzero(pending & valid[t] & ~held)
+        if len(candidates):
+            free = max_positions - int(held.sum())
+            skipped_no_slot += max(len(candidates) - max(free, 0), 0)
+            if len(candidates) > max(free, 0):
+                candidates = _entry_order(candidates, signal_row, entry_priority, rng)
+            chosen = candidates[:max(free, 0)]
+            if len(chosen):
+                allocation = min(equity_prev / max_positions, cash / len(chosen))
+                if allocation > 0:
+                    fill = opening[t, chosen] * (1 + half_spread)
+                    shares[chosen] = allocation / fill
+                    entry_price[chosen] = fill
+                    entry_bar[chosen] = bars[t, chosen]
+                    entry_row[chosen] = t
+                    cash -= allocation * len(chosen)
+                    traded += allocation * len(chosen)
+        pending &= ~valid[t]
+
+        # 2. Sorties à la clôture : durée atteinte ou divergence baissière
+        held = shares > 0
+        exiting = np.flatnonzero(held & valid[t] & ((bars[t] - entry_bar >= hold) | (signals[t] < 0)))
+        if len(exiting):
+            fill = close[t, exiting] * (1 - half_spread)
+            proceeds = shares[exiting] * fill
+            cash += proceeds.sum()
+            traded += proceeds.sum()
+            for n, exit_price, value in zip(exiting, fill, proceeds):
+                trades.append({
+                    'ticker': tickers[n],
+                    'entry_date': dates[entry_row[n]],
+                    'exit_date': dates[t],
+                    'entry_price': entry_price[n],
+                    'exit_price': exit_price,
+                    'bars_held': int(bars[t, n] - entry_bar[n]),
+                    'pnl': value - shares[n] * entry_price[n],
+                    'pnl_pct': (exit_price / entry_price[n] - 1) * 100,
+                    'exit_reason': 'holding' if bars[t, n] - entry_bar[n] >= hold else 'bearish',
+                })
+            shares[exiting] = 0.0
+
+        # 3. Divergences haussières confirmées à cette clôture : achat à la prochaine séance du ticker
+        bullish = signals[t] > 0
+        skipped_in_position += int((bullish & (shares > 0)).sum())
+        new_signals = bullish & (shares == 0) & ~pending
+        signal_row[new_signals] = t
+        pending |= new_signals
+
+        invested = float(shares @ mark[t])
+        equity_prev = cash + invested
+        equity[t] = equity_prev
+        cash_curve[t] = cash
+        exposure[t] = invested / equity_prev if equity_prev > 0 else 0.0
+        turnover[t] = traded / 2 / equity_prev if equity_prev > 0 else 0.0
+        open_count[t] = int((shares > 0).sum())
+
+    curve = pd.DataFrame({
+        'equity': equity,
+        'cash': cash_curve,
+        'exposure': exposure,
+        'turnover': turnover,
+        'positions': open_count,
+    }, index=dates)
+
+    trades_df = pd.DataFrame(trades, columns=[
+        'ticker', 'entry_date', 'exit_date', 'entry_price', 'exit_price',
+        'bars_held', 'pnl', 'pnl_pct', 'exit_reason'
+    ])
+
+    stats = _summary(curve['equity'], curve['exposure'], curve['turnover'], trades_df,
+                     capital, skipped_no_slot, skipped_in_position)
+    stats['entry_priority'] = entry_priority
+
+    return {
+        'curve': curve,
+        'trades': trades_df,
+        'open_positions': [tickers[n] for n in np.flatnonzero(shares > 0)],
+        'stats': stats,
+    }
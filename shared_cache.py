@@ -0,0 +1,337 @@
+# shared_cache.py
+"""
+Cache partagé entre les workers gunicorn (Procfile : plusieurs processus app:server).
+
+Un cache en mémoire est dupliqué, et froid, dans chaque worker : ce niveau partagé
+permet à un worker de réutiliser les résultats calculés par un autre.
+- Espaces de noms par type de données ('indicators', 'fundamentals', 'metadata'),
+  chacun avec sa durée de validité par défaut
+- Taille bornée : au-delà de CACHE_MAX_BYTES, les entrées les moins récemment lues sont évincées
+  (taille contrôlée périodiquement, pas à chaque écriture : les lectures restent sans écriture)
+- Compteurs hits / misses / écritures / évictions par espace de noms (par processus)
+
+Deux implémentations derrière la même interface (choisie par CACHE_BACKEND) :
+- 'sqlite' (défaut) : fichier SQLite local en mode WAL, partagé par les workers d'un même hôte
+- 'redis' : serveur Redis (CACHE_URL, paquet redis optionnel) ; l'éviction par taille
+  est alors confiée au serveur (maxmemory + maxmemory-policy allkeys-lru)
+- 'none' : désactivé
+
+Les valeurs sont sérialisées avec pickle : le cache ne doit contenir que des données
+produites par l'application elle-même.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from lazy_imports import lazy_import
+
+redis = lazy_import('redis')
+
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'sqlite').lower()
+CACHE_PATH = os.getenv('CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'cache.sqlite3'))
+CACHE_URL = os.getenv('CACHE_URL', os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', 512 * 1024 * 1024))
+CACHE_EVICTION_TARGET = 0.9  # après éviction, la taille totale redescend à 90% du maximum
+CACHE_EVICTION_CHECK_WRITES = 50  # contrôle de la taille toutes les N écritures du processus...
+CACHE_EVICTION_CHECK_BYTES = 0.05  # ...ou dès que 5% du maximum a été écrit depuis le dernier contrôle
+CACHE_ACCESS_UPDATE_SECONDS = 60  # date de dernière lecture (LRU) rafraîchie au plus une fois par minute
+CACHE_KEY_PREFIX = 'td'
+
+# Durée de validité par défaut (secondes) de chaque espace de noms
+NAMESPACE_TTLS = {
+    'indicators': 5 * 60,
+    'fundamentals': 24 * 3600,
+    'metadata': 24 * 3600,
+}
+DEFAULT_TTL = 3600
+
+_stats = {}
+_stats_lock = threading.Lock()
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _count(namespace, event, n=1):
+    with _stats_lock:
+        counters = _stats.setdefault(namespace, {'hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0})
+        counters[event] += n
+
+
+def _key_text(key):
+    """Clé texte stable à partir d'un tuple ou d'une chaîne."""
+    if isinstance(key, (tuple, list)):
+        return '|'.join(str(part) for part in key)
+    return str(key)
+
+
+# =============================================================================
+# IMPLÉMENTATIONS
+# =============================================================================
+
+class SQLiteCache:
+    """Cache sur fichier SQLite (WAL) : lecteurs et écrivains concurrents entre processus."""
+
+    def __init__(self, path=CACHE_PATH, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes_lock = threading.Lock()
+        self._writes_since_check = 0
+        self._bytes_since_check = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache_entries (accessed_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache_entries (expires_at)")
+
+    def _connection(self):
+        """
+        Une connexion par thread et par processus (sqlite3 ne partage pas les connexions
+        entre threads, ni entre processus après un fork de gunicorn --preload).
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, namespace, key):
+        """
+        Lecture seule dans le cas courant : la date de dernière lecture n'est réécrite
+        (verrou d'écriture de la base) que si elle date de plus de CACHE_ACCESS_UPDATE_SECONDS.
+        """
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, accessed_at FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (namespace, key, now)
+        ).fetchone()
+        if row is None:
+            return None
+        if now - row[1] > CACHE_ACCESS_UPDATE_SECONDS:
+            conn.execute("UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                         (now, namespace, key))
+        return row[0]
+
+    def set(self, namespace, key, payload, ttl):
+        conn = self._connection()
+        now = time.time()
+        conn.execute("""
+            INSERT INTO cache_entries (namespace, key, value, size, expires_at, accessed_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (namespace, key) DO UPDATE SET
+                value = excluded.value, size = excluded.size,
+                expires_at = excluded.expires_at, accessed_at = excluded.accessed_at
+        """, (namespace, key, payload, len(payload), now + ttl, now))
+        if self._eviction_due(len(payload)):
+            self._evict(conn, now)
+
+    def _eviction_due(self, size):
+        """
+        Le contrôle de taille (SUM sur toute la table) n'est fait que toutes les
+        CACHE_EVICTION_CHECK_WRITES écritures ou après CACHE_EVICTION_CHECK_BYTES du maximum écrits.
+        """
+        with self._writes_lock:
+            self._writes_since_check += 1
+            self._bytes_since_check += size
+            if (self._writes_since_check < CACHE_EVICTION_CHECK_WRITES
+                    and self._bytes_since_check < self.max_bytes * CACHE_EVICTION_CHECK_BYTES):
+                return False
+            self._writes_since_check = 0
+            self._bytes_since_check = 0
+            return True
+
+    def _evict(self, conn, now):
+        """Supprime les entrées expirées puis, si nécessaire, les moins récemment lues."""
+        conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        target = total - self.max_bytes * CACHE_EVICTION_TARGET
+        victims, freed = [], 0
+        for namespace, key, size in conn.execute(
+                "SELECT namespace, key, size FROM cache_entries ORDER BY accessed_at"):
+            victims.append((namespace, key))
+            freed += size
+            if freed >= target:
+                break
+        conn.executemany("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", victims)
+        for namespace, _ in victims:
+            _count(namespace, 'evictions')
+
+    def delete(self, namespace, key=None):
+        conn = self._connection()
+        if key is None:
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+        else:
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def usage(self):
+        """Taille et nombre d'entrées par espace de noms."""
+        rows = self._connection().execute(
+            "SELECT namespace, COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries GROUP BY namespace"
+        ).fetchall()
+        return {namespace: {'entries': count, 'bytes': size} for namespace, count, size in rows}
+
+
+class RedisCache:
+    """Cache sur serveur Redis : TTL natif, éviction par la politique maxmemory du serveur."""
+
+    def __init__(self, url=CACHE_URL):
+        self.client = redis.Redis.from_url(url, socket_timeout=2)
+        self.client.ping()
+
+    @staticmethod
+    def _name(namespace, key):
+        return f"{CACHE_KEY_PREFIX}:{namespace}:{key}"
+
+    def get(self, namespace, key):
+        return self.client.get(self._name(namespace, key))
+
+    def set(self, namespace, key, payload, ttl):
+        self.client.set(self._name(namespace, key), payload, ex=max(int(ttl), 1))
+
+    def delete(self, namespace, key=None):
+        if key is not None:
+            self.client.delete(self._name(namespace, key))
+            return
+        names = list(self.client.scan_iter(match=self._name(namespace, '*'), count=500))
+        if names:
+            self.client.delete(*names)
+
+    def usage(self):
+        usage = {}
+        for name in self.client.scan_iter(match=f"{CACHE_KEY_PREFIX}:*", count=500):
+            namespace = name.decode().split(':', 2)[1]
+            entry = usage.setdefault(namespace, {'entries': 0, 'bytes': 0})
+            entry['entries'] += 1
+            entry['bytes'] += self.client.memory_usage(name) or 0
+        return usage
+
+
+def get_backend():
+    """Implémentation configurée (créée au premier usage, None si désactivée ou indisponible)."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _create_backend()
+    return _backend or None
+
+
+def _create_backend():
+    if CACHE_BACKEND == 'none':
+        return False
+    if CACHE_BACKEND == 'redis':
+        try:
+            backend = RedisCache(CACHE_URL)
+            print(f"🗃️ Cache partagé: Redis ({CACHE_URL})")
+            return backend
+        except Exception as e:
+            print(f"⚠️ Redis indisponible ({e}), repli sur le cache SQLite local")
+    try:
+        backend = SQLiteCache(CACHE_PATH, CACHE_MAX_BYTES)
+        print(f"🗃️ Cache partagé: SQLite ({CACHE_PATH}, {CACHE_MAX_BYTES // (1024 * 1024)} Mo max)")
+        return backend
+    except Exception as e:
+        print(f"⚠️ Cache partagé désactivé: {e}")
+        return False
+
+
+# =============================================================================
+# INTERFACE
+# =============================================================================
+
+def cache_get(namespace, key):
+    """Valeur en cache (None si absente, expirée ou cache indisponible)."""
+    backend = get_backend()
+    if backend is None:
+        return None
+    try:
+        payload = backend.get(namespace, _key_text(key))
+    except Exception as e:
+        print(f"⚠️ Lecture du cache partagé impossible ({namespace}): {e}")
+        return None
+    if payload is None:
+        _count(namespace, 'misses')
+        return None
+    _count(namespace, 'hits')
+    return pickle.loads(payload)
+
+
+def cache_set(namespace, key, value, ttl=None):
+    """Enregistre une valeur (best effort) ; ttl en secondes, défaut de l'espace de noms."""
+    backend = get_backend()
+    if backend is None or value is None:
+        return
+    ttl = ttl if ttl is not None else NAMESPACE_TTLS.get(namespace, DEFAULT_TTL)
+    if ttl <= 0:
+        return
+    try:
+        backend.set(namespace, _key_text(key), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), ttl)
+        _count(namespace, 'sets')
+    except Exception as e:
+        print(f"⚠️ Écriture du cache partagé impossible ({namespace}): {e}")
+
+
+def cache_delete(namespace, key=None):
+    """Supprime une entrée, ou tout l'espace de noms si key est None."""
+    backend = get_backend()
+    if backend is None:
+        return
+    try:
+        backend.delete(namespace, _key_text(key) if key is not None else None)
+    except Exception as e:
+        print(f"⚠️ Invalidation du cache partagé impossible ({namespace}): {e}")
+
+
+def cached(namespace, key, compute, ttl=None, is_valid=None):
+    """
+    Lit `key` dans le cache partagé, sinon calcule compute() et l'enregistre.
+
+    Args:
+        is_valid: prédicat sur le résultat calculé (ex. DataFrame non vide) ; un résultat
+                  invalide est retourné sans être mis en cache
+    """
+    value = cache_get(namespace, key)
+    if value is not None:
+        return value
+    value = compute()
+    if is_valid is None or is_valid(value):
+        cache_set(namespace, key, value, ttl)
+    return value
+
+
+def cache_stats():
+    """Compteurs du processus et occupation du cache partagé par espace de noms."""
+    with _stats_lock:
+        stats = {namespace: dict(counters) for namespace, counters in _stats.items()}
+    for counters in stats.values():
+        lookups = counters['hits'] + counters['misses']
+        counters['hit_rate'] = counters['hits'] / lookups * 100 if lookups else None
+
+    backend = get_backend()
+    usage = {}
+    if backend is not None:
+        try:
+            usage = backend.usage()
+        except Exception as e:
+            print(f"⚠️ Occupation du cache partagé indisponible: {e}")
+    return {'counters': stats, 'usage': usage}
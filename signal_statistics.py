@@ -0,0 +1,168 @@
+# signal_statistics.py
+"""
+Tests de significativité de la précision des indicateurs et des combinaisons.
+
+Une précision de 58% sur 40 signaux peut n'être que du bruit. Pour chaque signal
+(sortie de calculate_performance_history_with_combinations) et chaque horizon :
+- Test de permutation : les signaux (même nombre d'achats et de ventes) sont replacés
+  au hasard parmi les séances ; la p-value est la part des tirages aléatoires qui font
+  au moins aussi bien que le signal (précision et rendement suivi)
+- Bootstrap par blocs : intervalle de confiance à 95% de la précision et du rendement
+  moyen (blocs de la longueur de l'horizon, les rendements futurs se chevauchant)
+
+Tous les tirages sont des opérations matricielles communes à tous les signaux :
+une permutation par tirage et des sommes cumulées (test de permutation),
+un produit matriciel poids × signaux (bootstrap).
+"""
+import numpy as np
+import pandas as pd
+
+
+SIGNIFICANCE_RESAMPLES = 2000      # tirages par horizon
+SIGNIFICANCE_MAX_CELLS = 4_000_000  # tirages × séances : plafond pour rester interactif
+SIGNIFICANCE_LEVEL = 0.05
+SIGNIFICANCE_SEED = 42              # tirages reproductibles d'un affichage à l'autre
+
+
+def _resample_count(n_bars, resamples):
+    """Nombre de tirages réduit sur les très longs historiques (budget de calcul fixe)."""
+    return int(max(min(resamples, SIGNIFICANCE_MAX_CELLS // max(n_bars, 1)), 200))
+
+
+def _signal_directions(performance_history, names, horizon, length):
+    """Matrice T × K : 1 achat évaluable, -1 vente évaluable, 0 sinon."""
+    directions = np.zeros((length, len(names)), dtype=np.int8)
+    for k, name in enumerate(names):
+        perf_df = performance_history[name]
+        correct_col = f'correct_{horizon}d'
+        if correct_col not in perf_df.columns:
+            continue
+        evaluated = perf_df[correct_col].notna().to_numpy()
+        signal = perf_df['signal'].astype(str).to_numpy()
+        directions[:, k] = np.where(evaluated & (signal == 'buy'), 1,
+                                    np.where(evaluated & (signal == 'sell'), -1, 0))
+    return directions
+
+
+def _permutation_null(future, n_buy, n_sell, resamples, rng):
+    """
+    Précision et rendement obtenus en plaçant n_buy achats et n_sell ventes au hasard.
+
+    Une seule permutation des séances par tirage sert à tous les signaux :
+    les n_buy premières séances permutées sont les achats, les n_sell suivantes les ventes.
+
+    Returns:
+        tuple: (réussites, rendements) de forme tirages × signaux
+    """
+    order = np.argsort(rng.random((resamples, len(future))), axis=1)
+    shuffled = future[order]
+
+    def cumulative(values):
+        return np.concatenate([np.zeros((resamples, 1), dtype=values.dtype), values.cumsum(axis=1)], axis=1)
+
+    up = cumulative((shuffled > 0).astype(np.int32))
+    down = cumulative((shuffled < 0).astype(np.int32))
+    total = cumulative(shuffled)
+    end = n_buy + n_sell
+
+    hits = up[:, n_buy] + down[:, end] - down[:, n_buy]
+    returns = total[:, n_buy] - (total[:, end] - total[:, n_buy])
+    return hits, returns
+
+
+def _block_weights(length, block, resamples, rng):
+    """Poids de bootstrap (Poisson) constants par blocs consécutifs de `block` séances."""
+    n_blocks = -(-length // block)
+    weights = rng.poisson(1.0, size=(resamples, n_blocks)).astype(np.float64)
+    return np.repeat(weights, block, axis=1)[:, :length]
+
+
+def evaluate_signal_significance(performance_history, prices, horizons=[1, 2, 5, 10, 20],
+                                 resamples=SIGNIFICANCE_RESAMPLES, seed=SIGNIFICANCE_SEED):
+    """
+    Teste chaque signal de l'historique de performance sur chaque horizon.
+
+    Args:
+        performance_history: {nom: DataFrame [Date, signal, correct_Xd, return_Xd...]}
+        prices: DataFrame avec 'Date' et 'close' (les rendements futurs de toutes les séances)
+        horizons: horizons testés (jours)
+        resamples: nombre de tirages (permutation et bootstrap)
+
+    Returns:
+        dict: {nom: {horizon: {'p_value', 'p_value_return', 'ci_low', 'ci_high',
+                                'return_ci_low', 'return_ci_high', 'null_accuracy'}}}
+    """
+    names = [name for name, perf_df in performance_history.items()
+             if not perf_df.empty and 'signal' in perf_df.columns]
+    if not names or prices is None or prices.empty:
+        return {}
+
+    dates = pd.to_datetime(performance_history[names[0]]['Date']).reset_index(drop=True)
+    names = [name for name in names if len(performance_history[name]) == len(dates)]
+
+    close = (prices.assign(Date=pd.to_datetime(prices['Date']))
+             .drop_duplicates('Date').set_index('Date')['close'].sort_index())
+    close = close.astype(float)
+
+    rng = np.random.default_rng(seed)
+    results = {name: {} for name in names}
+
+    for h in horizons:
+        future = ((close.shift(-h) / close - 1) * 100).reindex(dates).to_numpy(dtype=np.float64)
+        rows = ~np.isnan(future)
+        if rows.sum() < 2:
+            continue
+
+        future = future[rows]
+        directions = _signal_directions(performance_history, names, h, len(dates))[rows]
+        n_resamples = _resample_count(len(future), resamples)
+
+        # Valeurs observées
+        evaluated = directions != 0
+        hit_matrix = ((directions > 0) & (future[:, None] > 0)) | ((directions < 0) & (future[:, None] < 0))
+        return_matrix = directions * future[:, None]
+        n_buy = (directions > 0).sum(axis=0)
+        n_sell = (directions < 0).sum(axis=0)
+        n_signals = n_buy + n_sell
+        hits = hit_matrix.sum(axis=0)
+        returns = return_matrix.sum(axis=0)
+
+        # Test de permutation (unilatéral : le signal fait-il mieux que le hasard ?)
+        null_hits, null_returns = _permutation_null(future, n_buy, n_sell, n_resamples, rng)
+        p_value = (1 + (null_hits >= hits).sum(axis=0)) / (n_resamples + 1)
+        p_value_return = (1 + (null_returns >= returns - 1e-12).sum(axis=0)) / (n_resamples + 1)
+
+        # Bootstrap par blocs : intervalles de confiance
+        weights = _block_weights(len(future), max(h, 1), n_resamples, rng)
+        boot_n = weights @ evaluated.astype(np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            boot_accuracy = (weights @ hit_matrix.astype(np.float64)) / boot_n * 100
+            boot_return = (weights @ return_matrix) / boot_n
+            null_accuracy = null_hits.mean(axis=0) / n_signals * 100
+        active = np.flatnonzero(n_signals > 0)
+        ci_low, ci_high = np.nanpercentile(boot_accuracy[:, active], [2.5, 97.5], axis=0)
+        ret_low, ret_high = np.nanpercentile(boot_return[:, active], [2.5, 97.5], axis=0)
+
+        for i, k in enumerate(active):
+            results[names[k]][h] = {
+                'p_value': float(p_value[k]),
+                'p_value_return': float(p_value_return[k]),
+                'ci_low': float(ci_low[i]),
+                'ci_high': float(ci_high[i]),
+                'return_ci_low': float(ret_low[i]),
+                'return_ci_high': float(ret_high[i]),
+                'null_accuracy': float(null_accuracy[k]),
+            }
+
+    return results
+
+
+def combined_p_value(significance, horizons):
+    """
+    p-value d'un signal sur plusieurs horizons (correction de Bonferroni sur la meilleure),
+    None si aucun horizon n'a été testé.
+    """
+    p_values = [significance[h]['p_value'] for h in horizons if h in significance]
+    if not p_values:
+        return None
+    return min(1.0, min(p_values) * len(p_values))
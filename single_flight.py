@@ -0,0 +1,95 @@
+# single_flight.py
+"""
+Regroupement des appels concurrents identiques (« single flight »).
+
+Quand plusieurs callbacks (ou plusieurs utilisateurs) demandent en même temps le même
+calcul (téléchargement + indicateurs d'un ticker, données fondamentales...), seul
+le premier appel s'exécute ; les suivants attendent sa fin et reçoivent le même résultat
+(ou la même exception). Rien n'est conservé une fois l'appel terminé : ce n'est pas
+un cache, seulement une déduplication des appels en cours.
+
+Le regroupement vaut pour les threads d'un même processus (serveur Dash multi-thread).
+"""
+import threading
+
+import pandas as pd
+
+
+class _Call:
+    """Appel en cours : les appelants suivants attendent `done`."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+_calls = {}
+_guard = threading.Lock()
+_stats = {'executed': 0, 'shared': 0}
+
+
+def _share(value):
+    """Copie des DataFrames pour les appelants en attente : aucun ne modifie le résultat d'un autre."""
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    if isinstance(value, tuple):
+        return tuple(_share(item) for item in value)
+    return value
+
+
+def single_flight(key, func, *args, **kwargs):
+    """
+    Exécute func(*args, **kwargs), ou attend l'appel identique (même `key`) déjà en cours.
+
+    Args:
+        key: clé hashable identifiant le calcul (ex. ('prepare', ticker, period, config_hash))
+
+    Returns:
+        Le résultat de func, partagé entre les appelants concurrents
+    """
+    with _guard:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+            _stats['executed'] += 1
+        else:
+            call.waiters += 1
+            _stats['shared'] += 1
+
+    if not leader:
+        print(f"🔁 Appel en cours partagé: {key}")
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return _share(call.result)
+
+    waiters = 0
+    try:
+        call.result = func(*args, **kwargs)
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _guard:
+            _calls.pop(key, None)
+            waiters = call.waiters
+        call.done.set()
+
+    # call.result reste intact pour les appelants en attente (chacun en copie une version) :
+    # s'il est partagé, le premier appelant reçoit lui aussi une copie qu'il peut modifier
+    return _share(call.result) if waiters else call.result
+
+
+def in_flight_keys():
+    """Clés des appels en cours (diagnostic)."""
+    with _guard:
+        return list(_calls)
+
+
+def single_flight_stats():
+    """Compteurs : appels exécutés et appels servis par un appel déjà en cours."""
+    with _guard:
+        return dict(_stats)
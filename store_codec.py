@@ -0,0 +1,174 @@
+# store_codec.py
+"""
+Sérialisation colonnaire des DataFrames placés dans les dcc.Store.
+Au lieu de df.to_dict('records') (noms de colonnes répétés à chaque ligne, nombres en texte),
+chaque colonne est envoyée une seule fois :
+- numériques et dates : tableau typé little-endian encodé en base64
+- libellés : codes entiers (base64) + liste des catégories
+- autres objets (listes, dictionnaires...) : liste JSON
+
+encode_store / decode_store parcourent récursivement dictionnaires et listes,
+et decode_frame accepte aussi l'ancien format (liste d'enregistrements).
+"""
+import base64
+
+import numpy as np
+import pandas as pd
+
+
+FORMAT_KEY = '__columnar__'
+FORMAT_VERSION = 1
+
+
+# =============================================================================
+# TABLEAUX TYPÉS
+# =============================================================================
+
+def _pack(values, dtype):
+    array = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder('<'))
+    return base64.b64encode(array.tobytes()).decode('ascii')
+
+
+def _unpack(data, dtype, length):
+    array = np.frombuffer(base64.b64decode(data), dtype=np.dtype(dtype).newbyteorder('<'), count=length)
+    return array.astype(np.dtype(dtype), copy=False)
+
+
+def _json_value(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_json_value(v) for v in value]
+    return value
+
+
+def _encode_column(name, series):
+    dtype = series.dtype
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        return {'name': name, 'kind': 'category', 'dtype': 'int32', 'ordered': bool(dtype.ordered),
+                'categories': [_json_value(c) for c in dtype.categories],
+                'data': _pack(series.cat.codes.to_numpy(), 'int32')}
+
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        values = series.dt.tz_convert(None) if getattr(dtype, 'tz', None) else series
+        return {'name': name, 'kind': 'datetime', 'dtype': 'int64',
+                'data': _pack(values.to_numpy(dtype='datetime64[ms]').view('int64'), 'int64')}
+
+    if pd.api.types.is_bool_dtype(dtype) and not series.isna().any():
+        return {'name': name, 'kind': 'bool', 'dtype': 'uint8', 'data': _pack(series.to_numpy(dtype=bool), 'uint8')}
+
+    if pd.api.types.is_numeric_dtype(dtype):
+        if isinstance(dtype, np.dtype):
+            numpy_dtype = dtype
+        else:
+            # Types nullables (Int64, Float64...) : NaN pour les manquants
+            numpy_dtype = np.dtype('float64')
+        return {'name': name, 'kind': 'numeric', 'dtype': numpy_dtype.str.lstrip('<>|='),
+                'data': _pack(series.to_numpy(dtype=numpy_dtype, na_value=np.nan)
+                              if numpy_dtype.kind == 'f' else series.to_numpy(dtype=numpy_dtype), numpy_dtype)}
+
+    # Texte : factorisé si toutes les valeurs sont des chaînes (ou manquantes)
+    non_null = series.dropna()
+    if non_null.map(lambda v: isinstance(v, str)).all():
+        codes, categories = pd.factorize(series, use_na_sentinel=True)
+        return {'name': name, 'kind': 'labels', 'dtype': 'int32', 'categories': list(categories),
+                'data': _pack(codes, 'int32')}
+
+    return {'name': name, 'kind': 'json', 'data': [_json_value(v) for v in series.tolist()]}
+
+
+def _decode_column(column, length):
+    kind = column['kind']
+    if kind == 'json':
+        return pd.Series(column['data'], dtype=object)
+
+    values = _unpack(column['data'], column['dtype'], length)
+
+    if kind == 'category':
+        return pd.Categorical.from_codes(values, categories=column['categories'], ordered=column['ordered'])
+    if kind == 'labels':
+        categories = np.asarray(column['categories'], dtype=object)
+        labels = categories[np.maximum(values, 0)] if len(categories) else np.full(length, None, dtype=object)
+        labels[values < 0] = None
+        return labels
+    if kind == 'datetime':
+        return values.view('datetime64[ms]')
+    if kind == 'bool':
+        return values.astype(bool)
+    return values
+
+
+# =============================================================================
+# DATAFRAMES
+# =============================================================================
+
+def is_encoded_frame(payload):
+    return isinstance(payload, dict) and FORMAT_KEY in payload
+
+
+def encode_frame(df):
+    """Encode un DataFrame (index ignoré) au format colonnaire."""
+    return {
+        FORMAT_KEY: FORMAT_VERSION,
+        'length': len(df),
+        'columns': [_encode_column(str(name), df[name]) for name in df.columns],
+    }
+
+
+def decode_frame(payload, columns=None):
+    """
+    Reconstruit le DataFrame. Accepte aussi une liste d'enregistrements (ancien format).
+
+    Args:
+        columns: ne décoder que ces colonnes (None = toutes)
+    """
+    if not payload:
+        return pd.DataFrame()
+    if not is_encoded_frame(payload):
+        df = pd.DataFrame(payload)
+        return df[[c for c in columns if c in df.columns]] if columns is not None else df
+
+    length = payload['length']
+    data = {
+        column['name']: _decode_column(column, length)
+        for column in payload['columns']
+        if columns is None or column['name'] in columns
+    }
+    return pd.DataFrame(data, index=pd.RangeIndex(length))
+
+
+def decode_column(payload, name):
+    """Décode une seule colonne (ex. 'Date' pour un contrôle rapide), None si absente."""
+    df = decode_frame(payload, columns=[name])
+    return df[name] if name in df.columns else None
+
+
+# =============================================================================
+# VALEURS DE STORE (récursif)
+# =============================================================================
+
+def encode_store(value):
+    """Encode récursivement les DataFrames contenus dans une valeur de store."""
+    if isinstance(value, pd.DataFrame):
+        return encode_frame(value)
+    if isinstance(value, dict):
+        return {key: encode_store(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode_store(item) for item in value]
+    return value
+
+
+def decode_store(value):
+    """Inverse de encode_store : les DataFrames encodés sont reconstruits, le reste est inchangé."""
+    if is_encoded_frame(value):
+        return decode_frame(value)
+    if isinstance(value, dict):
+        return {key: decode_store(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [decode_store(item) for item in value]
+    return value
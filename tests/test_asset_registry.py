@@ -0,0 +1,62 @@
+# tests/test_asset_registry.py
+"""Registre des actifs quand la base est absente ou en échec : pas d'I/O répétée, rechargement différé."""
+import pytest
+
+import asset_registry
+import db_manager
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(asset_registry, '_registry', {})
+    monkeypatch.setattr(asset_registry, '_loaded', False)
+    monkeypatch.setattr(asset_registry, '_load_retry_at', 0.0)
+    monkeypatch.setattr(asset_registry, '_asset_id_retry_at', {})
+    monkeypatch.setattr(asset_registry, '_listener_enabled', False)
+    return asset_registry
+
+
+@pytest.fixture
+def failing_db(monkeypatch):
+    """Base configurée mais dont chaque requête échoue ; compte les connexions."""
+    calls = []
+
+    def connect():
+        calls.append(1)
+        raise RuntimeError("requête en échec")
+
+    monkeypatch.setattr(db_manager, 'DATABASE_URL', 'postgresql://test')
+    monkeypatch.setattr(db_manager, '_connection_failed_at', None)
+    monkeypatch.setattr(db_manager, 'get_db_connection', connect)
+    return calls
+
+
+def test_failed_load_is_retried_after_the_delay(registry, failing_db, monkeypatch):
+    assert registry.get_registered_category('AIR.PA')
+    assert registry._loaded is False
+    assert len(failing_db) == 1
+
+    # Pas de nouvel essai avant le délai
+    registry.get_asset_metadata('MC.PA')
+    assert len(failing_db) == 1
+
+    monkeypatch.setattr(registry, '_load_retry_at', 0.0)
+    registry.get_asset_metadata('MC.PA')
+    assert len(failing_db) == 2
+
+
+def test_failed_asset_id_is_not_retried_on_every_call(registry, failing_db, monkeypatch):
+    monkeypatch.setattr(registry, '_loaded', True)
+
+    assert registry.get_registered_asset_id('AAPL') is None
+    assert registry.get_registered_asset_id('AAPL') is None
+    assert len(failing_db) == 1
+    assert registry.get_asset_metadata('AAPL')['id'] is None
+
+
+def test_without_database_no_connection_is_attempted(registry, monkeypatch):
+    monkeypatch.setattr(db_manager, 'DATABASE_URL', None)
+    monkeypatch.setattr(db_manager, 'get_db_connection', lambda: pytest.fail("connexion tentée"))
+
+    assert registry.get_asset_metadata('BTC-USD')['exchange'] == 'Crypto'
+    assert registry.get_registered_asset_id('BTC-USD') is None
@@ -0,0 +1,134 @@
+# tests/test_charts.py
+"""
+Données des graphiques : les tableaux calculés par np.where / np.select doivent
+reproduire les anciennes boucles iterrows.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from components.charts import (
+    create_recommendations_chart,
+    create_trend_chart,
+    create_macd_chart,
+    create_volume_chart,
+)
+
+CONFIG = {'adx': {'strong': 25}}
+
+
+@pytest.fixture
+def df_graph():
+    rng = np.random.default_rng(27)
+    n = 300
+    close = 100 + rng.normal(0, 1, n).cumsum()
+    adx = rng.uniform(5, 50, n)
+    adx[rng.random(n) < 0.1] = np.nan
+    return pd.DataFrame({
+        'Date': pd.bdate_range('2024-01-01', periods=n),
+        'open': close + rng.normal(0, 0.5, n),
+        'close': close,
+        'volume': rng.integers(1_000, 100_000, n),
+        'recommendation': rng.choice(['Acheter', 'Neutre', 'Vendre'], n),
+        'conviction': rng.integers(0, 6, n),
+        'trend': rng.choice(['strong_bullish', 'bullish', 'neutral', 'bearish'], n),
+        'bb_signal': rng.choice(['lower_touch', 'neutral', 'upper_zone'], n),
+        'adx': adx,
+        'di_plus': rng.uniform(5, 40, n),
+        'di_minus': rng.uniform(5, 40, n),
+        'macd': rng.normal(0, 1, n),
+        'macd_signal': rng.normal(0, 1, n),
+        'macd_histogram': np.where(rng.random(n) < 0.05, np.nan, rng.normal(0, 1, n)),
+    })
+
+
+def _reference_recommendations(df_graph):
+    values, colors, texts = [], [], []
+    for _, row in df_graph.iterrows():
+        trend = row.get('trend', 'neutral')
+        bb_signal = row.get('bb_signal', 'neutral')
+        if row['recommendation'] == 'Acheter':
+            values.append(row['conviction'])
+            colors.append('#26a69a')
+            texts.append(f"ACHETER | Conv: {row['conviction']}/5 | Trend: {trend} | BB: {bb_signal}")
+        elif row['recommendation'] == 'Vendre':
+            values.append(-row['conviction'])
+            colors.append('#ef5350')
+            texts.append(f"VENDRE | Conv: {row['conviction']}/5 | Trend: {trend} | BB: {bb_signal}")
+        else:
+            values.append(0)
+            colors.append('rgba(128,128,128,0.3)')
+            texts.append(f"Neutre | Trend: {trend} | BB: {bb_signal}")
+    return values, colors, texts
+
+
+def _reference_trend(df_graph, adx_strong):
+    values, colors = [], []
+    for _, row in df_graph.iterrows():
+        adx, di_plus, di_minus = row.get('adx', 0), row.get('di_plus', 0), row.get('di_minus', 0)
+        if pd.isna(adx):
+            values.append(0)
+            colors.append('rgba(128,128,128,0.3)')
+        elif di_plus > di_minus:
+            values.append(adx)
+            colors.append('#26a69a' if adx >= adx_strong else '#4a7c6f')
+        else:
+            values.append(-adx)
+            colors.append('#ef5350' if adx >= adx_strong else '#8b5a5a')
+    return values, colors
+
+
+def test_recommendations_chart(df_graph):
+    values, colors, texts = _reference_recommendations(df_graph)
+    bar = create_recommendations_chart(df_graph, df_graph['Date'].iloc[-1]).data[0]
+
+    np.testing.assert_array_equal(np.asarray(bar.y, dtype=float), np.asarray(values, dtype=float))
+    assert list(bar.marker.color) == colors
+    assert list(bar.hovertext) == texts
+
+
+def test_trend_chart(df_graph):
+    values, colors = _reference_trend(df_graph, CONFIG['adx']['strong'])
+    bar = create_trend_chart(df_graph, df_graph['Date'].iloc[-1], CONFIG).data[0]
+
+    np.testing.assert_array_equal(np.asarray(bar.y, dtype=float), np.asarray(values, dtype=float))
+    assert list(bar.marker.color) == colors
+
+
+def test_macd_histogram_colors(df_graph):
+    expected = ['#26a69a' if v >= 0 else '#ef5350' for v in df_graph['macd_histogram'].fillna(0)]
+    bar = create_macd_chart(df_graph, df_graph['Date'].iloc[-1]).data[0]
+
+    assert list(bar.marker.color) == expected
+
+
+def test_volume_colors(df_graph):
+    expected = ['#26a69a' if c >= o else '#ef5350' for c, o in zip(df_graph['close'], df_graph['open'])]
+    bar = create_volume_chart(df_graph, df_graph['Date'].iloc[-1]).data[0]
+
+    assert list(bar.marker.color) == expected
+
+
+def test_date_patch_skips_figures_without_date_line(df_graph):
+    from callbacks.dashboard_callbacks import (
+        create_date_patch, create_technical_charts_with_zoom, get_figure_layouts,
+    )
+
+    selected_date = df_graph['Date'].iloc[-1]
+    charts = create_technical_charts_with_zoom(
+        df_graph.drop(columns=['macd']), selected_date, ['macd', 'volume'], CONFIG
+    )
+    layouts = get_figure_layouts(charts)
+
+    assert layouts['macd-chart'] == {'traces': 0, 'date_line': False}
+    assert layouts['volume-chart'] == {'traces': 1, 'date_line': True}
+
+    def patched_paths(patch):
+        return [op['location'] for op in patch.to_plotly_json()['operations']]
+
+    macd_paths = patched_paths(create_date_patch(selected_date, [], None, layouts['macd-chart']))
+    assert not any('shapes' in path or 'data' in path for path in macd_paths)
+
+    volume_paths = patched_paths(create_date_patch(selected_date, [{'x': [1]}], None, layouts['volume-chart']))
+    assert ['layout', 'shapes', 0, 'x0'] in volume_paths
+    assert ['data', 0, 'x'] in volume_paths
@@ -0,0 +1,42 @@
+# tests/test_downsampling.py
+"""
+Niveau de détail : la réduction des barres doit conserver les plus forts signaux
+et toutes les courbes des graphiques doivent passer par prepare_chart_frames.
+"""
+import numpy as np
+import pandas as pd
+
+from components.downsampling import MAX_BARS, downsample_peaks, prepare_chart_frames
+
+
+def _frame(n=5000):
+    rng = np.random.default_rng(26)
+    return pd.DataFrame({
+        'Date': pd.bdate_range('2005-01-01', periods=n),
+        'adx': rng.uniform(5, 40, n),
+        'stochastic_k': rng.uniform(0, 100, n),
+    })
+
+
+def test_downsample_peaks_keeps_strongest_bars():
+    df = _frame()
+    df.loc[[123, 2222, 4999], 'adx'] = [90.0, -95.0, np.nan]
+
+    reduced = downsample_peaks(df, 'adx')
+
+    assert len(reduced) == MAX_BARS
+    assert reduced['Date'].is_monotonic_increasing
+    assert {123, 2222} <= set(reduced.index)
+
+
+def test_prepare_chart_frames_bars_and_lines():
+    df = _frame()
+    lod = prepare_chart_frames(df)
+
+    assert len(lod['bars']('adx')) == MAX_BARS
+    assert len(lod['bars'](lambda window: window['adx'] > 30)) == MAX_BARS
+    assert len(lod['lines']('stochastic_k')) < len(df)
+    # Petite plage zoomée : pleine résolution sur la fenêtre (+ marge)
+    x_range = [df['Date'].iloc[1000], df['Date'].iloc[1100]]
+    zoomed = prepare_chart_frames(df, x_range)
+    assert zoomed['bars']('adx').equals(zoomed['window'])
@@ -0,0 +1,35 @@
+# tests/test_fundamental_cache.py
+"""
+Cache fondamental : sans base de données, un défaut de cache ne doit tenter
+aucune connexion.
+"""
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import db_manager
+import fundamental_cache
+
+
+def test_miss_without_database_skips_connection(monkeypatch):
+    def fail():
+        raise AssertionError("connexion tentée")
+
+    monkeypatch.setattr(db_manager, 'DATABASE_URL', None)
+    monkeypatch.setattr(db_manager, 'get_db_connection', fail)
+
+    assert fundamental_cache.get_cached('TEST.MISS', 'info') is None
+
+    value = pd.DataFrame({'date': pd.to_datetime(['2026-03-31']), 'pe': [12.5]})
+    fundamental_cache.set_cached('TEST.MISS', 'quarterly_history', value, datetime.now() + timedelta(days=1))
+    assert fundamental_cache.get_cached('TEST.MISS', 'quarterly_history') is value
+
+
+def test_recent_connection_failure_skips_database(monkeypatch):
+    calls = []
+    monkeypatch.setattr(db_manager, 'DATABASE_URL', 'postgresql://unused')
+    monkeypatch.setattr(db_manager, '_connection_failed_at', datetime.now().timestamp())
+    monkeypatch.setattr(db_manager, 'get_db_connection', lambda: calls.append(1))
+
+    assert fundamental_cache.get_cached('TEST.DOWN', 'info') is None
+    assert calls == []
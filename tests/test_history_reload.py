@@ -0,0 +1,87 @@
+# tests/test_history_reload.py
+"""
+Historique relu depuis historical_data : les colonnes dérivées non stockées (moyennes
+glissantes, contributions) sont présentes et cohérentes sur toutes les barres, relues ou recalculées.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_handler
+import db_schema
+from config import get_default_config, config_fingerprint
+from indicator_calculator import add_derived_columns, calculate_individual_contributions
+
+
+@pytest.fixture
+def config():
+    config = get_default_config()
+    config['signal_timeframe'] = 3
+    return config
+
+
+def _indicator_rows(dates, seed):
+    """Barres au format de historical_data (colonnes stockées uniquement)."""
+    rng = np.random.default_rng(seed)
+    n = len(dates)
+    close = 100 + rng.normal(0, 1, n).cumsum()
+    return pd.DataFrame({
+        'Date': dates,
+        'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+        'volume': rng.integers(1_000, 5_000, n),
+        'rsi': rng.uniform(10, 90, n).astype(np.float32),
+        'stochastic_k': rng.uniform(0, 100, n).astype(np.float32),
+        'stochastic_d': rng.uniform(0, 100, n).astype(np.float32),
+        'macd': rng.normal(0, 1, n), 'macd_signal': rng.normal(0, 1, n), 'macd_histogram': rng.normal(0, 1, n),
+        'trend': rng.choice(['bullish', 'neutral', 'bearish'], n),
+        'rsi_divergence': rng.choice(['none', 'bullish'], n),
+    })
+
+
+@pytest.fixture
+def history(config, monkeypatch):
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize() - pd.Timedelta(days=1), periods=560)
+    stored = _indicator_rows(dates, seed=40).assign(config_hash=config_fingerprint(config))
+    monkeypatch.setattr(db_schema, 'load_history', lambda asset_id, start: stored.copy())
+    monkeypatch.setattr(db_schema, 'save_history', lambda df, config_hash: None)
+    return stored
+
+
+def _check_derived_columns(df, config):
+    expected = df['rsi'].astype(np.float64).rolling(config['signal_timeframe'], min_periods=1).mean()
+    np.testing.assert_allclose(df['rsi_smoothed'].to_numpy(), expected.to_numpy(), rtol=1e-6)
+
+    contributions = calculate_individual_contributions(df, config)
+    for column in contributions.columns:
+        assert not df[column].isna().any(), column
+        np.testing.assert_allclose(df[column].to_numpy(), contributions[column].to_numpy(), rtol=1e-6,
+                                   err_msg=column)
+
+
+def test_history_read_as_is_gets_the_derived_columns(history, config, monkeypatch):
+    monkeypatch.setattr(data_handler, '_download_trailing', lambda ticker, stored: pd.DataFrame())
+
+    df = data_handler._load_from_history('AAA', 1, '2y', config, 'custom')
+
+    _check_derived_columns(df, config)
+
+
+def test_tail_recompute_keeps_one_schema_for_all_bars(history, config, monkeypatch):
+    last = history['Date'].iloc[-1]
+    new_dates = pd.bdate_range(last, periods=3)
+    trailing = _indicator_rows(new_dates, seed=41).set_index('Date')[['open', 'high', 'low', 'close', 'volume']]
+    trailing.columns = ['Open', 'High', 'Low', 'Close', 'Volume']
+    monkeypatch.setattr(data_handler, '_download_trailing', lambda ticker, stored: trailing)
+
+    def prepare(prices, config, asset_id, asset_category):
+        # Calcul complet simulé sur la fenêtre de fin de série
+        computed = _indicator_rows(prices.index, seed=42).assign(asset_id=asset_id, asset_category=asset_category)
+        return add_derived_columns(computed, config)
+
+    monkeypatch.setattr(data_handler, '_prepare_indicators', prepare)
+
+    df = data_handler._load_from_history('AAA', 1, '2y', config, 'custom')
+
+    assert df['Date'].iloc[-1] == new_dates[-1]
+    assert df['Date'].is_unique
+    _check_derived_columns(df, config)
@@ -0,0 +1,169 @@
+# tests/test_indicator_contributions.py
+"""
+Contributions achat / vente calculées pour toutes les barres : mêmes scores que l'ancien
+calcul barre par barre, avec ou sans colonnes précalculées.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import get_default_config, RSI, STOCHASTIC, ADX
+from indicator_calculator import (
+    calculate_individual_contributions,
+    calculate_individual_signals,
+    _safe_get,
+    _safe_num,
+)
+
+
+def _reference_individual_scores(row, config):
+    """Ancien calculate_individual_signals : (achat, vente) d'une barre."""
+    w = config.get('individual_weights', {})
+    rsi_cfg = config.get('rsi', RSI)
+    stoch_cfg = config.get('stochastic', STOCHASTIC)
+    adx_cfg = config.get('adx', ADX)
+    buy = sell = 0
+
+    rsi = _safe_num(row, 'rsi', 50)
+    stoch_k = _safe_num(row, 'stochastic_k', 50)
+    stoch_d = _safe_num(row, 'stochastic_d', 50)
+    macd = _safe_num(row, 'macd', 0)
+    macd_signal_val = _safe_num(row, 'macd_signal', 0)
+    macd_hist = _safe_num(row, 'macd_histogram', 0)
+    trend = _safe_get(row, 'trend', 'neutral')
+    pattern_dir = _safe_get(row, 'pattern_direction', 'neutral')
+    rsi_div = _safe_get(row, 'rsi_divergence', 'none')
+    bb_signal = _safe_get(row, 'bb_signal', 'neutral')
+    adx = _safe_num(row, 'adx', 0)
+    di_plus = _safe_num(row, 'di_plus', 0)
+    di_minus = _safe_num(row, 'di_minus', 0)
+
+    if w.get('rsi_divergence', 0) > 0:
+        if rsi_div == 'bullish':
+            buy += w['rsi_divergence']
+        elif rsi_div == 'bearish':
+            sell += w['rsi_divergence']
+
+    if w.get('rsi_extreme', 0) > 0:
+        if rsi <= rsi_cfg.get('oversold', 30):
+            buy += w['rsi_extreme']
+        elif rsi >= rsi_cfg.get('overbought', 70):
+            sell += w['rsi_extreme']
+    if w.get('rsi_exit_zone', 0) > 0:
+        if rsi_cfg.get('exit_oversold_min', 30) <= rsi <= rsi_cfg.get('exit_oversold_max', 40):
+            buy += w['rsi_exit_zone']
+        elif rsi_cfg.get('exit_overbought_min', 60) <= rsi <= rsi_cfg.get('exit_overbought_max', 70):
+            sell += w['rsi_exit_zone']
+
+    if w.get('stoch_cross', 0) > 0:
+        if stoch_k < stoch_cfg.get('oversold', 20) + 10 and stoch_k > stoch_d:
+            buy += w['stoch_cross']
+        elif stoch_k > stoch_cfg.get('overbought', 80) - 10 and stoch_k < stoch_d:
+            sell += w['stoch_cross']
+
+    if w.get('macd_cross', 0) > 0:
+        if macd > macd_signal_val and macd_hist > 0:
+            buy += w['macd_cross']
+        elif macd < macd_signal_val and macd_hist < 0:
+            sell += w['macd_cross']
+    if w.get('macd_histogram', 0) > 0:
+        if macd_hist > 0:
+            buy += w['macd_histogram']
+        elif macd_hist < 0:
+            sell += w['macd_histogram']
+
+    strong, weak = w.get('trend_strong', 0), w.get('trend_weak', 0)
+    if trend == 'strong_bullish' and strong > 0:
+        buy += strong
+    elif trend == 'bullish' and weak > 0:
+        buy += weak
+    elif trend == 'strong_bearish' and strong > 0:
+        sell += strong
+    elif trend == 'bearish' and weak > 0:
+        sell += weak
+
+    if w.get('pattern_signal', 0) > 0:
+        if pattern_dir == 'bullish':
+            buy += w['pattern_signal']
+        elif pattern_dir == 'bearish':
+            sell += w['pattern_signal']
+
+    if w.get('bollinger_touch', 0) > 0:
+        if bb_signal == 'lower_touch':
+            buy += w['bollinger_touch']
+        elif bb_signal == 'upper_touch':
+            sell += w['bollinger_touch']
+    if w.get('bollinger_zone', 0) > 0:
+        if bb_signal == 'lower_zone':
+            buy += w['bollinger_zone']
+        elif bb_signal == 'upper_zone':
+            sell += w['bollinger_zone']
+
+    if w.get('adx_direction', 0) > 0 and adx > adx_cfg.get('weak', 20):
+        if di_plus > di_minus:
+            buy += w['adx_direction']
+        else:
+            sell += w['adx_direction']
+
+    return buy, sell
+
+
+def _with_gaps(rng, values, n, missing_rate=0.1):
+    column = rng.choice(values, n).astype(object)
+    column[rng.random(n) < missing_rate] = None
+    return column
+
+
+@pytest.fixture
+def df_indicators():
+    """Barres synthétiques avec seuils exacts, valeurs manquantes et libellés absents."""
+    rng = np.random.default_rng(48)
+    n = 1000
+    return pd.DataFrame({
+        'Close': rng.uniform(50, 150, n),
+        'rsi': _with_gaps(rng, np.array([0, 25, 30, 35, 40, 45, 50, 60, 65, 70, 85], dtype=float), n),
+        'stochastic_k': _with_gaps(rng, np.array([5, 15, 29.9, 30, 50, 70, 70.1, 95], dtype=float), n),
+        'stochastic_d': _with_gaps(rng, np.array([10, 20, 30, 50, 70, 80, 90], dtype=float), n),
+        'macd': _with_gaps(rng, np.array([-1, -0.2, 0, 0.3, 1], dtype=float), n),
+        'macd_signal': _with_gaps(rng, np.array([-0.5, 0, 0.5], dtype=float), n),
+        'macd_histogram': _with_gaps(rng, np.array([-0.4, 0, 0.4], dtype=float), n),
+        'adx': _with_gaps(rng, np.array([10, 20, 20.5, 35], dtype=float), n),
+        'di_plus': _with_gaps(rng, np.array([10, 20, 30], dtype=float), n),
+        'di_minus': _with_gaps(rng, np.array([10, 20, 30], dtype=float), n),
+        'trend': _with_gaps(rng, np.array(['strong_bullish', 'bullish', 'neutral', 'bearish', 'strong_bearish']), n),
+        'pattern_direction': _with_gaps(rng, np.array(['bullish', 'neutral', 'bearish']), n),
+        'rsi_divergence': _with_gaps(rng, np.array(['bullish', 'none', 'bearish']), n),
+        'bb_signal': _with_gaps(rng, np.array(['lower_touch', 'lower_zone', 'neutral', 'upper_zone', 'upper_touch']), n),
+    })
+
+
+def _configs():
+    default = get_default_config()
+    partial = get_default_config()
+    partial['individual_weights'] = dict(partial['individual_weights'],
+                                         rsi_extreme=0, macd_histogram=0, trend_weak=0, bollinger_zone=-1)
+    return [default, partial]
+
+
+@pytest.mark.parametrize('config', _configs(), ids=['default', 'partial_weights'])
+def test_contributions_match_row_wise_signals(df_indicators, config):
+    contributions = calculate_individual_contributions(df_indicators, config)
+    buy = contributions.filter(like='_buy').sum(axis=1).to_numpy()
+    sell = contributions.filter(like='_sell').sum(axis=1).to_numpy()
+
+    expected = np.array([_reference_individual_scores(row, config) for _, row in df_indicators.iterrows()])
+
+    np.testing.assert_allclose(buy, expected[:, 0], rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(sell, expected[:, 1], rtol=1e-12, atol=1e-12)
+
+
+def test_signals_with_and_without_precomputed_columns(df_indicators):
+    """Colonnes contrib_* précalculées, ou barre relue depuis la base sans ces colonnes : même score."""
+    config = get_default_config()
+    sample = df_indicators.head(200)
+    precomputed = pd.concat([sample, calculate_individual_contributions(sample, config)], axis=1)
+
+    for frame in (sample, precomputed):
+        for _, row in frame.iterrows():
+            buy, sell, _ = calculate_individual_signals(row, config, active_flags=None)
+            assert (buy, sell) == pytest.approx(_reference_individual_scores(row, config))
@@ -0,0 +1,110 @@
+# tests/test_mmap_store.py
+"""Panneaux mappés : écriture, relecture sans copie, expiration et repli sur le calcul."""
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import mmap_store
+
+
+@pytest.fixture(autouse=True)
+def panel_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(mmap_store, 'PANEL_STORE_DIR', str(tmp_path / 'panels'))
+    # Pas de nettoyage automatique pendant les écritures des tests
+    monkeypatch.setattr(mmap_store, '_last_purge', [time.time()])
+    mmap_store._open_panels.clear()
+    yield tmp_path / 'panels'
+    mmap_store._open_panels.clear()
+
+
+def _indicator_frame(rows=50):
+    rng = np.random.default_rng(50)
+    return pd.DataFrame({
+        'Date': pd.date_range('2024-01-01', periods=rows, freq='B', tz='Europe/Paris'),
+        'close': rng.normal(100, 5, rows),
+        'rsi': rng.uniform(0, 100, rows).astype(np.float32),
+        'volume': rng.integers(0, 10_000, rows),
+        'conviction': pd.array(rng.integers(0, 6, rows), dtype='Int64'),
+        'trend': pd.Categorical(rng.choice(['bullish', 'neutral', 'bearish'], rows)),
+        'rsi_divergence': rng.choice(np.array(['none', 'bullish', None], dtype=object), rows),
+    })
+
+
+def test_roundtrip_keeps_values_and_dtypes():
+    df = _indicator_frame()
+    assert mmap_store.store_frame('AAA', ('1d', '1y'), df, ttl=60)
+
+    loaded = mmap_store.load_frame('AAA', ('1d', '1y'))
+
+    expected = df.assign(conviction=df['conviction'].astype(np.float64))
+    pd.testing.assert_frame_equal(loaded, expected)
+    assert mmap_store.load_frame('AAA', ('1d', '5y')) is None
+
+
+def test_loaded_frame_can_be_modified_without_touching_the_panel():
+    df = _indicator_frame().set_index('Date')
+    mmap_store.store_frame('AAA', 'key', df, ttl=60)
+
+    first = mmap_store.load_frame('AAA', 'key')
+    first['close'] = 0.0
+    first['extra'] = 1
+
+    second = mmap_store.load_frame('AAA', 'key')
+    np.testing.assert_array_equal(second['close'], df['close'])
+    assert 'extra' not in second.columns
+    pd.testing.assert_index_equal(second.index, df.index)
+
+
+def test_expired_panel_is_a_miss():
+    mmap_store.store_frame('AAA', 'key', _indicator_frame(), ttl=-1)
+
+    assert mmap_store.load_frame('AAA', 'key') is None
+    assert mmap_store.purge_panels() == 1
+
+
+def test_cached_frame_computes_once():
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return _indicator_frame()
+
+    first = mmap_store.cached_frame('AAA', 'key', compute, ttl=60)
+    second = mmap_store.cached_frame('AAA', 'key', compute, ttl=60)
+
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_non_columnar_frames_are_returned_without_being_stored():
+    df = _indicator_frame().assign(active_combinations=[['a']] * 50)
+
+    result = mmap_store.cached_frame('AAA', 'key', lambda: df, ttl=60)
+
+    assert result is df
+    assert mmap_store.load_frame('AAA', 'key') is None
+    assert mmap_store.cached_frame('BBB', 'key', pd.DataFrame, ttl=60, is_valid=lambda f: not f.empty).empty
+
+
+def test_invalidate_removes_only_the_ticker_panels():
+    mmap_store.store_frame('AAA', 'key', _indicator_frame(), ttl=60)
+    mmap_store.store_frame('BBB', 'key', _indicator_frame(), ttl=60)
+
+    mmap_store.invalidate('AAA')
+
+    assert mmap_store.load_frame('AAA', 'key') is None
+    assert mmap_store.load_frame('BBB', 'key') is not None
+
+
+def test_cached_frame_returns_the_computed_frame_when_the_panel_is_purged(monkeypatch):
+    # Panneau supprimé par le nettoyage déclenché juste après son écriture
+    monkeypatch.setattr(mmap_store, 'PANEL_STORE_MAX_BYTES', 1000)
+    monkeypatch.setattr(mmap_store, '_last_purge', [0.0])
+    df = _indicator_frame()
+
+    result = mmap_store.cached_frame('AAA', 'key', lambda: df, ttl=60)
+
+    assert result is df
+    assert mmap_store.load_frame('AAA', 'key') is None
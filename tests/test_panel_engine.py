@@ -0,0 +1,165 @@
+# tests/test_panel_engine.py
+"""
+Le panel calcule tous les tickers à la fois : chaque colonne doit donner le résultat
+du calcul mono-ticker (compactage des jours fériés propres à chaque ticker), les formules
+celles de pandas_ta, et les divergences celles de detect_rsi_divergence.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import get_default_config
+from indicator_calculator import detect_rsi_divergence
+from panel_engine import build_panel, compute_panel_indicators, panel_frame, panel_latest, PRICE_FIELDS
+
+TICKERS = ['AAA', 'BBB', 'CCC', 'DDD']
+
+
+@pytest.fixture(scope='module')
+def prices():
+    """Calendrier commun avec des débuts décalés et des jours fériés propres à chaque ticker."""
+    rng = np.random.default_rng(35)
+    dates = pd.bdate_range('2023-01-02', periods=400)
+    fields = {field: {} for field in PRICE_FIELDS}
+    for i, ticker in enumerate(TICKERS):
+        # Oscillations marquées pour produire des pivots et des divergences
+        t = np.arange(len(dates))
+        close = 100 + 8 * np.sin(t / (6 + 2 * i)) + rng.normal(0, 1.5, len(dates)).cumsum()
+        opening = close + rng.normal(0, 0.5, len(dates))
+        high = np.maximum(opening, close) + rng.uniform(0, 1, len(dates))
+        low = np.minimum(opening, close) - rng.uniform(0, 1, len(dates))
+        volume = rng.integers(1_000, 50_000, len(dates)).astype(float)
+
+        closed = np.zeros(len(dates), dtype=bool)
+        closed[:30 * i] = True
+        closed[rng.random(len(dates)) < 0.03] = True
+        for field, values in zip(PRICE_FIELDS, (opening, high, low, close, volume)):
+            fields[field][ticker] = np.where(closed, np.nan, values)
+    return {field: pd.DataFrame(columns, index=dates) for field, columns in fields.items()}
+
+
+def _single_ticker_prices(prices, ticker):
+    """Séances d'un seul ticker, sans les dates où il ne cote pas."""
+    sessions = prices['close'][ticker].notna()
+    return {field: matrix.loc[sessions, [ticker]] for field, matrix in prices.items()}
+
+
+def _reference_rsi(close, length):
+    """RSI de Wilder (pandas_ta.rsi) sur la série d'un seul ticker."""
+    delta = close.diff()
+    gains = delta.clip(lower=0).ewm(alpha=1.0 / length, min_periods=length).mean()
+    losses = delta.clip(upper=0).abs().ewm(alpha=1.0 / length, min_periods=length).mean()
+    return 100 * gains / (gains + losses)
+
+
+def _reference_frame(prices, ticker, config):
+    close = prices['close'][ticker].dropna()
+    df = pd.DataFrame({'Close': close.to_numpy()}, index=close.index)
+    df['rsi'] = _reference_rsi(df['Close'], config['rsi']['period']).to_numpy()
+    df['rsi_divergence'] = detect_rsi_divergence(df, lookback=config['divergence']['lookback_period'], config=config)
+    return df
+
+
+def test_panel_matches_single_ticker_computation(prices):
+    config = get_default_config()
+    panel = compute_panel_indicators(build_panel(prices), config, indicators=['divergence'])
+
+    events = 0
+    for ticker in TICKERS:
+        expected = _reference_frame(prices, ticker, config)
+        frame = panel_frame(panel, ticker)
+
+        np.testing.assert_array_equal(frame['Date'].to_numpy(), expected.index.to_numpy())
+        np.testing.assert_allclose(frame['rsi'].to_numpy(), expected['rsi'].to_numpy(),
+                                   rtol=1e-10, equal_nan=True, err_msg=ticker)
+        assert list(frame['rsi_divergence']) == list(expected['rsi_divergence']), ticker
+        events += int((expected['rsi_divergence'] != 'none').sum())
+
+    # Le jeu de données doit réellement contenir des divergences
+    assert events > 0
+
+
+def test_recent_rows_limits_detection_to_the_last_sessions(prices):
+    config = get_default_config()
+    recent = 40
+    panel = compute_panel_indicators(build_panel(prices), config, indicators=['divergence'], recent_rows=recent)
+
+    for ticker in TICKERS:
+        expected = _reference_frame(prices, ticker, config)['rsi_divergence'].tolist()
+        labels = panel_frame(panel, ticker)['rsi_divergence'].tolist()
+
+        assert labels[-recent:] == expected[-recent:], ticker
+        assert set(labels[:-recent]) <= {'none'}, ticker
+
+
+def test_panel_latest_is_the_last_session_of_each_ticker(prices):
+    config = get_default_config()
+    panel = compute_panel_indicators(build_panel(prices), config, indicators=['rsi'])
+    latest = panel_latest(panel, fields=['close', 'rsi'])
+
+    for ticker in TICKERS:
+        expected = _reference_frame(prices, ticker, config)
+        assert latest.loc[ticker, 'close'] == expected['Close'].iloc[-1]
+        assert latest.loc[ticker, 'rsi'] == pytest.approx(expected['rsi'].iloc[-1], rel=1e-10)
+        assert latest.loc[ticker, 'length'] == len(expected)
+
+
+def test_every_column_matches_the_ticker_computed_alone(prices):
+    """Un ticker calculé parmi d'autres (jours fériés différents) ou seul donne les mêmes valeurs."""
+    config = get_default_config()
+    panel = compute_panel_indicators(build_panel(prices), config)
+
+    for ticker in TICKERS:
+        alone = compute_panel_indicators(build_panel(_single_ticker_prices(prices, ticker)), config)
+        pd.testing.assert_frame_equal(panel_frame(panel, ticker), panel_frame(alone, ticker),
+                                      check_exact=False, rtol=1e-10, obj=ticker)
+
+
+def _pandas_ta_frame(prices, ticker, config):
+    """Indicateurs calculés par pandas_ta comme dans calculate_all_indicators."""
+    single = _single_ticker_prices(prices, ticker)
+    df = pd.DataFrame({field: single[field][ticker] for field in PRICE_FIELDS})
+    stoch, macd, adx = config['stochastic'], config['macd'], config['adx']
+    bb, ma = config['bollinger'], config['moving_averages']
+
+    df.ta.stoch(k=stoch['k_period'], d=stoch['d_period'], append=True)
+    df.ta.rsi(length=config['rsi']['period'], append=True)
+    bands = df.ta.bbands(length=bb['period'], std=bb['std_dev'])
+    df.ta.macd(fast=macd['fast'], slow=macd['slow'], signal=macd['signal'], append=True)
+    df.ta.adx(length=adx['period'], append=True)
+
+    macd_suffix = f"{macd['fast']}_{macd['slow']}_{macd['signal']}"
+    return pd.DataFrame({
+        'stochastic_k': df[f"STOCHk_{stoch['k_period']}_{stoch['d_period']}_3"],
+        'stochastic_d': df[f"STOCHd_{stoch['k_period']}_{stoch['d_period']}_3"],
+        'rsi': df[f"RSI_{config['rsi']['period']}"],
+        # Colonnes Bollinger dans l'ordre L, M, U, B, P (suffixes variables selon la version)
+        'bb_lower': bands.iloc[:, 0],
+        'bb_middle': bands.iloc[:, 1],
+        'bb_upper': bands.iloc[:, 2],
+        'bb_bandwidth': bands.iloc[:, 3],
+        'bb_percent': bands.iloc[:, 4],
+        'sma_20': df.ta.sma(length=ma['sma_short']),
+        'ema_12': df.ta.ema(length=ma['ema_fast']),
+        'ema_26': df.ta.ema(length=ma['ema_slow']),
+        'macd': df[f'MACD_{macd_suffix}'],
+        'macd_signal': df[f'MACDs_{macd_suffix}'],
+        'macd_histogram': df[f'MACDh_{macd_suffix}'],
+        'adx': df[f"ADX_{adx['period']}"],
+        'di_plus': df[f"DMP_{adx['period']}"],
+        'di_minus': df[f"DMN_{adx['period']}"],
+    })
+
+
+def test_indicators_match_pandas_ta(prices):
+    pytest.importorskip('pandas_ta')
+    config = get_default_config()
+    panel = compute_panel_indicators(build_panel(prices), config)
+
+    for ticker in TICKERS:
+        expected = _pandas_ta_frame(prices, ticker, config)
+        frame = panel_frame(panel, ticker)
+        for column in expected.columns:
+            np.testing.assert_allclose(frame[column].to_numpy(dtype=float),
+                                       expected[column].to_numpy(dtype=float),
+                                       rtol=1e-8, atol=1e-8, equal_nan=True, err_msg=f"{ticker} {column}")
@@ -0,0 +1,118 @@
+# tests/test_portfolio_backtest.py
+"""Simulation du portefeuille de divergences sur des prix construits à la main."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicator_calculator import DIVERGENCE_PIVOT_WINDOW
+from portfolio_backtest import run_portfolio_backtest, build_signal_matrix, DEFAULT_CAPITAL
+
+DATES = pd.bdate_range('2024-01-01', periods=60)
+SPREAD = 0.5
+HALF_SPREAD = SPREAD / 100 / 2
+
+
+def _prices(tickers, closed=None):
+    """Tendance linéaire par ticker, ouverture 0,5 sous la clôture ; `closed` : {ticker: lignes sans séance}."""
+    close = pd.DataFrame({ticker: 100.0 + 10 * n + np.arange(len(DATES)) for n, ticker in enumerate(tickers)},
+                         index=DATES)
+    for ticker, rows in (closed or {}).items():
+        close.iloc[rows, close.columns.get_loc(ticker)] = np.nan
+    return {'open': close - 0.5, 'close': close}
+
+
+def _event(row, ticker, kind='bullish'):
+    return {'date': DATES[row], 'ticker': ticker, 'type': kind}
+
+
+def _signal_row(event_row):
+    """Séance de confirmation du pivot : la divergence n'est connue qu'à sa clôture."""
+    return event_row + DIVERGENCE_PIVOT_WINDOW
+
+
+def _entry_row(event_row):
+    """Achat à l'ouverture de la séance suivante."""
+    return _signal_row(event_row) + 1
+
+
+def test_without_signals_the_capital_is_untouched():
+    result = run_portfolio_backtest([], _prices(['AAA']))
+
+    assert result['trades'].empty
+    assert (result['curve']['equity'] == DEFAULT_CAPITAL).all()
+    assert result['stats']['total_return'] == 0
+
+
+def test_position_is_held_for_the_holding_period():
+    prices = _prices(['AAA'])
+    result = run_portfolio_backtest([_event(10, 'AAA')], prices, holding_period=5, max_positions=1,
+                                    spread_pct=SPREAD)
+
+    trade = result['trades'].iloc[0]
+    entry, exit_ = _entry_row(10), _entry_row(10) + 4
+    assert trade['entry_date'] == DATES[entry]
+    assert trade['exit_date'] == DATES[exit_]
+    assert trade['bars_held'] == 4
+    assert trade['exit_reason'] == 'holding'
+    assert trade['entry_price'] == pytest.approx(prices['open']['AAA'].iloc[entry] * (1 + HALF_SPREAD))
+    assert trade['exit_price'] == pytest.approx(prices['close']['AAA'].iloc[exit_] * (1 - HALF_SPREAD))
+
+    final = result['curve']['equity'].iloc[-1]
+    assert final == pytest.approx(DEFAULT_CAPITAL * trade['exit_price'] / trade['entry_price'])
+
+
+def test_bearish_divergence_closes_the_position_early():
+    events = [_event(10, 'AAA'), _event(13, 'AAA', 'bearish')]
+    result = run_portfolio_backtest(events, _prices(['AAA']), holding_period=20)
+
+    trade = result['trades'].iloc[0]
+    assert trade['exit_reason'] == 'bearish'
+    assert trade['exit_date'] == DATES[_signal_row(13)]
+
+
+def test_holding_period_counts_the_ticker_sessions():
+    # Deux jours sans séance pendant la détention : la sortie est repoussée d'autant
+    entry = _entry_row(10)
+    prices = _prices(['AAA'], closed={'AAA': [entry + 1, entry + 2]})
+    result = run_portfolio_backtest([_event(10, 'AAA')], prices, holding_period=5)
+
+    trade = result['trades'].iloc[0]
+    assert trade['bars_held'] == 4
+    assert trade['exit_date'] == DATES[entry + 6]
+
+
+def test_signals_beyond_the_free_slots_are_skipped():
+    tickers = ['AAA', 'BBB', 'CCC']
+    events = [_event(10, ticker) for ticker in tickers] + [_event(12, 'AAA')]
+    result = run_portfolio_backtest(events, _prices(tickers), holding_period=10, max_positions=2)
+
+    stats = result['stats']
+    assert stats['skipped_no_slot'] == 1
+    assert stats['skipped_in_position'] == 1
+    assert result['curve']['positions'].max() == 2
+    # Chaque position reçoit la moitié du capital
+    first = result['curve'].iloc[_entry_row(10)]
+    assert first['cash'] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_entry_waits_for_the_pivot_confirmation():
+    # Le pivot (ligne 10) n'est confirmé qu'après DIVERGENCE_PIVOT_WINDOW séances du ticker ;
+    # un jour sans séance dans cet intervalle repousse la confirmation d'autant
+    prices = _prices(['AAA'], closed={'AAA': [12]})
+    result = run_portfolio_backtest([_event(10, 'AAA')], prices, holding_period=5)
+
+    confirmation = 10 + DIVERGENCE_PIVOT_WINDOW + 1
+    assert result['trades'].iloc[0]['entry_date'] == DATES[confirmation + 1]
+    assert result['curve']['positions'].iloc[:confirmation + 1].max() == 0
+
+
+def test_signal_matrix_places_events_on_their_confirmation_session():
+    valid = np.ones((len(DATES), 2), dtype=bool)
+    valid[3, 1] = False
+    events = [_event(0, 'AAA'), _event(0, 'BBB', 'bearish'), _event(len(DATES) - 2, 'AAA')]
+
+    signals = build_signal_matrix(events, DATES, ['AAA', 'BBB'], valid=valid)
+
+    assert np.flatnonzero(signals[:, 0]).tolist() == [DIVERGENCE_PIVOT_WINDOW]
+    assert np.flatnonzero(signals[:, 1]).tolist() == [DIVERGENCE_PIVOT_WINDOW + 1]
+    assert signals[DIVERGENCE_PIVOT_WINDOW + 1, 1] == -1
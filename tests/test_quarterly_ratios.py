@@ -0,0 +1,198 @@
+# tests/test_quarterly_ratios.py
+"""
+Ratios trimestriels : le calcul colonne par colonne (merge_asof pour les prix) reproduit
+l'ancien calcul trimestre par trimestre, conservé ici comme référence.
+"""
+import numpy as np
+import pandas as pd
+
+from fundamental_analyzer import calculate_quarterly_history, get_quarter_string
+
+QUARTERS = pd.to_datetime([
+    '2022-03-31', '2022-06-30', '2022-09-30', '2022-12-31',
+    '2023-03-31', '2023-06-30', '2023-09-30', '2023-12-31', '2024-03-31',
+])
+
+
+class FakeTicker:
+    """Ticker yfinance minimal : états trimestriels et cours de clôture fixes."""
+
+    def __init__(self):
+        rng = np.random.default_rng(31)
+        n = len(QUARTERS)
+        # Colonnes du plus récent au plus ancien, comme yfinance
+        columns = QUARTERS[::-1]
+
+        revenue = rng.uniform(800, 1200, n)
+        revenue[2] = 0  # dénominateur nul
+        net_income = rng.uniform(-50, 150, n)
+        net_income[4] = np.nan
+        self.quarterly_financials = pd.DataFrame({
+            'Total Revenue': revenue,
+            'Gross Profit': revenue * 0.4,
+            'EBIT': revenue * 0.15,  # nom alternatif
+            'Net Income': net_income,
+            'Net Income Common Stockholders': net_income + 1,  # ignoré sauf si Net Income manque
+        }, index=columns).T
+
+        equity = rng.uniform(2000, 3000, n)
+        equity[5] = 0
+        inventory = rng.uniform(50, 100, n)
+        inventory[1] = 0
+        debt = rng.uniform(500, 900, n)
+        debt[3] = np.nan
+        balance = pd.DataFrame({
+            'Stockholders Equity': equity,
+            'Total Assets': equity * 2.5,
+            'Long Term Debt': debt,
+            'Current Assets': rng.uniform(600, 900, n),
+            'Current Liabilities': rng.uniform(300, 500, n),
+            'Inventory': inventory,
+        }, index=columns).T
+        # Le bilan ne couvre pas le trimestre le plus ancien
+        self.quarterly_balance_sheet = balance.iloc[:, :-1]
+
+        fcf = rng.uniform(-20, 80, n)
+        fcf[[0, 6]] = np.nan  # reconstruit à partir du cash flow opérationnel et du capex
+        self.quarterly_cashflow = pd.DataFrame({
+            'Free Cash Flow': fcf,
+            'Operating Cash Flow': rng.uniform(50, 150, n),
+            'Capital Expenditure': -rng.uniform(10, 40, n),
+        }, index=columns).T
+
+        # Séances ouvrées avec un trou de plus de 9 jours après un trimestre
+        dates = pd.bdate_range('2021-01-01', '2024-06-28', tz='America/New_York')
+        dates = dates[(dates < '2023-06-30') | (dates > '2023-07-20')]
+        close = 100 + rng.normal(0, 1, len(dates)).cumsum()
+        self._hist = pd.DataFrame({'Close': close}, index=dates)
+        self.info = {'sharesOutstanding': 1_000}
+
+    def history(self, period=None):
+        return self._hist
+
+
+def _get_financial_value(df, date, possible_names):
+    if df.empty or date not in df.columns:
+        return None
+    for name in possible_names:
+        if name in df.index:
+            val = df.loc[name, date]
+            if pd.notna(val):
+                return val
+    return None
+
+
+def _get_price_at_date(hist, target_date):
+    target = pd.Timestamp(target_date).tz_localize(None)
+    hist_copy = hist.copy()
+    hist_copy.index = hist_copy.index.tz_localize(None)
+    for delta in range(0, 10):
+        check_date = target + pd.Timedelta(days=delta)
+        if check_date in hist_copy.index:
+            return hist_copy.loc[check_date, 'Close']
+    idx = hist_copy.index.get_indexer([target], method='nearest')[0]
+    return hist_copy.iloc[idx]['Close']
+
+
+def _reference_quarterly_history(ticker):
+    """Ancien calculate_quarterly_history, trimestre par trimestre."""
+    qf, qb, qc = ticker.quarterly_financials, ticker.quarterly_balance_sheet, ticker.quarterly_cashflow
+    hist = ticker.history(period="5y")
+    shares = ticker.info.get('sharesOutstanding', None)
+    records = []
+
+    for quarter_date in qf.columns:
+        record = {'date': quarter_date, 'quarter': get_quarter_string(quarter_date)}
+        net_income = _get_financial_value(qf, quarter_date, ['Net Income', 'Net Income Common Stockholders', 'NetIncome'])
+        total_revenue = _get_financial_value(qf, quarter_date, ['Total Revenue', 'TotalRevenue', 'Revenue'])
+        gross_profit = _get_financial_value(qf, quarter_date, ['Gross Profit', 'GrossProfit'])
+        operating_income = _get_financial_value(qf, quarter_date, ['Operating Income', 'OperatingIncome', 'EBIT'])
+
+        if quarter_date in qb.columns:
+            total_equity = _get_financial_value(qb, quarter_date, ['Stockholders Equity', 'Total Stockholder Equity', 'StockholdersEquity', 'Total Equity'])
+            total_assets = _get_financial_value(qb, quarter_date, ['Total Assets', 'TotalAssets'])
+            total_debt = _get_financial_value(qb, quarter_date, ['Total Debt', 'TotalDebt', 'Long Term Debt', 'LongTermDebt'])
+            current_assets = _get_financial_value(qb, quarter_date, ['Current Assets', 'CurrentAssets', 'Total Current Assets'])
+            current_liabilities = _get_financial_value(qb, quarter_date, ['Current Liabilities', 'CurrentLiabilities', 'Total Current Liabilities'])
+            inventory = _get_financial_value(qb, quarter_date, ['Inventory', 'Inventories'])
+        else:
+            total_equity = total_assets = total_debt = None
+            current_assets = current_liabilities = inventory = None
+
+        free_cash_flow = _get_financial_value(qc, quarter_date, ['Free Cash Flow', 'FreeCashFlow'])
+        if free_cash_flow is None:
+            operating_cf = _get_financial_value(qc, quarter_date, ['Operating Cash Flow', 'Cash Flow From Operating Activities'])
+            capex = _get_financial_value(qc, quarter_date, ['Capital Expenditure', 'Capital Expenditures', 'CapEx'])
+            if operating_cf is not None and capex is not None:
+                free_cash_flow = operating_cf + capex
+
+        quarter_price = _get_price_at_date(hist, quarter_date)
+
+        if total_revenue and total_revenue != 0:
+            record['gross_margin'] = (gross_profit / total_revenue * 100) if gross_profit else None
+            record['operating_margin'] = (operating_income / total_revenue * 100) if operating_income else None
+            record['net_margin'] = (net_income / total_revenue * 100) if net_income else None
+        if total_equity and total_equity != 0 and net_income:
+            record['roe'] = (net_income / total_equity * 100) * 4
+        if total_assets and total_assets != 0 and net_income:
+            record['roa'] = (net_income / total_assets * 100) * 4
+        if total_equity and total_equity != 0 and total_debt:
+            record['debt_equity'] = total_debt / total_equity
+        if current_liabilities and current_liabilities != 0:
+            if current_assets:
+                record['current_ratio'] = current_assets / current_liabilities
+            if current_assets and inventory:
+                record['quick_ratio'] = (current_assets - inventory) / current_liabilities
+        if shares and net_income:
+            eps = (net_income * 4) / shares
+            record['eps'] = eps
+            if quarter_price and eps and eps != 0:
+                record['pe_ratio'] = quarter_price / eps
+        if shares and total_equity and quarter_price:
+            book_per_share = total_equity / shares
+            if book_per_share and book_per_share != 0:
+                record['pb_ratio'] = quarter_price / book_per_share
+        if shares and total_revenue and quarter_price:
+            sales_per_share = (total_revenue * 4) / shares
+            if sales_per_share and sales_per_share != 0:
+                record['ps_ratio'] = quarter_price / sales_per_share
+
+        record['free_cash_flow'] = free_cash_flow
+        record['price'] = quarter_price
+        if quarter_price and shares:
+            record['market_cap'] = quarter_price * shares
+        record['revenue'] = total_revenue
+        record['net_income'] = net_income
+        records.append(record)
+
+    df = pd.DataFrame(records)
+    df['date'] = pd.to_datetime(df['date'])
+    df = df.sort_values('date').reset_index(drop=True)
+    for col in ['revenue', 'net_income', 'eps', 'free_cash_flow']:
+        df[f'{col}_yoy'] = df[col].astype(float).pct_change(periods=4, fill_method=None) * 100
+    return df
+
+
+def test_quarterly_history_matches_row_wise_reference():
+    ticker = FakeTicker()
+    expected = _reference_quarterly_history(ticker)
+    result = calculate_quarterly_history(ticker)
+
+    assert result is not None
+    assert list(result['quarter']) == list(expected['quarter'])
+    np.testing.assert_array_equal(result['date'].values, expected['date'].values)
+
+    ratio_cols = [col for col in expected.columns if col not in ('date', 'quarter')]
+    assert set(ratio_cols) <= set(result.columns)
+    for col in ratio_cols:
+        np.testing.assert_allclose(
+            result[col].astype(float).values, expected[col].astype(float).values,
+            rtol=1e-12, equal_nan=True, err_msg=col,
+        )
+
+
+def test_quarterly_history_without_prices_is_a_failure():
+    ticker = FakeTicker()
+    ticker._hist = ticker._hist.iloc[:0]
+
+    assert calculate_quarterly_history(ticker) is None
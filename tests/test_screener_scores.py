@@ -0,0 +1,95 @@
+# tests/test_screener_scores.py
+"""
+Score du screener : une passe vectorisée sur toute la watchlist, identique à
+calculate_fundamental_score appliqué ligne par ligne.
+"""
+import numpy as np
+import pandas as pd
+
+from fundamental_analyzer import calculate_fundamental_score
+from fundamental_screener import calculate_fundamental_scores
+
+# Valeurs testées par ratio : seuils exacts, zéros, négatifs et absences
+RATIO_VALUES = {
+    'pe_ratio': [-5, 0, 10, 15, 19.9, 20, 25, 34, 35, 80],
+    'peg_ratio': [-1, 0, 0.5, 1, 1.2, 1.5, 2, 3],
+    'roe': [-10, 0, 5, 5.1, 10, 15, 20, 20.1, 40],
+    'net_margin': [-3, 0, 5, 6, 10, 15, 20, 25],
+    'debt_equity': [0, 0.2, 0.3, 0.5, 0.8, 1, 2, 5],
+    'current_ratio': [0.5, 1, 1.2, 1.5, 2, 3],
+    'revenue_growth': [-20, 0, 0.1, 5, 10, 20, 30],
+    'earnings_growth': [-50, 0, 3, 5, 10, 15, 20, 60],
+}
+
+
+def _synthetic_watchlist(n=500, missing_rate=0.25):
+    rng = np.random.default_rng(32)
+    data = {}
+    for ratio, values in RATIO_VALUES.items():
+        column = rng.choice(np.asarray(values, dtype=float), n)
+        column[rng.random(n) < missing_rate] = np.nan
+        data[ratio] = column
+    df = pd.DataFrame(data)
+    df.insert(0, 'ticker', [f'T{i:03d}' for i in range(n)])
+    # Une ligne sans aucune donnée
+    df.loc[0, list(RATIO_VALUES)] = np.nan
+    return df
+
+
+def test_vectorized_scores_match_row_wise_score():
+    df = _synthetic_watchlist()
+    result = calculate_fundamental_scores(df)
+
+    category_cols = {
+        'valuation': 'valuation_score',
+        'profitability': 'profitability_score',
+        'financial_health': 'financial_health_score',
+        'growth': 'growth_score',
+    }
+    for i, row in df.iterrows():
+        # Les données courantes utilisent None pour une valeur absente
+        current = {ratio: (None if pd.isna(row[ratio]) else row[ratio]) for ratio in RATIO_VALUES}
+        score, details = calculate_fundamental_score(current)
+
+        if score is None:
+            assert pd.isna(result.loc[i, 'score']), row['ticker']
+        else:
+            assert result.loc[i, 'score'] == score, row['ticker']
+
+        for category, column in category_cols.items():
+            if category in details:
+                assert result.loc[i, column] == details[category], (row['ticker'], category)
+            else:
+                assert pd.isna(result.loc[i, column]), (row['ticker'], category)
+
+
+def test_scores_keep_input_columns():
+    df = _synthetic_watchlist(n=20)
+    result = calculate_fundamental_scores(df)
+
+    pd.testing.assert_frame_equal(result[df.columns], df)
+    assert calculate_fundamental_scores(df.iloc[:0]).empty
+
+
+def test_empty_snapshot_read_is_cached(monkeypatch):
+    import fundamental_screener as screener
+
+    calls = []
+
+    def load():
+        calls.append(1)
+        return pd.DataFrame(columns=screener.SNAPSHOT_COLUMNS), None
+
+    monkeypatch.setattr(screener, 'load_latest_snapshot', load)
+    monkeypatch.setattr(screener, '_snapshot', {
+        'date': None, 'loaded_at': None, 'data': pd.DataFrame(columns=screener.SNAPSHOT_COLUMNS)
+    })
+
+    for _ in range(3):
+        data, snapshot_date = screener.get_snapshot()
+        assert data.empty and snapshot_date is None
+    assert len(calls) == 1
+
+    monkeypatch.setattr(screener, 'SNAPSHOT_RELOAD_DELAY', 0)
+    screener.get_snapshot()
+    assert len(calls) == 2
@@ -0,0 +1,49 @@
+# tests/test_single_flight.py
+"""
+Regroupement des appels concurrents : le premier appelant ne doit pas recevoir
+l'objet que les appelants en attente copient.
+"""
+import threading
+import time
+
+import pandas as pd
+
+import single_flight as sf
+
+
+def test_leader_gets_its_own_copy_when_shared():
+    release = threading.Event()
+    original = pd.DataFrame({'close': [1.0, 2.0, 3.0]})
+
+    def compute():
+        release.wait(5)
+        return original
+
+    results = {}
+
+    def run(name):
+        results[name] = sf.single_flight(('test', 'shared'), compute)
+
+    leader = threading.Thread(target=run, args=('leader',))
+    leader.start()
+    while ('test', 'shared') not in sf.in_flight_keys():
+        time.sleep(0.001)
+    waiter = threading.Thread(target=run, args=('waiter',))
+    waiter.start()
+    while sf._calls[('test', 'shared')].waiters == 0:
+        time.sleep(0.001)
+
+    release.set()
+    leader.join()
+    waiter.join()
+
+    assert results['leader'] is not original
+    assert results['waiter'] is not original
+    assert results['leader'] is not results['waiter']
+    pd.testing.assert_frame_equal(results['leader'], original)
+    pd.testing.assert_frame_equal(results['waiter'], original)
+
+
+def test_single_caller_gets_result_without_copy():
+    original = pd.DataFrame({'close': [1.0]})
+    assert sf.single_flight(('test', 'alone'), lambda: original) is original
@@ -0,0 +1,78 @@
+# tests/test_store_codec.py
+"""Aller-retour encode / decode des DataFrames placés dans les dcc.Store."""
+import json
+
+import numpy as np
+import pandas as pd
+
+from store_codec import (
+    encode_frame, decode_frame, decode_column, encode_store, decode_store, is_encoded_frame,
+)
+
+
+def _indicator_frame():
+    return pd.DataFrame({
+        'Date': pd.date_range('2024-01-01', periods=5, freq='D'),
+        'close': [100.5, 101.25, np.nan, 99.0, 98.75],
+        'rsi': np.array([30.5, 45.0, 55.5, np.nan, 70.25], dtype=np.float32),
+        'volume': np.array([1000, 2000, 3000, 4000, 5000], dtype=np.int64),
+        'conviction': pd.array([1, None, 3, 4, 5], dtype='Int64'),
+        'is_pivot': [True, False, False, True, False],
+        'trend': pd.Categorical(['bullish', 'neutral', None, 'bearish', 'bullish']),
+        'recommendation': ['Acheter', None, 'Neutre', 'Vendre', 'Neutre'],
+        'active_combinations': [['a', 'b'], [], None, ['c'], []],
+    })
+
+
+def test_frame_roundtrip_through_json():
+    df = _indicator_frame()
+    # Le payload passe par le JSON du navigateur
+    payload = json.loads(json.dumps(encode_frame(df)))
+    decoded = decode_frame(payload)
+
+    assert list(decoded.columns) == list(df.columns)
+    np.testing.assert_array_equal(decoded['Date'].to_numpy(dtype='datetime64[ms]'),
+                                  df['Date'].to_numpy(dtype='datetime64[ms]'))
+    np.testing.assert_array_equal(decoded['close'], df['close'])
+    assert decoded['rsi'].dtype == np.float32
+    np.testing.assert_array_equal(decoded['rsi'], df['rsi'])
+    assert decoded['volume'].dtype == np.int64
+    np.testing.assert_array_equal(decoded['volume'], df['volume'])
+    np.testing.assert_array_equal(decoded['conviction'], [1, np.nan, 3, 4, 5])
+    assert decoded['is_pivot'].tolist() == df['is_pivot'].tolist()
+    assert decoded['trend'].tolist()[:2] == ['bullish', 'neutral']
+    assert pd.isna(decoded['trend'].iloc[2])
+    assert decoded['recommendation'].fillna('').tolist() == ['Acheter', '', 'Neutre', 'Vendre', 'Neutre']
+    assert decoded['active_combinations'].tolist() == [['a', 'b'], [], None, ['c'], []]
+
+
+def test_partial_decode_and_single_column():
+    payload = encode_frame(_indicator_frame())
+
+    assert list(decode_frame(payload, columns=['rsi', 'Date']).columns) == ['Date', 'rsi']
+    assert decode_column(payload, 'recommendation').tolist()[0] == 'Acheter'
+    assert decode_column(payload, 'missing') is None
+
+
+def test_legacy_records_and_empty_payloads():
+    df = pd.DataFrame({'Date': ['2024-01-01', '2024-01-02'], 'close': [1.0, 2.0]})
+    records = df.to_dict('records')
+
+    pd.testing.assert_frame_equal(decode_frame(records), df)
+    pd.testing.assert_frame_equal(decode_frame(records, columns=['close', 'missing']), df[['close']])
+    assert decode_frame(None).empty
+    assert decode_frame([]).empty
+
+
+def test_store_values_are_encoded_recursively():
+    history = {'📊 RSI': _indicator_frame()[['Date', 'close']], '📊 MACD': pd.DataFrame()}
+    value = {'history': history, 'significance': {'📊 RSI': {5: {'p_value': 0.03}}}, 'tickers': ['AAA']}
+
+    encoded = json.loads(json.dumps(encode_store(value)))
+    assert is_encoded_frame(encoded['history']['📊 RSI'])
+
+    decoded = decode_store(encoded)
+    assert decoded['history']['📊 RSI']['close'].tolist()[:2] == [100.5, 101.25]
+    assert decoded['history']['📊 MACD'].empty
+    assert decoded['significance'] == {'📊 RSI': {'5': {'p_value': 0.03}}}
+    assert decoded['tickers'] == ['AAA']
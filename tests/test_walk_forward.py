@@ -0,0 +1,89 @@
+# tests/test_walk_forward.py
+"""Découpage walk-forward et sommes de fenêtres sur les matrices cumulées."""
+import numpy as np
+import pandas as pd
+
+from indicator_performance import (
+    walk_forward_folds, _window_sums, build_signal_matrices, walk_forward_evaluation,
+)
+
+HORIZONS = [1, 5]
+
+
+def test_expanding_folds():
+    assert walk_forward_folds(400, train_bars=250, test_bars=60) == [
+        (0, 250, 310), (0, 310, 370), (0, 370, 400),
+    ]
+
+
+def test_sliding_folds_keep_the_training_length():
+    folds = walk_forward_folds(400, train_bars=250, test_bars=60, scheme='sliding')
+
+    assert folds == [(0, 250, 310), (60, 310, 370), (120, 370, 400)]
+    assert all(test_start - train_start == 250 for train_start, test_start, _ in folds)
+
+
+def test_folds_tile_the_test_period():
+    folds = walk_forward_folds(1000, train_bars=250, test_bars=60)
+
+    assert folds[0][1] == 250 and folds[-1][2] == 1000
+    assert all(prev[2] == nxt[1] for prev, nxt in zip(folds, folds[1:]))
+    assert walk_forward_folds(200, train_bars=250) == []
+
+
+def test_window_sums_match_direct_sums():
+    rng = np.random.default_rng(44)
+    values = rng.normal(size=(100, 3, len(HORIZONS)))
+    cumulative = np.concatenate([np.zeros((1, 3, len(HORIZONS))), values.cumsum(axis=0)])
+
+    ends = np.array([40, 35])  # une fin par horizon
+    sums = _window_sums(cumulative, 10, ends)
+
+    assert sums.shape == (3, len(HORIZONS))
+    for j, end in enumerate(ends):
+        np.testing.assert_allclose(sums[:, j], values[10:end, :, j].sum(axis=0))
+
+
+def _performance_history(n_bars):
+    """Deux signaux : l'un toujours correct, l'autre correct une barre sur deux."""
+    dates = pd.bdate_range('2020-01-01', periods=n_bars)
+    history = {}
+    for name, correct in (('📊 RSI', np.ones(n_bars)), ('📊 MACD', np.arange(n_bars) % 2)):
+        frame = pd.DataFrame({'Date': dates})
+        for h in HORIZONS:
+            frame[f'correct_{h}d'] = correct.astype(float)
+            frame[f'return_{h}d'] = np.where(correct == 1, 1.0, -1.0)
+        history[name] = frame
+    return history
+
+
+def test_evaluation_purges_the_training_tail():
+    history = _performance_history(400)
+    result = walk_forward_evaluation(history, horizons=HORIZONS, train_bars=250, test_bars=60)
+
+    table = result['table'].set_index(['fold', 'name', 'horizon'])
+    # Pli 1 : entraînement [0, 250) privé des h dernières barres
+    for h in HORIZONS:
+        assert table.loc[(1, '📊 RSI', h), 'train_signals'] == 250 - h
+        assert table.loc[(1, '📊 RSI', h), 'test_signals'] == 60
+    assert table.loc[(3, '📊 RSI', 1), 'test_signals'] == 30
+
+    summary = result['summary'].set_index(['name', 'horizon'])
+    assert summary.loc[('📊 RSI', 5), 'test_accuracy'] == 100
+    assert summary.loc[('📊 MACD', 5), 'test_accuracy'] == 50
+    assert summary.loc[('📊 RSI', 5), 'test_signals'] == 150
+    assert summary.loc[('📊 RSI', 5), 'folds'] == 3
+
+
+def test_matrices_are_built_once_and_reused():
+    history = _performance_history(300)
+    matrices = build_signal_matrices(history, HORIZONS)
+
+    assert matrices['signals'].shape == (301, 2, len(HORIZONS))
+    for scheme in ('expanding', 'sliding'):
+        reused = walk_forward_evaluation(history, horizons=HORIZONS, train_bars=200, test_bars=50,
+                                         scheme=scheme, matrices=matrices)
+        fresh = walk_forward_evaluation(history, horizons=HORIZONS, train_bars=200, test_bars=50, scheme=scheme)
+        pd.testing.assert_frame_equal(reused['table'], fresh['table'])
+
+    assert build_signal_matrices({'📊 RSI': pd.DataFrame()}, HORIZONS) is None